@@ -1,10 +1,12 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from os import path
-from flask_login import LoginManager
+from flask_login import LoginManager, user_logged_in, user_logged_out
 from dotenv import load_dotenv
 import os
+import time
 import logging
+from uuid import UUID
 # flask_migrate removed - using Supabase for schema management
 from flask_cors import CORS
 from .config import Config
@@ -123,11 +125,18 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(id):
-        """Load user from Supabase (not PostgreSQL)"""
+        """Load user from Supabase (not PostgreSQL), via the principal cache"""
+        from flask import g
+        from .services.principal_cache import principal_cache
+        from .services.performance_service import performance_service
+        
+        started = time.perf_counter()
         try:
-            from .services.supabase_auth_service import SupabaseAuthService
-            auth_service = SupabaseAuthService()
-            user_data = auth_service.get_user_by_id(id)
+            def fetch_user():
+                from .services.supabase_auth_service import SupabaseAuthService
+                return SupabaseAuthService().get_user_by_id(id)
+            
+            user_data = principal_cache.load(id, fetch_user)
             
             if user_data:
                 # Create User object from Supabase data
@@ -140,11 +149,35 @@ def create_app():
                 user.company_website = user_data.get('company_website', '')
                 user.role = UserRole.ADMIN if user_data.get('role') == 'admin' else UserRole.USER
                 user.status = UserStatus.ACTIVE if user_data.get('status') == 'active' else UserStatus.INVITED
+                # Business UUID resolved on an earlier request (saves _ensure_business_uuid's lookup)
+                if user_data.get('resolved_business_uuid'):
+                    user.business_id = UUID(user_data['resolved_business_uuid'])
                 return user
             return None
         except Exception as e:
             logger.error(f"Error loading user {id}: {e}")
             return None
+        finally:
+            elapsed = time.perf_counter() - started
+            g.auth_ms = g.get('auth_ms', 0.0) + elapsed * 1000
+            performance_service.track_operation('auth.load_user', elapsed)
+
+    @user_logged_in.connect_via(app)
+    @user_logged_out.connect_via(app)
+    def drop_cached_principal(sender, user=None, **extra):
+        """Login/logout always starts from a fresh users row"""
+        from .services.principal_cache import principal_cache
+        if user is not None and getattr(user, 'id', None) is not None:
+            principal_cache.invalidate(user.id)
+
+    @app.after_request
+    def add_auth_timing(response):
+        """Report per-request auth overhead (user load + business UUID) as Server-Timing"""
+        from flask import g
+        auth_ms = g.get('auth_ms')
+        if auth_ms is not None:
+            response.headers.add('Server-Timing', f"auth;dur={auth_ms:.1f}")
+        return response
 
     from .views import views
     from .auth import auth
@@ -216,6 +249,10 @@ def create_app():
         # Database schema managed by Supabase
         pass
 
+    # Local ANN index: change listener + ANN_INDEX_WARM_BUSINESSES builds (no-op unless enabled)
+    from .services.ann_index import ann_index
+    ann_index.start()
+
     return app
 
 def create_database(app):
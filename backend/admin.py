@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, render_template, flash, redirect,
 from flask_login import login_required, current_user
 from .models import User, UserRole, UserStatus
 from .decorators import admin_required
+from .services.principal_cache import principal_cache
 from . import db
 import secrets
 from datetime import datetime, timedelta, timezone
@@ -135,6 +136,7 @@ def admin_make_admin():
     user.role = UserRole.ADMIN
     try:
         db.session.commit()
+        principal_cache.invalidate(user_id)
         return jsonify({'success': True, 'message': f'{user.email} is now an admin'}), 200
     except Exception as e:
         db.session.rollback()
@@ -163,6 +165,7 @@ def admin_delete_user():
     try:
         db.session.delete(user)
         db.session.commit()
+        principal_cache.invalidate(user_id)
         return jsonify({'success': True, 'message': f'User {user.email} deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -36,6 +36,9 @@ class LLMConfig(BaseSettings):
     # Supabase
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_service_key: str = os.getenv("SUPABASE_SERVICE_KEY", "")
+    # Graph nodes await aretrieve_documents / aretrieve_chunks on the pooled async client
+    # (SUPABASE_ASYNC_POOL_SIZE, SUPABASE_HTTP2) instead of blocking the event loop on sync calls
+    async_retrieval_enabled: bool = os.getenv("ASYNC_RETRIEVAL_ENABLED", "true").lower() == "true"
     
     # LangGraph
     streaming_enabled: bool = os.getenv("STREAMING_ENABLED", "true").lower() == "true"
@@ -43,6 +46,14 @@ class LLMConfig(BaseSettings):
     vector_top_k: int = int(os.getenv("VECTOR_TOP_K", "30"))
     similarity_threshold: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.35"))
     min_similarity_threshold: float = float(os.getenv("MIN_SIMILARITY_THRESHOLD", "0.15"))
+    # Follow-ups reuse (or delta-retrieve over) the previous turn's chunks when scope matches and the
+    # query is similar enough (RETRIEVAL_REUSE_SIMILARITY / RETRIEVAL_DELTA_SIMILARITY / RETRIEVAL_REUSE_TTL_SECONDS)
+    retrieval_reuse_enabled: bool = os.getenv("RETRIEVAL_REUSE_ENABLED", "true").lower() == "true"
+    # Planner plan cache: "shadow" (default) only measures agreement with the LLM plan, "on" serves cached
+    # plans (sampled shadow checks) once the recorded agreement justifies it, "off"
+    plan_cache_mode: str = os.getenv("PLAN_CACHE_MODE", "shadow")
+    # Start retrieve_docs on the raw query while the planner LLM runs; executor reuses it if the plan matches
+    speculative_retrieval_enabled: bool = os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "true").lower() == "true"
 
     # Chunk Expansion (adjacency-based context retrieval)
     # Expands retrieved chunks with adjacent neighbors to improve accuracy for multi-paragraph concepts
@@ -53,8 +64,20 @@ class LLMConfig(BaseSettings):
     # Cohere Reranker
     cohere_api_key: str = os.getenv("COHERE_API_KEY", "")
     cohere_rerank_model: str = os.getenv("COHERE_RERANKER_MODEL", "rerank-english-v3.0")
+    # Blends cross-encoder scores into chunk retrieval; falls back to the embedding server's /rerank
+    # cross-encoder when Cohere is unavailable (RERANK_LOCAL_FALLBACK_ENABLED)
     cohere_rerank_enabled: bool = os.getenv("COHERE_RERANK_ENABLED", "false").lower() == "true"
     
+    # Final answer generation in summarize_results:
+    #   sequential - segments call, then citation + answer calls only if segments fail
+    #   parallel   - segments and citation-extraction calls run concurrently (fallback is already in flight)
+    #   single     - one structured-output call returning segments (answer text + anchor-quote citations)
+    #   stream     - single call streamed; text segments are sent as they arrive, citations resolve in background
+    summary_llm_mode: str = os.getenv("SUMMARY_LLM_MODE", "stream")
+    # responder_node: stream the answer and its citations while the model generates (falls back
+    # to one structured-output call when there is no stream queue or the stream fails before any text)
+    responder_stream_enabled: bool = os.getenv("RESPONDER_STREAM_ENABLED", "true").lower() == "true"
+
     # Developer/testing helpers
     simple_mode: bool = os.getenv("LLM_SIMPLE_MODE", "false").lower() == "true"
 
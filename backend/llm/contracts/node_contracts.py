@@ -65,8 +65,8 @@ class ExecutorInput(TypedDict, total=False):
 
 class ExecutorOutput(TypedDict):
     """Output contract for executor_node"""
-    current_step_index: int  # REQUIRED: Updated to next step
-    execution_results: List[Dict[str, Any]]  # REQUIRED: Appended with new result
+    current_step_index: int  # REQUIRED: Advanced past the executed step(s)
+    execution_results: List[Dict[str, Any]]  # REQUIRED: Appended with one result per executed step
     # Result structure: {
     #   "step_id": str,
     #   "action": str,
@@ -199,7 +199,7 @@ class RouterContract:
     4. Graph edges use router function
     
     Flow Rules:
-    - executor → evaluator (always, after each step)
+    - executor → evaluator (always, after each step or batch of independent steps)
     - evaluator → router decision:
       * More steps? → executor
       * All steps done + results sufficient? → responder
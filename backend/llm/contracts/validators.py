@@ -89,33 +89,34 @@ def validate_executor_output(output: Dict[str, Any], input_state: Dict[str, Any]
         if field not in output:
             raise ValueError(f"Executor output missing required field: {field}")
     
-    # Check that step_index incremented by exactly 1
+    # Check that step_index advanced by the number of steps executed (1, or a batch of
+    # independent steps run concurrently) and that exactly one result was appended per step
     old_index = input_state.get("current_step_index", 0)
     new_index = output["current_step_index"]
-    if new_index != old_index + 1:
+    executed = new_index - old_index
+    if executed < 1:
         raise ValueError(
-            f"Executor must increment step_index by 1 "
+            f"Executor must advance step_index by at least 1 "
             f"(was {old_index}, got {new_index})"
         )
     
-    # Check that results list grew by exactly 1
     old_results = input_state.get("execution_results", [])
     new_results = output["execution_results"]
     old_len = len(old_results) if old_results else 0
     new_len = len(new_results) if new_results else 0
     
-    if new_len != old_len + 1:
+    if new_len != old_len + executed:
         raise ValueError(
-            f"Executor must append exactly one result "
-            f"(was {old_len}, got {new_len})"
+            f"Executor must append exactly one result per executed step "
+            f"(executed {executed}, results was {old_len}, got {new_len})"
         )
     
-    # Check that the new result has required fields
-    new_result = new_results[-1]
+    # Check that the new results have required fields
     required_result_fields = ["step_id", "action", "success"]
-    for field in required_result_fields:
-        if field not in new_result:
-            raise ValueError(f"Executor result missing required field: {field}")
+    for new_result in new_results[old_len:]:
+        for field in required_result_fields:
+            if field not in new_result:
+                raise ValueError(f"Executor result missing required field: {field}")
     
     logger.debug("[VALIDATOR] ✅ Executor output contract validated")
     return True
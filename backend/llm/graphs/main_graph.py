@@ -66,6 +66,10 @@ from backend.llm.nodes.executor_node import executor_node
 from backend.llm.nodes.evaluator_node import evaluator_node
 from backend.llm.contracts.node_contracts import RouterContract
 from backend.llm.nodes.responder_node import responder_node
+from backend.llm.nodes.retrieval_cache_node import retrieval_cache_node
+from backend.llm.utils.retrieval_cache import REUSE, DELTA
+from backend.llm.config import config
+from backend.services.tracing import traced_node
 # LangGraph prebuilt components
 from langgraph.prebuilt import ToolNode
 from backend.llm.nodes.tool_execution_node import ExecutionAwareToolNode
@@ -302,7 +306,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     # Routing is now handled by simple_route() which only handles fast paths.
     # Everything else goes directly to agent.
 
-    builder.add_node("fetch_direct_chunks", fetch_direct_document_chunks)
+    builder.add_node("fetch_direct_chunks", traced_node("fetch_direct_chunks", fetch_direct_document_chunks))
     """
     Fast Path Node: Direct Document Fetch
     - Fetches ALL chunks from specific document(s)
@@ -310,7 +314,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Used when user attaches files or mentions specific document
     """
 
-    builder.add_node("handle_attachment_fast", handle_attachment_fast)
+    builder.add_node("handle_attachment_fast", traced_node("handle_attachment_fast", handle_attachment_fast))
     """
     ULTRA-FAST Path Node: Attachment Fast Handler (~2s)
     - User attached file(s) and selected "fast response"
@@ -319,7 +323,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - ~5-10x faster than normal pipeline
     """
     
-    builder.add_node("handle_citation_query", handle_citation_query)
+    builder.add_node("handle_citation_query", traced_node("handle_citation_query", handle_citation_query))
     """
     ULTRA-FAST Path Node: Citation Query Handler (~2s)
     - User clicked on a citation and asked a question about it
@@ -329,11 +333,11 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     """
     
     # NEW: Context Manager Node (automatic summarization to prevent token overflow)
-    builder.add_node("context_manager", context_manager_node)
+    builder.add_node("context_manager", traced_node("context_manager", context_manager_node))
     logger.info("✅ Added context_manager node (auto-summarize at 8k tokens)")
     
     # NEW: Planner → Executor → Responder architecture
-    builder.add_node("planner", planner_node)
+    builder.add_node("planner", traced_node("planner", planner_node))
     """
     Planner Node
     - Generates structured JSON execution plan from user query
@@ -341,7 +345,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Emits plan as execution event (visible to user)
     """
     
-    builder.add_node("executor", executor_node)
+    builder.add_node("executor", traced_node("executor", executor_node))
     """
     Executor Node
     - Executes steps from execution plan sequentially
@@ -350,7 +354,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Output: execution_results (results from each step)
     """
     
-    builder.add_node("evaluator", evaluator_node)
+    builder.add_node("evaluator", traced_node("evaluator", evaluator_node))
     """
     Evaluator Node
     - Evaluates plan execution and result sufficiency
@@ -358,7 +362,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Emits evaluation events
     """
     
-    builder.add_node("responder", responder_node)
+    builder.add_node("responder", traced_node("responder", responder_node))
     """
     Responder Node
     - Generates final answer from execution results
@@ -367,7 +371,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     """
     
     # KEEP: Unified Agent Node (fallback for non-planner paths)
-    builder.add_node("agent", agent_node)
+    builder.add_node("agent", traced_node("agent", agent_node))
     """
     Unified Agent Node (Fallback)
     - Handles query analysis (inline)
@@ -405,7 +409,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Does NOT handle semantic retries (that's agent's job)
     """
     
-    builder.add_node("no_results_node", no_results_node)
+    builder.add_node("no_results_node", traced_node("no_results_node", no_results_node))
     """
     NEW: No Results Node (Shared Failure Handler)
     - Generates helpful failure messages when retries are exhausted
@@ -413,7 +417,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Output: final_summary with helpful failure message
     """
     
-    builder.add_node("handle_navigation_action", handle_navigation_action)
+    builder.add_node("handle_navigation_action", traced_node("handle_navigation_action", handle_navigation_action))
     """
     INSTANT Path Node: Navigation Action Handler (~0.1s)
     - User wants to navigate to a property on the map
@@ -429,7 +433,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     # REMOVED: determine_detail_level
     # Agent decides detail level based on query context.
 
-    builder.add_node("process_documents", process_documents)
+    builder.add_node("process_documents", traced_node("process_documents", process_documents))
     """
     Node 5: Process Documents (parallel subgraph invocations)
     - Input: relevant_documents, user_query, conversation_history
@@ -440,7 +444,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Supports simple_mode for faster stubbed responses
     """
 
-    builder.add_node("summarize_results", summarize_results)
+    builder.add_node("summarize_results", traced_node("summarize_results", summarize_results))
     """
     Node 6: Summarize
     - Input: document_outputs, user_query, conversation_history
@@ -450,7 +454,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     - Output: final_summary, updated conversation_history
     """
 
-    builder.add_node("format_response", format_response)
+    builder.add_node("format_response", traced_node("format_response", format_response))
     """
     Node 7: Format Response
     - Input: final_summary (raw LLM response)
@@ -521,7 +525,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     logger.debug("START -> [navigation_action|citation_query|attachment_fast|direct_chunks|context_manager]")
     
     # Conversation node (chat without document retrieval — greetings, small talk, personal)
-    builder.add_node("conversation", conversation_node)
+    builder.add_node("conversation", traced_node("conversation", conversation_node))
     logger.info("Added conversation node (chat-only path)")
 
     # Simple path: rule-based "is this a simple document query?" (no planner LLM)
@@ -555,35 +559,68 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
             "execution_results": [],
         }
 
-    builder.add_node("simple_plan", simple_plan_node)
+    builder.add_node("simple_plan", traced_node("simple_plan", simple_plan_node))
 
-    # Context manager → classify intent → conversation, document_cached (responder), document_simple (simple_plan), or document (planner)
-    # Cache-first: when use_cached_results and execution_results are set (follow-up), skip planner+executor and go to responder.
+    # Follow-up retrieval reuse: compare the query against the thread's cached retrieval
+    builder.add_node("retrieval_cache", traced_node("retrieval_cache", retrieval_cache_node))
+
+    def _route_to_planning(state: MainWorkflowState) -> str:
+        if _is_simple_document_query(state):
+            logger.info("[GRAPH] document_simple: routing to simple_plan (skip planner LLM)")
+            return "document_simple"
+        return "document"
+
+    # Context manager → classify intent → conversation, retrieval_cache (follow-up with cached retrieval),
+    # document_simple (simple_plan), or document (planner).
     # Simple path: when document query is "simple" (no chip, no format/refine), use fixed 2-step plan and skip planner LLM.
     async def after_context_manager(state):
         intent = await classify_intent(state)
         if intent == "conversation":
             return "conversation"
-        # Document intent: check cache-first, then simple path, else full planner
-        if state.get("use_cached_results") and state.get("execution_results"):
-            logger.info("[GRAPH] document_cached: routing to responder (cache-first)")
-            return "document_cached"
-        if _is_simple_document_query(state):
-            logger.info("[GRAPH] document_simple: routing to simple_plan (skip planner LLM)")
-            return "document_simple"
-        return "document"
+        # Document intent: check the retrieval cache first (format/refine turns always need the planner)
+        query_lower = (state.get("user_query") or "").lower()
+        if (
+            config.retrieval_reuse_enabled
+            and state.get("retrieval_cache")
+            and not any(p in query_lower for p in REFINE_PATTERNS)
+        ):
+            return "document_cache_check"
+        return _route_to_planning(state)
 
     builder.add_conditional_edges(
         "context_manager",
         after_context_manager,
         {
             "conversation": "conversation",
+            "document_cache_check": "retrieval_cache",
+            "document_simple": "simple_plan",
+            "document": "planner",
+        }
+    )
+    logger.debug("Conditional: context_manager -> [conversation|document_cache_check|document_simple|document]")
+
+    # Retrieval cache → responder (reuse), executor (delta retrieval over cached documents) or planning (miss)
+    def after_retrieval_cache(state: MainWorkflowState) -> str:
+        mode = (state.get("retrieval_reuse") or {}).get("mode")
+        if mode == REUSE:
+            logger.info("[GRAPH] document_cached: routing to responder (retrieval reuse)")
+            return "document_cached"
+        if mode == DELTA:
+            logger.info("[GRAPH] document_delta: routing to executor (delta retrieval over cached documents)")
+            return "document_delta"
+        return _route_to_planning(state)
+
+    builder.add_conditional_edges(
+        "retrieval_cache",
+        after_retrieval_cache,
+        {
             "document_cached": "responder",
+            "document_delta": "executor",
             "document_simple": "simple_plan",
             "document": "planner",
         }
     )
-    logger.debug("Conditional: context_manager -> [conversation|document_cached|document_simple|document]")
+    logger.debug("Conditional: retrieval_cache -> [document_cached|document_delta|document_simple|document]")
 
     # Conversation → END (single LLM call, no retrieval)
     builder.add_edge("conversation", END)
@@ -624,7 +661,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
         logger.warning("[EXTRACT_FINAL] No final answer found in messages")
         return {"final_summary": "I apologize, but I couldn't generate a response."}
     
-    builder.add_node("extract_final_answer", extract_final_answer)
+    builder.add_node("extract_final_answer", traced_node("extract_final_answer", extract_final_answer))
 
     # Helper functions for Phase 2: Chunk presence detection
     def check_chunks_retrieved(messages: list) -> bool:
@@ -781,7 +818,7 @@ async def build_main_graph(use_checkpointer: bool = True, checkpointer_instance=
     logger.debug("Conditional: agent -> [tools|force_chunks|extract_final_answer]")
 
     # Add force_chunks node
-    builder.add_node("force_chunks", force_chunk_retrieval_node)
+    builder.add_node("force_chunks", traced_node("force_chunks", force_chunk_retrieval_node))
     logger.debug("Node: force_chunks (forces chunk retrieval)")
     
     # Force_chunks always routes back to agent (so agent can call retrieve_chunks)
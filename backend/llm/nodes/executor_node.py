@@ -12,8 +12,11 @@ SIMPLE TWO-STEP RETRIEVAL ARCHITECTURE:
 - This proven approach is simpler and more reliable than complex multi-tool exploration
 """
 
+import asyncio
 import logging
 import json
+import os
+import time
 from typing import Dict, Any, List, Optional
 # Removed unused imports for document explorer tools:
 # from langchain_openai import ChatOpenAI
@@ -22,16 +25,24 @@ from typing import Dict, Any, List, Optional
 
 from backend.llm.types import MainWorkflowState, ExecutionPlan, ExecutionStep
 from backend.llm.utils.execution_events import ExecutionEvent, ExecutionEventEmitter
-from backend.llm.tools.document_retriever_tool import retrieve_documents
-from backend.llm.tools.chunk_retriever_tool import retrieve_chunks
+from backend.llm.tools.document_retriever_tool import retrieve_documents, aretrieve_documents
+from backend.llm.tools.chunk_retriever_tool import retrieve_chunks, aretrieve_chunks
 from backend.llm.contracts.validators import validate_executor_output
+from backend.llm.utils.query_embedding import peek_query_embedding
+from backend.llm.utils.retrieval_cache import build_retrieval_cache, retrieval_reuse_stats
+from backend.llm.runtime.tool_pool import run_sync_tool
+from backend.llm.utils.speculative_retrieval import speculative_retrievals
 from backend.llm.config import config
+from backend.services.tracing import span
 # Document explorer tools removed - using simple retrieve_chunks() instead
 # from backend.llm.tools.document_explorer import create_document_explorer_tools
 from backend.services.supabase_client_factory import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# Max consecutive independent steps run concurrently in one executor pass
+MAX_PARALLEL_STEPS = int(os.environ.get('EXECUTOR_MAX_PARALLEL_STEPS', '4'))
+
 # Prefixes to strip from user-style requests so the remainder reads well
 _REASONING_QUERY_STRIP_PREFIXES = (
     "give me ", "get me ", "can you ", "could you ", "would you ", "will you ",
@@ -216,16 +227,196 @@ def is_complex_query(query: str, document_ids: List[str]) -> bool:
 # If you need to restore it, check git history or restore from backup.
 
 
+def _step_dependencies(step: ExecutionStep) -> List[str]:
+    """Step ids this step references via '<from_step_X>' placeholders."""
+    return [
+        ref[11:-1]
+        for ref in (step.get("document_ids") or [])
+        if isinstance(ref, str) and ref.startswith("<from_step_") and ref.endswith(">")
+    ]
+
+
+def _independent_batch(steps: List[ExecutionStep], start: int, execution_results: List[Dict[str, Any]]) -> List[int]:
+    """
+    Indices of consecutive steps from `start` that can run concurrently: every reference they
+    make is already satisfied by execution_results (none depends on a step in the same batch).
+    """
+    completed = {r.get("step_id") for r in execution_results}
+    batch = [start]
+    for index in range(start + 1, min(len(steps), start + MAX_PARALLEL_STEPS)):
+        if not all(dep in completed for dep in _step_dependencies(steps[index])):
+            break
+        batch.append(index)
+    return batch
+
+
+def _emit_step_started(emitter: Optional[ExecutionEventEmitter], resolved_step: ExecutionStep) -> None:
+    """Emit user-facing reasoning before a step runs (not internal tool metadata)."""
+    if not emitter:
+        return
+    action = resolved_step["action"]
+    reasoning_label = resolved_step.get("reasoning_label", "")
+    reasoning_detail = resolved_step.get("reasoning_detail")
+
+    if action == "retrieve_docs":
+        # Emit a short, natural sentence; choose intro (Finding / Searching for / Locating) by what flows best
+        step_query = (resolved_step.get("query") or "").strip()
+        if step_query and "execution plan" not in step_query.lower() and "user's query" not in step_query.lower():
+            intent = _rephrase_query_for_reasoning_step(step_query)
+            reasoning_label = _choose_search_intro(intent)
+        elif reasoning_label:
+            # Use plan's reasoning_label if step query is empty or meta
+            pass
+        else:
+            reasoning_label = "Searching for documents"
+        emitter.emit_reasoning(
+            label=reasoning_label,
+            detail=reasoning_detail
+        )
+
+    elif action == "retrieve_chunks":
+        document_ids = resolved_step.get("document_ids") or []
+        doc_count = len(document_ids) if document_ids else 0
+
+        # Use the reasoning_label from the plan
+        if not reasoning_label:
+            reasoning_label = f"Reviewed {doc_count} document{'' if doc_count == 1 else 's'}"
+
+        emitter.emit_reasoning(
+            label=reasoning_label,
+            detail=reasoning_detail
+        )
+
+
+def _emit_step_result(emitter: Optional[ExecutionEventEmitter], resolved_step: ExecutionStep, result: Any) -> None:
+    """Emit user-facing reasoning for a step's results."""
+    if not emitter:
+        return
+    action = resolved_step["action"]
+    result_count = 0
+    if isinstance(result, list):
+        result_count = len(result)
+    elif isinstance(result, dict) and "status" in result:
+        result_count = 1  # Analyze action
+
+    if action == "retrieve_docs":
+        if result_count > 0:
+            emitter.emit_reasoning(
+                label=f"Found {result_count} relevant document{'' if result_count == 1 else 's'}",
+                detail=None
+            )
+        else:
+            emitter.emit_reasoning(
+                label="No relevant documents found",
+                detail="Trying alternative search terms"
+            )
+    elif action == "retrieve_chunks":
+        doc_ids = resolved_step.get("document_ids") or []
+        doc_count = len(doc_ids) if doc_ids else 0
+
+        if result_count > 0:
+            emitter.emit_reasoning(
+                label=f"Found {result_count} relevant section{'' if result_count == 1 else 's'}",
+                detail=f"From {doc_count} document{'' if doc_count == 1 else 's'}"
+            )
+        else:
+            emitter.emit_reasoning(
+                label="No relevant information found",
+                detail="The document doesn't contain the requested information"
+            )
+
+
+async def _run_step(resolved_step: ExecutionStep, business_id: Optional[str], speculation_id: Optional[str] = None) -> Any:
+    """
+    Execute one resolved step. Retrieval uses the async tools, or the sync tools on the
+    bounded tool pool, so the graph loop is never blocked.
+    """
+    action = resolved_step["action"]
+
+    if action == "retrieve_docs":
+        # Planner may already have started this exact search while the LLM was planning
+        speculative = speculative_retrievals.claim(speculation_id, resolved_step.get("query", ""), business_id)
+        if speculative is not None:
+            try:
+                return await speculative
+            except Exception as e:
+                logger.warning(f"[EXECUTOR] Speculative retrieve_docs failed ({e}), retrying")
+        # Simple call - let retriever decide parameters
+        if config.async_retrieval_enabled:
+            return await aretrieve_documents(
+                query=resolved_step.get("query", ""),
+                business_id=business_id
+            )
+        return await run_sync_tool(
+            retrieve_documents,
+            query=resolved_step.get("query", ""),
+            business_id=business_id
+        )
+
+    if action == "retrieve_chunks":
+        document_ids = resolved_step.get("document_ids")
+        if document_ids is None or (isinstance(document_ids, list) and len(document_ids) == 0):
+            logger.warning(f"[EXECUTOR] Step {resolved_step['id']} has no document_ids, skipping")
+            return []
+        query = resolved_step.get("query", "")
+        logger.info(f"[EXECUTOR] Calling retrieve_chunks: '{query[:50]}...' ({len(document_ids)} documents)")
+
+        # Simple call - let retriever decide all parameters (query profile, top_k, min_score)
+        if config.async_retrieval_enabled:
+            result = await aretrieve_chunks(
+                query=query,
+                document_ids=document_ids,
+                business_id=business_id
+            )
+        else:
+            result = await run_sync_tool(
+                retrieve_chunks,
+                query=query,
+                document_ids=document_ids,
+                business_id=business_id
+            )
+
+        # Fail loudly if no results - no retry, no interpretation
+        if not result or len(result) == 0:
+            logger.warning(f"[EXECUTOR] ⚠️ No chunks found for query: '{query[:50]}...'")
+        return result
+
+    if action == "query_db":
+        # TODO: Implement database query execution
+        logger.warning(f"[EXECUTOR] query_db action not yet implemented")
+        return []
+
+    if action == "analyze":
+        # Analyze action is handled by responder node
+        logger.info(f"[EXECUTOR] Analyze action will be handled by responder")
+        return {"status": "pending", "focus": resolved_step.get("focus")}
+
+    logger.warning(f"[EXECUTOR] Unknown action: {action}")
+    return []
+
+
+async def _timed_step(resolved_step: ExecutionStep, business_id: Optional[str], speculation_id: Optional[str] = None) -> Any:
+    step_started = time.perf_counter()
+    with span(f"tool.{resolved_step['action']}", 'tool', step_id=resolved_step['id']) as step_span:
+        result = await _run_step(resolved_step, business_id, speculation_id)
+        if step_span is not None and isinstance(result, list):
+            step_span.set(rows=len(result))
+    if resolved_step["action"] in ("retrieve_docs", "retrieve_chunks"):
+        retrieval_reuse_stats.record_step(resolved_step["action"], (time.perf_counter() - step_started) * 1000)
+    return result
+
+
 async def executor_node(state: MainWorkflowState, runnable_config=None) -> MainWorkflowState:
     """
     Executor node - executes next step(s) from execution plan.
     
     This node:
     1. Gets current execution plan and step index
-    2. Executes next step (or batch if parallelizable)
+    2. Executes the next step, or the next run of independent steps concurrently
+       (steps whose '<from_step_X>' references are already satisfied)
     3. Emits execution events for each step
-    4. Stores results in execution_results
-    5. Updates current_step_index
+    4. Stores results in execution_results (in plan order)
+    5. Advances current_step_index past the executed steps
     
     Args:
         state: MainWorkflowState with execution_plan, current_step_index, execution_results
@@ -261,165 +452,70 @@ async def executor_node(state: MainWorkflowState, runnable_config=None) -> MainW
         logger.info("[EXECUTOR] All steps completed")
         return {}
     
-    # Get current step
-    current_step = steps[current_step_index]
-    logger.info(f"[EXECUTOR] Executing step {current_step_index + 1}/{len(steps)}: {current_step['id']} ({current_step['action']})")
-    
-    # Resolve step references (e.g., "<from_step_search_docs>")
-    resolved_step = resolve_step_references(current_step, execution_results)
-    
-    # Emit user-facing reasoning events (not internal tool metadata)
-    if emitter:
-        action = resolved_step["action"]
-        reasoning_label = resolved_step.get("reasoning_label", "")
-        reasoning_detail = resolved_step.get("reasoning_detail")
-        
-        if action == "retrieve_docs":
-            # Emit a short, natural sentence; choose intro (Finding / Searching for / Locating) by what flows best
-            step_query = (resolved_step.get("query") or "").strip()
-            if step_query and "execution plan" not in step_query.lower() and "user's query" not in step_query.lower():
-                intent = _rephrase_query_for_reasoning_step(step_query)
-                reasoning_label = _choose_search_intro(intent)
-            elif reasoning_label:
-                # Use plan's reasoning_label if step query is empty or meta
-                pass
-            else:
-                reasoning_label = "Searching for documents"
-            emitter.emit_reasoning(
-                label=reasoning_label,
-                detail=reasoning_detail
-            )
-            
-        elif action == "retrieve_chunks":
-            document_ids = resolved_step.get("document_ids") or []
-            doc_count = len(document_ids) if document_ids else 0
-            
-            # Use the reasoning_label from the plan
-            if not reasoning_label:
-                reasoning_label = f"Reviewed {doc_count} document{'' if doc_count == 1 else 's'}"
+    batch = _independent_batch(steps, current_step_index, execution_results)
+    # Resolve step references (e.g., "<from_step_search_docs>") against results from earlier batches
+    resolved_steps = [resolve_step_references(steps[index], execution_results) for index in batch]
+    for index, resolved_step in zip(batch, resolved_steps):
+        logger.info(f"[EXECUTOR] Executing step {index + 1}/{len(steps)}: {resolved_step['id']} ({resolved_step['action']})")
+        _emit_step_started(emitter, resolved_step)
+    if len(batch) > 1:
+        logger.info(f"[EXECUTOR] Running {len(batch)} independent steps concurrently")
+
+    outcomes = await asyncio.gather(
+        *(_timed_step(resolved_step, business_id, state.get("speculation_id")) for resolved_step in resolved_steps),
+        return_exceptions=True
+    )
+
+    retrieval_cache = None
+    for resolved_step, outcome in zip(resolved_steps, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"[EXECUTOR] ❌ Error executing step {resolved_step['id']}: {outcome}", exc_info=outcome)
             
-            emitter.emit_reasoning(
-                label=reasoning_label,
-                detail=reasoning_detail
-            )
-        
-    # Execute step based on action type
-    result = None
-    try:
-        action = resolved_step["action"]
-        
-        if action == "retrieve_docs":
-            # Simple call - let retriever decide parameters
-            result = retrieve_documents(
-                query=resolved_step.get("query", ""),
-                business_id=business_id
-            )
+            # Store error result
+            execution_results.append({
+                "step_id": resolved_step["id"],
+                "action": resolved_step["action"],
+                "result": None,
+                "success": False,
+                "error": str(outcome)
+            })
             
-        elif action == "retrieve_chunks":
-            document_ids = resolved_step.get("document_ids")
-            if document_ids is None or (isinstance(document_ids, list) and len(document_ids) == 0):
-                logger.warning(f"[EXECUTOR] Step {resolved_step['id']} has no document_ids, skipping")
-                result = []
-            else:
-                query = resolved_step.get("query", "")
-                logger.info(f"[EXECUTOR] Calling retrieve_chunks: '{query[:50]}...' ({len(document_ids)} documents)")
-                
-                # Simple call - let retriever decide all parameters (query profile, top_k, min_score)
-                result = retrieve_chunks(
-                    query=query,
-                    document_ids=document_ids,
-                    business_id=business_id
+            # Emit error reasoning event (user-facing)
+            if emitter:
+                emitter.emit_reasoning(
+                    label="Error occurred while searching",
+                    detail="Please try rephrasing your question"
                 )
-                
-                # Fail loudly if no results - no retry, no interpretation
-                if not result or len(result) == 0:
-                    logger.warning(f"[EXECUTOR] ⚠️ No chunks found for query: '{query[:50]}...'")
-                
-        elif action == "query_db":
-            # TODO: Implement database query execution
-            logger.warning(f"[EXECUTOR] query_db action not yet implemented")
-            result = []
-            
-        elif action == "analyze":
-            # Analyze action is handled by responder node
-            logger.info(f"[EXECUTOR] Analyze action will be handled by responder")
-            result = {"status": "pending", "focus": resolved_step.get("focus")}
-            
-        else:
-            logger.warning(f"[EXECUTOR] Unknown action: {action}")
-            result = []
-        
+            continue
+
         # Store result
-        execution_results.append({
-            "step_id": resolved_step["id"],
-            "action": action,
-            "result": result,
-            "success": True
-        })
-        
-        # Emit user-facing reasoning for results
-        if emitter:
-            action = resolved_step["action"]
-            result_count = 0
-            if isinstance(result, list):
-                result_count = len(result)
-            elif isinstance(result, dict) and "status" in result:
-                result_count = 1  # Analyze action
-            
-            if action == "retrieve_docs":
-                if result_count > 0:
-                    emitter.emit_reasoning(
-                        label=f"Found {result_count} relevant document{'' if result_count == 1 else 's'}",
-                        detail=None
-                    )
-                else:
-                    emitter.emit_reasoning(
-                        label="No relevant documents found",
-                        detail="Trying alternative search terms"
-                    )
-            elif action == "retrieve_chunks":
-                doc_ids = resolved_step.get("document_ids") or []
-                doc_count = len(doc_ids) if doc_ids else 0
-                
-                if result_count > 0:
-                    emitter.emit_reasoning(
-                        label=f"Found {result_count} relevant section{'' if result_count == 1 else 's'}",
-                        detail=f"From {doc_count} document{'' if doc_count == 1 else 's'}"
-                    )
-                else:
-                    emitter.emit_reasoning(
-                        label="No relevant information found",
-                        detail="The document doesn't contain the requested information"
-                    )
-        logger.info(f"[EXECUTOR] ✅ Step {resolved_step['id']} completed successfully")
-        
-    except Exception as e:
-        logger.error(f"[EXECUTOR] ❌ Error executing step {resolved_step['id']}: {e}", exc_info=True)
-        
-        # Store error result
         execution_results.append({
             "step_id": resolved_step["id"],
             "action": resolved_step["action"],
-            "result": None,
-            "success": False,
-            "error": str(e)
+            "result": outcome,
+            "success": True
         })
-        
-        # Emit error reasoning event (user-facing)
-        if emitter:
-            emitter.emit_reasoning(
-                label="Error occurred while searching",
-                detail="Please try rephrasing your question"
+        if resolved_step["action"] == "retrieve_chunks" and outcome:
+            # Cache this retrieval for follow-ups (reuse / delta retrieval, see retrieval_cache node)
+            retrieval_cache = build_retrieval_cache(
+                state,
+                execution_results,
+                resolved_step.get("document_ids") or [],
+                query_embedding=peek_query_embedding(user_query or ""),
             )
+        _emit_step_result(emitter, resolved_step, outcome)
+        logger.info(f"[EXECUTOR] ✅ Step {resolved_step['id']} completed successfully")
     
-    # Move to next step
-    next_step_index = current_step_index + 1
+    # Move past the executed steps
+    next_step_index = current_step_index + len(batch)
     
     # Prepare output with a copy of execution_results to avoid state mutation issues
     executor_output = {
         "current_step_index": next_step_index,
         "execution_results": list(execution_results)  # Ensure we return a new list
     }
+    if retrieval_cache:
+        executor_output["retrieval_cache"] = retrieval_cache
     
     # Validate output against contract
     # IMPORTANT: Pass the original state (before modifications) for validation
@@ -432,4 +528,3 @@ async def executor_node(state: MainWorkflowState, runnable_config=None) -> MainW
         raise
     
     return executor_output
-
@@ -7,8 +7,10 @@ The planner outputs a JSON plan (not text reasoning) that is safe to show to use
 Key Principle: Show operational steps (what will be done), not cognitive reasoning (how the LLM thinks).
 """
 
+import asyncio
 import logging
-from typing import Any, Optional, List
+import random
+from typing import Any, Optional, List, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from pydantic import BaseModel, Field
@@ -17,6 +19,9 @@ from langchain_core.output_parsers import PydanticOutputParser
 from backend.llm.config import config
 from backend.llm.types import MainWorkflowState, ExecutionPlan
 from backend.llm.contracts.validators import validate_planner_output
+from backend.llm.utils.plan_cache import plan_cache, SHADOW_SAMPLE_RATE
+from backend.llm.utils.query_embedding import aembed_query
+from backend.llm.utils.speculative_retrieval import speculative_retrievals
 from backend.llm.prompts.planner import (
     get_planner_system_prompt,
     get_planner_initial_prompt,
@@ -282,18 +287,50 @@ async def planner_node(state: MainWorkflowState, runnable_config=None) -> MainWo
         )
         messages_to_use = [system_prompt] + messages + [HumanMessage(content=prompt)]
 
-    # Use planner-specific model (default gpt-4o-mini) to keep main-path latency lower.
-    llm = ChatOpenAI(
-        api_key=config.openai_api_key,
-        model=config.openai_planner_model,
-        temperature=0,
+    business_id = state.get("business_id")
+    # Only plans that pass the user's query through unchanged are cacheable; follow-ups that need
+    # the conversation to infer the query, refine/format requests and re-plans always go to the LLM.
+    passes_query_through = (
+        not is_refinement
+        and not is_refine_format
+        and not is_incomplete_followup
+        and not (messages and _is_short_query(user_query))
     )
+    plan_cache_mode = (config.plan_cache_mode or "off").lower()
+    cacheable = plan_cache_mode in ("on", "shadow") and passes_query_through
+    cached = None
+    query_embedding = None
+    cache_task = None
+    if cacheable:
+        # Embedding + lookup run alongside the planner LLM; only 'on' mode can serve a hit, so
+        # only it waits for the lookup before calling the LLM
+        cache_task = asyncio.create_task(_lookup_cached_plan(business_id, user_query))
+        if plan_cache_mode == "on":
+            cached, query_embedding = await cache_task
+
+    if cached and plan_cache_mode == "on":
+        execution_plan = cached["plan"]
+        logger.info(
+            "[PLANNER] ✅ Plan cache %s hit (similarity %.3f, cached query '%s...'), skipping planner LLM",
+            cached["match"], cached["similarity"], cached["cached_query"][:QUERY_LOG_TRUNCATE],
+        )
+        if random.random() < SHADOW_SAMPLE_RATE:
+            _spawn_shadow_check(messages_to_use, parser, execution_plan, user_query)
+        planner_output = _build_planner_output(execution_plan, messages, emitter, user_query, plan_refinement_count)
+        planner_output["speculation_id"] = None
+        return planner_output
+
+    # Speculation: start retrieve_docs on the raw query while the LLM plans; the executor
+    # claims it if the plan's retrieve_docs step matches
+    speculation_id = None
+    if config.speculative_retrieval_enabled and passes_query_through and user_query.strip():
+        speculation_id = speculative_retrievals.start(user_query, business_id)
 
     try:
-        response = await llm.ainvoke(messages_to_use)
-        plan_dict = parser.parse(response.content)
-        execution_plan = _plan_dict_to_execution_plan(plan_dict)
-        execution_plan = _normalize_two_step_plan(execution_plan)
+        execution_plan = await _generate_plan(messages_to_use, parser)
+        if cache_task is not None:
+            # Shadow mode: the lookup ran during the LLM call (in 'on' mode it already finished)
+            cached, query_embedding = await cache_task
 
         logger.info("[PLANNER] ✅ Generated plan with %s steps", len(execution_plan["steps"]))
         logger.info("[PLANNER] Objective: %s", execution_plan["objective"])
@@ -301,31 +338,17 @@ async def planner_node(state: MainWorkflowState, runnable_config=None) -> MainWo
             logger.info("  [%s] %s: %s - %s...", i, step["id"], step["action"], (step.get("query") or "N/A")[:50])
         _log_rewrite_if_applied(execution_plan, user_query)
 
-        if emitter:
-            # Rephrase user query as "Finding the [X] of [Y]" (e.g. "Finding the EPC rating of highlands")
-            planning_label = _rephrase_query_to_finding(user_query)
-            emitter.emit_reasoning(label=planning_label, detail=None)
-
-        prior_turn_content = None
-        if execution_plan.get("use_prior_context") and messages:
-            prior_turn_content = _get_last_ai_content(messages)
-
-        plan_message = AIMessage(
-            content=f"Generated execution plan: {execution_plan['objective']} ({len(execution_plan['steps'])} steps)"
-        )
-        planner_output = {
-            "execution_plan": execution_plan,
-            "current_step_index": 0,
-            "execution_results": [],
-            "messages": [plan_message],
-            "plan_refinement_count": plan_refinement_count,
-            "prior_turn_content": prior_turn_content,
-            "format_instruction": execution_plan.get("format_instruction"),
-        }
-        validate_planner_output(planner_output)
+        planner_output = _build_planner_output(execution_plan, messages, emitter, user_query, plan_refinement_count)
+        planner_output["speculation_id"] = _keep_speculation(speculation_id, execution_plan)
+        if cacheable:
+            if cached:
+                plan_cache.record_shadow(cached["plan"], execution_plan, user_query)
+            plan_cache.store(business_id, user_query, execution_plan, query_embedding)
         return planner_output
 
     except Exception as e:
+        if cache_task is not None:
+            cache_task.cancel()
         logger.error("[PLANNER] ❌ Error generating plan: %s", e, exc_info=True)
         fallback_plan = _make_fallback_plan(user_query)
         logger.warning("[PLANNER] Using fallback plan")
@@ -342,5 +365,90 @@ async def planner_node(state: MainWorkflowState, runnable_config=None) -> MainWo
         except ValueError as val_err:
             logger.error("[PLANNER] ❌ Fallback plan contract violation: %s", val_err)
             raise
+        fallback_output["speculation_id"] = _keep_speculation(speculation_id, fallback_plan)
         return fallback_output
 
+
+async def _lookup_cached_plan(business_id: Optional[str], user_query: str) -> Tuple[Optional[dict], Optional[List[float]]]:
+    """Embed the query and look it up in the plan cache; (None, None) if the embedding fails."""
+    try:
+        # Shares the embedding LRU with the retrieval tools, which embed the same query next
+        query_embedding = await aembed_query(user_query, purpose="plan cache")
+    except Exception as e:
+        logger.warning("[PLANNER] Plan cache embedding failed, planning without cache: %s", e)
+        return None, None
+    return plan_cache.lookup(business_id, user_query, query_embedding), query_embedding
+
+
+def _keep_speculation(speculation_id: Optional[str], execution_plan: dict) -> Optional[str]:
+    """Return the speculation id if the plan can use it; otherwise cancel it."""
+    if not speculation_id:
+        return None
+    if speculative_retrievals.matches_plan(speculation_id, execution_plan):
+        return speculation_id
+    speculative_retrievals.discard(speculation_id, "plan has no matching retrieve_docs step")
+    return None
+
+
+async def _generate_plan(messages_to_use: List[Any], parser: PydanticOutputParser) -> dict:
+    """Call the planner LLM and return the parsed, normalized execution plan."""
+    # Use planner-specific model (default gpt-4o-mini) to keep main-path latency lower.
+    llm = ChatOpenAI(
+        api_key=config.openai_api_key,
+        model=config.openai_planner_model,
+        temperature=0,
+    )
+    response = await llm.ainvoke(messages_to_use)
+    plan_dict = parser.parse(response.content)
+    execution_plan = _plan_dict_to_execution_plan(plan_dict)
+    return _normalize_two_step_plan(execution_plan)
+
+
+def _build_planner_output(
+    execution_plan: dict,
+    messages: List[Any],
+    emitter: Any,
+    user_query: str,
+    plan_refinement_count: int,
+) -> dict:
+    """Emit the planning step and build the validated planner state update."""
+    if emitter:
+        # Rephrase user query as "Finding the [X] of [Y]" (e.g. "Finding the EPC rating of highlands")
+        planning_label = _rephrase_query_to_finding(user_query)
+        emitter.emit_reasoning(label=planning_label, detail=None)
+
+    prior_turn_content = None
+    if execution_plan.get("use_prior_context") and messages:
+        prior_turn_content = _get_last_ai_content(messages)
+
+    plan_message = AIMessage(
+        content=f"Generated execution plan: {execution_plan['objective']} ({len(execution_plan['steps'])} steps)"
+    )
+    planner_output = {
+        "execution_plan": execution_plan,
+        "current_step_index": 0,
+        "execution_results": [],
+        "messages": [plan_message],
+        "plan_refinement_count": plan_refinement_count,
+        "prior_turn_content": prior_turn_content,
+        "format_instruction": execution_plan.get("format_instruction"),
+    }
+    validate_planner_output(planner_output)
+    return planner_output
+
+
+_shadow_tasks: set = set()
+
+
+def _spawn_shadow_check(messages_to_use: List[Any], parser: PydanticOutputParser, cached_plan: dict, user_query: str) -> None:
+    """Re-plan a served cache hit with the LLM in the background and record agreement."""
+    async def _check():
+        try:
+            llm_plan = await _generate_plan(messages_to_use, parser)
+            plan_cache.record_shadow(cached_plan, llm_plan, user_query)
+        except Exception as e:
+            logger.debug("[PLANNER] Shadow plan check failed: %s", e)
+
+    task = asyncio.get_running_loop().create_task(_check())
+    _shadow_tasks.add(task)
+    task.add_done_callback(_shadow_tasks.discard)
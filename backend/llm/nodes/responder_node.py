@@ -8,8 +8,10 @@ structured results instead of tool messages.
 Key Principle: Generate answer from operational results, not internal reasoning.
 """
 
+import asyncio
 import logging
 import re
+import time
 import uuid
 import json
 from typing import Dict, Any, List, Tuple, Optional, Literal
@@ -24,6 +26,7 @@ from backend.llm.utils.execution_events import ExecutionEvent, ExecutionEventEmi
 from backend.llm.nodes.agent_node import generate_conversational_answer, extract_chunk_citations_from_messages, get_document_filename
 from backend.llm.contracts.validators import validate_responder_output
 from backend.llm.config import config
+from backend.llm.runtime.tool_pool import run_sync_tool
 from backend.llm.prompts import _get_main_answer_tagging_rule, ensure_main_tags_when_missing
 from backend.llm.prompts.responder import (
     get_responder_fact_mapping_system_prompt,
@@ -44,6 +47,7 @@ from backend.llm.utils.personality_prompts import (
 from backend.llm.tools.citation_mapping import create_chunk_citation_tool, _narrow_bbox_to_cited_line
 from backend.llm.prompts.conversation import format_memories_section
 from backend.services.supabase_client_factory import get_supabase_client
+from backend.services.performance_service import performance_service
 
 # Import from new citation architecture modules
 from backend.llm.citation import (
@@ -324,6 +328,16 @@ def format_chunks_with_short_ids(chunks_metadata: List[Dict[str, Any]]) -> Tuple
 _BLOCK_ID_IN_RESPONSE = re.compile(r'\s*\(\s*(BLOCK_CITE_ID_\d+)\s*\)')
 # Fallback: block id without parentheses (e.g. [ID: 1] BLOCK_CITE_ID_42)
 _BLOCK_ID_NO_PARENS = re.compile(r'\s+(BLOCK_CITE_ID_\d+)\b')
+# In-text citation marker: [ID: X], optionally followed by one of the block ids above
+_CITATION_MARKER = re.compile(r'\[ID:\s*([^\]]+)\]')
+# Characters after a marker searched for its block id, and the most a citation reads
+# (block id + sentence context) - the streaming mapper waits for this much text
+_BLOCK_ID_SEARCH_SPAN = 60
+_CITATION_LOOKAHEAD = _BLOCK_ID_SEARCH_SPAN + 60
+# Leading "of [property name]" line leaked from the intent phrase (the views strip it from answers)
+_INTENT_FRAGMENT = re.compile(r"^of\s+[A-Za-z]+(?:\s+[A-Za-z]+)?\s*(\n|$)", re.IGNORECASE)
+# Answer openings that can still turn into that line once more text arrives
+_INTENT_FRAGMENT_PREFIX = re.compile(r"^o(?:f\s*|f\s+[A-Za-z]+(?:[ \t]+[A-Za-z]*)?[ \t]*)?$", re.IGNORECASE)
 
 # Max blocks per doc in the prompt metadata table (avoids token overflow; resolution still uses full table)
 MAX_BLOCKS_PER_DOC_IN_PROMPT = 500
@@ -361,278 +375,405 @@ def extract_citations_with_positions(
     use short_id_lookup and select best block within the chunk.
     """
     citations = []
-    pattern = r'\[ID:\s*([^\]]+)\]'
-    matches = list(re.finditer(pattern, llm_response))
+    matches = list(_CITATION_MARKER.finditer(llm_response))
 
     logger.info(f"[CITATION_DEBUG] Extracting citations from LLM response ({len(matches)} matches found)")
 
     for idx, match in enumerate(matches, start=1):
-        short_id = match.group(1).strip()
-        start_position = match.start()
-        end_position = match.end()
-
-        # Jan28th-style: look for (BLOCK_CITE_ID_N) or BLOCK_CITE_ID_N immediately after [ID: X]
-        block_id_from_response = None
-        search_span = llm_response[end_position:end_position + 60]
-        block_id_match = _BLOCK_ID_IN_RESPONSE.match(search_span)
+        citation = _citation_for_match(llm_response, match, idx, short_id_lookup, metadata_lookup_tables)
+        if citation is not None:
+            citations.append(citation)
+    
+    logger.info(f"[CITATION_DEBUG] Extracted {len(citations)} citations total")
+    return citations
+
+
+def _citation_for_match(
+    llm_response: str,
+    match: "re.Match",
+    idx: int,
+    short_id_lookup: Dict[str, Dict[str, Any]],
+    metadata_lookup_tables: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Resolve one [ID: X] marker (idx = order of appearance) to a citation, or None when the
+    short ID is unknown. Reads up to _CITATION_LOOKAHEAD characters after the marker.
+    """
+    short_id = match.group(1).strip()
+    start_position = match.start()
+    end_position = match.end()
+
+    # Jan28th-style: look for (BLOCK_CITE_ID_N) or BLOCK_CITE_ID_N immediately after [ID: X]
+    block_id_from_response = None
+    search_span = llm_response[end_position:end_position + _BLOCK_ID_SEARCH_SPAN]
+    block_id_match = _BLOCK_ID_IN_RESPONSE.match(search_span)
+    if block_id_match:
+        block_id_from_response = block_id_match.group(1)
+        end_position = end_position + block_id_match.end()
+    else:
+        block_id_match = _BLOCK_ID_NO_PARENS.match(search_span)
         if block_id_match:
             block_id_from_response = block_id_match.group(1)
             end_position = end_position + block_id_match.end()
-        else:
-            block_id_match = _BLOCK_ID_NO_PARENS.match(search_span)
-            if block_id_match:
-                block_id_from_response = block_id_match.group(1)
-                end_position = end_position + block_id_match.end()
-        
-        # Extract context around the citation to help match to the right block
-        # Use a smaller context window to get more specific context
-        context_start = max(0, start_position - 50)
-        context_end = min(len(llm_response), end_position + 50)
-        citation_context = llm_response[context_start:context_end].lower()
-        
-        # Extract the sentence containing the citation for better matching
-        # Find sentence boundaries around the citation
-        sentence_start = citation_context.rfind('.', 0, start_position - context_start)
-        sentence_end = citation_context.find('.', end_position - context_start)
-        if sentence_start == -1:
-            sentence_start = 0
-        else:
-            sentence_start += 1  # Skip the period
-        if sentence_end == -1:
-            sentence_end = len(citation_context)
-        else:
-            sentence_end += 1  # Include the period
-        
-        # Use the sentence containing the citation as the primary context
-        sentence_context = citation_context[sentence_start:sentence_end].strip()
-        # Cited text for sub-level bbox: phrase that should be highlighted (sentence or key value)
-        # Prefer sentence; fallback to short window before marker (often contains "£X" or "value")
-        cited_text_for_bbox = sentence_context if sentence_context else llm_response[max(0, start_position - 80):start_position].strip()
-        if len(cited_text_for_bbox) > 200:
-            cited_text_for_bbox = cited_text_for_bbox[-200:]
-
-        # Jan28th-style: resolve by block_id when present (exact bbox, no heuristic)
-        # Citation number = order of appearance (1, 2, 3...) so UI shows [1], [2], [3], not block id.
-        if block_id_from_response and metadata_lookup_tables:
-            resolved = _resolve_block_id_to_metadata(block_id_from_response, metadata_lookup_tables)
-            if resolved:
-                citation_number = idx  # Sequential by appearance in response
-                bbox = resolved.get('bbox')
-                page_number = int(resolved.get('page', 0))
-                citation = {
-                    'citation_number': citation_number,
+    
+    # Extract context around the citation to help match to the right block
+    # Use a smaller context window to get more specific context
+    context_start = max(0, start_position - 50)
+    context_end = min(len(llm_response), end_position + 50)
+    citation_context = llm_response[context_start:context_end].lower()
+    
+    # Extract the sentence containing the citation for better matching
+    # Find sentence boundaries around the citation
+    sentence_start = citation_context.rfind('.', 0, start_position - context_start)
+    sentence_end = citation_context.find('.', end_position - context_start)
+    if sentence_start == -1:
+        sentence_start = 0
+    else:
+        sentence_start += 1  # Skip the period
+    if sentence_end == -1:
+        sentence_end = len(citation_context)
+    else:
+        sentence_end += 1  # Include the period
+    
+    # Use the sentence containing the citation as the primary context
+    sentence_context = citation_context[sentence_start:sentence_end].strip()
+    # Cited text for sub-level bbox: phrase that should be highlighted (sentence or key value)
+    # Prefer sentence; fallback to short window before marker (often contains "£X" or "value")
+    cited_text_for_bbox = sentence_context if sentence_context else llm_response[max(0, start_position - 80):start_position].strip()
+    if len(cited_text_for_bbox) > 200:
+        cited_text_for_bbox = cited_text_for_bbox[-200:]
+
+    # Jan28th-style: resolve by block_id when present (exact bbox, no heuristic)
+    # Citation number = order of appearance (1, 2, 3...) so UI shows [1], [2], [3], not block id.
+    if block_id_from_response and metadata_lookup_tables:
+        resolved = _resolve_block_id_to_metadata(block_id_from_response, metadata_lookup_tables)
+        if resolved:
+            citation_number = idx  # Sequential by appearance in response
+            bbox = resolved.get('bbox')
+            page_number = int(resolved.get('page', 0))
+            citation = {
+                'citation_number': citation_number,
+                'short_id': short_id,
+                'chunk_id': '',
+                'position': start_position,
+                'end_position': end_position,
+                'bbox': bbox,
+                'page_number': page_number,
+                'doc_id': resolved.get('doc_id', ''),
+                'original_filename': resolved.get('original_filename', ''),
+                'block_id': block_id_from_response,
+                'method': 'block-id-lookup',
+                'block_info': None,
+                'cited_text': cited_text_for_bbox,
+                'citation_debug': {
                     'short_id': short_id,
-                    'chunk_id': '',
-                    'position': start_position,
-                    'end_position': end_position,
-                    'bbox': bbox,
-                    'page_number': page_number,
-                    'doc_id': resolved.get('doc_id', ''),
-                    'original_filename': resolved.get('original_filename', ''),
+                    'citation_number': citation_number,
+                    'cited_text_for_bbox': cited_text_for_bbox,
+                    'distinctive_values': [],
+                    'chosen_bbox': dict(bbox) if isinstance(bbox, dict) else None,
                     'block_id': block_id_from_response,
-                    'method': 'block-id-lookup',
-                    'block_info': None,
-                    'cited_text': cited_text_for_bbox,
-                    'citation_debug': {
-                        'short_id': short_id,
-                        'citation_number': citation_number,
-                        'cited_text_for_bbox': cited_text_for_bbox,
-                        'distinctive_values': [],
-                        'chosen_bbox': dict(bbox) if isinstance(bbox, dict) else None,
-                        'block_id': block_id_from_response,
-                        'block_index': None,
-                        'block_type': None,
-                        'block_content_preview': None,
-                        'match_score': None,
-                        'source': 'block-id-lookup',
-                        'num_blocks_considered': 0,
-                    },
-                }
-                citations.append(citation)
-                logger.info(
-                    f"[CITATION_DEBUG] Citation {idx} resolved by block_id {block_id_from_response} "
-                    f"(page={page_number}, doc_id={resolved.get('doc_id', '')[:8]})"
-                )
-                continue
-
-        # Look up full metadata for this short ID (fallback when no block_id in response)
-        metadata = short_id_lookup.get(short_id)
-        if metadata:
-            # Find the best matching block for this citation
-            best_bbox = metadata.get('bbox')  # Fallback to chunk-level bbox
-            best_block_info = None
-            
-            blocks = metadata.get('blocks', [])
-            distinctive = _distinctive_values_from_cited_text(cited_text_for_bbox) if cited_text_for_bbox else []
-            if blocks and isinstance(blocks, list) and len(blocks) > 0:
-                # Distinctive values (e.g. £2,300,000, 12th February 2024) so we pick the block
-                # that actually contains the cited figure, not a similar block (e.g. "180 days").
-                best_match_score = 0
-
-                for block_idx, block in enumerate(blocks):
-                    if not isinstance(block, dict):
-                        continue
+                    'block_index': None,
+                    'block_type': None,
+                    'block_content_preview': None,
+                    'match_score': None,
+                    'source': 'block-id-lookup',
+                    'num_blocks_considered': 0,
+                },
+            }
+            logger.info(
+                f"[CITATION_DEBUG] Citation {idx} resolved by block_id {block_id_from_response} "
+                f"(page={page_number}, doc_id={resolved.get('doc_id', '')[:8]})"
+            )
+            return citation
+
+    # Look up full metadata for this short ID (fallback when no block_id in response)
+    metadata = short_id_lookup.get(short_id)
+    if metadata:
+        # Find the best matching block for this citation
+        best_bbox = metadata.get('bbox')  # Fallback to chunk-level bbox
+        best_block_info = None
+        
+        blocks = metadata.get('blocks', [])
+        distinctive = _distinctive_values_from_cited_text(cited_text_for_bbox) if cited_text_for_bbox else []
+        if blocks and isinstance(blocks, list) and len(blocks) > 0:
+            # Distinctive values (e.g. £2,300,000, 12th February 2024) so we pick the block
+            # that actually contains the cited figure, not a similar block (e.g. "180 days").
+            best_match_score = 0
+
+            for block_idx, block in enumerate(blocks):
+                if not isinstance(block, dict):
+                    continue
 
-                    block_content_lower = (block.get('content', '') or '').lower()
-                    block_content_raw = (block.get('content', '') or '')
-                    block_type = block.get('type', '').lower()
-                    block_bbox = block.get('bbox')
+                block_content_lower = (block.get('content', '') or '').lower()
+                block_content_raw = (block.get('content', '') or '')
+                block_type = block.get('type', '').lower()
+                block_bbox = block.get('bbox')
 
-                    if not block_content_lower or not isinstance(block_bbox, dict):
-                        continue
+                if not block_content_lower or not isinstance(block_bbox, dict):
+                    continue
 
-                    # Skip headings/titles (they're usually not what we want to highlight)
-                    if block_type in ['title', 'heading']:
-                        continue
+                # Skip headings/titles (they're usually not what we want to highlight)
+                if block_type in ['title', 'heading']:
+                    continue
 
-                    # When we have cited figures, skip blocks that look like footer/URL
-                    # (e.g. "www.mjgroupint.com" or "United Kingdom - Spain - Portugal")
-                    if distinctive and _block_looks_like_footer_or_url(block_content_raw):
-                        continue
+                # When we have cited figures, skip blocks that look like footer/URL
+                # (e.g. "www.mjgroupint.com" or "United Kingdom - Spain - Portugal")
+                if distinctive and _block_looks_like_footer_or_url(block_content_raw):
+                    continue
 
-                    # Normalize block content for value check (remove spaces in numbers: "2 400 000" -> "2400000")
-                    block_normalized = re.sub(r'(\d)\s+(\d)', r'\1\2', block_content_raw) if block_content_raw else ''
-
-                    # Calculate match score based on keyword overlap
-                    context_words = set(word for word in citation_context.split() if len(word) > 3)
-                    block_words = set(word for word in block_content_lower.split() if len(word) > 3)
-                    overlap = len(context_words & block_words)
-                    match_score = overlap
-
-                    if sentence_context:
-                        sentence_words = set(word for word in sentence_context.split() if len(word) > 3)
-                        sentence_overlap = len(sentence_words & block_words)
-                        match_score += sentence_overlap * 2
-
-                    if len(block_content_lower) > 50:
-                        match_score += 1
-
-                    if sentence_context and sentence_context in block_content_lower:
-                        match_score += 10
-
-                    # When the citation contains distinctive values (e.g. £2,300,000, 12th February 2024),
-                    # only consider blocks that contain at least one of them. Otherwise we can highlight
-                    # the wrong block (e.g. "Market Value... 180 days" or footer "www.mjgroupint.com").
-                    if distinctive:
-                        block_has_value = any(
-                            val in block_content_raw or val in block_normalized
-                            for val in distinctive
-                        )
-                        if not block_has_value:
-                            continue  # skip this block
-                        match_score += 100  # strong bonus for containing the cited value
-
-                    if match_score > best_match_score:
-                        best_match_score = match_score
-                        best_bbox = block_bbox
-                        best_block_info = {
-                            'block_index': block_idx,
-                            'block_type': block_type,
-                            'content_preview': block.get('content', '')[:80],
-                            'match_score': match_score,
-                            'content': block.get('content', '') or '',
-                        }
-                
-                # Narrow bbox to the line containing the cited text (avoid highlighting whole block)
-                if best_block_info and cited_text_for_bbox and isinstance(best_bbox, dict):
-                    block_content_for_narrow = best_block_info.get('content', '') or best_block_info.get('content_preview', '')
-                    if block_content_for_narrow:
-                        try:
-                            narrowed = _narrow_bbox_to_cited_line(
-                                block_content_for_narrow, best_bbox, cited_text_for_bbox
-                            )
-                            if narrowed and narrowed != best_bbox:
-                                best_bbox = narrowed
-                        except Exception as e:
-                            logger.debug("Could not narrow bbox to cited line: %s", e)
-                
-                # Log block selection for debugging
-                if best_block_info:
-                    logger.info(
-                        f"[CITATION_DEBUG] Citation {idx} (short_id={short_id}): "
-                        f"Selected block {best_block_info['block_index']} "
-                        f"(type={best_block_info['block_type']}, "
-                        f"score={best_block_info['match_score']}, "
-                        f"bbox={best_bbox is not None})"
-                    )
-                    logger.debug(
-                        f"  Block content preview: '{best_block_info['content_preview']}...'"
+                # Normalize block content for value check (remove spaces in numbers: "2 400 000" -> "2400000")
+                block_normalized = re.sub(r'(\d)\s+(\d)', r'\1\2', block_content_raw) if block_content_raw else ''
+
+                # Calculate match score based on keyword overlap
+                context_words = set(word for word in citation_context.split() if len(word) > 3)
+                block_words = set(word for word in block_content_lower.split() if len(word) > 3)
+                overlap = len(context_words & block_words)
+                match_score = overlap
+
+                if sentence_context:
+                    sentence_words = set(word for word in sentence_context.split() if len(word) > 3)
+                    sentence_overlap = len(sentence_words & block_words)
+                    match_score += sentence_overlap * 2
+
+                if len(block_content_lower) > 50:
+                    match_score += 1
+
+                if sentence_context and sentence_context in block_content_lower:
+                    match_score += 10
+
+                # When the citation contains distinctive values (e.g. £2,300,000, 12th February 2024),
+                # only consider blocks that contain at least one of them. Otherwise we can highlight
+                # the wrong block (e.g. "Market Value... 180 days" or footer "www.mjgroupint.com").
+                if distinctive:
+                    block_has_value = any(
+                        val in block_content_raw or val in block_normalized
+                        for val in distinctive
                     )
-                else:
-                    logger.warning(
-                        f"[CITATION_DEBUG] Citation {idx} (short_id={short_id}): "
-                        f"No matching block found, using chunk-level bbox"
-                    )
-            
-            # Ensure bbox is a dict (not None or invalid)
-            if not isinstance(best_bbox, dict):
-                logger.warning(f"Citation {idx}: bbox is not a dict (got {type(best_bbox)}), using fallback")
-                best_bbox = None
-
-            # Use page from the selected block's bbox when available (not chunk-level default).
-            page_number = metadata.get('page_number', 0)
-            if isinstance(best_bbox, dict) and best_bbox.get('page') is not None:
-                try:
-                    page_number = int(best_bbox.get('page', page_number))
-                except (TypeError, ValueError):
-                    pass
-
-            # Citation number = order of appearance (1, 2, 3...) so UI shows [1], [2], [3].
-            citation_number = idx
-
-            chunk_id = metadata.get('chunk_id', '')
-            block_index = best_block_info.get('block_index') if best_block_info else None
-            block_id = f"chunk_{chunk_id or 'unknown'}_block_{block_index if block_index is not None else 0}" if (chunk_id or block_index is not None) else None
-
-            # Debug payload: exact data used to choose this bbox (for citation mapping diagnosis)
-            citation_debug = {
-                'short_id': short_id,
-                'citation_number': citation_number,
-                'cited_text_for_bbox': cited_text_for_bbox,  # Exact sentence/markdown used for matching
-                'distinctive_values': list(distinctive),
-                'chosen_bbox': dict(best_bbox) if isinstance(best_bbox, dict) else None,
-                'block_id': block_id,
-                'block_index': block_index,
-                'block_type': best_block_info.get('block_type') if best_block_info else None,
-                'block_content_preview': (best_block_info.get('content', '') or best_block_info.get('content_preview', ''))[:300] if best_block_info else None,
-                'match_score': best_block_info.get('match_score') if best_block_info else None,
-                'source': 'block' if best_block_info else 'chunk',
-                'num_blocks_considered': len(blocks) if blocks else 0,
-            }
+                    if not block_has_value:
+                        continue  # skip this block
+                    match_score += 100  # strong bonus for containing the cited value
+
+                if match_score > best_match_score:
+                    best_match_score = match_score
+                    best_bbox = block_bbox
+                    best_block_info = {
+                        'block_index': block_idx,
+                        'block_type': block_type,
+                        'content_preview': block.get('content', '')[:80],
+                        'match_score': match_score,
+                        'content': block.get('content', '') or '',
+                    }
             
-            citation = {
-                'citation_number': citation_number,
-                'short_id': short_id,
-                'chunk_id': chunk_id,
-                'position': start_position,
-                'end_position': end_position,
-                'bbox': best_bbox,  # Best matching block bbox or chunk-level bbox
-                'page_number': page_number,  # From selected block when available
-                'doc_id': metadata.get('doc_id'),
-                'original_filename': metadata.get('original_filename', ''),
-                'method': 'direct-id-extraction',
-                'block_info': best_block_info,  # For debugging
-                'cited_text': cited_text_for_bbox,  # For sub-level bbox: match exact line in block
-                'citation_debug': citation_debug,
-            }
-            citations.append(citation)
+            # Narrow bbox to the line containing the cited text (avoid highlighting whole block)
+            if best_block_info and cited_text_for_bbox and isinstance(best_bbox, dict):
+                block_content_for_narrow = best_block_info.get('content', '') or best_block_info.get('content_preview', '')
+                if block_content_for_narrow:
+                    try:
+                        narrowed = _narrow_bbox_to_cited_line(
+                            block_content_for_narrow, best_bbox, cited_text_for_bbox
+                        )
+                        if narrowed and narrowed != best_bbox:
+                            best_bbox = narrowed
+                    except Exception as e:
+                        logger.debug("Could not narrow bbox to cited line: %s", e)
             
-            logger.info(
-                f"[CITATION_DEBUG] Citation {idx} extracted: "
-                f"doc_id={metadata.get('doc_id', '')[:8]}, "
-                f"page={page_number}, "
-                f"bbox_valid={isinstance(best_bbox, dict)}, "
-                f"bbox_left={best_bbox.get('left', 'N/A') if isinstance(best_bbox, dict) else 'N/A'}, "
-                f"bbox_top={best_bbox.get('top', 'N/A') if isinstance(best_bbox, dict) else 'N/A'}"
-            )
-        else:
-            logger.warning(
-                f"Short ID '{short_id}' not found in lookup. "
-                f"Available IDs: {list(short_id_lookup.keys())}"
+            # Log block selection for debugging
+            if best_block_info:
+                logger.info(
+                    f"[CITATION_DEBUG] Citation {idx} (short_id={short_id}): "
+                    f"Selected block {best_block_info['block_index']} "
+                    f"(type={best_block_info['block_type']}, "
+                    f"score={best_block_info['match_score']}, "
+                    f"bbox={best_bbox is not None})"
+                )
+                logger.debug(
+                    f"  Block content preview: '{best_block_info['content_preview']}...'"
+                )
+            else:
+                logger.warning(
+                    f"[CITATION_DEBUG] Citation {idx} (short_id={short_id}): "
+                    f"No matching block found, using chunk-level bbox"
+                )
+        
+        # Ensure bbox is a dict (not None or invalid)
+        if not isinstance(best_bbox, dict):
+            logger.warning(f"Citation {idx}: bbox is not a dict (got {type(best_bbox)}), using fallback")
+            best_bbox = None
+
+        # Use page from the selected block's bbox when available (not chunk-level default).
+        page_number = metadata.get('page_number', 0)
+        if isinstance(best_bbox, dict) and best_bbox.get('page') is not None:
+            try:
+                page_number = int(best_bbox.get('page', page_number))
+            except (TypeError, ValueError):
+                pass
+
+        # Citation number = order of appearance (1, 2, 3...) so UI shows [1], [2], [3].
+        citation_number = idx
+
+        chunk_id = metadata.get('chunk_id', '')
+        block_index = best_block_info.get('block_index') if best_block_info else None
+        block_id = f"chunk_{chunk_id or 'unknown'}_block_{block_index if block_index is not None else 0}" if (chunk_id or block_index is not None) else None
+
+        # Debug payload: exact data used to choose this bbox (for citation mapping diagnosis)
+        citation_debug = {
+            'short_id': short_id,
+            'citation_number': citation_number,
+            'cited_text_for_bbox': cited_text_for_bbox,  # Exact sentence/markdown used for matching
+            'distinctive_values': list(distinctive),
+            'chosen_bbox': dict(best_bbox) if isinstance(best_bbox, dict) else None,
+            'block_id': block_id,
+            'block_index': block_index,
+            'block_type': best_block_info.get('block_type') if best_block_info else None,
+            'block_content_preview': (best_block_info.get('content', '') or best_block_info.get('content_preview', ''))[:300] if best_block_info else None,
+            'match_score': best_block_info.get('match_score') if best_block_info else None,
+            'source': 'block' if best_block_info else 'chunk',
+            'num_blocks_considered': len(blocks) if blocks else 0,
+        }
+        
+        citation = {
+            'citation_number': citation_number,
+            'short_id': short_id,
+            'chunk_id': chunk_id,
+            'position': start_position,
+            'end_position': end_position,
+            'bbox': best_bbox,  # Best matching block bbox or chunk-level bbox
+            'page_number': page_number,  # From selected block when available
+            'doc_id': metadata.get('doc_id'),
+            'original_filename': metadata.get('original_filename', ''),
+            'method': 'direct-id-extraction',
+            'block_info': best_block_info,  # For debugging
+            'cited_text': cited_text_for_bbox,  # For sub-level bbox: match exact line in block
+            'citation_debug': citation_debug,
+        }
+        logger.info(
+            f"[CITATION_DEBUG] Citation {idx} extracted: "
+            f"doc_id={metadata.get('doc_id', '')[:8]}, "
+            f"page={page_number}, "
+            f"bbox_valid={isinstance(best_bbox, dict)}, "
+            f"bbox_left={best_bbox.get('left', 'N/A') if isinstance(best_bbox, dict) else 'N/A'}, "
+            f"bbox_top={best_bbox.get('top', 'N/A') if isinstance(best_bbox, dict) else 'N/A'}"
+        )
+        return citation
+    else:
+        logger.warning(
+            f"Short ID '{short_id}' not found in lookup. "
+            f"Available IDs: {list(short_id_lookup.keys())}"
+        )
+        return None
+
+
+class _StreamingCitationMapper:
+    """
+    Apply extract_citations_with_positions + replace_ids_with_citation_numbers to an answer
+    while it streams.
+
+    feed() returns (display_text, new_citations): the text that can be shown now, with each
+    resolved [ID: X](BLOCK_CITE_ID_N) replaced by [n], and the citations resolved by this chunk.
+    Text from a possible marker onwards is held back until _CITATION_LOOKAHEAD characters follow
+    the marker (or the stream ends), so every citation sees the same context as the batch path.
+    Unresolved markers are left in the text, as in the batch path.
+    """
+
+    def __init__(
+        self,
+        short_id_lookup: Dict[str, Dict[str, Any]],
+        metadata_lookup_tables: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+    ):
+        self.short_id_lookup = short_id_lookup
+        self.metadata_lookup_tables = metadata_lookup_tables
+        self.raw = ''
+        self.citations: List[Dict[str, Any]] = []
+        self._consumed = 0  # raw offset up to which display text has been produced
+        self._markers_seen = 0
+
+    def feed(self, chunk: str, final: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+        self.raw += chunk
+        parts: List[str] = []
+        new_citations: List[Dict[str, Any]] = []
+        pos = self._consumed
+        while True:
+            start = self.raw.find('[', pos)
+            if start == -1:
+                safe_end = len(self.raw)
+                break
+            match = _CITATION_MARKER.match(self.raw, start)
+            if match is None:
+                if not final and self._may_become_marker(self.raw[start:]):
+                    safe_end = start
+                    break
+                parts.append(self.raw[pos:start + 1])
+                pos = start + 1
+                continue
+            if not final and len(self.raw) - match.end() < _CITATION_LOOKAHEAD:
+                safe_end = start
+                break
+            self._markers_seen += 1
+            parts.append(self.raw[pos:start])
+            citation = _citation_for_match(
+                self.raw, match, self._markers_seen, self.short_id_lookup, self.metadata_lookup_tables
             )
-    
-    logger.info(f"[CITATION_DEBUG] Extracted {len(citations)} citations total")
-    return citations
+            if citation is None:
+                parts.append(match.group(0))
+                pos = match.end()
+                continue
+            # Sequential among resolved citations, like the renumbering after batch extraction
+            citation['citation_number'] = len(self.citations) + 1
+            self.citations.append(citation)
+            new_citations.append(citation)
+            parts.append(f"[{citation['citation_number']}]")
+            pos = citation['end_position']
+        parts.append(self.raw[pos:safe_end])
+        self._consumed = safe_end
+        return ''.join(parts), new_citations
+
+    @staticmethod
+    def _may_become_marker(text: str) -> bool:
+        """True while text (starting at '[') is a prefix of an unfinished [ID: X] marker."""
+        if len(text) < 4:
+            return '[ID:'.startswith(text)
+        return text.startswith('[ID:') and ']' not in text and len(text) < 200
+
+
+class _StreamingAnswerCleaner:
+    """
+    Streaming equivalent of the cleanup applied to a finished answer: .strip() and dropping a
+    leading intent-phrase fragment (_INTENT_FRAGMENT, as _strip_intent_fragment_from_response in
+    the views). The opening is held back only while it could still be such a fragment, and
+    trailing whitespace until more text follows, so the concatenated output of feed() is exactly
+    the cleaned answer.
+    """
+
+    def __init__(self):
+        self._head = ''
+        self._opening = 'pending'  # -> 'lstrip' once the fragment check is done -> 'done'
+        self._trailing = ''
+
+    def feed(self, text: str, final: bool = False) -> str:
+        if self._opening != 'done':
+            head = (self._head + text).lstrip()
+            if self._opening == 'pending':
+                match = _INTENT_FRAGMENT.match(head)
+                # A match that ends at the end of the text so far may still grow or fail
+                undecided = not head or _INTENT_FRAGMENT_PREFIX.match(head) or (match and not match.group(1))
+                if undecided and not final:
+                    self._head = head
+                    return ''
+                if match:
+                    head = head[match.end():].lstrip()
+                self._opening = 'lstrip'
+            if not head and not final:
+                self._head = ''
+                return ''
+            self._opening = 'done'
+            text = head
+        text = self._trailing + text
+        if final:
+            self._trailing = ''
+            return text.rstrip()
+        stripped = text.rstrip()
+        self._trailing = text[len(stripped):]
+        return stripped
 
 
 def format_chunks_with_block_ids(
@@ -1814,26 +1955,146 @@ def _build_metadata_table_section(metadata_lookup_tables: Dict[str, Dict[str, Di
     return "\n".join(lines)
 
 
-async def generate_conversational_answer_with_citations(
-    user_query: str,
-    formatted_chunks: str,
-    metadata_lookup_tables: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
-    previous_personality: Optional[str] = None,
-    is_first_message: bool = False,
-    user_id: Optional[str] = None,
-) -> Tuple[str, str]:
+# Strict json_schema for the streamed responder call. Same fields as PersonalityResponse;
+# personality_id comes first so it is complete before the answer text starts.
+_PERSONALITY_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "personality_response",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "additionalProperties": False,
+            "required": ["personality_id", "response"],
+            "properties": {
+                "personality_id": {
+                    "type": "string",
+                    "description": PersonalityResponse.model_fields["personality_id"].description,
+                },
+                "response": {
+                    "type": "string",
+                    "description": PersonalityResponse.model_fields["response"].description,
+                },
+            },
+        },
+    },
+}
+
+
+class _PersonalityStreamParser:
     """
-    Generate conversational answer with citation instructions (jan28th-style).
-    The LLM sees content with <BLOCK id="BLOCK_CITE_ID_N"> and must cite as [ID: X](BLOCK_CITE_ID_N).
-    Also chooses personality for this turn and returns (personality_id, answer_text).
+    Incrementally decode a streamed {"personality_id": ..., "response": ...} object.
+
+    feed() returns the newly decoded part of the response string, so answer text is available
+    before its closing quote arrives; personality_id is set once its value is complete.
+    Escapes split across chunks (including \\uXXXX surrogate pairs) are decoded when complete.
     """
-    # Temperature 0.38: slight increase for more natural variation; revert if responses become inconsistent or repetitive (see plan: conversational responses).
-    llm = ChatOpenAI(
-        model=config.openai_model,
-        temperature=0.38,
-        max_tokens=4096  # Avoid mid-sentence cutoff; 2000 was too low for full answers
-    )
 
+    def __init__(self):
+        self.raw_parts: List[str] = []
+        self.personality_id: Optional[str] = None
+        self._in_string = False
+        self._is_value = False
+        self._after_colon = False
+        self._key = None
+        self._buffer: List[str] = []
+        self._escape = ''
+        self._high_surrogate = ''
+
+    @property
+    def raw(self) -> str:
+        return ''.join(self.raw_parts)
+
+    def feed(self, chunk: str) -> str:
+        self.raw_parts.append(chunk)
+        out: List[str] = []
+        for ch in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape += ch
+                    if len(self._escape) == 2 and ch != 'u' or len(self._escape) == 6:
+                        self._append(self._decode_escape(), out)
+                elif ch == '\\':
+                    self._escape = ch
+                elif ch == '"':
+                    self._end_string()
+                else:
+                    self._append(ch, out)
+            elif ch == '"':
+                self._in_string = True
+                self._is_value = self._after_colon
+                self._buffer = []
+            elif ch == ':':
+                self._after_colon = True
+            elif ch == ',':
+                self._after_colon = False
+        return ''.join(out)
+
+    def _append(self, text: str, out: List[str]) -> None:
+        if not text:
+            return
+        if self._is_value and self._key == 'response':
+            out.append(text)
+        else:
+            self._buffer.append(text)
+
+    def _end_string(self) -> None:
+        value = ''.join(self._buffer)
+        if not self._is_value:
+            self._key = value
+        elif self._key == 'personality_id':
+            self.personality_id = value
+        self._in_string = False
+        self._after_colon = False
+        self._buffer = []
+
+    def _decode_escape(self) -> str:
+        sequence, self._escape = self._escape, ''
+        if sequence[1] == 'u':
+            try:
+                code = int(sequence[2:], 16)
+            except ValueError:
+                return ''
+            if 0xD800 <= code < 0xDC00:
+                self._high_surrogate = sequence
+                return ''
+            sequence, self._high_surrogate = self._high_surrogate + sequence, ''
+        try:
+            return json.loads(f'"{sequence}"')
+        except ValueError:
+            return ''
+
+
+async def _memories_section(user_query: str, user_id: Optional[str]) -> str:
+    """Mem0 memories for the responder system prompt ('' when disabled, empty or failed)."""
+    if not getattr(config, "mem0_enabled", False):
+        return ""
+    try:
+        from backend.services.memory_service import velora_memory
+        _mem_results = await velora_memory.search(
+            query=user_query,
+            user_id=user_id or "anonymous",
+            limit=getattr(config, "mem0_search_limit", 5),
+            timeout=getattr(config, "mem0_search_timeout", 2.0),
+        )
+        _mem_text = format_memories_section(_mem_results)
+        if _mem_text:
+            logger.info(f"[RESPONDER] Injected {len(_mem_results)} memories")
+        return _mem_text or ""
+    except Exception as _mem_err:
+        logger.warning(f"[RESPONDER] Memory search failed: {_mem_err}")
+        return ""
+
+
+def _build_block_citation_messages(
+    user_query: str,
+    formatted_chunks: str,
+    metadata_lookup_tables: Optional[Dict[str, Dict[str, Dict[str, Any]]]],
+    previous_personality: Optional[str],
+    is_first_message: bool,
+    memories_text: str,
+) -> List[Any]:
+    """System + human messages for the block-citation answer call (jan28th-style)."""
     metadata_section = _build_metadata_table_section(metadata_lookup_tables or {})
 
     personality_context = f"""
@@ -1843,20 +2104,8 @@ Is this the first message in the conversation? {is_first_message}
     system_content = get_responder_block_citation_system_content(personality_context)
 
     # --- Mem0 memory injection (Phase 2) ---
-    if getattr(config, "mem0_enabled", False):
-        try:
-            from backend.services.memory_service import velora_memory
-            _mem_results = await velora_memory.search(
-                query=user_query,
-                user_id=user_id or "anonymous",
-                limit=getattr(config, "mem0_search_limit", 5),
-            )
-            _mem_text = format_memories_section(_mem_results)
-            if _mem_text:
-                system_content = system_content + "\n" + _mem_text
-                logger.info(f"[RESPONDER] Injected {len(_mem_results)} memories")
-        except Exception as _mem_err:
-            logger.warning(f"[RESPONDER] Memory search failed: {_mem_err}")
+    if memories_text:
+        system_content = system_content + "\n" + memories_text
 
     system_prompt = SystemMessage(content=system_content)
 
@@ -1876,6 +2125,37 @@ Is this the first message in the conversation? {is_first_message}
 - Put any closing or sign-off on a new line; if you add a follow-up, make it context-aware (tied to what you said and what they asked), not generic. When you add a follow-up, use a few friendly emojis (2–3), e.g. 📄 ✨ 📋 🌳 📊 💡 ✅ or a friendly smile 😊. Put a space before the first emoji and between each emoji (e.g. "feel free to ask! 😊 📋"). Keep it professional—no hearts, monkeys, or casual gestures.
 - Explain in a clear, conversational way; use Markdown where it helps readability. Be accurate.
 """)
+    return [system_prompt, human_message]
+
+
+async def generate_conversational_answer_with_citations(
+    user_query: str,
+    formatted_chunks: str,
+    metadata_lookup_tables: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+    previous_personality: Optional[str] = None,
+    is_first_message: bool = False,
+    user_id: Optional[str] = None,
+    memories_text: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    Generate conversational answer with citation instructions (jan28th-style).
+    The LLM sees content with <BLOCK id="BLOCK_CITE_ID_N"> and must cite as [ID: X](BLOCK_CITE_ID_N).
+    Also chooses personality for this turn and returns (personality_id, answer_text).
+    memories_text: Mem0 section already looked up by the caller (None = look it up here).
+    """
+    # Temperature 0.38: slight increase for more natural variation; revert if responses become inconsistent or repetitive (see plan: conversational responses).
+    llm = ChatOpenAI(
+        model=config.openai_model,
+        temperature=0.38,
+        max_tokens=4096  # Avoid mid-sentence cutoff; 2000 was too low for full answers
+    )
+
+    if memories_text is None:
+        memories_text = await _memories_section(user_query, user_id)
+    system_prompt, human_message = _build_block_citation_messages(
+        user_query, formatted_chunks, metadata_lookup_tables,
+        previous_personality, is_first_message, memories_text,
+    )
 
     logger.info(
         f"[RESPONDER] Invoking LLM with block-id citation instructions "
@@ -1901,86 +2181,209 @@ Is this the first message in the conversation? {is_first_message}
         return DEFAULT_PERSONALITY_ID, answer_text
 
 
+async def _stream_answer_with_citations(
+    messages: List[Any],
+    emitter: ExecutionEventEmitter,
+    short_id_lookup: Dict[str, Dict[str, Any]],
+    metadata_lookup_tables: Optional[Dict[str, Dict[str, Dict[str, Any]]]],
+) -> Tuple[str, str, List[Dict[str, Any]], Optional[float]]:
+    """
+    Stream the block-citation answer call: answer text goes to the client as it is generated
+    (answer_delta events) and each citation is resolved and sent (answer_citation events) as
+    soon as its marker and context have arrived.
+
+    Returns (personality_id, answer_text, citations, first_text_at). answer_text is exactly the
+    concatenation of the answer_delta texts (already stripped of surrounding whitespace and an
+    intent-phrase fragment, so nothing downstream needs to rewrite it); citations are numbered
+    in order of appearance. Raises if the
+    stream fails before any text was sent; after that the partial answer is kept.
+    """
+    llm = ChatOpenAI(
+        model=config.openai_model,
+        temperature=0.38,
+        max_tokens=4096,
+    ).bind(response_format=_PERSONALITY_RESPONSE_FORMAT)
+    parser = _PersonalityStreamParser()
+    mapper = _StreamingCitationMapper(short_id_lookup, metadata_lookup_tables)
+    cleaner = _StreamingAnswerCleaner()
+    sent: List[str] = []
+    first_text_at = None
+
+    def _send(text: str, citations: List[Dict[str, Any]], final: bool = False) -> None:
+        nonlocal first_text_at
+        text = cleaner.feed(text, final=final)
+        if text:
+            sent.append(text)
+            if emitter.emit_answer_delta(text) and first_text_at is None:
+                first_text_at = time.time()
+        for frontend_citation in format_citations_for_frontend(citations):
+            emitter.emit_citation(frontend_citation)
+
+    try:
+        async for chunk in llm.astream(messages):
+            content = getattr(chunk, 'content', '')
+            if not isinstance(content, str) or not content:
+                continue
+            answer_part = parser.feed(content)
+            if answer_part:
+                _send(*mapper.feed(answer_part))
+    except Exception:
+        if not sent:
+            raise
+        logger.warning(
+            f"[RESPONDER] Answer stream failed after {sum(len(text) for text in sent)} chars were sent - "
+            "keeping partial answer",
+            exc_info=True,
+        )
+
+    if not mapper.raw:
+        # Nothing decoded from the response field: accept a complete JSON object or plain text
+        raw = parser.raw.strip()
+        try:
+            parsed = json.loads(raw)
+            if isinstance(parsed, dict):
+                parser.personality_id = parsed.get('personality_id')
+                raw = parsed.get('response') or ''
+        except ValueError:
+            pass
+        _send(*mapper.feed(raw))
+    _send(*mapper.feed('', final=True), final=True)
+
+    personality_id = (
+        parser.personality_id
+        if parser.personality_id in VALID_PERSONALITY_IDS
+        else DEFAULT_PERSONALITY_ID
+    )
+    return personality_id, ''.join(sent), mapper.citations, first_text_at
+
+
 async def generate_answer_with_direct_citations(
     user_query: str,
     execution_results: list[Dict[str, Any]],
     previous_personality: Optional[str] = None,
     is_first_message: bool = False,
     user_id: Optional[str] = None,
-) -> Tuple[str, List[Dict[str, Any]], str]:
+    emitter: Optional[ExecutionEventEmitter] = None,
+) -> Tuple[str, List[Dict[str, Any]], str, bool]:
     """
     Generate answer using direct citation system with short IDs.
 
     Flow:
-    1. Extract chunks with metadata
-    2. Format chunks with block-level BLOCK_CITE_ID tags
+    1. Start the Mem0 memory lookup; extract chunks with metadata
+    2. Format chunks with block-level BLOCK_CITE_ID tags (on the tool pool, while memories load)
     3. Generate LLM response (with personality selection); get (personality_id, raw response)
     4. Extract citations, replace IDs, format for frontend
-    5. Return (formatted_answer, citations_list, personality_id)
+    5. Return (formatted_answer, citations_list, personality_id, streamed)
+
+    When the emitter has a stream queue and config.responder_stream_enabled is set, steps 3-4
+    run incrementally: the answer and its citations are sent to the client while the model is
+    still generating, and the returned answer is exactly the streamed text (streamed=True).
 
     Args:
         user_query: User's question
         execution_results: Execution results from executor node
         previous_personality: Personality from previous turn (or None)
         is_first_message: True if this is the first message in the conversation
+        emitter: Execution event emitter of the request (enables streaming)
 
     Returns:
-        Tuple of (formatted_answer, citations_list, personality_id)
+        Tuple of (formatted_answer, citations_list, personality_id, streamed)
     """
+    started_at = time.time()
+    memory_task = asyncio.ensure_future(_memories_section(user_query, user_id))
     try:
         # Step 1: Extract chunks with metadata
         chunks_metadata = extract_chunks_with_metadata(execution_results)
 
         if not chunks_metadata:
             logger.warning("[DIRECT_CITATIONS] No chunks found in execution results")
-            return "No relevant information found.", [], DEFAULT_PERSONALITY_ID
+            memory_task.cancel()
+            return "No relevant information found.", [], DEFAULT_PERSONALITY_ID, False
 
         logger.info(f"[DIRECT_CITATIONS] Extracted {len(chunks_metadata)} chunks with metadata")
 
         # Step 2: Format chunks with block-level BLOCK_CITE_ID tags and metadata table (jan28th-style)
-        formatted_chunks, short_id_lookup, metadata_lookup_tables = format_chunks_with_block_ids(chunks_metadata)
+        formatted_chunks, short_id_lookup, metadata_lookup_tables = await run_sync_tool(
+            format_chunks_with_block_ids, chunks_metadata
+        )
         logger.info(
             f"[DIRECT_CITATIONS] Formatted chunks with block IDs: "
             f"{list(short_id_lookup.keys())}, {sum(len(t) for t in metadata_lookup_tables.values())} blocks"
         )
+        memories_text = await memory_task
 
-        # Step 3: Generate LLM response (with personality selection)
-        logger.info(f"[DIRECT_CITATIONS] Generating LLM response with block-id citation instructions...")
-        personality_id, llm_response = await generate_conversational_answer_with_citations(
-            user_query, formatted_chunks, metadata_lookup_tables,
-            previous_personality=previous_personality,
-            is_first_message=is_first_message,
-            user_id=user_id,
+        stream = (
+            config.responder_stream_enabled
+            and emitter is not None
+            and emitter.stream_queue is not None
         )
-        logger.info(f"[DIRECT_CITATIONS] LLM response generated ({len(llm_response)} chars), personality_id={personality_id}")
+        if stream:
+            messages = _build_block_citation_messages(
+                user_query, formatted_chunks, metadata_lookup_tables,
+                previous_personality, is_first_message, memories_text,
+            )
+            logger.info(f"[DIRECT_CITATIONS] Streaming LLM response with incremental citation mapping...")
+            try:
+                personality_id, formatted_response, citations, first_text_at = await _stream_answer_with_citations(
+                    messages, emitter, short_id_lookup, metadata_lookup_tables
+                )
+            except Exception as e:
+                logger.warning(f"[DIRECT_CITATIONS] Answer stream failed before any text was sent, not streaming: {e}")
+                stream = False
+
+        if stream:
+            total = time.time() - started_at
+            ttfb = (first_text_at or time.time()) - started_at
+            performance_service.track_operation("responder.stream.ttfb", ttfb)
+            performance_service.track_operation("responder.stream.total", total)
+            logger.info(
+                f"[DIRECT_CITATIONS] Streamed response ({len(formatted_response)} chars, {len(citations)} citations), "
+                f"personality_id={personality_id}, ttfb={ttfb * 1000:.0f}ms total={total * 1000:.0f}ms"
+            )
+        else:
+            # Step 3: Generate LLM response (with personality selection)
+            logger.info(f"[DIRECT_CITATIONS] Generating LLM response with block-id citation instructions...")
+            personality_id, llm_response = await generate_conversational_answer_with_citations(
+                user_query, formatted_chunks, metadata_lookup_tables,
+                previous_personality=previous_personality,
+                is_first_message=is_first_message,
+                user_id=user_id,
+                memories_text=memories_text,
+            )
+            logger.info(f"[DIRECT_CITATIONS] LLM response generated ({len(llm_response)} chars), personality_id={personality_id}")
 
-        # Step 4: Extract citations (prefer block_id lookup when (BLOCK_CITE_ID_N) present)
-        citations = extract_citations_with_positions(
-            llm_response, short_id_lookup, metadata_lookup_tables
-        )
-        logger.info(f"[DIRECT_CITATIONS] Extracted {len(citations)} citations from response")
+            # Step 4: Extract citations (prefer block_id lookup when (BLOCK_CITE_ID_N) present)
+            citations = extract_citations_with_positions(
+                llm_response, short_id_lookup, metadata_lookup_tables
+            )
+            logger.info(f"[DIRECT_CITATIONS] Extracted {len(citations)} citations from response")
+
+            # Step 4b: Assign sequential citation numbers 1, 2, 3... by order of appearance (position).
+            # This ensures UI shows [1], [2], [3] and we never collapse two in-text citations into one.
+            citations.sort(key=lambda c: c.get('position', 0))
+            for seq, citation in enumerate(citations, start=1):
+                citation['citation_number'] = seq
 
-        # Step 4b: Assign sequential citation numbers 1, 2, 3... by order of appearance (position).
-        # This ensures UI shows [1], [2], [3] and we never collapse two in-text citations into one.
-        citations.sort(key=lambda c: c.get('position', 0))
-        for seq, citation in enumerate(citations, start=1):
-            citation['citation_number'] = seq
+            # Step 5: Replace [ID: 1] with [1], [ID: 2] with [2], etc. (safe replacement)
+            formatted_response = replace_ids_with_citation_numbers(llm_response, citations)
+            logger.info(f"[DIRECT_CITATIONS] Replaced citation IDs with numbers")
+
+            total = time.time() - started_at
+            performance_service.track_operation("responder.invoke.ttfb", total)
+            performance_service.track_operation("responder.invoke.total", total)
         
-        # Step 5: Validate citations
+        # Step 6: Validate citations
         if not validate_citations(citations, short_id_lookup):
             logger.warning("[DIRECT_CITATIONS] Some citations failed validation, continuing anyway...")
         
-        # Step 6: Replace [ID: 1] with [1], [ID: 2] with [2], etc. (safe replacement)
-        formatted_response = replace_ids_with_citation_numbers(llm_response, citations)
-        logger.info(f"[DIRECT_CITATIONS] Replaced citation IDs with numbers")
-        
         # Step 7: Format citations for frontend
         frontend_citations = format_citations_for_frontend(citations)
         logger.info(f"[DIRECT_CITATIONS] Formatted {len(frontend_citations)} citations for frontend")
 
-        return formatted_response, frontend_citations, personality_id
+        return formatted_response, frontend_citations, personality_id, stream
 
     except Exception as e:
+        memory_task.cancel()
         logger.error(f"[DIRECT_CITATIONS] Error in citation generation: {e}", exc_info=True)
         # Fallback: return answer without citations
         chunks_metadata = extract_chunks_with_metadata(execution_results)
@@ -1988,8 +2391,8 @@ async def generate_answer_with_direct_citations(
             chunk_texts = [chunk.get('chunk_text', '') for chunk in chunks_metadata if chunk.get('chunk_text')]
             formatted_chunk_text = "\n\n---\n\n".join(chunk_texts)
             fallback_answer = await generate_conversational_answer(user_query, formatted_chunk_text)
-            return fallback_answer, [], DEFAULT_PERSONALITY_ID
-        return "I encountered an error while generating the answer. Please try again.", [], DEFAULT_PERSONALITY_ID
+            return fallback_answer, [], DEFAULT_PERSONALITY_ID, False
+        return "I encountered an error while generating the answer. Please try again.", [], DEFAULT_PERSONALITY_ID, False
 
 
 async def generate_formatted_answer(
@@ -2113,13 +2516,16 @@ async def responder_node(state: MainWorkflowState, runnable_config=None) -> Main
         # Generate answer with direct citations (includes personality selection in same LLM call)
         try:
             logger.info(f"[RESPONDER] Generating answer with direct citation system...")
-            formatted_answer, citations, personality_id = await generate_answer_with_direct_citations(
+            formatted_answer, citations, personality_id, streamed = await generate_answer_with_direct_citations(
                 user_query, execution_results,
                 previous_personality=previous_personality,
                 is_first_message=is_first_message,
                 user_id=state.get("user_id"),
+                emitter=emitter,
             )
-            formatted_answer = ensure_main_tags_when_missing(formatted_answer, user_query)
+            # A streamed answer is already on screen; the final text must match it exactly
+            if not streamed:
+                formatted_answer = ensure_main_tags_when_missing(formatted_answer, user_query)
 
             logger.info(f"[RESPONDER] ✅ Answer generated ({len(formatted_answer)} chars) with {len(citations)} citations, personality_id={personality_id}")
 
@@ -0,0 +1,94 @@
+"""
+Retrieval Cache Node - reuse the previous turn's retrieval on follow-ups.
+
+Runs between context_manager and planner for document queries when the thread has a cached
+retrieval (see backend/llm/utils/retrieval_cache.py). Decides:
+
+- reuse: replay the cached execution_results and go straight to the responder
+- delta: inject a 1-step retrieve_chunks plan over the cached documents (skips planner and
+  retrieve_docs)
+- miss: continue to simple_plan / planner as before
+"""
+
+import asyncio
+import logging
+import time
+
+from backend.llm.types import MainWorkflowState
+from backend.llm.utils.query_embedding import aembed_query
+from backend.llm.utils.retrieval_cache import (
+    REUSE, DELTA, MISS,
+    precheck_reuse, classify_reuse, make_delta_plan, retrieval_reuse_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def retrieval_cache_node(state: MainWorkflowState) -> MainWorkflowState:
+    """
+    Check the thread's retrieval cache against the current query.
+
+    Args:
+        state: MainWorkflowState with user_query, scope fields and retrieval_cache
+
+    Returns:
+        State update with retrieval_reuse (decision) and, for reuse/delta, the results or
+        plan the next node needs
+    """
+    started = time.perf_counter()
+    # Not stripped: the retrieval tools embed the same string, so the embedding LRU is shared
+    user_query = state.get("user_query") or ""
+    cache = state.get("retrieval_cache")
+
+    reject_reason = precheck_reuse(cache, state)
+    if reject_reason:
+        decision = {"mode": MISS, "similarity": None, "reason": reject_reason}
+        updated_cache = cache
+    else:
+        cached_embedding = cache.get("query_embedding")
+        if cached_embedding is None:
+            # Entries written before the query was embedded: embed both in parallel
+            query_embedding, cached_embedding = await asyncio.gather(
+                aembed_query(user_query, purpose="reuse check"),
+                aembed_query(cache.get("query") or "", purpose="reuse check"),
+            )
+            updated_cache = dict(cache, query_embedding=cached_embedding)
+        else:
+            query_embedding = await aembed_query(user_query, purpose="reuse check")
+            updated_cache = cache
+        decision = classify_reuse(updated_cache, user_query, query_embedding)
+
+    check_ms = (time.perf_counter() - started) * 1000
+    saved_ms = retrieval_reuse_stats.record_decision(decision["mode"], check_ms)
+    decision.update({"check_ms": round(check_ms, 1), "estimated_saved_ms": round(saved_ms, 1)})
+    logger.info(
+        f"[RETRIEVAL_CACHE] {decision['mode']}: {decision['reason']} "
+        f"(check {check_ms:.0f}ms, est. saved {saved_ms:.0f}ms)"
+    )
+
+    output = {
+        "retrieval_reuse": decision,
+        "use_cached_results": decision["mode"] == REUSE,
+    }
+    if updated_cache is not cache:
+        output["retrieval_cache"] = updated_cache
+
+    emitter = state.get("execution_events")
+    if decision["mode"] == REUSE:
+        output.update({
+            "execution_results": list(updated_cache["execution_results"]),
+            # Reused answers are never format/refine turns (those go through the planner)
+            "format_instruction": None,
+            "prior_turn_content": None,
+        })
+        if emitter:
+            emitter.emit_reasoning(label="Using sections found earlier", detail=None)
+    elif decision["mode"] == DELTA:
+        output.update({
+            "execution_plan": make_delta_plan(user_query, updated_cache["document_ids"]),
+            "current_step_index": 0,
+            "execution_results": [],
+            "format_instruction": None,
+            "prior_turn_content": None,
+        })
+    return output
@@ -487,7 +487,7 @@ async def fetch_direct_document_chunks(state: MainWorkflowState) -> MainWorkflow
     
     # Query-aware branch: when user_query is non-empty, use retrieve_chunks (vector/hybrid within docs) instead of fetch-all
     if user_query and business_id:
-        from backend.llm.tools.chunk_retriever_tool import retrieve_chunks
+        from backend.llm.tools.chunk_retriever_tool import retrieve_chunks, aretrieve_chunks
         # When the query was built from a document chip, it often contains the document name
         # (e.g. "what is the EPC rating of Highlands_Berden_Bishops_St..."). Use intent-only
         # query for retrieval so we match content (EPC section) not filename-style text.
@@ -512,11 +512,21 @@ async def fetch_direct_document_chunks(state: MainWorkflowState) -> MainWorkflow
             document_ids,
             retrieval_query[:80] if len(retrieval_query) > 80 else retrieval_query,
         )
-        chunks_result = retrieve_chunks(
-            query=retrieval_query,
-            document_ids=document_ids,
-            business_id=business_id,
-        )
+        from backend.llm.config import config
+        if config.async_retrieval_enabled:
+            chunks_result = await aretrieve_chunks(
+                query=retrieval_query,
+                document_ids=document_ids,
+                business_id=business_id,
+            )
+        else:
+            from backend.llm.runtime.tool_pool import run_sync_tool
+            chunks_result = await run_sync_tool(
+                retrieve_chunks,
+                query=retrieval_query,
+                document_ids=document_ids,
+                business_id=business_id,
+            )
         if chunks_result:
             # Convert retrieve_chunks return to List[RetrievedDocument]
             retrieved_docs: List[RetrievedDocument] = []
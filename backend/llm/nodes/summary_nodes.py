@@ -2,11 +2,13 @@
 Summarization code - create final unified answer from all document outputs.
 """
 
+import asyncio
 import logging
 import os
 import re
+import time
 from datetime import datetime
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, ToolMessage, AIMessage
@@ -28,6 +30,8 @@ from backend.llm.tools.agent_actions import create_agent_action_tools
 from backend.llm.utils.query_characteristics import detect_query_characteristics
 from backend.llm.tools.document_retriever_tool import create_document_retrieval_tool
 from backend.llm.tools.chunk_retriever_tool import create_chunk_retrieval_tool
+from backend.llm.runtime.tool_pool import run_sync_tool
+from backend.services.performance_service import performance_service
 
 logger = logging.getLogger(__name__)
 
@@ -812,6 +816,297 @@ def _renumber_citations_by_appearance(
     return renumbered_summary, renumbered_citations
 
 
+# ============================================================
+# ANSWER SEGMENTS (anchor-quote citation flow)
+# ============================================================
+
+SUMMARY_LLM_MODES = ('sequential', 'parallel', 'single', 'stream')
+
+# Structured-output schema for the single/stream modes. Strict json_schema needs every
+# property required, so optional segment fields are nullable instead of omitted.
+_SEGMENTS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "answer_segments",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "additionalProperties": False,
+            "required": ["segments"],
+            "properties": {
+                "segments": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": ["type", "content", "anchor_quote", "citation_number", "block_id", "doc_id"],
+                        "properties": {
+                            "type": {"type": "string", "enum": ["text", "cite"]},
+                            "content": {"type": ["string", "null"]},
+                            "anchor_quote": {"type": ["string", "null"]},
+                            "citation_number": {"type": ["integer", "null"]},
+                            "block_id": {"type": ["string", "null"]},
+                            "doc_id": {"type": ["string", "null"]},
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+_STRUCTURED_SEGMENTS_NOTE = (
+    "\n\nReturn the array as the \"segments\" field of a JSON object. "
+    "Use null for fields that do not apply to a segment."
+)
+
+_BLOCK_ID_ECHO_RE = re.compile(r'\s*[\[\(]?BLOCK_CITE_ID_\d+[\]\)]?\s*')
+
+
+def _get_summary_llm_mode() -> str:
+    mode = (config.summary_llm_mode or 'sequential').strip().lower()
+    if mode not in SUMMARY_LLM_MODES:
+        logger.warning(f"[SUMMARIZE_RESULTS] Unknown SUMMARY_LLM_MODE '{mode}', using sequential")
+        return 'sequential'
+    return mode
+
+
+def _parse_segments(raw: str) -> List[Dict[str, Any]]:
+    """Parse segments from a JSON array or a {"segments": [...]} object (raises on invalid JSON)."""
+    raw = (raw or '').strip()
+    if raw.startswith('```'):
+        raw = re.sub(r'^```\w*\n?', '', raw)
+        raw = re.sub(r'\n?```\s*$', '', raw)
+    parsed = json.loads(raw)
+    if isinstance(parsed, dict):
+        parsed = parsed.get('segments')
+    if not isinstance(parsed, list):
+        raise TypeError(f"Expected a list of segments, got {type(parsed).__name__}")
+    return parsed
+
+
+class _SegmentStreamParser:
+    """
+    Incrementally extract segment objects from a streamed JSON answer.
+
+    Accepts the bare array the segments prompt asks for and the {"segments": [...]} object
+    returned in structured-output mode. Each element is returned as soon as its closing
+    brace arrives; the full raw text is kept for a final parse if nothing was extracted.
+    """
+
+    def __init__(self):
+        self.raw_parts: List[str] = []
+        self._pending = ''
+        self._scan_from = 0
+        self._element_start: int = -1
+        self._depth = 0
+        self._in_array = False
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+    @property
+    def raw(self) -> str:
+        return ''.join(self.raw_parts)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.raw_parts.append(chunk)
+        if self._done:
+            return []
+        text = self._pending + chunk
+        elements = []
+        i = self._scan_from
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif not self._in_array:
+                if ch == '[':
+                    self._in_array = True
+            elif ch == '{':
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif ch == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        element = json.loads(text[self._element_start:i + 1])
+                        if isinstance(element, dict):
+                            elements.append(element)
+                    except ValueError:
+                        pass
+                    self._element_start = -1
+            elif ch == ']' and self._depth == 0:
+                self._done = True
+                break
+            i += 1
+        # Keep only the unfinished element so long answers are not rescanned
+        if self._element_start >= 0:
+            self._pending = text[self._element_start:]
+            self._scan_from = len(self._pending)
+            self._element_start = 0
+        else:
+            self._pending = ''
+            self._scan_from = 0
+        return elements
+
+
+def _resolve_cite_segment(
+    seg: Dict[str, Any],
+    metadata_lookup_tables: Dict[str, Dict[str, Dict[str, Any]]],
+    searchable_blocks: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Resolve one cite segment to a citation (block_id first, then exact and fuzzy anchor quote)."""
+    anchor = (seg.get('anchor_quote') or '').strip()
+    num = seg.get('citation_number')
+    block_id_from_seg = seg.get('block_id')
+    doc_id_from_seg = seg.get('doc_id')
+    resolved = None
+    if block_id_from_seg and metadata_lookup_tables:
+        resolved = resolve_block_id_to_bbox(
+            block_id_from_seg,
+            metadata_lookup_tables,
+            doc_id_hint=doc_id_from_seg,
+        )
+        if resolved:
+            logger.debug(
+                "[SUMMARIZE_RESULTS] Resolved citation %s by block_id from segment",
+                num,
+            )
+    if not resolved:
+        resolved = resolve_anchor_quote_to_bbox(anchor, searchable_blocks)
+    if not resolved and searchable_blocks:
+        logger.warning(
+            "[SUMMARIZE_RESULTS] Anchor quote not found (exact match); blocks=%d, anchor_preview=%s",
+            len(searchable_blocks),
+            (anchor[:60] + '...') if len(anchor) > 60 else anchor,
+        )
+        resolved = resolve_anchor_quote_to_bbox_fuzzy(anchor, searchable_blocks)
+        if resolved:
+            logger.info(
+                "[SUMMARIZE_RESULTS] Used fuzzy anchor match for citation %s (confidence=low)",
+                num,
+            )
+    if resolved:
+        return {
+            'citation_number': num,
+            'doc_id': resolved.get('doc_id', ''),
+            'page_number': resolved.get('page', 0),
+            'bbox': resolved.get('bbox'),
+            'block_id': resolved.get('block_id', ''),
+            'cited_text': anchor,
+            'method': resolved.get('method', 'anchor-quote-lookup'),
+            'confidence': resolved.get('confidence', 'high'),
+            'original_filename': None,
+        }
+    logger.warning(
+        "[SUMMARIZE_RESULTS] Anchor quote not found (exact and fuzzy); blocks=%d, anchor_preview=%s",
+        len(searchable_blocks),
+        (anchor[:60] + '...') if len(anchor) > 60 else anchor,
+    )
+    return {
+        'citation_number': num,
+        'doc_id': '',
+        'page_number': 0,
+        'bbox': None,
+        'block_id': None,
+        'cited_text': anchor,
+        'method': 'anchor-quote-lookup',
+        'confidence': 'low',
+        'original_filename': None,
+    }
+
+
+def _summary_from_segments(
+    segments: List[Dict[str, Any]],
+    citations_by_num: Dict[Any, Dict[str, Any]],
+) -> str:
+    """Join text segments and [N] markers (cite segments must already be resolved into citations_by_num)."""
+    summary_parts = []
+    for seg in segments:
+        if seg.get('type') == 'text':
+            summary_parts.append(seg.get('content') or '')
+        elif seg.get('type') == 'cite' and seg.get('citation_number') in citations_by_num:
+            summary_parts.append(f"[{seg.get('citation_number')}]")
+    return ''.join(summary_parts)
+
+
+def _stream_text(seg: Dict[str, Any]) -> str:
+    """Client-facing text for a streamed segment (matches the final post-processing of the summary)."""
+    if seg.get('type') == 'cite':
+        return f"[{seg.get('citation_number')}]" if seg.get('citation_number') is not None else ''
+    text = seg.get('content') or ''
+    return _BLOCK_ID_ECHO_RE.sub(' ', text) if 'BLOCK_CITE_ID_' in text else text
+
+
+async def _stream_answer_segments(
+    llm,
+    messages: List[Any],
+    emitter,
+    metadata_lookup_tables: Dict[str, Dict[str, Dict[str, Any]]],
+    searchable_blocks: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], Dict[Any, Dict[str, Any]], Optional[float]]:
+    """
+    Stream the segments call: each text segment is sent to the client as soon as it is
+    complete, and each cite segment is resolved on the tool pool while generation continues.
+
+    Returns (segments, citations_by_num, first_text_at). first_text_at is None when nothing
+    reached the client (no stream queue, or the model produced no parseable segments).
+    If the stream fails after text was sent, the segments received so far are returned so
+    the final answer matches what the user already saw.
+    """
+    parser = _SegmentStreamParser()
+    segments: List[Dict[str, Any]] = []
+    resolving: Dict[Any, asyncio.Future] = {}
+    first_text_at = None
+    try:
+        async for chunk in llm.astream(messages):
+            content = getattr(chunk, 'content', '')
+            if not isinstance(content, str) or not content:
+                continue
+            for seg in parser.feed(content):
+                segments.append(seg)
+                num = seg.get('citation_number')
+                if seg.get('type') == 'cite' and num is not None and num not in resolving:
+                    resolving[num] = asyncio.ensure_future(
+                        run_sync_tool(_resolve_cite_segment, seg, metadata_lookup_tables, searchable_blocks)
+                    )
+                if emitter is not None and emitter.emit_answer_delta(_stream_text(seg)) and first_text_at is None:
+                    first_text_at = time.time()
+    except Exception:
+        if first_text_at is None:
+            for future in resolving.values():
+                future.cancel()
+            raise
+        logger.warning(
+            "[SUMMARIZE_RESULTS] Segment stream failed after %d segments were sent - keeping partial answer",
+            len(segments),
+            exc_info=True,
+        )
+
+    if not segments:
+        segments = _parse_segments(parser.raw)
+        for seg in segments:
+            num = seg.get('citation_number')
+            if seg.get('type') == 'cite' and num is not None and num not in resolving:
+                resolving[num] = asyncio.ensure_future(
+                    run_sync_tool(_resolve_cite_segment, seg, metadata_lookup_tables, searchable_blocks)
+                )
+
+    citations_by_num = {}
+    for num, future in resolving.items():
+        citations_by_num[num] = await future
+    return segments, citations_by_num, first_text_at
+
+
 async def summarize_results(state: MainWorkflowState) -> MainWorkflowState:
     """
     Create a final unified answer from all document outputs.
@@ -858,7 +1153,9 @@ async def summarize_results(state: MainWorkflowState) -> MainWorkflowState:
         Recomended prioritizing Property B for further investigation."
     }
 
-    Latency: ~1-2 seconds for LLM call
+    Latency: ~1-2 seconds for LLM call. The call layout (sequential, parallel fallback,
+    single structured call, or streamed segments) is chosen by SUMMARY_LLM_MODE; TTFB and
+    total time are recorded per mode as summary.<mode>.ttfb / summary.<mode>.total.
     """
 
     doc_outputs = state.get('document_outputs', []) or []
@@ -1114,7 +1411,6 @@ async def summarize_results(state: MainWorkflowState) -> MainWorkflowState:
     # Create citation tool instance (used for fallback Phase 1+2)
     citation_tool, citation_tool_instance = create_citation_tool(metadata_lookup_tables)
     
-    import time
     phase1_start = time.time()
     phase2_start = None  # Set in 2-phase path only; used for Phase 2 timing log
 
@@ -1130,15 +1426,40 @@ async def summarize_results(state: MainWorkflowState) -> MainWorkflowState:
     # ============================================================
     # STRUCTURED SEGMENTS (anchor-quote citation flow) - primary path
     # ============================================================
+    summary_mode = _get_summary_llm_mode()
     segments_used = False
     summary = ''
     citations_from_state = []
     answer_response = None
+    first_text_at = None  # When the first answer text reached the client (stream mode)
     citation_context = state.get("citation_context")
     is_citation_query = bool(citation_context and citation_context.get("cited_text"))
     is_agent_mode = state.get('is_agent_mode', False)
     agent_action_instance = None
     
+    def _start_citation_phase():
+        """Phase 1 (citation extraction with tools) - used as the fallback when segments fail."""
+        citation_llm = ChatOpenAI(
+            api_key=config.openai_api_key,
+            model=config.openai_model,
+            temperature=0,
+        ).bind_tools(
+            [citation_tool],
+            tool_choice="auto"
+        )
+        citation_prompt = get_citation_extraction_prompt(
+            user_query=state['user_query'],
+            conversation_history=history_context,
+            search_summary=search_summary,
+            formatted_outputs=formatted_outputs_str,
+            metadata_lookup_tables=metadata_lookup_tables
+        )
+        return asyncio.ensure_future(citation_llm.ainvoke([system_msg, HumanMessage(content=citation_prompt)]))
+    
+    # PARALLEL: Phase 1 does not depend on the segments call, so start it now; if segments
+    # succeed it is cancelled, otherwise the fallback already has its citations in flight.
+    citation_task = _start_citation_phase() if summary_mode == 'parallel' else None
+    
     searchable_blocks = build_searchable_blocks_from_metadata_lookup_tables(metadata_lookup_tables)
     segments_prompt = get_final_answer_prompt_segments(
         user_query=state['user_query'],
@@ -1152,87 +1473,34 @@ async def summarize_results(state: MainWorkflowState) -> MainWorkflowState:
             model=config.openai_model,
             temperature=0,
         )
-        seg_resp = await segments_llm.ainvoke([system_msg, HumanMessage(content=segments_prompt)])
-        raw = (seg_resp.content or '').strip()
-        if raw.startswith('```'):
-            raw = re.sub(r'^```\w*\n?', '', raw)
-            raw = re.sub(r'\n?```\s*$', '', raw)
-        segments = json.loads(raw)
-        if isinstance(segments, list) and len(segments) > 0:
-            summary_parts = []
-            citations_by_num = {}
-            for seg in segments:
-                if seg.get('type') == 'text':
-                    summary_parts.append(seg.get('content', ''))
-                elif seg.get('type') == 'cite':
-                    anchor = (seg.get('anchor_quote') or '').strip()
-                    num = seg.get('citation_number')
-                    block_id_from_seg = seg.get('block_id')
-                    doc_id_from_seg = seg.get('doc_id')
-                    if num is not None:
-                        resolved = None
-                        if block_id_from_seg and metadata_lookup_tables:
-                            resolved = resolve_block_id_to_bbox(
-                                block_id_from_seg,
-                                metadata_lookup_tables,
-                                doc_id_hint=doc_id_from_seg,
-                            )
-                            if resolved:
-                                logger.debug(
-                                    "[SUMMARIZE_RESULTS] Resolved citation %s by block_id from segment",
-                                    num,
-                                )
-                        if not resolved:
-                            resolved = resolve_anchor_quote_to_bbox(anchor, searchable_blocks)
-                        if not resolved and searchable_blocks:
-                            logger.warning(
-                                "[SUMMARIZE_RESULTS] Anchor quote not found (exact match); blocks=%d, anchor_preview=%s",
-                                len(searchable_blocks),
-                                (anchor[:60] + '...') if len(anchor) > 60 else anchor,
-                            )
-                            resolved = resolve_anchor_quote_to_bbox_fuzzy(anchor, searchable_blocks)
-                            if resolved:
-                                logger.info(
-                                    "[SUMMARIZE_RESULTS] Used fuzzy anchor match for citation %s (confidence=low)",
-                                    num,
-                                )
-                        if resolved:
-                            citations_by_num[num] = {
-                                'citation_number': num,
-                                'doc_id': resolved.get('doc_id', ''),
-                                'page_number': resolved.get('page', 0),
-                                'bbox': resolved.get('bbox'),
-                                'block_id': resolved.get('block_id', ''),
-                                'cited_text': anchor,
-                                'method': resolved.get('method', 'anchor-quote-lookup'),
-                                'confidence': resolved.get('confidence', 'high'),
-                                'original_filename': None,
-                            }
-                        else:
-                            logger.warning(
-                                "[SUMMARIZE_RESULTS] Anchor quote not found (exact and fuzzy); blocks=%d, anchor_preview=%s",
-                                len(searchable_blocks),
-                                (anchor[:60] + '...') if len(anchor) > 60 else anchor,
-                            )
-                            citations_by_num[num] = {
-                                'citation_number': num,
-                                'doc_id': '',
-                                'page_number': 0,
-                                'bbox': None,
-                                'block_id': None,
-                                'cited_text': anchor,
-                                'method': 'anchor-quote-lookup',
-                                'confidence': 'low',
-                                'original_filename': None,
-                            }
-                        summary_parts.append(f'[{num}]')
-            summary = ''.join(summary_parts)
+        if summary_mode in ('single', 'stream'):
+            segments_llm = segments_llm.bind(response_format=_SEGMENTS_RESPONSE_FORMAT)
+            segments_prompt += _STRUCTURED_SEGMENTS_NOTE
+        segments_messages = [system_msg, HumanMessage(content=segments_prompt)]
+        if summary_mode == 'stream':
+            segments, citations_by_num, first_text_at = await _stream_answer_segments(
+                segments_llm,
+                segments_messages,
+                state.get("execution_events"),
+                metadata_lookup_tables,
+                searchable_blocks,
+            )
+        else:
+            seg_resp = await segments_llm.ainvoke(segments_messages)
+            segments = _parse_segments(seg_resp.content)
+            citations_by_num = {
+                seg['citation_number']: _resolve_cite_segment(seg, metadata_lookup_tables, searchable_blocks)
+                for seg in segments
+                if seg.get('type') == 'cite' and seg.get('citation_number') is not None
+            }
+        if len(segments) > 0:
+            summary = _summary_from_segments(segments, citations_by_num)
             citations_from_state = [citations_by_num[k] for k in sorted(citations_by_num.keys())]
             segments_used = True
             answer_response = None
             logger.info(
-                "[SUMMARIZE_RESULTS] Segments flow succeeded: %d chars, %d citations",
-                len(summary), len(citations_from_state),
+                "[SUMMARIZE_RESULTS] Segments flow succeeded (%s): %d chars, %d citations",
+                summary_mode, len(summary), len(citations_from_state),
             )
     except (json.JSONDecodeError, TypeError, KeyError) as seg_err:
         logger.warning(
@@ -1240,41 +1508,34 @@ async def summarize_results(state: MainWorkflowState) -> MainWorkflowState:
             seg_err,
         )
     except Exception as seg_err:
+        error_msg = str(seg_err).lower()
+        if "shutdown" in error_msg or "closed" in error_msg or "cannot schedule" in error_msg:
+            if citation_task is not None:
+                citation_task.cancel()
+            raise
         logger.warning(
             "[SUMMARIZE_RESULTS] Segments flow error (falling back to Phase 1+2): %s",
             seg_err,
             exc_info=True,
         )
     
+    if segments_used and citation_task is not None:
+        citation_task.cancel()
+        citation_task = None
+    
     # ============================================================
     # FALLBACK: 2-PHASE APPROACH (Phase 1 tool calls + Phase 2 answer)
     # ============================================================
     if not segments_used:
         logger.info("[SUMMARIZE_RESULTS] Using 2-phase approach for reliable citations")
         
-        # PHASE 1: Citation Extraction (with tools)
-        citation_llm = ChatOpenAI(
-            api_key=config.openai_api_key,
-            model=config.openai_model,
-            temperature=0,
-        ).bind_tools(
-            [citation_tool],
-            tool_choice="auto"
-        )
-        
-        citation_prompt = get_citation_extraction_prompt(
-            user_query=state['user_query'],
-            conversation_history=history_context,
-            search_summary=search_summary,
-            formatted_outputs=formatted_outputs_str,
-            metadata_lookup_tables=metadata_lookup_tables
-        )
-        
-        citation_messages = [system_msg, HumanMessage(content=citation_prompt)]
+        # PHASE 1: Citation Extraction (with tools) - already running in parallel mode
+        if citation_task is None:
+            citation_task = _start_citation_phase()
         
         try:
             logger.info("[SUMMARIZE_RESULTS] Phase 1: Extracting citations...")
-            citation_response = await citation_llm.ainvoke(citation_messages)
+            citation_response = await citation_task
             logger.info("[SUMMARIZE_RESULTS] Phase 1 complete")
         except Exception as llm_error:
             error_msg = str(llm_error).lower()
@@ -1670,7 +1931,17 @@ async def summarize_results(state: MainWorkflowState) -> MainWorkflowState:
     
     summary_complete_time = time.time()
     total_duration = summary_complete_time - phase1_start
-    
+
+    # TTFB per mode: first streamed text in stream mode, otherwise the finished summary
+    # (the view can only start sending once this node returns)
+    ttfb = (first_text_at or summary_complete_time) - phase1_start
+    performance_service.track_operation(f"summary.{summary_mode}.ttfb", ttfb)
+    performance_service.track_operation(f"summary.{summary_mode}.total", total_duration)
+    logger.info(
+        f"[SUMMARIZE_RESULTS] Mode={summary_mode} segments={segments_used} "
+        f"ttfb={ttfb * 1000:.0f}ms total={total_duration * 1000:.0f}ms"
+    )
+
     logger.info(
         f"[SUMMARIZE_RESULTS] Generated answer with {len(citations_from_state)} citations from blocks used "
         f"({len(summary)} chars) - Total time: {round(total_duration, 2)}s"
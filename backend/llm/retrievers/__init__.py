@@ -1,5 +1,5 @@
 # Removed deprecated retrievers: vector_retriever, bm25_retriever, hybrid_retriever
 # New two-level RAG uses tools: document_retriever_tool and chunk_retriever_tool
-from backend.llm.retrievers.cohere_reranker import CohereReranker
+from backend.llm.retrievers.cohere_reranker import CohereReranker, get_reranker
 
-__all__ = ["CohereReranker"]
+__all__ = ["CohereReranker", "get_reranker"]
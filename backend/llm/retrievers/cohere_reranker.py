@@ -3,14 +3,164 @@ Cohere ranker for document relevance scoring.
 
 Replaces expensive LLM-based reranking with Cohere's specialised reranking API.
 Much faster and cheaper than GPT, Gemini, Anthropic reranking.
+
+Relevance scores are cached per (model, query hash, candidate id), in-process and in
+Redis, so the evaluator loop or a follow-up re-ranking the same chunks only pays for
+candidates it has not scored before. Cache misses are truncated to the model's token
+limit and sent in batches of COHERE_RERANK_BATCH_SIZE. When Cohere is unavailable (no key,
+HTTP error, timeout) the cross-encoder hosted by embedding_server.py (POST /rerank) scores
+the candidates instead, with a short timeout so reranking stays bounded offline.
 """
-from typing import List, Dict, Any, Optional 
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import os
 import logging
+import threading
+import time
 import requests
 
+from backend.services.tracing import span
+from backend.services.redis_client import get_redis_client
+
 logger = logging.getLogger(__name__)
 
+RERANK_CACHE_TTL_SECONDS = int(os.environ.get('RERANK_CACHE_TTL_SECONDS', str(24 * 3600)))
+RERANK_CACHE_MAX_ENTRIES = int(os.environ.get('RERANK_CACHE_MAX_ENTRIES', '50000'))
+# Cohere accepts up to 1000 documents per call but recommends <= 100 for latency
+COHERE_RERANK_BATCH_SIZE = int(os.environ.get('COHERE_RERANK_BATCH_SIZE', '100'))
+# Query + document tokens per candidate (4096 for rerank-*-v3.0, 512 for v2.0)
+COHERE_RERANK_MAX_TOKENS = int(os.environ.get('COHERE_RERANK_MAX_TOKENS', '4096'))
+COHERE_RERANK_TIMEOUT_SECONDS = float(os.environ.get('COHERE_RERANK_TIMEOUT_SECONDS', '30'))
+RERANK_LOCAL_FALLBACK_ENABLED = os.environ.get('RERANK_LOCAL_FALLBACK_ENABLED', 'true').lower() == 'true'
+LOCAL_RERANK_TIMEOUT_SECONDS = float(os.environ.get('LOCAL_RERANK_TIMEOUT_SECONDS', '5'))
+# After the local server fails, skip it for this long instead of paying the timeout per call
+LOCAL_RERANK_RETRY_SECONDS = float(os.environ.get('LOCAL_RERANK_RETRY_SECONDS', '60'))
+
+# Rough token estimate for truncation (English prose averages ~4 characters per token)
+_CHARS_PER_TOKEN = 4
+_KEY_PREFIX = 'rerank:'
+
+
+def _get_redis_client():
+    return get_redis_client(os.environ.get('RERANK_CACHE_REDIS_URL'))
+
+
+def query_hash(query: str) -> str:
+    """Stable hash of a query (whitespace and case insensitive)."""
+    return hashlib.sha256(' '.join((query or '').lower().split()).encode('utf-8')).hexdigest()[:32]
+
+
+def _candidate_text(doc: Dict[str, Any]) -> str:
+    content = doc.get('content', '')
+    if not content:
+        content = f"{doc.get('classification_type', '')} {doc.get('property_address', '')}"
+    return content
+
+
+def _candidate_id(doc: Dict[str, Any], text: str) -> str:
+    """Chunk/document id when present, otherwise a hash of the text that gets scored."""
+    for field in ('chunk_id', 'id', 'doc_id', 'document_id'):
+        value = doc.get(field)
+        if value:
+            if field in ('doc_id', 'document_id') and doc.get('chunk_index') is not None:
+                return f"{value}:{doc['chunk_index']}"
+            return str(value)
+    return 'h' + hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class RerankScoreCache:
+    """Per-candidate relevance scores keyed by (model, query hash, candidate id)."""
+
+    def __init__(self, max_entries: int = RERANK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    def get_many(self, model: str, qhash: str, candidate_ids: List[str]) -> Dict[str, float]:
+        """Cached scores for the candidates that have one."""
+        found: Dict[str, float] = {}
+        missing: List[str] = []
+        now = time.time()
+        with self._lock:
+            for cid in candidate_ids:
+                key = (model, qhash, cid)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[cid] = entry[1]
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(cid)
+
+        client = _get_redis_client()
+        if client is not None and missing:
+            try:
+                # One hash per (model, query): a single HMGET covers every candidate
+                values = client.hmget(f"{_KEY_PREFIX}{model}:{qhash}", missing)
+            except Exception as e:
+                logger.debug(f"[RERANK_CACHE] Redis get failed: {e}")
+                values = [None] * len(missing)
+            from_redis = {}
+            for cid, value in zip(missing, values):
+                if value is not None:
+                    try:
+                        from_redis[cid] = float(value)
+                    except (TypeError, ValueError):
+                        continue
+            if from_redis:
+                self._store_local(model, qhash, from_redis)
+                found.update(from_redis)
+
+        with self._lock:
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(candidate_ids) - len(found)
+        return found
+
+    def set_many(self, model: str, qhash: str, scores: Dict[str, float]) -> None:
+        if not scores:
+            return
+        self._store_local(model, qhash, scores)
+        client = _get_redis_client()
+        if client is not None:
+            key = f"{_KEY_PREFIX}{model}:{qhash}"
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.hset(key, mapping={cid: repr(score) for cid, score in scores.items()})
+                pipe.expire(key, RERANK_CACHE_TTL_SECONDS)
+                pipe.execute()
+            except Exception as e:
+                logger.debug(f"[RERANK_CACHE] Redis set failed: {e}")
+        with self._lock:
+            self._stats['stores'] += len(scores)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['redis'] = _get_redis_client() is not None
+        return stats
+
+    def _store_local(self, model: str, qhash: str, scores: Dict[str, float]) -> None:
+        expires_at = time.time() + RERANK_CACHE_TTL_SECONDS
+        with self._lock:
+            for cid, score in scores.items():
+                key = (model, qhash, cid)
+                self._entries[key] = (expires_at, score)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
 class CohereReranker:
     """Cohere reranker API client for document relevance and scoring."""
     def __init__(self):
@@ -19,7 +169,12 @@ class CohereReranker:
         self.api_url = 'https://api.cohere.ai/rerank'
         self.model = os.environ.get('COHERE_RERANKER_MODEL', 'rerank-english-v3.0')
         self.top_n = int(os.environ.get('COHERE_RERANKER_TOP_N', '10'))
-        
+        self.local_url = self._local_rerank_url()
+        self.local_fallback = RERANK_LOCAL_FALLBACK_ENABLED
+        self.cache = RerankScoreCache()
+        self._session = requests.Session()
+        self._local_disabled_until = 0.0
+
         # Validate API key
         self.enabled = bool(self.api_key)
 
@@ -31,6 +186,23 @@ class CohereReranker:
         else:
             logger.warning("COHERE_API_KEY not set - Cohere Reranker disabled")
             logger.info("To enable Cohere reranking, set COHERE_API_KEY in your .env file")
+            if self.local_fallback:
+                logger.info(f"Reranking will use the local cross-encoder at {self.local_url}")
+
+    @staticmethod
+    def _local_rerank_url() -> str:
+        """LOCAL_RERANK_URL, or /rerank on the same host as LOCAL_EMBEDDING_URL."""
+        env_url = os.environ.get('LOCAL_RERANK_URL')
+        if env_url:
+            return env_url.strip()
+        embed_url = os.environ.get('LOCAL_EMBEDDING_URL')
+        if embed_url:
+            base = embed_url.strip().rstrip('/')
+            if base.endswith('/embed'):
+                base = base[:-len('/embed')]
+            return f"{base}/rerank"
+        default_host = 'embedding-server' if os.environ.get('DOCKER_ENV') else 'localhost'
+        return f'http://{default_host}:5003/rerank'
 
     def rerank(
         self,
@@ -44,118 +216,205 @@ class CohereReranker:
         Args:
             query: Users search query
             documents: List of document dicts with 'content' field
-            top_n: Number of results to return (default: self.top_n) 
-        
+            top_n: Number of results to return (default: self.top_n)
+
         Returns:
             Reranked list of documents (same format, reordered by relevance)
         """
 
-        if not self.enabled:
+        if not self.is_enabled():
             logger.warning("Cohere Reranker disabled - returning original order")
             return documents
-        
+
         if not documents:
             return []
-        
+
         max_docs = 100
         if len(documents) > max_docs:
             logger.warning(
                 f"Too many documents ({len(documents)}), limiting to {max_docs}"
             )
             documents = documents[:max_docs]
-        
-        # Exctract text content for reranking 
-        doc_texts = []
-        for doc in documents:
-            content = doc.get('content', '')
-            if not content:
-                content = f"{doc.get('classification_type', '')} {doc.get('property_address', '')}"
-            doc_texts.append(content)
 
         # Use the provided top_n or default
         top_n = top_n or self.top_n
         top_n = min(top_n, len(documents))
 
+        scores = self.score(query, documents)
+        if scores is None:
+            logger.warning("Falling back to original document order")
+            return documents
+
+        ranked = sorted(enumerate(scores), key=lambda item: item[1], reverse=True)[:top_n]
+        reranked_docs = []
+        for index, relevance_score in ranked:
+            doc = documents[index].copy()
+            # Add the relevance score to the document (0-1, higher is better) without
+            # lowering a stronger retrieval score
+            doc['rerank_score'] = relevance_score
+            doc['similarity_score'] = max(doc.get('similarity_score', 0.0) or 0.0, relevance_score)
+            reranked_docs.append(doc)
+
+        logger.info(
+            f"Cohere Reranker: Re-ranked {len(reranked_docs)} documents "
+            f"(Top {top_n} from {len(documents)} candidates)"
+        )
+        return reranked_docs
+
+    def score(self, query: str, documents: List[Dict[str, Any]]) -> Optional[List[float]]:
+        """
+        Relevance score (0-1) for every document, aligned with the input list.
+
+        Cached scores are reused; only misses are sent to Cohere (batched, truncated).
+        If Cohere cannot score them, all candidates are scored by the local cross-encoder
+        so scores in one ranking always come from one model. Returns None if neither works.
+        """
+        if not documents:
+            return []
+        texts = [_candidate_text(doc) for doc in documents]
+        ids = [_candidate_id(doc, text) for doc, text in zip(documents, texts)]
+        qhash = query_hash(query)
+
+        if self.enabled:
+            scores = self._score_cached(self.model, qhash, ids, texts,
+                                        lambda miss_texts: self._score_cohere(query, miss_texts))
+            if scores is not None:
+                return scores
+        if self.local_fallback:
+            return self._score_cached('local', qhash, ids, texts,
+                                      lambda miss_texts: self._score_local(query, miss_texts))
+        return None
+
+    def _score_cached(self, model: str, qhash: str, ids: List[str], texts: List[str], scorer) -> Optional[List[float]]:
+        # Duplicate ids (same chunk reached twice) are scored once
+        unique_ids = list(dict.fromkeys(ids))
+        cached = self.cache.get_many(model, qhash, unique_ids)
+        text_by_id = dict(zip(ids, texts))
+        misses = [cid for cid in unique_ids if cid not in cached]
+
+        if misses:
+            miss_scores = scorer([text_by_id[cid] for cid in misses])
+            if miss_scores is None:
+                return None
+            fresh = dict(zip(misses, miss_scores))
+            self.cache.set_many(model, qhash, fresh)
+            cached.update(fresh)
+        logger.debug(f"Reranker ({model}): {len(unique_ids) - len(misses)} cached, {len(misses)} scored")
+        return [cached[cid] for cid in ids]
+
+    def _truncate(self, query: str, text: str) -> str:
+        budget_tokens = max(64, COHERE_RERANK_MAX_TOKENS - len(query) // _CHARS_PER_TOKEN - 16)
+        max_chars = budget_tokens * _CHARS_PER_TOKEN
+        return text if len(text) <= max_chars else text[:max_chars]
+
+    def _score_cohere(self, query: str, texts: List[str]) -> Optional[List[float]]:
+        """Score texts with Cohere in batches (run concurrently); None on any failure."""
+        texts = [self._truncate(query, text) for text in texts]
+        batches = [texts[i:i + COHERE_RERANK_BATCH_SIZE] for i in range(0, len(texts), COHERE_RERANK_BATCH_SIZE)]
+        if len(batches) == 1:
+            results = [self._cohere_batch(query, batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(4, len(batches))) as executor:
+                results = list(executor.map(lambda batch: self._cohere_batch(query, batch), batches))
+        if any(result is None for result in results):
+            return None
+        return [score for batch_scores in results for score in batch_scores]
+
+    def _cohere_batch(self, query: str, doc_texts: List[str]) -> Optional[List[float]]:
         try:
             # Validate API key is still available
             if not self.api_key:
                 logger.error("Cohere API key not available during rerank call")
-                return documents
-            
+                return None
+
             # call the cohere api
             headers = {
                 'Authorization': f'Bearer {self.api_key}',
                 'Content-Type': 'application/json'
             }
 
+            # top_n = every candidate so each one gets a cacheable score
             payload = {
                 'model': self.model,
                 'query': query,
                 'documents': doc_texts,
-                'top_n': top_n,
+                'top_n': len(doc_texts),
                 'return_documents': False # We have the documents already
             }
 
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
+            with span('cohere.rerank', 'cohere', model=self.model, documents=len(doc_texts), top_n=len(doc_texts)) as rerank_span:
+                response = self._session.post(
+                    self.api_url,
+                    headers=headers,
+                    json=payload,
+                    timeout=COHERE_RERANK_TIMEOUT_SECONDS
+                )
+                if rerank_span is not None:
+                    rerank_span.set(status=response.status_code, response_bytes=len(response.content))
             response.raise_for_status()
 
             result = response.json()
 
-            # Map the cohere results back to original documents
-            reranked_docs = []
+            # Map the cohere results back to input positions
+            scores = [0.0] * len(doc_texts)
             for item in result.get('results', []):
                 index = item.get('index', -1)
-                relevance_score = item.get('relevance_score', 0.0)
-
-                if index >= 0 and index < len(documents):
-                    doc = documents[index].copy()
-                    # Add the cohere relevance score to the document (0-1, higher is better)
-                    doc['similarity_score'] = relevance_score
-                    # update the similarity_score to include Cohere's score
-                    doc['similarity_score'] = max(
-                        doc.get('similarity_score', 0.0),
-                        relevance_score
-                    )
-                    reranked_docs.append(doc)
-
-            logger.info(
-                f"Cohere Reranker: Re-ranked {len(reranked_docs)} documents "
-                f"(Top {top_n} from {len(documents)} candidates)"
-            )
-
-            return reranked_docs
+                if 0 <= index < len(doc_texts):
+                    scores[index] = float(item.get('relevance_score', 0.0))
+            return scores
 
         except requests.exceptions.HTTPError as e:
             # Handle specific HTTP errors (401 = unauthorized, 403 = forbidden, etc.)
-            if e.response and e.response.status_code == 401:
+            if e.response is not None and e.response.status_code == 401:
                 logger.error("Cohere API authentication failed - check COHERE_API_KEY is valid")
-            elif e.response and e.response.status_code == 403:
+            elif e.response is not None and e.response.status_code == 403:
                 logger.error("Cohere API access forbidden - check API key permissions")
             else:
                 logger.error(f"Cohere rerank API HTTP error: {e}")
-            logger.warning("Falling back to original document order")
-            return documents
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(f"Cohere rerank API request error: {e}")
-            logger.warning("Falling back to original document order")
-            return documents
-        
+            return None
+
         except Exception as e:
             logger.error(f"Unexpected error in Cohere reranker: {e}")
-            logger.warning("falling back to original document order")
-            return documents
-        
-    
+            return None
+
+    def _score_local(self, query: str, texts: List[str]) -> Optional[List[float]]:
+        """Score texts with the embedding server's cross-encoder; None if it is unavailable."""
+        if time.time() < self._local_disabled_until:
+            return None
+        try:
+            with span('local.rerank', 'local_model', documents=len(texts)):
+                response = self._session.post(
+                    self.local_url,
+                    json={'query': query, 'documents': texts},
+                    timeout=LOCAL_RERANK_TIMEOUT_SECONDS
+                )
+            response.raise_for_status()
+            scores = response.json().get('scores', [])
+            if len(scores) != len(texts):
+                raise ValueError(f"Score count mismatch: expected {len(texts)}, got {len(scores)}")
+            return [float(score) for score in scores]
+        except Exception as e:
+            logger.warning(f"Local cross-encoder rerank failed ({e}); skipping it for {LOCAL_RERANK_RETRY_SECONDS:.0f}s")
+            self._local_disabled_until = time.time() + LOCAL_RERANK_RETRY_SECONDS
+            return None
+
     def is_enabled(self) -> bool:
-        """Check if reranker is available."""
-        return self.enabled
-        
+        """Check if reranker is available (Cohere or the local cross-encoder fallback)."""
+        return self.enabled or self.local_fallback
 
 
+_instance_lock = threading.Lock()
+_default_reranker: Optional[CohereReranker] = None
 
 
+def get_reranker() -> CohereReranker:
+    """Shared reranker (one HTTP session and score cache per process)."""
+    global _default_reranker
+    if _default_reranker is None:
+        with _instance_lock:
+            if _default_reranker is None:
+                _default_reranker = CohereReranker()
+    return _default_reranker
@@ -1,7 +1,10 @@
 import asyncio
 import logging
 import threading
-from typing import Any, AsyncIterator, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from backend.llm.runtime.loop_lag import LoopLagMonitor
+from backend.services import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +26,7 @@ class GraphRunner:
         self._ready_error: Optional[BaseException] = None
         self._graph: Any = None
         self._checkpointer: Any = None
+        self._lag_monitor = LoopLagMonitor()
 
     def start(self) -> None:
         """Start the background runner thread (idempotent)."""
@@ -66,6 +70,8 @@ class GraphRunner:
     async def _initialize(self) -> None:
         from backend.llm.graphs.main_graph import build_main_graph, create_checkpointer_for_current_loop
 
+        self._lag_monitor.start()
+
         logger.info("GraphRunner initializing checkpointer + compiled graph...")
         checkpointer = await create_checkpointer_for_current_loop()
         if checkpointer:
@@ -86,7 +92,12 @@ class GraphRunner:
         self.wait_ready()
         return self._checkpointer
 
-    def run_query_sync(self, initial_state: dict, thread_id: Optional[str]) -> dict:
+    def loop_lag_stats(self) -> Dict[str, Any]:
+        """Scheduling lag of the runner loop (see LoopLagMonitor)."""
+        return self._lag_monitor.snapshot()
+
+    def run_query_sync(self, initial_state: dict, thread_id: Optional[str],
+                       trace: Optional[tracing.Trace] = None) -> dict:
         """
         Run graph.ainvoke on the runner loop and block for the result.
         Used by non-stream endpoint after endpoint refactor.
@@ -95,18 +106,38 @@ class GraphRunner:
         if not self._loop:
             raise RuntimeError("GraphRunner loop not available")
 
+        trace = trace or tracing.current_trace()
+
         async def _run() -> dict:
+            # The runner loop is another thread; re-attach the caller's query trace
+            tracing.attach(trace)
             cfg = {"configurable": {"thread_id": thread_id}} if thread_id else {}
+            cfg["callbacks"] = tracing.llm_trace_callbacks()
             return await self._graph.ainvoke(initial_state, cfg)
 
         fut = asyncio.run_coroutine_threadsafe(_run(), self._loop)
         return fut.result()
 
+    def get_checkpoint_tuple_sync(self, thread_id: str, timeout: float = 10.0) -> Any:
+        """
+        Load the latest checkpoint tuple for a thread via the async checkpointer on the
+        runner loop (the checkpointer is bound to that loop, so its sync API can't be used
+        from Flask threads).
+        """
+        self.wait_ready()
+        if not self._loop or not self._checkpointer:
+            return None
+
+        cfg = {"configurable": {"thread_id": thread_id}}
+        fut = asyncio.run_coroutine_threadsafe(self._checkpointer.aget_tuple(cfg), self._loop)
+        return fut.result(timeout=timeout)
+
     def stream_events_sync(
         self,
         initial_state: dict,
         thread_id: Optional[str],
         version: str = "v2",
+        trace: Optional[tracing.Trace] = None,
     ) -> AsyncIterator[dict]:
         """
         Return an async iterator of graph.astream_events bound to runner loop.
@@ -117,8 +148,12 @@ class GraphRunner:
         if not self._loop:
             raise RuntimeError("GraphRunner loop not available")
 
+        trace = trace or tracing.current_trace()
+
         async def _iter() -> AsyncIterator[dict]:
+            tracing.attach(trace)
             cfg = {"configurable": {"thread_id": thread_id}} if thread_id else {}
+            cfg["callbacks"] = tracing.llm_trace_callbacks()
             async for ev in self._graph.astream_events(initial_state, cfg, version=version):
                 yield ev
 
@@ -0,0 +1,76 @@
+"""
+Event-loop lag monitor for the GraphRunner loop.
+
+A background task sleeps for a fixed interval and records how late it wakes up. Any
+synchronous work on the loop thread (blocking HTTP, DB calls, CPU-heavy parsing) shows up
+directly as lag, so these numbers show whether one conversation is stalling the others.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LAG_INTERVAL_SECONDS = float(os.environ.get('LOOP_LAG_INTERVAL_SECONDS', '0.25'))
+LAG_WARN_MS = float(os.environ.get('LOOP_LAG_WARN_MS', '200'))
+_SAMPLE_WINDOW = int(os.environ.get('LOOP_LAG_SAMPLES', '2400'))  # ~10 min at 0.25s
+
+
+class LoopLagMonitor:
+    """Samples scheduling lag of an asyncio loop into a fixed-size window."""
+
+    def __init__(self, interval: float = LAG_INTERVAL_SECONDS, window: int = _SAMPLE_WINDOW):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._blocked_count = 0
+
+    def start(self) -> None:
+        """Start sampling on the current running loop (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+            with self._lock:
+                self._samples.append(lag_ms)
+                if lag_ms >= LAG_WARN_MS:
+                    self._blocked_count += 1
+            if lag_ms >= LAG_WARN_MS:
+                logger.warning(f"[LOOP_LAG] Graph loop blocked for {lag_ms:.0f}ms")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            blocked = self._blocked_count
+        if not samples:
+            return {'samples': 0}
+
+        def pct(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+        return {
+            'samples': len(samples),
+            'interval_ms': self.interval * 1000,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'p99_ms': pct(0.99),
+            'max_ms': round(samples[-1], 1),
+            'blocked_over_threshold': blocked,
+            'threshold_ms': LAG_WARN_MS,
+        }
@@ -0,0 +1,46 @@
+"""
+Bounded thread pool for synchronous tools called from graph nodes.
+
+Graph nodes run on the GraphRunner loop, shared by every in-flight conversation. Sync tools
+(Supabase .execute(), Voyage HTTP, numpy rescoring) must not run on that thread, so nodes
+await them through run_sync_tool instead. The pool is bounded (EXECUTOR_TOOL_THREADS) so a
+burst of queries queues here rather than exhausting database connections.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+TOOL_THREADS = int(os.environ.get('EXECUTOR_TOOL_THREADS', '16'))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_tool_pool() -> ThreadPoolExecutor:
+    """Process-wide tool pool (created on first use)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="graph-tool")
+                logger.info(f"Graph tool pool started ({TOOL_THREADS} threads)")
+    return _pool
+
+
+async def run_sync_tool(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a synchronous tool on the tool pool without blocking the event loop.
+
+    Context variables (request/trace ids) are copied into the worker thread.
+    """
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_tool_pool(), call)
@@ -8,12 +8,29 @@ Uses vector similarity search on chunks, scoped to documents selected in Level 1
 Implements global reranking to prevent context explosion (selects top 8-15 chunks total).
 """
 
-from typing import List, Dict, Optional, Literal
+from typing import List, Dict, Optional, Literal, Tuple
+import asyncio
+import json
 import logging
+import random
+import numpy as np
 from pydantic import BaseModel, Field
 from langchain_core.tools import StructuredTool
-from backend.services.supabase_client_factory import get_supabase_client
+from backend.services.supabase_client_factory import get_supabase_client, get_async_supabase_client
+from backend.llm.utils.query_embedding import embed_query, aembed_query
 from backend.services.local_embedding_service import get_default_service
+from backend.services.performance_service import track_db_query
+from backend.services.ann_index import ann_index
+from backend.services.document_catalog import document_catalog
+from backend.services.embedding_quantization import (
+    QUANTIZED_EMBEDDINGS_ENABLED,
+    QUANTIZED_RESCORE_MULTIPLIER,
+    decode_int8,
+    embedding_select,
+    is_int8_literal,
+)
+from backend.llm.utils import lexical_search
+from backend.llm.config import config
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +47,7 @@ class ChunkRetrievalInput(BaseModel):
     )
 
 
+@track_db_query('retrieve_chunks')
 def retrieve_chunks(
     query: str,
     document_ids: List[str],
@@ -57,632 +75,245 @@ def retrieve_chunks(
     """
     try:
         # 1. Validate input
-        if not document_ids:
-            logger.warning("No document IDs provided for chunk retrieval")
-            return []
-        
-        if not isinstance(document_ids, list):
-            logger.warning(f"document_ids must be a list, got {type(document_ids)}")
-            return []
-        
-        if not query or not query.strip():
-            logger.warning("Empty query provided to retrieve_chunks")
-            return []
-        
-        # Validate document_ids are strings (UUIDs)
-        valid_document_ids = []
-        for doc_id in document_ids:
-            if isinstance(doc_id, str) and doc_id.strip():
-                valid_document_ids.append(doc_id.strip())
-            else:
-                logger.warning(f"Invalid document_id: {doc_id} (skipping)")
-        
+        valid_document_ids = _validate_inputs(query, document_ids)
         if not valid_document_ids:
-            logger.warning("No valid document IDs after validation")
             return []
         
         logger.debug(f"🔍 Chunk retrieval for {len(valid_document_ids)} documents, query: {query[:50]}...")
         
         # 2. HEURISTIC: Determine query profile (not LLM-driven)
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['summarize', 'overview', 'all', 'everything', 'complete', 'entire', 'full']):
-            query_profile = "summary"
-            effective_top_k = 80
-            effective_min_score = 0.2
-            per_doc_limit = None  # Unlimited
-            is_summarize_query = True
-        elif any(word in query_lower for word in ['how', 'why', 'explain', 'what is', 'describe', 'tell me about']):
-            query_profile = "explanation"
-            effective_top_k = 25
-            effective_min_score = 0.4
-            per_doc_limit = 8
-            is_summarize_query = False
-        else:
-            query_profile = "fact"
-            effective_top_k = 8
-            effective_min_score = 0.6
-            per_doc_limit = 3
-            is_summarize_query = False
-        
-        logger.info(f"[RETRIEVER] Query profile: {query_profile} (top_k={effective_top_k}, min_score={effective_min_score}, per_doc_limit={per_doc_limit})")
+        profile = _query_profile(query)
         
         # 3. Generate query embedding using Voyage AI (matches database embeddings)
         # CRITICAL: Chunk embeddings use Voyage AI (1024 dimensions) to match database schema
         # This matches the embeddings stored in document_vectors.embedding column
-        import os
-        use_voyage = os.environ.get('USE_VOYAGE_EMBEDDINGS', 'true').lower() == 'true'
-        
-        if use_voyage:
-            try:
-                from voyageai import Client
-                voyage_api_key = os.environ.get('VOYAGE_API_KEY')
-                if not voyage_api_key:
-                    logger.error("VOYAGE_API_KEY not set, cannot generate chunk embedding")
-                    return []
-                
-                voyage_client = Client(api_key=voyage_api_key)
-                voyage_model = os.environ.get('VOYAGE_EMBEDDING_MODEL', 'voyage-law-2')
-                
-                response = voyage_client.embed(
-                    texts=[query],
-                    model=voyage_model,
-                    input_type='query'  # Use 'query' for query embeddings
-                )
-                query_embedding = response.embeddings[0]
-                logger.debug(f"✅ Using Voyage AI embedding ({len(query_embedding)} dimensions) for chunk search")
-            except Exception as e:
-                logger.error(f"Failed to generate Voyage embedding: {e}")
-                return []
-        else:
-            # Fallback to OpenAI if Voyage is disabled
-            try:
-                from openai import OpenAI
-                openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
-                response = openai_client.embeddings.create(
-                    model="text-embedding-3-small",
-                    input=[query]
-                )
-                query_embedding = response.data[0].embedding
-                logger.warning(f"⚠️ Using OpenAI embedding ({len(query_embedding)} dimensions) - Voyage is disabled")
-            except Exception as e:
-                logger.error(f"Failed to generate OpenAI embedding: {e}")
-                return []
-        
+        query_embedding = embed_query(query, purpose='chunk')
+        if query_embedding is None:
+            return []
         logger.debug(f"   Query embedding dimension: {len(query_embedding)}")
         
         # 4. Get Supabase client
         supabase = get_supabase_client()
         
         # 5. Verify documents belong to business_id if provided (for multi-tenancy)
-        if business_id:
+        # Business and display metadata come from the process-wide document catalog
+        business_uuid = business_id if _is_uuid(business_id) else None
+        try:
+            catalog = document_catalog.lookup(supabase, valid_document_ids)
+        except Exception as catalog_error:
+            if business_uuid:
+                raise
+            logger.warning(f"   Failed to fetch document metadata: {catalog_error}")
+            catalog = {}
+        if business_uuid:
+            valid_document_ids = _filter_documents_by_business(valid_document_ids, list(catalog.values()), business_id)
+            if not valid_document_ids:
+                return []
+        
+        # 5a. Local ANN index (hot tenants): one row fetch replaces the per-document RPCs
+        local_rows = {}
+        local_hits = _local_vector_hits(business_uuid, query_embedding, valid_document_ids, profile)
+        if local_hits:
             try:
-                from uuid import UUID
-                UUID(business_id)  # Validate UUID format
-                # Check business_uuid for all documents
-                doc_check = supabase.table('documents').select('id, business_uuid').in_('id', valid_document_ids).execute()
-                business_map = {str(doc['id']): doc.get('business_uuid') for doc in doc_check.data or []}
-                valid_document_ids = [doc_id for doc_id in valid_document_ids if str(business_map.get(doc_id)) == business_id]
-                if not valid_document_ids:
-                    logger.warning(f"   No documents found for business_id {business_id[:8]}... after filtering")
-                    return []
-                logger.debug(f"   Filtered to {len(valid_document_ids)} documents for business_id {business_id[:8]}...")
-            except (ValueError, TypeError):
-                logger.warning(f"   business_id '{business_id}' is not a valid UUID, skipping business filter")
+                rows_response = _chunk_rows_request(supabase, _hit_ids(local_hits)).execute()
+                local_rows = _local_vector_rows(local_hits, rows_response.data or [], query_embedding, profile)
+                _check_local_recall(business_uuid, query_embedding, local_hits, profile)
+            except Exception as local_error:
+                logger.warning(f"   ANN index row fetch failed, using match_chunks: {local_error}")
         
         # 6. Search chunks within each document (HYBRID: Vector + Keyword)
-        
         all_chunks = []
-        document_metadata_cache = {}  # Cache document metadata (filename and classification_type)
-        
         for doc_id in valid_document_ids:
             try:
-                # 5a. For summarize queries: get ALL chunks directly (bypass vector search)
-                # For normal queries: use vector similarity search
-                if is_summarize_query:
-                    # Summarize: Get ALL chunks directly from database, no similarity filtering
-                    logger.debug(f"   Summarize query - getting ALL chunks for document: {doc_id[:8]}...")
-                    direct_query = supabase.table('document_vectors').select(
-                        'id, document_id, chunk_index, chunk_text, chunk_text_clean, page_number, metadata, bbox, blocks'
-                    ).eq('document_id', doc_id).order('page_number').order('chunk_index').execute()
-                    
-                    vector_chunks = direct_query.data or []
-                    # Add a dummy similarity score (1.0) for all chunks since we're not filtering by similarity
-                    for chunk in vector_chunks:
-                        chunk['similarity'] = 1.0
-                    logger.info(f"   ✅ Retrieved {len(vector_chunks)} chunks directly from document {doc_id[:8]} (summarize mode)")
-                    if vector_chunks:
-                        # Debug: log first chunk structure
-                        first_chunk = vector_chunks[0]
-                        logger.info(f"   First chunk keys: {list(first_chunk.keys())}, has 'id': {'id' in first_chunk}, id value: {first_chunk.get('id', 'MISSING')}")
-                        logger.info(f"   First chunk sample: {str(first_chunk)[:200]}...")
-                    else:
-                        logger.error(f"   ⚠️ CRITICAL: No chunks returned from Supabase for document {doc_id[:8]}!")
+                if doc_id in local_rows:
+                    vector_chunks = _vector_rows(doc_id, local_rows[doc_id], profile)
                 else:
-                    # Normal queries: Vector search within document using match_chunks() RPC
-                    logger.debug(f"   Vector search for chunks in document: {doc_id[:8]}...")
-                    
-                    # More permissive threshold for initial retrieval
-                    match_threshold = max(0.2, effective_min_score * 0.5)
-                    match_count = effective_top_k * 2  # Get more candidates for reranking
-                    
-                    vector_response = supabase.rpc(
-                        'match_chunks',
-                        {
-                            'query_embedding': query_embedding,
-                            'target_document_id': doc_id,
-                            'match_threshold': match_threshold,
-                            'match_count': match_count
-                        }
-                    ).execute()
-                    
-                    vector_chunks = vector_response.data or []
-                    logger.debug(f"   Vector search found {len(vector_chunks)} chunks in document {doc_id[:8]}")
+                    vector_chunks = _vector_rows(
+                        doc_id, _document_vector_request(supabase, doc_id, query_embedding, profile).execute().data, profile
+                    )
                 
-                # 5b. Keyword search on chunk_text for exact matches (complements vector search)
                 # SKIP keyword search for summarize queries (we already have all chunks)
                 keyword_chunks = []
-                if not is_summarize_query:
+                if not profile['is_summarize_query']:
                     try:
-                        query_lower = query.lower().strip()
-                        query_words = [w for w in query_lower.split() if len(w) > 3]  # Only words longer than 3 chars
-                        
-                        keyword_query = supabase.table('document_vectors').select(
-                            'id, document_id, chunk_index, chunk_text, chunk_text_clean, page_number, metadata, bbox, blocks'
-                        ).eq('document_id', doc_id)
-                        
-                        # Search in chunk_text
-                        or_conditions = [f'chunk_text.ilike.%{query_lower}%', f'chunk_text_clean.ilike.%{query_lower}%']
-                        if len(query_words) > 1:
-                            for word in query_words:
-                                or_conditions.append(f'chunk_text.ilike.%{word}%')
-                                or_conditions.append(f'chunk_text_clean.ilike.%{word}%')
-                        
-                        keyword_query = keyword_query.or_(','.join(or_conditions)).limit(effective_top_k).execute()
-                        keyword_chunks = keyword_query.data or []
+                        keyword_chunks = _document_keyword_request(supabase, doc_id, query, profile).execute().data or []
                         logger.debug(f"   Keyword search found {len(keyword_chunks)} chunks in document {doc_id[:8]}")
                     except Exception as kw_error:
+                        lexical_search.record_failure(kw_error)
                         logger.warning(f"   Keyword search failed for document {doc_id[:8]}: {kw_error}")
-                        keyword_chunks = []
                 
-                # 5c. Combine vector and keyword results (deduplicate by chunk_id)
-                chunks_dict = {}
-                vector_chunk_ids = []  # Track chunk IDs from vector search for bbox lookup
-                logger.info(f"   Processing {len(vector_chunks)} vector_chunks for document {doc_id[:8]}...")
-                for idx, chunk in enumerate(vector_chunks):
-                    chunk_id = str(chunk.get('id', ''))
-                    if not chunk_id:
-                        # For summarize queries, chunks might not have id in the response
-                        # Use document_id + chunk_index as fallback identifier
-                        chunk_id = f"{doc_id}_{chunk.get('chunk_index', idx)}"
-                        logger.info(f"   Chunk {idx} missing 'id', using fallback: {chunk_id[:30]}...")
-                    
-                    # Track if bbox is missing (match_chunks RPC might not return it)
-                    if not chunk.get('bbox') or not isinstance(chunk.get('bbox'), dict):
-                        vector_chunk_ids.append(chunk_id)
-                    
-                    chunks_dict[chunk_id] = {
-                        **chunk,
-                        'similarity': float(chunk.get('similarity', 1.0))
-                    }
-                logger.info(f"   Added {len(chunks_dict)} chunks to chunks_dict for document {doc_id[:8]}")
+                chunks_dict, vector_chunk_ids = _collect_vector_hits(doc_id, vector_chunks)
                 
-                # 5c.1. Fetch bbox for vector chunks that don't have it (match_chunks RPC might not return bbox)
+                # Fetch bbox for vector chunks that don't have it (match_chunks RPC might not return bbox)
                 if vector_chunk_ids:
                     try:
                         logger.debug(f"   Fetching bbox for {len(vector_chunk_ids)} vector chunks missing bbox...")
-                        bbox_response = supabase.table('document_vectors').select(
-                            'id, bbox, blocks'
-                        ).in_('id', vector_chunk_ids).execute()
-                        
-                        for row in bbox_response.data or []:
-                            chunk_id = str(row.get('id'))
-                            bbox = row.get('bbox')
-                            blocks = row.get('blocks', [])
-                            
-                            if chunk_id in chunks_dict:
-                                # Always attach blocks for block-level citations (match_chunks RPC doesn't return them)
-                                if blocks and isinstance(blocks, list):
-                                    chunks_dict[chunk_id]['blocks'] = blocks
-                                    logger.debug(f"   ✅ Added {len(blocks)} blocks to {chunk_id[:8]}...")
-                                # Prefer chunk-level bbox, fallback to first block's bbox
-                                if isinstance(bbox, dict) and bbox.get('left') is not None:
-                                    chunks_dict[chunk_id]['bbox'] = bbox
-                                    logger.debug(f"   ✅ Added chunk-level bbox to {chunk_id[:8]}...")
-                                elif blocks and isinstance(blocks, list) and len(blocks) > 0:
-                                    first_block = blocks[0]
-                                    if isinstance(first_block, dict):
-                                        block_bbox = first_block.get('bbox')
-                                        if isinstance(block_bbox, dict) and block_bbox.get('left') is not None:
-                                            chunks_dict[chunk_id]['bbox'] = block_bbox
-                                            logger.debug(f"   ✅ Added block-level bbox to {chunk_id[:8]}...")
-                                else:
-                                    logger.debug(f"   ⚠️ No valid bbox found for {chunk_id[:8]}... (bbox={bbox}, blocks={len(blocks) if blocks else 0})")
+                        bbox_response = _bbox_request(supabase, vector_chunk_ids).execute()
+                        _attach_bbox_rows(chunks_dict, bbox_response.data or [])
                     except Exception as bbox_fetch_error:
                         logger.warning(f"   Failed to fetch bbox for vector chunks: {bbox_fetch_error}")
                 
-                # Add keyword matches with quality-based scoring (skip for summarize queries)
-                if not is_summarize_query and keyword_chunks:
-                    query_lower = query.lower().strip()
-                    query_words = [w for w in query_lower.split() if len(w) > 3]  # Only words longer than 3 chars
-                    
-                    for chunk in keyword_chunks:
-                        chunk_id = str(chunk.get('id', ''))
-                        chunk_text = (chunk.get('chunk_text', '') or chunk.get('chunk_text_clean', '') or '').lower()
-                        
-                        # Calculate keyword match quality
-                        keyword_score = 0.0
-                        if query_lower in chunk_text:
-                            keyword_score = 0.7  # Exact match
-                        elif any(word in chunk_text for word in query_words if len(word) > 3):
-                            matched_words = sum(1 for word in query_words if word in chunk_text)
-                            keyword_score = min(0.5, 0.1 * matched_words)  # 0.1 per word, max 0.5
-                        else:
-                            keyword_score = 0.2  # Fallback for any match
-                        
-                        if chunk_id in chunks_dict:
-                            # Found in both: small boost (don't clamp!)
-                            original_score = chunks_dict[chunk_id]['similarity']
-                            chunks_dict[chunk_id]['similarity'] = original_score + (keyword_score * 0.1)  # Small boost, no clamping
-                            logger.debug(f"   Chunk {chunk_id[:8]} found in both: vector={original_score:.3f}, boost={keyword_score * 0.1:.3f}")
-                        else:
-                            # Keyword-only: use keyword score (not hardcoded 0.6)
-                            chunks_dict[chunk_id] = {
-                                **chunk,
-                                'similarity': keyword_score  # Quality-based, not hardcoded
-                            }
-                        logger.debug(f"   Chunk {chunk_id[:8]} keyword-only: score={keyword_score:.3f}")
-                
-                chunks = list(chunks_dict.values())
-                logger.info(f"   Combined: {len(chunks)} unique chunks from document {doc_id[:8]} (vector: {len(vector_chunks)}, keyword: {len(keyword_chunks)}, chunks_dict: {len(chunks_dict)})")
-                
-                # CRITICAL: For summarize queries, ensure we have chunks
-                if is_summarize_query and len(chunks) == 0 and len(vector_chunks) > 0:
-                    logger.error(f"   ⚠️ CRITICAL: {len(vector_chunks)} chunks retrieved but 0 chunks in chunks_dict!")
-                    if vector_chunks:
-                        logger.error(f"   First chunk structure: {list(vector_chunks[0].keys())}")
-                        logger.error(f"   First chunk 'id' value: {vector_chunks[0].get('id', 'MISSING')}")
-                    # Fallback: add chunks directly even if they don't have proper IDs
-                    for idx, chunk in enumerate(vector_chunks):
-                        fallback_id = f"{doc_id}_fallback_{idx}"
-                        chunks_dict[fallback_id] = {
-                            **chunk,
-                            'similarity': float(chunk.get('similarity', 1.0))
-                        }
-                    chunks = list(chunks_dict.values())
-                    logger.warning(f"   Fallback: Added {len(chunks)} chunks using fallback IDs")
-                
-                # Get document metadata (cache to avoid repeated queries)
-                if doc_id not in document_metadata_cache:
-                    try:
-                        doc_response = supabase.table('documents').select(
-                            'id, original_filename, classification_type'
-                        ).eq('id', doc_id).limit(1).execute()
-                        
-                        if doc_response.data and len(doc_response.data) > 0:
-                            doc_data = doc_response.data[0]
-                            document_metadata_cache[doc_id] = {
-                                'filename': doc_data.get('original_filename', 'unknown'),
-                                'classification_type': doc_data.get('classification_type', 'unknown')
-                            }
-                        else:
-                            document_metadata_cache[doc_id] = {
-                                'filename': 'unknown',
-                                'classification_type': 'unknown'
-                            }
-                            logger.warning(f"   Document {doc_id[:8]} not found in database")
-                    except Exception as e:
-                        logger.warning(f"   Failed to fetch metadata for document {doc_id[:8]}: {e}")
-                        document_metadata_cache[doc_id] = {
-                            'filename': 'unknown',
-                            'classification_type': 'unknown'
-                        }
-                
-                doc_metadata = document_metadata_cache[doc_id]
-                doc_filename = doc_metadata.get('filename', 'unknown') if isinstance(doc_metadata, dict) else doc_metadata
-                doc_type = doc_metadata.get('classification_type', 'unknown') if isinstance(doc_metadata, dict) else 'unknown'
-                
-                # 5d. Format chunks with metadata
-                logger.info(f"   Formatting {len(chunks)} chunks for document {doc_id[:8]}...")
-                formatted_count = 0
-                for chunk in chunks:
-                    try:
-                        chunk_metadata = chunk.get('metadata', {})
-                        if isinstance(chunk_metadata, str):
-                            # Handle case where metadata might be a JSON string
-                            try:
-                                import json
-                                chunk_metadata = json.loads(chunk_metadata)
-                            except:
-                                chunk_metadata = {}
-                        
-                        # Get chunk_id - use fallback if missing
-                        chunk_id = str(chunk.get('id', ''))
-                        if not chunk_id:
-                            chunk_id = f"{doc_id}_{chunk.get('chunk_index', formatted_count)}"
-                        
-                        # Ensure we have chunk text
-                        chunk_text = chunk.get('chunk_text', '') or chunk.get('chunk_text_clean', '')
-                        if not chunk_text:
-                            logger.warning(f"   Skipping chunk {chunk_id[:20]}... - no chunk text")
-                            continue
-                        
-                        chunk_bbox = chunk.get('bbox')
-                        # Log bbox status for debugging
-                        if not chunk_bbox or not isinstance(chunk_bbox, dict):
-                            logger.debug(f"   ⚠️ Chunk {chunk_id[:8]}... has no bbox (type: {type(chunk_bbox)})")
-                        
-                        # Include blocks for block-level citation highlighting (more precise than chunk-level)
-                        blocks = chunk.get('blocks', [])
-                        
-                        all_chunks.append({
-                            'chunk_id': chunk_id,
-                            'document_id': doc_id,
-                            'document_filename': doc_filename,
-                            'document_type': doc_type,  # Include document type for metadata
-                            'chunk_index': chunk.get('chunk_index', formatted_count),
-                            'chunk_text': chunk.get('chunk_text', ''),
-                            'chunk_text_clean': chunk.get('chunk_text_clean', ''),
-                            'page_number': chunk.get('page_number', 0),
-                            'bbox': chunk_bbox,  # Chunk-level bbox (fallback)
-                            'blocks': blocks,  # Block-level data for precise citation highlighting
-                            'section_title': chunk_metadata.get('section_title') if isinstance(chunk_metadata, dict) else None,
-                            'score': round(float(chunk.get('similarity', 1.0)), 4),
-                            'metadata': chunk_metadata if isinstance(chunk_metadata, dict) else {}
-                        })
-                        formatted_count += 1
-                    except Exception as format_error:
-                        logger.error(f"   Failed to format chunk {formatted_count} from document {doc_id[:8]}: {format_error}", exc_info=True)
-                        continue
-                logger.info(f"   ✅ Formatted {formatted_count} chunks for document {doc_id[:8]} (total all_chunks: {len(all_chunks)})")
+                # Document metadata (filename and classification_type)
+                doc_metadata = _parse_document_metadata(doc_id, catalog.get(doc_id))
                 
+                all_chunks.extend(_finalize_document_chunks(
+                    doc_id, query, profile, chunks_dict, vector_chunks, keyword_chunks, doc_metadata
+                ))
             except Exception as doc_error:
                 # Continue to next document if one fails
                 logger.warning(f"   Failed to retrieve chunks for document {doc_id[:8]}: {doc_error}")
                 continue
         
         if not all_chunks:
-            logger.warning(f"   No chunks found for query: {query[:50]}...")
-            logger.warning(f"   Debug: is_summarize_query={is_summarize_query}, valid_document_ids={len(valid_document_ids)}")
-            # For summarize queries, this should never happen if documents have chunks
-            if is_summarize_query:
-                logger.error(f"   ⚠️ CRITICAL: Summarize query returned 0 chunks for {len(valid_document_ids)} documents!")
-                logger.error(f"   This suggests documents might not have chunks in the database.")
+            _log_no_chunks(query, profile, valid_document_ids)
             return []
         
-        # 6. Deduplicate chunks by chunk_id and ensure bbox is available
-        seen_chunk_ids = set()
-        unique_chunks = []
-        chunks_needing_bbox = []  # Track chunks that need bbox lookup
-        
-        for chunk in all_chunks:
-            chunk_id = chunk.get('chunk_id')
-            if chunk_id and chunk_id not in seen_chunk_ids:
-                seen_chunk_ids.add(chunk_id)
-                # Check if bbox is missing - we'll fetch it later
-                if not chunk.get('bbox') or not isinstance(chunk.get('bbox'), dict):
-                    chunks_needing_bbox.append(chunk_id)
-                unique_chunks.append(chunk)
-            elif not chunk_id:
-                # Include chunks without IDs (shouldn't happen, but handle gracefully)
-                unique_chunks.append(chunk)
-        
-        # 6a. Fetch missing bbox data from database (batch lookup)
+        # 7. Deduplicate chunks by chunk_id and ensure bbox is available
+        unique_chunks, chunks_needing_bbox = _dedupe_chunks(all_chunks)
+        
+        # 7a. Fetch missing bbox data from database (batch lookup)
         if chunks_needing_bbox:
             try:
                 logger.debug(f"   Fetching bbox data for {len(chunks_needing_bbox)} chunks missing bbox...")
-                bbox_response = supabase.table('document_vectors').select(
-                    'id, bbox, blocks'
-                ).in_('id', chunks_needing_bbox).execute()
-                
-                # Create lookup maps for bbox and blocks (chunks may lack both when from RPCs that don't return them)
-                bbox_lookup = {}
-                blocks_lookup = {}
-                for row in bbox_response.data or []:
-                    chunk_id = row.get('id')
-                    bbox = row.get('bbox')
-                    blocks = row.get('blocks', [])
-                    if blocks and isinstance(blocks, list):
-                        blocks_lookup[chunk_id] = blocks
-                    # Prefer chunk-level bbox, fallback to first block's bbox
-                    if isinstance(bbox, dict) and bbox.get('left') is not None:
-                        bbox_lookup[chunk_id] = bbox
-                    elif blocks and isinstance(blocks, list) and len(blocks) > 0:
-                        first_block = blocks[0]
-                        if isinstance(first_block, dict):
-                            block_bbox = first_block.get('bbox')
-                            if isinstance(block_bbox, dict) and block_bbox.get('left') is not None:
-                                bbox_lookup[chunk_id] = block_bbox
-                                logger.debug(f"   Using block bbox for chunk {str(chunk_id)[:8]}...")
-                
-                # Update chunks with bbox and blocks
-                for chunk in unique_chunks:
-                    chunk_id = chunk.get('chunk_id')
-                    if chunk_id in bbox_lookup:
-                        chunk['bbox'] = bbox_lookup[chunk_id]
-                        logger.debug(f"   ✅ Added bbox to chunk {str(chunk_id)[:8]}...")
-                    if chunk_id in blocks_lookup:
-                        chunk['blocks'] = blocks_lookup[chunk_id]
-                        logger.debug(f"   ✅ Added {len(blocks_lookup[chunk_id])} blocks to chunk {str(chunk_id)[:8]}...")
+                bbox_response = _bbox_request(supabase, chunks_needing_bbox).execute()
+                _apply_bbox_lookup(unique_chunks, bbox_response.data or [])
             except Exception as bbox_error:
                 logger.warning(f"   Failed to fetch bbox data: {bbox_error}")
                 # Continue without bbox - citations will still work but without highlighting
         
         logger.debug(f"   Deduplicated: {len(all_chunks)} → {len(unique_chunks)} chunks")
         
-        # 6.5. Global reranking: Re-compute vector similarity for all chunks
+        # 7b. Global reranking: Re-compute vector similarity for all chunks
         # This ensures we're ranking by actual vector similarity, not clamped scores
-        logger.debug(f"   Re-computing vector similarity for {len(unique_chunks)} chunks...")
-        
-        # Get all chunk embeddings in one query (more efficient)
         chunk_ids = [chunk['chunk_id'] for chunk in unique_chunks if chunk.get('chunk_id')]
         if chunk_ids:
             try:
-                embeddings_response = supabase.table('document_vectors').select(
-                    'id, embedding'
-                ).in_('id', chunk_ids).execute()
-                
-                # Create mapping of chunk_id -> embedding
-                chunk_embeddings = {}
-                for row in embeddings_response.data or []:
-                    embedding = row.get('embedding')
-                    # Handle both list and string representations of embeddings
-                    if isinstance(embedding, str):
-                        # Parse string representation (PostgreSQL array format)
-                        try:
-                            import ast
-                            embedding = ast.literal_eval(embedding)
-                        except:
-                            # Try JSON parsing
-                            try:
-                                import json
-                                embedding = json.loads(embedding)
-                            except:
-                                logger.warning(f"   Could not parse embedding for chunk {row['id']}")
-                                continue
-                    chunk_embeddings[str(row['id'])] = embedding
-                
-                # Re-compute cosine similarity for all chunks
-                import numpy as np
-                query_vec = np.array(query_embedding, dtype=np.float32)
-                
-                reranked_count = 0
-                for chunk in unique_chunks:
-                    chunk_id = chunk.get('chunk_id')
-                    if chunk_id and chunk_id in chunk_embeddings:
-                        try:
-                            chunk_vec = np.array(chunk_embeddings[chunk_id], dtype=np.float32)
-                            # Cosine similarity
-                            similarity = np.dot(query_vec, chunk_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(chunk_vec))
-                            chunk['score'] = float(similarity)  # Use raw vector similarity
-                            reranked_count += 1
-                        except Exception as vec_error:
-                            logger.debug(f"   Failed to compute similarity for chunk {chunk_id[:8]}: {vec_error}")
-                            # Keep existing score if vector computation fails
-                    # If no embedding found, keep existing score (from keyword match)
-                
-                logger.debug(f"   Re-computed vector similarity for {reranked_count} chunks")
+                logger.debug(f"   Re-computing vector similarity for {len(unique_chunks)} chunks...")
+                embeddings_response = _embeddings_request(supabase, chunk_ids).execute()
+                _rescore_with_embeddings(unique_chunks, embeddings_response.data or [], query_embedding)
             except Exception as rerank_error:
                 logger.warning(f"   Global reranking failed (non-fatal): {rerank_error}")
                 # Continue with existing scores if reranking fails
+        _fuse_keyword_ranks(unique_chunks)
         
-        # 6.6. Per-document chunk limits: Prevent lower-scoring documents from dominating
-        # 7. Group chunks by document and apply per-document limits based on query profile
-        if document_ids and len(document_ids) > 1:
-            chunks_by_doc = {}
-            for chunk in unique_chunks:
-                doc_id = chunk['document_id']
-                if doc_id not in chunks_by_doc:
-                    chunks_by_doc[doc_id] = []
-                chunks_by_doc[doc_id].append(chunk)
-            
-            # Apply per-document limits based on query profile
-            if per_doc_limit is not None:
-                limited_chunks = []
-                for i, doc_id in enumerate(document_ids):
-                    doc_chunks = chunks_by_doc.get(doc_id, [])
-                    # Sort chunks by score within this document
-                    doc_chunks.sort(key=lambda x: x['score'], reverse=True)
-                    
-                    # Use per_doc_limit from query profile
-                    # First doc gets full limit, subsequent docs get slightly less
-                    if i == 0:
-                        max_chunks = per_doc_limit
-                    else:
-                        max_chunks = max(1, int(per_doc_limit * 0.7))  # 70% for subsequent docs
-                    
-                    selected = doc_chunks[:max_chunks]
-                    limited_chunks.extend(selected)
-                    logger.debug(f"   Document {i+1} ({doc_id[:8]}...): {len(doc_chunks)} chunks → {len(selected)} selected (limit: {max_chunks})")
-                
-                unique_chunks = limited_chunks
-                logger.debug(f"   Per-document limits applied: {len(limited_chunks)} chunks total (per_doc_limit={per_doc_limit})")
-            else:
-                # No per-doc limit (summary queries)
-                logger.debug(f"   No per-doc limit (summary query) - keeping all {len(unique_chunks)} chunks")
+        # 7c. Optional cross-encoder reranking (Cohere, local fallback; scores cached per chunk)
+        _apply_rerank_scores(query, unique_chunks, profile)
         
-        # 6.7. Document-level prioritization: Boost chunks from higher-scoring documents
-        # Documents are passed in order from retrieve_docs (sorted by score), so first = highest score
-        if document_ids and len(document_ids) > 1:
-            doc_priority = {}
-            for i, doc_id in enumerate(document_ids):
-                # First document (highest score) gets weight 1.0, second gets 0.9, etc.
-                # This ensures chunks from the most relevant document are prioritized
-                doc_priority[doc_id] = 1.0 - (i * 0.15)  # 0.15 decrement per position
-            
-            # Apply document priority boost to chunk scores
-            # INCREASED BOOST: Changed from 0.2 to 0.8 for stronger prioritization
-            boosted_count = 0
-            for chunk in unique_chunks:
-                doc_id = chunk['document_id']
-                priority_boost = doc_priority.get(doc_id, 0.5)  # Default 0.5 for unknown docs
-                # Boost score by document priority (but don't exceed 1.0)
-                # First document gets 1.8x boost (1.0 + 1.0 * 0.8), second gets 1.52x (1.0 + 0.85 * 0.8)
-                original_score = chunk['score']
-                chunk['score'] = min(1.0, original_score * (1.0 + priority_boost * 0.8))
-                if priority_boost > 0.5:
-                    boosted_count += 1
-            
-            if boosted_count > 0:
-                logger.debug(f"   Applied document priority boost (0.8x) to {boosted_count} chunks from top documents")
-        
-        # 7. Global sorting - depends on search_goal
-        if is_summarize_query:
-            # For summarize queries: sort by document order (page/chunk_index) for coherence
-            unique_chunks.sort(key=lambda x: (
-                x.get('document_id', ''),
-                x.get('page_number', 0),
-                x.get('chunk_index', 0)
-            ))
-        else:
-            # For normal queries: sort by similarity score (descending)
-            unique_chunks.sort(key=lambda x: x['score'], reverse=True)
-        
-        # 8. CRITICAL: Global reranking - select chunks with relative filtering
-        # SPECIAL CASE: For "summarize" queries, return ALL chunks (no filtering)
-        if is_summarize_query:
-            # For summarize queries: return ALL chunks, sorted by page/chunk_index for natural document order
-            final_chunks = unique_chunks
-            logger.debug(f"   Summarize query - returning ALL {len(final_chunks)} chunks (no filtering)")
-        else:
-            # Normal queries: select top 8-15 chunks total with relative filtering
-            # This prevents context explosion (20 docs × 5 chunks = 100 chunks is too much)
-            # Industry standard: Retrieve top-k per doc, then rerank globally, select final 8-15 chunks
-            
-            # Relative thresholding: Only filter if there's a clear quality gap
-            if len(unique_chunks) > 0:
-                top_score = unique_chunks[0]['score']
-                # Only filter if top score is significantly above threshold AND there's a quality gap
-                if top_score > effective_min_score * 1.5:  # Top score is well above threshold
-                    # Filter out chunks that are much worse than the best
-                    quality_gap = top_score - effective_min_score
-                    final_chunks = [c for c in unique_chunks if c['score'] >= (top_score - quality_gap * 0.5)]
-                    # Limit to top 15 regardless
-                    final_chunks = final_chunks[:15]
-                    logger.debug(f"   Relative filtering: {len(unique_chunks)} → {len(final_chunks)} chunks (top_score={top_score:.3f}, gap={quality_gap:.3f})")
-                else:
-                    # No clear quality gap - return top chunks (relative ranking is what matters)
-                    final_chunks = unique_chunks[:15]
-                    logger.debug(f"   No quality gap detected, returning top {len(final_chunks)} chunks")
-            else:
-                final_chunks = []
+        return _select_final_chunks(query, document_ids, valid_document_ids, unique_chunks, profile)
         
-        logger.info(
-            f"✅ Retrieved {len(final_chunks)} chunks from {len(valid_document_ids)} documents "
-            f"(after global reranking from {len(unique_chunks)} total chunks)"
+    except Exception as e:
+        logger.error(f"Chunk retrieval failed: {e}")
+        import traceback
+        logger.debug(traceback.format_exc())
+        return []
+
+
+@track_db_query('retrieve_chunks')
+async def aretrieve_chunks(
+    query: str,
+    document_ids: List[str],
+    business_id: Optional[str] = None
+) -> List[Dict]:
+    """
+    Async variant of retrieve_chunks for graph nodes.
+    
+    Same query profiles, scoring and selection; uses the pooled async Supabase client so
+    documents are searched concurrently (vector RPC and keyword query per
+    document in parallel) rather than one round trip at a time.
+    """
+    try:
+        valid_document_ids = _validate_inputs(query, document_ids)
+        if not valid_document_ids:
+            return []
+        
+        logger.debug(f"🔍 Chunk retrieval for {len(valid_document_ids)} documents, query: {query[:50]}...")
+        
+        profile = _query_profile(query)
+        
+        query_embedding = await aembed_query(query, purpose='chunk')
+        if query_embedding is None:
+            return []
+        logger.debug(f"   Query embedding dimension: {len(query_embedding)}")
+        
+        supabase = await get_async_supabase_client()
+        
+        business_uuid = business_id if _is_uuid(business_id) else None
+        try:
+            catalog = await document_catalog.alookup(supabase, valid_document_ids)
+        except Exception as catalog_error:
+            if business_uuid:
+                raise
+            logger.warning(f"   Failed to fetch document metadata: {catalog_error}")
+            catalog = {}
+        if business_uuid:
+            valid_document_ids = _filter_documents_by_business(valid_document_ids, list(catalog.values()), business_id)
+            if not valid_document_ids:
+                return []
+        
+        local_rows = {}
+        local_hits = _local_vector_hits(business_uuid, query_embedding, valid_document_ids, profile)
+        if local_hits:
+            try:
+                rows_response = await _chunk_rows_request(supabase, _hit_ids(local_hits)).execute()
+                local_rows = _local_vector_rows(local_hits, rows_response.data or [], query_embedding, profile)
+                _check_local_recall(business_uuid, query_embedding, local_hits, profile)
+            except Exception as local_error:
+                logger.warning(f"   ANN index row fetch failed, using match_chunks: {local_error}")
+        
+        per_document = await asyncio.gather(
+            *[
+                _asearch_document(
+                    supabase, doc_id, query, query_embedding, profile,
+                    _parse_document_metadata(doc_id, catalog.get(doc_id)), local_rows.get(doc_id)
+                )
+                for doc_id in valid_document_ids
+            ],
+            return_exceptions=True
         )
+        all_chunks = []
+        for doc_id, doc_chunks in zip(valid_document_ids, per_document):
+            if isinstance(doc_chunks, Exception):
+                logger.warning(f"   Failed to retrieve chunks for document {doc_id[:8]}: {doc_chunks}")
+                continue
+            all_chunks.extend(doc_chunks)
         
-        # 9. Log retrieval quality (Phase 2)
-        log_retrieval_quality(query, valid_document_ids, final_chunks, query_profile)
+        if not all_chunks:
+            _log_no_chunks(query, profile, valid_document_ids)
+            return []
         
-        # 10. Optional: Fallback widening if no results for fact queries
-        if not final_chunks and query_profile == "fact":
-            logger.warning("[RETRIEVER] No results for fact query, trying with lower threshold...")
-            effective_min_score = 0.4
-            # Retry with lower threshold (would need to re-run search, but for now just log)
-            logger.warning("[RETRIEVER] Fallback widening not yet implemented - returning empty")
+        unique_chunks, chunks_needing_bbox = _dedupe_chunks(all_chunks)
+        chunk_ids = [chunk['chunk_id'] for chunk in unique_chunks if chunk.get('chunk_id')]
         
-        return final_chunks
+        # Missing-bbox lookup and embedding fetch for reranking are independent
+        async def _no_rows():
+            return None
+        
+        bbox_response, embeddings_response = await asyncio.gather(
+            _bbox_request(supabase, chunks_needing_bbox).execute() if chunks_needing_bbox else _no_rows(),
+            _embeddings_request(supabase, chunk_ids).execute() if chunk_ids else _no_rows(),
+            return_exceptions=True
+        )
+        if isinstance(bbox_response, Exception):
+            logger.warning(f"   Failed to fetch bbox data: {bbox_response}")
+        elif bbox_response is not None:
+            _apply_bbox_lookup(unique_chunks, bbox_response.data or [])
+        
+        logger.debug(f"   Deduplicated: {len(all_chunks)} → {len(unique_chunks)} chunks")
+        
+        if isinstance(embeddings_response, Exception):
+            logger.warning(f"   Global reranking failed (non-fatal): {embeddings_response}")
+        elif embeddings_response is not None:
+            try:
+                _rescore_with_embeddings(unique_chunks, embeddings_response.data or [], query_embedding)
+            except Exception as rerank_error:
+                logger.warning(f"   Global reranking failed (non-fatal): {rerank_error}")
+        _fuse_keyword_ranks(unique_chunks)
+        
+        if _should_rerank(profile):
+            from backend.llm.runtime.tool_pool import run_sync_tool
+            await run_sync_tool(_apply_rerank_scores, query, unique_chunks, profile)
+        
+        return _select_final_chunks(query, document_ids, valid_document_ids, unique_chunks, profile)
         
     except Exception as e:
         logger.error(f"Chunk retrieval failed: {e}")
@@ -691,6 +322,832 @@ def retrieve_chunks(
         return []
 
 
+async def _asearch_document(
+    supabase,
+    doc_id: str,
+    query: str,
+    query_embedding: List[float],
+    profile: Dict,
+    doc_metadata: Dict[str, str],
+    local_vector_rows: Optional[List[Dict]] = None
+) -> List[Dict]:
+    """
+    Search one document with the async client (vector and keyword search concurrently).
+    
+    doc_metadata comes from the document catalog; local_vector_rows (rows already resolved
+    from the ANN index) replace the match_chunks RPC.
+    """
+    async def _vector():
+        if local_vector_rows is not None:
+            return local_vector_rows
+        response = await _document_vector_request(supabase, doc_id, query_embedding, profile).execute()
+        return response.data
+    
+    async def _keyword():
+        if profile['is_summarize_query']:
+            return []
+        try:
+            response = await _document_keyword_request(supabase, doc_id, query, profile).execute()
+            keyword_chunks = response.data or []
+            logger.debug(f"   Keyword search found {len(keyword_chunks)} chunks in document {doc_id[:8]}")
+            return keyword_chunks
+        except Exception as kw_error:
+            lexical_search.record_failure(kw_error)
+            logger.warning(f"   Keyword search failed for document {doc_id[:8]}: {kw_error}")
+            return []
+    
+    vector_data, keyword_chunks = await asyncio.gather(
+        _vector(),
+        _keyword(),
+    )
+    vector_chunks = _vector_rows(doc_id, vector_data, profile)
+    
+    chunks_dict, vector_chunk_ids = _collect_vector_hits(doc_id, vector_chunks)
+    if vector_chunk_ids:
+        try:
+            logger.debug(f"   Fetching bbox for {len(vector_chunk_ids)} vector chunks missing bbox...")
+            bbox_response = await _bbox_request(supabase, vector_chunk_ids).execute()
+            _attach_bbox_rows(chunks_dict, bbox_response.data or [])
+        except Exception as bbox_fetch_error:
+            logger.warning(f"   Failed to fetch bbox for vector chunks: {bbox_fetch_error}")
+    
+    return _finalize_document_chunks(
+        doc_id, query, profile, chunks_dict, vector_chunks, keyword_chunks, doc_metadata
+    )
+
+
+# ----------------------------------------------------------------------------
+# Shared helpers (sync + async paths build the same queries and scoring)
+# ----------------------------------------------------------------------------
+
+_CHUNK_COLUMNS = 'id, document_id, chunk_index, chunk_text, chunk_text_clean, page_number, metadata, bbox, blocks'
+_UNKNOWN_DOCUMENT_METADATA = {'filename': 'unknown', 'classification_type': 'unknown'}
+
+
+def _validate_inputs(query: str, document_ids: List[str]) -> List[str]:
+    """Return the usable (stripped, non-empty) document IDs, or [] if the call is invalid."""
+    if not document_ids:
+        logger.warning("No document IDs provided for chunk retrieval")
+        return []
+    
+    if not isinstance(document_ids, list):
+        logger.warning(f"document_ids must be a list, got {type(document_ids)}")
+        return []
+    
+    if not query or not query.strip():
+        logger.warning("Empty query provided to retrieve_chunks")
+        return []
+    
+    # Validate document_ids are strings (UUIDs)
+    valid_document_ids = []
+    for doc_id in document_ids:
+        if isinstance(doc_id, str) and doc_id.strip():
+            valid_document_ids.append(doc_id.strip())
+        else:
+            logger.warning(f"Invalid document_id: {doc_id} (skipping)")
+    
+    if not valid_document_ids:
+        logger.warning("No valid document IDs after validation")
+    return valid_document_ids
+
+
+def _query_profile(query: str) -> Dict:
+    """HEURISTIC query profile: fact / explanation / summary with adaptive limits."""
+    query_lower = query.lower()
+    
+    if any(word in query_lower for word in ['summarize', 'overview', 'all', 'everything', 'complete', 'entire', 'full']):
+        profile = {
+            'query_profile': "summary",
+            'effective_top_k': 80,
+            'effective_min_score': 0.2,
+            'per_doc_limit': None,  # Unlimited
+            'is_summarize_query': True,
+        }
+    elif any(word in query_lower for word in ['how', 'why', 'explain', 'what is', 'describe', 'tell me about']):
+        profile = {
+            'query_profile': "explanation",
+            'effective_top_k': 25,
+            'effective_min_score': 0.4,
+            'per_doc_limit': 8,
+            'is_summarize_query': False,
+        }
+    else:
+        profile = {
+            'query_profile': "fact",
+            'effective_top_k': 8,
+            'effective_min_score': 0.6,
+            'per_doc_limit': 3,
+            'is_summarize_query': False,
+        }
+    
+    logger.info(
+        f"[RETRIEVER] Query profile: {profile['query_profile']} (top_k={profile['effective_top_k']}, "
+        f"min_score={profile['effective_min_score']}, per_doc_limit={profile['per_doc_limit']})"
+    )
+    return profile
+
+
+def _is_uuid(business_id: Optional[str]) -> bool:
+    if not business_id:
+        return False
+    try:
+        from uuid import UUID
+        UUID(business_id)  # Validate UUID format
+        return True
+    except (ValueError, TypeError):
+        logger.warning(f"   business_id '{business_id}' is not a valid UUID, skipping business filter")
+        return False
+
+
+def _filter_documents_by_business(valid_document_ids: List[str], rows: List[Dict], business_id: str) -> List[str]:
+    business_map = {str(doc['id']): doc.get('business_uuid') for doc in rows}
+    filtered = [doc_id for doc_id in valid_document_ids if str(business_map.get(doc_id)) == business_id]
+    if not filtered:
+        logger.warning(f"   No documents found for business_id {business_id[:8]}... after filtering")
+    else:
+        logger.debug(f"   Filtered to {len(filtered)} documents for business_id {business_id[:8]}...")
+    return filtered
+
+
+def _document_vector_request(supabase, doc_id: str, query_embedding: List[float], profile: Dict):
+    """
+    For summarize queries: get ALL chunks directly (bypass vector search).
+    For normal queries: vector search within the document using match_chunks() RPC.
+    """
+    if profile['is_summarize_query']:
+        logger.debug(f"   Summarize query - getting ALL chunks for document: {doc_id[:8]}...")
+        return supabase.table('document_vectors').select(
+            _CHUNK_COLUMNS
+        ).eq('document_id', doc_id).order('page_number').order('chunk_index')
+    
+    logger.debug(f"   Vector search for chunks in document: {doc_id[:8]}...")
+    params = {
+        'query_embedding': query_embedding,
+        'target_document_id': doc_id,
+        'match_threshold': _match_threshold(profile),
+        'match_count': profile['effective_top_k'] * 2  # Get more candidates for reranking
+    }
+    if QUANTIZED_EMBEDDINGS_ENABLED:
+        # Hamming candidates on embedding_binary, rescored with the full vectors
+        return supabase.rpc('match_chunks_two_stage', {**params, 'rescore_multiplier': QUANTIZED_RESCORE_MULTIPLIER})
+    return supabase.rpc('match_chunks', params)
+
+
+def _match_threshold(profile: Dict) -> float:
+    # More permissive threshold for initial retrieval
+    return max(0.2, profile['effective_min_score'] * 0.5)
+
+
+def _local_vector_hits(
+    business_uuid: Optional[str],
+    query_embedding: List[float],
+    doc_ids: List[str],
+    profile: Dict
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Per-document (chunk_id, similarity) hits from the local ANN index, same threshold and
+    count as match_chunks. Empty when the tenant isn't indexed (or for summarize queries,
+    which read every chunk anyway); documents absent from the result go to the RPC.
+    """
+    if profile['is_summarize_query'] or not business_uuid:
+        return {}
+    result = ann_index.search_chunks(
+        business_uuid, query_embedding, doc_ids, profile['effective_top_k'] * 2, _match_threshold(profile)
+    )
+    if result is None:
+        return {}
+    hits, missing = result
+    if hits:
+        logger.debug(f"   ANN index served {len(hits)} documents locally, {len(missing)} via match_chunks")
+    return hits
+
+
+def _hit_ids(hits: Dict[str, List[Tuple[str, float]]]) -> List[str]:
+    return [chunk_id for doc_hits in hits.values() for chunk_id, _ in doc_hits]
+
+
+def _chunk_rows_request(supabase, chunk_ids: List[str]):
+    columns = _CHUNK_COLUMNS
+    if ann_index.chunk_scores_are_estimates:
+        # Binary-code candidates: fetch (compact) embeddings with the rows for stage-two rescoring
+        columns = f'{_CHUNK_COLUMNS}, {embedding_select()}'
+    return supabase.table('document_vectors').select(columns).in_('id', chunk_ids)
+
+
+def _local_vector_rows(
+    hits: Dict[str, List[Tuple[str, float]]],
+    rows: List[Dict],
+    query_embedding: List[float],
+    profile: Dict
+) -> Dict[str, List[Dict]]:
+    """Chunk rows in hit order with 'similarity' set, shaped like match_chunks results."""
+    rows_by_id = {str(row['id']): row for row in rows if row.get('id')}
+    rescore = ann_index.chunk_scores_are_estimates
+    if rescore:
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        query_vec /= (np.linalg.norm(query_vec) or 1.0)
+    vector_rows = {}
+    for doc_id, doc_hits in hits.items():
+        doc_rows = []
+        for chunk_id, similarity in doc_hits:
+            row = rows_by_id.get(chunk_id)
+            if row is None:  # Deleted since the index was updated
+                continue
+            row = dict(row)
+            if rescore:
+                chunk_vec = _parse_chunk_embedding(row.pop('embedding', None))
+                if chunk_vec is not None:
+                    similarity = float(np.dot(query_vec, chunk_vec) / (np.linalg.norm(chunk_vec) or 1.0))
+            doc_rows.append({**row, 'similarity': similarity})
+        if rescore:
+            doc_rows.sort(key=lambda row: row['similarity'], reverse=True)
+            doc_rows = [
+                row for row in doc_rows if row['similarity'] > _match_threshold(profile)
+            ][:profile['effective_top_k'] * 2]
+        vector_rows[doc_id] = doc_rows
+    return vector_rows
+
+
+def _check_local_recall(
+    business_uuid: str,
+    query_embedding: List[float],
+    hits: Dict[str, List[Tuple[str, float]]],
+    profile: Dict
+) -> None:
+    """Sampled comparison of one document's local hits with match_chunks (runs off the request path)."""
+    doc_id = random.choice(list(hits))
+    
+    def _db_ids():
+        rows = _document_vector_request(get_supabase_client(), doc_id, query_embedding, profile).execute().data
+        return [str(row['id']) for row in rows or [] if row.get('id')]
+    
+    ann_index.maybe_check_recall(business_uuid, 'chunks', [chunk_id for chunk_id, _ in hits[doc_id]], _db_ids)
+
+
+def _vector_rows(doc_id: str, rows: Optional[List[Dict]], profile: Dict) -> List[Dict]:
+    vector_chunks = rows or []
+    if not profile['is_summarize_query']:
+        logger.debug(f"   Vector search found {len(vector_chunks)} chunks in document {doc_id[:8]}")
+        return vector_chunks
+    
+    # Add a dummy similarity score (1.0) for all chunks since we're not filtering by similarity
+    for chunk in vector_chunks:
+        chunk['similarity'] = 1.0
+    logger.info(f"   ✅ Retrieved {len(vector_chunks)} chunks directly from document {doc_id[:8]} (summarize mode)")
+    if vector_chunks:
+        # Debug: log first chunk structure
+        first_chunk = vector_chunks[0]
+        logger.info(f"   First chunk keys: {list(first_chunk.keys())}, has 'id': {'id' in first_chunk}, id value: {first_chunk.get('id', 'MISSING')}")
+        logger.info(f"   First chunk sample: {str(first_chunk)[:200]}...")
+    else:
+        logger.error(f"   ⚠️ CRITICAL: No chunks returned from Supabase for document {doc_id[:8]}!")
+    return vector_chunks
+
+
+def _document_keyword_request(supabase, doc_id: str, query: str, profile: Dict):
+    """
+    Keyword search on chunk text for exact matches (complements vector search).
+    
+    Ranked full-text search (search_chunks_fts, GIN index) when deployed; otherwise the
+    ILIKE fallback, which scans every chunk of the document.
+    """
+    if lexical_search.fts_available():
+        return lexical_search.search_chunks_request(supabase, doc_id, query, profile['effective_top_k'])
+    
+    query_lower = query.lower().strip()
+    query_words = [w for w in query_lower.split() if len(w) > 3]  # Only words longer than 3 chars
+    
+    or_conditions = [f'chunk_text.ilike.%{query_lower}%', f'chunk_text_clean.ilike.%{query_lower}%']
+    if len(query_words) > 1:
+        for word in query_words:
+            or_conditions.append(f'chunk_text.ilike.%{word}%')
+            or_conditions.append(f'chunk_text_clean.ilike.%{word}%')
+    
+    return supabase.table('document_vectors').select(
+        _CHUNK_COLUMNS
+    ).eq('document_id', doc_id).or_(','.join(or_conditions)).limit(profile['effective_top_k'])
+
+
+def _bbox_request(supabase, chunk_ids: List[str]):
+    return supabase.table('document_vectors').select('id, bbox, blocks').in_('id', chunk_ids)
+
+
+def _embeddings_request(supabase, chunk_ids: List[str]):
+    # int8 codes when enabled: ~2 KB per chunk instead of ~15 KB of float text. Chunks not
+    # backfilled yet come back empty and keep their match_chunks similarity.
+    return supabase.table('document_vectors').select(f'id, {embedding_select()}').in_('id', chunk_ids)
+
+
+def _parse_chunk_embedding(embedding) -> Optional[np.ndarray]:
+    """Stored chunk embedding (list, '[...]' text or int8 codes) as float32, or None."""
+    if embedding is None:
+        return None
+    if is_int8_literal(embedding):
+        return decode_int8(embedding)
+    if isinstance(embedding, str):
+        try:
+            embedding = json.loads(embedding)
+        except ValueError:
+            return None
+    try:
+        return np.asarray(embedding, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_document_metadata(doc_id: str, doc_data: Optional[Dict]) -> Dict[str, str]:
+    """Filename and classification_type from a document catalog record."""
+    if doc_data:
+        return {
+            'filename': doc_data.get('original_filename', 'unknown'),
+            'classification_type': doc_data.get('classification_type', 'unknown')
+        }
+    logger.warning(f"   Document {doc_id[:8]} not found in database")
+    return dict(_UNKNOWN_DOCUMENT_METADATA)
+
+
+def _block_fallback_bbox(blocks) -> Optional[Dict]:
+    """First block's bbox, used when the chunk-level bbox is missing."""
+    if blocks and isinstance(blocks, list) and len(blocks) > 0:
+        first_block = blocks[0]
+        if isinstance(first_block, dict):
+            block_bbox = first_block.get('bbox')
+            if isinstance(block_bbox, dict) and block_bbox.get('left') is not None:
+                return block_bbox
+    return None
+
+
+def _collect_vector_hits(doc_id: str, vector_chunks: List[Dict]):
+    """
+    Seed the per-document chunk map from vector hits.
+    
+    Returns:
+        (chunks_dict keyed by chunk_id, chunk IDs missing a bbox)
+    """
+    chunks_dict = {}
+    vector_chunk_ids = []  # Track chunk IDs from vector search for bbox lookup
+    logger.info(f"   Processing {len(vector_chunks)} vector_chunks for document {doc_id[:8]}...")
+    for idx, chunk in enumerate(vector_chunks):
+        chunk_id = str(chunk.get('id', ''))
+        if not chunk_id:
+            # For summarize queries, chunks might not have id in the response
+            # Use document_id + chunk_index as fallback identifier
+            chunk_id = f"{doc_id}_{chunk.get('chunk_index', idx)}"
+            logger.info(f"   Chunk {idx} missing 'id', using fallback: {chunk_id[:30]}...")
+        
+        # Track if bbox is missing (match_chunks RPC might not return it)
+        if not chunk.get('bbox') or not isinstance(chunk.get('bbox'), dict):
+            vector_chunk_ids.append(chunk_id)
+        
+        chunks_dict[chunk_id] = {
+            **chunk,
+            'similarity': float(chunk.get('similarity', 1.0))
+        }
+    logger.info(f"   Added {len(chunks_dict)} chunks to chunks_dict for document {doc_id[:8]}")
+    return chunks_dict, vector_chunk_ids
+
+
+def _attach_bbox_rows(chunks_dict: Dict[str, Dict], rows: List[Dict]) -> None:
+    for row in rows:
+        chunk_id = str(row.get('id'))
+        bbox = row.get('bbox')
+        blocks = row.get('blocks', [])
+        
+        if chunk_id in chunks_dict:
+            # Always attach blocks for block-level citations (match_chunks RPC doesn't return them)
+            if blocks and isinstance(blocks, list):
+                chunks_dict[chunk_id]['blocks'] = blocks
+                logger.debug(f"   ✅ Added {len(blocks)} blocks to {chunk_id[:8]}...")
+            # Prefer chunk-level bbox, fallback to first block's bbox
+            if isinstance(bbox, dict) and bbox.get('left') is not None:
+                chunks_dict[chunk_id]['bbox'] = bbox
+                logger.debug(f"   ✅ Added chunk-level bbox to {chunk_id[:8]}...")
+            else:
+                block_bbox = _block_fallback_bbox(blocks)
+                if block_bbox is not None:
+                    chunks_dict[chunk_id]['bbox'] = block_bbox
+                    logger.debug(f"   ✅ Added block-level bbox to {chunk_id[:8]}...")
+                else:
+                    logger.debug(f"   ⚠️ No valid bbox found for {chunk_id[:8]}... (bbox={bbox}, blocks={len(blocks) if blocks else 0})")
+
+
+def _add_keyword_hits(chunks_dict: Dict[str, Dict], keyword_chunks: List[Dict], query: str) -> None:
+    """Add keyword matches with quality-based scoring."""
+    query_lower = query.lower().strip()
+    query_words = [w for w in query_lower.split() if len(w) > 3]  # Only words longer than 3 chars
+    ranked = lexical_search.is_ranked(keyword_chunks)
+    
+    for keyword_rank, chunk in enumerate(keyword_chunks, start=1):
+        chunk_id = str(chunk.get('id', ''))
+        chunk_text = (chunk.get('chunk_text', '') or chunk.get('chunk_text_clean', '') or '').lower()
+        
+        # Calculate keyword match quality
+        if query_lower in chunk_text:
+            keyword_score = 0.7  # Exact match
+        elif any(word in chunk_text for word in query_words if len(word) > 3):
+            matched_words = sum(1 for word in query_words if word in chunk_text)
+            keyword_score = min(0.5, 0.1 * matched_words)  # 0.1 per word, max 0.5
+        else:
+            keyword_score = 0.2  # Fallback for any match
+        
+        if chunk_id in chunks_dict:
+            # Found in both: small boost (don't clamp!)
+            original_score = chunks_dict[chunk_id]['similarity']
+            chunks_dict[chunk_id]['similarity'] = original_score + (keyword_score * 0.1)  # Small boost, no clamping
+            logger.debug(f"   Chunk {chunk_id[:8]} found in both: vector={original_score:.3f}, boost={keyword_score * 0.1:.3f}")
+        else:
+            # Keyword-only: use keyword score (not hardcoded 0.6)
+            chunks_dict[chunk_id] = {
+                **chunk,
+                'similarity': keyword_score  # Quality-based, not hardcoded
+            }
+        logger.debug(f"   Chunk {chunk_id[:8]} keyword-only: score={keyword_score:.3f}")
+        if ranked:
+            # Position in the BM25-style ranking, fused with vector order after rescoring
+            chunks_dict[chunk_id]['keyword_rank'] = keyword_rank
+
+
+def _finalize_document_chunks(
+    doc_id: str,
+    query: str,
+    profile: Dict,
+    chunks_dict: Dict[str, Dict],
+    vector_chunks: List[Dict],
+    keyword_chunks: List[Dict],
+    doc_metadata: Dict[str, str]
+) -> List[Dict]:
+    """Merge keyword hits into the document's chunk map and format chunks with metadata."""
+    is_summarize_query = profile['is_summarize_query']
+    if not is_summarize_query and keyword_chunks:
+        _add_keyword_hits(chunks_dict, keyword_chunks, query)
+    
+    chunks = list(chunks_dict.values())
+    logger.info(f"   Combined: {len(chunks)} unique chunks from document {doc_id[:8]} (vector: {len(vector_chunks)}, keyword: {len(keyword_chunks)}, chunks_dict: {len(chunks_dict)})")
+    
+    # CRITICAL: For summarize queries, ensure we have chunks
+    if is_summarize_query and len(chunks) == 0 and len(vector_chunks) > 0:
+        logger.error(f"   ⚠️ CRITICAL: {len(vector_chunks)} chunks retrieved but 0 chunks in chunks_dict!")
+        logger.error(f"   First chunk structure: {list(vector_chunks[0].keys())}")
+        logger.error(f"   First chunk 'id' value: {vector_chunks[0].get('id', 'MISSING')}")
+        # Fallback: add chunks directly even if they don't have proper IDs
+        for idx, chunk in enumerate(vector_chunks):
+            fallback_id = f"{doc_id}_fallback_{idx}"
+            chunks_dict[fallback_id] = {
+                **chunk,
+                'similarity': float(chunk.get('similarity', 1.0))
+            }
+        chunks = list(chunks_dict.values())
+        logger.warning(f"   Fallback: Added {len(chunks)} chunks using fallback IDs")
+    
+    doc_filename = doc_metadata.get('filename', 'unknown')
+    doc_type = doc_metadata.get('classification_type', 'unknown')
+    
+    # Format chunks with metadata
+    logger.info(f"   Formatting {len(chunks)} chunks for document {doc_id[:8]}...")
+    formatted = []
+    for chunk in chunks:
+        formatted_count = len(formatted)
+        try:
+            chunk_metadata = chunk.get('metadata', {})
+            if isinstance(chunk_metadata, str):
+                # Handle case where metadata might be a JSON string
+                try:
+                    import json
+                    chunk_metadata = json.loads(chunk_metadata)
+                except:
+                    chunk_metadata = {}
+            
+            # Get chunk_id - use fallback if missing
+            chunk_id = str(chunk.get('id', ''))
+            if not chunk_id:
+                chunk_id = f"{doc_id}_{chunk.get('chunk_index', formatted_count)}"
+            
+            # Ensure we have chunk text
+            chunk_text = chunk.get('chunk_text', '') or chunk.get('chunk_text_clean', '')
+            if not chunk_text:
+                logger.warning(f"   Skipping chunk {chunk_id[:20]}... - no chunk text")
+                continue
+            
+            chunk_bbox = chunk.get('bbox')
+            # Log bbox status for debugging
+            if not chunk_bbox or not isinstance(chunk_bbox, dict):
+                logger.debug(f"   ⚠️ Chunk {chunk_id[:8]}... has no bbox (type: {type(chunk_bbox)})")
+            
+            formatted.append({
+                'chunk_id': chunk_id,
+                'document_id': doc_id,
+                'document_filename': doc_filename,
+                'document_type': doc_type,  # Include document type for metadata
+                'chunk_index': chunk.get('chunk_index', formatted_count),
+                'chunk_text': chunk.get('chunk_text', ''),
+                'chunk_text_clean': chunk.get('chunk_text_clean', ''),
+                'page_number': chunk.get('page_number', 0),
+                'bbox': chunk_bbox,  # Chunk-level bbox (fallback)
+                # Block-level data for precise citation highlighting (more precise than chunk-level)
+                'blocks': chunk.get('blocks', []),
+                'section_title': chunk_metadata.get('section_title') if isinstance(chunk_metadata, dict) else None,
+                'score': round(float(chunk.get('similarity', 1.0)), 4),
+                'keyword_rank': chunk.get('keyword_rank'),
+                'metadata': chunk_metadata if isinstance(chunk_metadata, dict) else {}
+            })
+        except Exception as format_error:
+            logger.error(f"   Failed to format chunk {formatted_count} from document {doc_id[:8]}: {format_error}", exc_info=True)
+            continue
+    logger.info(f"   ✅ Formatted {len(formatted)} chunks for document {doc_id[:8]}")
+    return formatted
+
+
+def _log_no_chunks(query: str, profile: Dict, valid_document_ids: List[str]) -> None:
+    logger.warning(f"   No chunks found for query: {query[:50]}...")
+    logger.warning(f"   Debug: is_summarize_query={profile['is_summarize_query']}, valid_document_ids={len(valid_document_ids)}")
+    # For summarize queries, this should never happen if documents have chunks
+    if profile['is_summarize_query']:
+        logger.error(f"   ⚠️ CRITICAL: Summarize query returned 0 chunks for {len(valid_document_ids)} documents!")
+        logger.error(f"   This suggests documents might not have chunks in the database.")
+
+
+def _dedupe_chunks(all_chunks: List[Dict]):
+    """
+    Deduplicate chunks by chunk_id.
+    
+    Returns:
+        (unique chunks, chunk IDs that still need a bbox lookup)
+    """
+    seen_chunk_ids = set()
+    unique_chunks = []
+    chunks_needing_bbox = []
+    
+    for chunk in all_chunks:
+        chunk_id = chunk.get('chunk_id')
+        if chunk_id and chunk_id not in seen_chunk_ids:
+            seen_chunk_ids.add(chunk_id)
+            # Check if bbox is missing - we'll fetch it later
+            if not chunk.get('bbox') or not isinstance(chunk.get('bbox'), dict):
+                chunks_needing_bbox.append(chunk_id)
+            unique_chunks.append(chunk)
+        elif not chunk_id:
+            # Include chunks without IDs (shouldn't happen, but handle gracefully)
+            unique_chunks.append(chunk)
+    return unique_chunks, chunks_needing_bbox
+
+
+def _apply_bbox_lookup(unique_chunks: List[Dict], rows: List[Dict]) -> None:
+    # Create lookup maps for bbox and blocks (chunks may lack both when from RPCs that don't return them)
+    bbox_lookup = {}
+    blocks_lookup = {}
+    for row in rows:
+        chunk_id = row.get('id')
+        bbox = row.get('bbox')
+        blocks = row.get('blocks', [])
+        if blocks and isinstance(blocks, list):
+            blocks_lookup[chunk_id] = blocks
+        # Prefer chunk-level bbox, fallback to first block's bbox
+        if isinstance(bbox, dict) and bbox.get('left') is not None:
+            bbox_lookup[chunk_id] = bbox
+        else:
+            block_bbox = _block_fallback_bbox(blocks)
+            if block_bbox is not None:
+                bbox_lookup[chunk_id] = block_bbox
+                logger.debug(f"   Using block bbox for chunk {str(chunk_id)[:8]}...")
+    
+    # Update chunks with bbox and blocks
+    for chunk in unique_chunks:
+        chunk_id = chunk.get('chunk_id')
+        if chunk_id in bbox_lookup:
+            chunk['bbox'] = bbox_lookup[chunk_id]
+            logger.debug(f"   ✅ Added bbox to chunk {str(chunk_id)[:8]}...")
+        if chunk_id in blocks_lookup:
+            chunk['blocks'] = blocks_lookup[chunk_id]
+            logger.debug(f"   ✅ Added {len(blocks_lookup[chunk_id])} blocks to chunk {str(chunk_id)[:8]}...")
+
+
+def _rescore_with_embeddings(unique_chunks: List[Dict], rows: List[Dict], query_embedding: List[float]) -> None:
+    """Re-compute cosine similarity against stored chunk embeddings (keeps keyword scores if missing)."""
+    # Create mapping of chunk_id -> embedding
+    chunk_embeddings = {}
+    for row in rows:
+        if row.get('embedding') is None:
+            continue
+        # Handles list, '[...]' text and int8-code representations
+        embedding = _parse_chunk_embedding(row.get('embedding'))
+        if embedding is None:
+            logger.warning(f"   Could not parse embedding for chunk {row['id']}")
+            continue
+        chunk_embeddings[str(row['id'])] = embedding
+    
+    # Re-compute cosine similarity for all chunks
+    query_vec = np.array(query_embedding, dtype=np.float32)
+    
+    reranked_count = 0
+    for chunk in unique_chunks:
+        chunk_id = chunk.get('chunk_id')
+        if chunk_id and chunk_id in chunk_embeddings:
+            try:
+                chunk_vec = np.array(chunk_embeddings[chunk_id], dtype=np.float32)
+                # Cosine similarity
+                similarity = np.dot(query_vec, chunk_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(chunk_vec))
+                chunk['score'] = float(similarity)  # Use raw vector similarity
+                reranked_count += 1
+            except Exception as vec_error:
+                logger.debug(f"   Failed to compute similarity for chunk {chunk_id[:8]}: {vec_error}")
+                # Keep existing score if vector computation fails
+        # If no embedding found, keep existing score (from keyword match)
+    
+    logger.debug(f"   Re-computed vector similarity for {reranked_count} chunks")
+
+
+def _fuse_keyword_ranks(unique_chunks: List[Dict]) -> None:
+    """
+    Reorder each document's chunks by reciprocal-rank fusion of vector and keyword rank.
+    
+    Only applies when keyword hits came from the ranked full-text search. The document's
+    existing scores are handed out again in fused order, so the score distribution (and
+    every threshold in _select_final_chunks) is unchanged; only which chunk holds which
+    score moves.
+    """
+    chunks_by_doc: Dict[str, List[Dict]] = {}
+    for chunk in unique_chunks:
+        chunks_by_doc.setdefault(chunk['document_id'], []).append(chunk)
+    
+    for doc_chunks in chunks_by_doc.values():
+        keyword_hits = [c for c in doc_chunks if c.get('keyword_rank')]
+        if not keyword_hits or len(doc_chunks) < 2:
+            continue
+        by_score = sorted(doc_chunks, key=lambda c: c['score'], reverse=True)
+        by_keyword = sorted(keyword_hits, key=lambda c: c['keyword_rank'])
+        order = lexical_search.fused_order([
+            [c['chunk_id'] for c in by_score],
+            [c['chunk_id'] for c in by_keyword],
+        ])
+        chunks_by_id = {c['chunk_id']: c for c in doc_chunks}
+        scores = [c['score'] for c in by_score]
+        for chunk_id, score in zip(order, scores):
+            chunks_by_id[chunk_id]['score'] = score
+
+
+def _should_rerank(profile: Dict) -> bool:
+    # Summarize queries return every chunk in document order, so scores don't matter
+    return config.cohere_rerank_enabled and not profile['is_summarize_query']
+
+
+def _apply_rerank_scores(query: str, unique_chunks: List[Dict], profile: Dict) -> None:
+    """
+    Blend cross-encoder relevance into chunk scores (COHERE_RERANK_ENABLED).
+    
+    Scores only ever go up (max of vector and rerank score), so the vector-similarity
+    thresholds used by _select_final_chunks keep their meaning. Cached per
+    (model, query, chunk_id): repeat evaluations of the same chunks cost nothing.
+    """
+    if not unique_chunks or not _should_rerank(profile):
+        return
+    try:
+        from backend.llm.retrievers.cohere_reranker import get_reranker
+        reranker = get_reranker()
+        if not reranker.is_enabled():
+            return
+        scores = reranker.score(query, unique_chunks)
+    except Exception as rerank_error:
+        logger.warning(f"   Cross-encoder reranking failed (non-fatal): {rerank_error}")
+        return
+    if not scores:
+        return
+    for chunk, relevance in zip(unique_chunks, scores):
+        chunk['rerank_score'] = relevance
+        chunk['score'] = max(chunk.get('score', 0.0), relevance)
+    logger.debug(f"   Applied rerank scores to {len(unique_chunks)} chunks")
+
+
+def _select_final_chunks(
+    query: str,
+    document_ids: List[str],
+    valid_document_ids: List[str],
+    unique_chunks: List[Dict],
+    profile: Dict
+) -> List[Dict]:
+    """Per-document limits, document priority boost, global sort and relative filtering."""
+    per_doc_limit = profile['per_doc_limit']
+    is_summarize_query = profile['is_summarize_query']
+    effective_min_score = profile['effective_min_score']
+    query_profile = profile['query_profile']
+    
+    # Per-document chunk limits: Prevent lower-scoring documents from dominating
+    # Group chunks by document and apply per-document limits based on query profile
+    if document_ids and len(document_ids) > 1:
+        chunks_by_doc = {}
+        for chunk in unique_chunks:
+            doc_id = chunk['document_id']
+            if doc_id not in chunks_by_doc:
+                chunks_by_doc[doc_id] = []
+            chunks_by_doc[doc_id].append(chunk)
+        
+        # Apply per-document limits based on query profile
+        if per_doc_limit is not None:
+            limited_chunks = []
+            for i, doc_id in enumerate(document_ids):
+                doc_chunks = chunks_by_doc.get(doc_id, [])
+                # Sort chunks by score within this document
+                doc_chunks.sort(key=lambda x: x['score'], reverse=True)
+                
+                # Use per_doc_limit from query profile
+                # First doc gets full limit, subsequent docs get slightly less
+                if i == 0:
+                    max_chunks = per_doc_limit
+                else:
+                    max_chunks = max(1, int(per_doc_limit * 0.7))  # 70% for subsequent docs
+                
+                selected = doc_chunks[:max_chunks]
+                limited_chunks.extend(selected)
+                logger.debug(f"   Document {i+1} ({doc_id[:8]}...): {len(doc_chunks)} chunks → {len(selected)} selected (limit: {max_chunks})")
+            
+            unique_chunks = limited_chunks
+            logger.debug(f"   Per-document limits applied: {len(limited_chunks)} chunks total (per_doc_limit={per_doc_limit})")
+        else:
+            # No per-doc limit (summary queries)
+            logger.debug(f"   No per-doc limit (summary query) - keeping all {len(unique_chunks)} chunks")
+    
+    # Document-level prioritization: Boost chunks from higher-scoring documents
+    # Documents are passed in order from retrieve_docs (sorted by score), so first = highest score
+    if document_ids and len(document_ids) > 1:
+        doc_priority = {}
+        for i, doc_id in enumerate(document_ids):
+            # First document (highest score) gets weight 1.0, second gets 0.9, etc.
+            # This ensures chunks from the most relevant document are prioritized
+            doc_priority[doc_id] = 1.0 - (i * 0.15)  # 0.15 decrement per position
+        
+        # Apply document priority boost to chunk scores
+        # INCREASED BOOST: Changed from 0.2 to 0.8 for stronger prioritization
+        boosted_count = 0
+        for chunk in unique_chunks:
+            doc_id = chunk['document_id']
+            priority_boost = doc_priority.get(doc_id, 0.5)  # Default 0.5 for unknown docs
+            # Boost score by document priority (but don't exceed 1.0)
+            # First document gets 1.8x boost (1.0 + 1.0 * 0.8), second gets 1.52x (1.0 + 0.85 * 0.8)
+            original_score = chunk['score']
+            chunk['score'] = min(1.0, original_score * (1.0 + priority_boost * 0.8))
+            if priority_boost > 0.5:
+                boosted_count += 1
+        
+        if boosted_count > 0:
+            logger.debug(f"   Applied document priority boost (0.8x) to {boosted_count} chunks from top documents")
+    
+    # Global sorting - depends on search_goal
+    if is_summarize_query:
+        # For summarize queries: sort by document order (page/chunk_index) for coherence
+        unique_chunks.sort(key=lambda x: (
+            x.get('document_id', ''),
+            x.get('page_number', 0),
+            x.get('chunk_index', 0)
+        ))
+    else:
+        # For normal queries: sort by similarity score (descending)
+        unique_chunks.sort(key=lambda x: x['score'], reverse=True)
+    
+    # CRITICAL: Global reranking - select chunks with relative filtering
+    # SPECIAL CASE: For "summarize" queries, return ALL chunks (no filtering)
+    if is_summarize_query:
+        # For summarize queries: return ALL chunks, sorted by page/chunk_index for natural document order
+        final_chunks = unique_chunks
+        logger.debug(f"   Summarize query - returning ALL {len(final_chunks)} chunks (no filtering)")
+    else:
+        # Normal queries: select top 8-15 chunks total with relative filtering
+        # This prevents context explosion (20 docs × 5 chunks = 100 chunks is too much)
+        # Industry standard: Retrieve top-k per doc, then rerank globally, select final 8-15 chunks
+        
+        # Relative thresholding: Only filter if there's a clear quality gap
+        if len(unique_chunks) > 0:
+            top_score = unique_chunks[0]['score']
+            # Only filter if top score is significantly above threshold AND there's a quality gap
+            if top_score > effective_min_score * 1.5:  # Top score is well above threshold
+                # Filter out chunks that are much worse than the best
+                quality_gap = top_score - effective_min_score
+                final_chunks = [c for c in unique_chunks if c['score'] >= (top_score - quality_gap * 0.5)]
+                # Limit to top 15 regardless
+                final_chunks = final_chunks[:15]
+                logger.debug(f"   Relative filtering: {len(unique_chunks)} → {len(final_chunks)} chunks (top_score={top_score:.3f}, gap={quality_gap:.3f})")
+            else:
+                # No clear quality gap - return top chunks (relative ranking is what matters)
+                final_chunks = unique_chunks[:15]
+                logger.debug(f"   No quality gap detected, returning top {len(final_chunks)} chunks")
+        else:
+            final_chunks = []
+    
+    logger.info(
+        f"✅ Retrieved {len(final_chunks)} chunks from {len(valid_document_ids)} documents "
+        f"(after global reranking from {len(unique_chunks)} total chunks)"
+    )
+    
+    # Log retrieval quality (Phase 2)
+    log_retrieval_quality(query, valid_document_ids, final_chunks, query_profile)
+    
+    # Optional: Fallback widening if no results for fact queries
+    if not final_chunks and query_profile == "fact":
+        logger.warning("[RETRIEVER] No results for fact query, trying with lower threshold...")
+        # Retry with lower threshold (would need to re-run search, but for now just log)
+        logger.warning("[RETRIEVER] Fallback widening not yet implemented - returning empty")
+    
+    return final_chunks
+
+
 def log_retrieval_quality(
     query: str,
     document_ids: List[str],
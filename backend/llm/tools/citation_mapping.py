@@ -13,7 +13,8 @@ from pydantic import BaseModel, Field
 from langchain_core.tools import StructuredTool
 
 from backend.llm.types import Citation
-from backend.services.supabase_client_factory import get_supabase_client
+from backend.services.supabase_client_factory import get_supabase_client, get_async_supabase_client
+from backend.services.performance_service import track_db_query
 
 logger = logging.getLogger(__name__)
 
@@ -705,6 +706,7 @@ class CitationTool:
         return f"✅ Citation {citation_number} recorded for {block_id}"
 
 
+@track_db_query('citation_match_chunk')
 def match_citation_to_chunk(chunk_id: str, cited_text: str) -> Dict[str, Any]:
     """
     Match cited text to a specific block within a chunk and return bbox coordinates.
@@ -960,6 +962,79 @@ def _narrow_bbox_to_cited_line(
     }
 
 
+def _parse_synthetic_block_id(block_id: str) -> Optional[Tuple[str, int]]:
+    """Parse "chunk_<chunk_uuid>_block_<index>" into (chunk_id, block_index)."""
+    if not block_id or not block_id.startswith("chunk_") or "_block_" not in block_id:
+        return None
+    # chunk_uuid is document_vectors.id, UUID with hyphens
+    suffix = "_block_"
+    idx = block_id.rfind(suffix)
+    if idx == -1:
+        return None
+    chunk_id = block_id[len("chunk_"):idx]
+    try:
+        block_index = int(block_id[idx + len(suffix):])
+    except ValueError:
+        return None
+    return chunk_id, block_index
+
+
+def _resolve_block_from_chunk_row(
+    chunk_data: Dict[str, Any],
+    chunk_id: str,
+    block_index: int,
+    cited_text: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Build the bbox result for one block of a document_vectors row."""
+    blocks = chunk_data.get('blocks') or []
+    if not isinstance(blocks, list) or block_index < 0 or block_index >= len(blocks):
+        bbox = chunk_data.get('bbox', {})
+        page = chunk_data.get('page_number', bbox.get('page', 0))
+        return {
+            'doc_id': chunk_data.get('document_id', ''),
+            'chunk_id': chunk_data.get('id', chunk_id),
+            'block_index': 0,
+            'page': int(page) if page is not None else 0,
+            'bbox': {
+                'left': float(bbox.get('left', 0)),
+                'top': float(bbox.get('top', 0)),
+                'width': float(bbox.get('width', 0)),
+                'height': float(bbox.get('height', 0)),
+                'page': int(page) if page is not None else 0
+            }
+        }
+    block = blocks[block_index]
+    if not isinstance(block, dict):
+        return None
+    block_bbox_raw = block.get('bbox', {})
+    page = block_bbox_raw.get('page', chunk_data.get('page_number', 0))
+    block_bbox = {
+        'left': round(float(block_bbox_raw.get('left', 0)), 4),
+        'top': round(float(block_bbox_raw.get('top', 0)), 4),
+        'width': round(float(block_bbox_raw.get('width', 0)), 4),
+        'height': round(float(block_bbox_raw.get('height', 0)), 4),
+        'page': int(page) if page is not None else 0
+    }
+    # Sub-level bbox: narrow to the line that contains cited_text (e.g. £1,950,000)
+    block_content = (block.get('content') or '').strip()
+    if cited_text and block_content:
+        narrowed = _narrow_bbox_to_cited_line(block_content, block_bbox, cited_text)
+        if narrowed != block_bbox:
+            block_bbox = narrowed
+            logger.info(
+                f"[CITATION_BBOX] Sub-level bbox for cited_text '{cited_text[:40]}...' "
+                f"(line match within block)"
+            )
+    return {
+        'doc_id': chunk_data.get('document_id', ''),
+        'chunk_id': chunk_data.get('id', chunk_id),
+        'block_index': block_index,
+        'page': int(page) if page is not None else 0,
+        'bbox': block_bbox
+    }
+
+
+@track_db_query('citation_resolve_block')
 def resolve_block_id_to_bbox(block_id: str, cited_text: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     Resolve a synthetic block_id (e.g. chunk_<uuid>_block_1) to bbox.
@@ -972,19 +1047,11 @@ def resolve_block_id_to_bbox(block_id: str, cited_text: Optional[str] = None) ->
     Returns:
         Dict with doc_id, page, bbox (normalized 0-1), chunk_id, block_index; or None if not found.
     """
-    if not block_id or not block_id.startswith("chunk_") or "_block_" not in block_id:
+    parsed = _parse_synthetic_block_id(block_id)
+    if parsed is None:
         return None
+    chunk_id, block_index = parsed
     try:
-        # Parse "chunk_<chunk_uuid>_block_<index>" (chunk_uuid is document_vectors.id, UUID with hyphens)
-        suffix = "_block_"
-        idx = block_id.rfind(suffix)
-        if idx == -1:
-            return None
-        chunk_id = block_id[len("chunk_"):idx]
-        try:
-            block_index = int(block_id[idx + len(suffix):])
-        except ValueError:
-            return None
         supabase = get_supabase_client()
         response = supabase.table('document_vectors').select(
             'id, document_id, page_number, bbox, blocks'
@@ -992,58 +1059,55 @@ def resolve_block_id_to_bbox(block_id: str, cited_text: Optional[str] = None) ->
         if not response.data:
             logger.warning(f"[CITATION_BBOX] Chunk not found for block_id={block_id[:50]}...")
             return None
-        chunk_data = response.data
-        blocks = chunk_data.get('blocks') or []
-        if not isinstance(blocks, list) or block_index < 0 or block_index >= len(blocks):
-            bbox = chunk_data.get('bbox', {})
-            page = chunk_data.get('page_number', bbox.get('page', 0))
-            return {
-                'doc_id': chunk_data.get('document_id', ''),
-                'chunk_id': chunk_data.get('id', chunk_id),
-                'block_index': 0,
-                'page': int(page) if page is not None else 0,
-                'bbox': {
-                    'left': float(bbox.get('left', 0)),
-                    'top': float(bbox.get('top', 0)),
-                    'width': float(bbox.get('width', 0)),
-                    'height': float(bbox.get('height', 0)),
-                    'page': int(page) if page is not None else 0
-                }
-            }
-        block = blocks[block_index]
-        if not isinstance(block, dict):
-            return None
-        block_bbox_raw = block.get('bbox', {})
-        page = block_bbox_raw.get('page', chunk_data.get('page_number', 0))
-        block_bbox = {
-            'left': round(float(block_bbox_raw.get('left', 0)), 4),
-            'top': round(float(block_bbox_raw.get('top', 0)), 4),
-            'width': round(float(block_bbox_raw.get('width', 0)), 4),
-            'height': round(float(block_bbox_raw.get('height', 0)), 4),
-            'page': int(page) if page is not None else 0
-        }
-        # Sub-level bbox: narrow to the line that contains cited_text (e.g. £1,950,000)
-        block_content = (block.get('content') or '').strip()
-        if cited_text and block_content:
-            narrowed = _narrow_bbox_to_cited_line(block_content, block_bbox, cited_text)
-            if narrowed != block_bbox:
-                block_bbox = narrowed
-                logger.info(
-                    f"[CITATION_BBOX] Sub-level bbox for cited_text '{cited_text[:40]}...' "
-                    f"(line match within block)"
-                )
-        return {
-            'doc_id': chunk_data.get('document_id', ''),
-            'chunk_id': chunk_data.get('id', chunk_id),
-            'block_index': block_index,
-            'page': int(page) if page is not None else 0,
-            'bbox': block_bbox
-        }
+        return _resolve_block_from_chunk_row(response.data, chunk_id, block_index, cited_text)
     except Exception as e:
         logger.warning(f"[CITATION_BBOX] resolve_block_id_to_bbox failed for block_id={block_id[:50]}...: {e}")
         return None
 
 
+@track_db_query('citation_resolve_blocks_batch')
+async def aresolve_block_ids_to_bbox(
+    citations: List[Tuple[str, Optional[str]]]
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Resolve many synthetic block_ids at once with the async Supabase client.
+
+    All referenced chunks are fetched in a single query instead of one round trip per
+    citation, so resolving an answer's citations costs one request.
+
+    Args:
+        citations: (block_id, cited_text) pairs
+
+    Returns:
+        Mapping block_id -> resolve_block_id_to_bbox-style result (None if unresolved)
+    """
+    parsed = {block_id: _parse_synthetic_block_id(block_id) for block_id, _ in citations}
+    chunk_ids = sorted({p[0] for p in parsed.values() if p is not None})
+    rows_by_id: Dict[str, Dict[str, Any]] = {}
+    if chunk_ids:
+        try:
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('document_vectors').select(
+                'id, document_id, page_number, bbox, blocks'
+            ).in_('id', chunk_ids).execute()
+            rows_by_id = {str(row.get('id')): row for row in response.data or []}
+        except Exception as e:
+            logger.warning(f"[CITATION_BBOX] Batch block lookup failed for {len(chunk_ids)} chunks: {e}")
+
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    for block_id, cited_text in citations:
+        target = parsed.get(block_id)
+        row = rows_by_id.get(target[0]) if target else None
+        if target and row is None and chunk_ids:
+            logger.warning(f"[CITATION_BBOX] Chunk not found for block_id={block_id[:50]}...")
+        try:
+            results[block_id] = _resolve_block_from_chunk_row(row, target[0], target[1], cited_text) if row else None
+        except Exception as e:
+            logger.warning(f"[CITATION_BBOX] resolve failed for block_id={block_id[:50]}...: {e}")
+            results[block_id] = None
+    return results
+
+
 class ChunkCitationInput(BaseModel):
     """Input schema for chunk citation tool."""
     chunk_id: str = Field(
@@ -119,7 +119,10 @@ class MainWorkflowState(TypedDict, total=False):
     execution_plan: Optional[ExecutionPlan]  # Current plan from planner node
     current_step_index: int  # Which step executor is on (default: 0)
     execution_results: List[Dict[str, Any]]  # Results from each executed step
-    use_cached_results: Optional[bool]  # When True, skip planner+executor and use execution_results from checkpoint (cache-first for follow-ups)
+    use_cached_results: Optional[bool]  # True when this turn reuses the cached retrieval (set by retrieval_cache node)
+    retrieval_cache: Optional[Dict[str, Any]]  # Last successful retrieval for this thread: query, query_embedding, scope, document_ids, execution_results, created_at
+    retrieval_reuse: Optional[Dict[str, Any]]  # This turn's reuse decision: mode ("reuse"|"delta"|"miss"), similarity, reason, check_ms, estimated_saved_ms
+    speculation_id: Optional[str]  # Speculative retrieve_docs started by the planner (claimed by executor; task is process-local)
     plan_refinement_count: int  # Track how many times plan has been refined (circuit breaker, default: 0, max: 3)
     prior_turn_content: Optional[str]  # Previous assistant answer when use_prior_context (for refine/format)
     format_instruction: Optional[str]  # User-requested output format (e.g. "one concise paragraph")
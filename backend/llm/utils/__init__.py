@@ -8,6 +8,7 @@ from typing import List, Dict
 from .chunk_expansion import (
     expand_chunk_with_adjacency,
     batch_expand_chunks,
+    abatch_expand_chunks,
     merge_expanded_chunks
 )
 
@@ -21,6 +22,7 @@ __all__ = [
     'reciprocal_rank_fusion',
     'expand_chunk_with_adjacency',
     'batch_expand_chunks',
+    'abatch_expand_chunks',
     'merge_expanded_chunks',
     'format_document_with_block_ids',
     'get_llm',
@@ -24,6 +24,7 @@ Key Features:
 """
 
 from typing import List, Dict, Tuple, Optional, Any
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -266,26 +267,7 @@ def batch_expand_chunks(
         supabase_client = get_supabase_client()
     
     # Group chunks by document_id for efficient batch fetching
-    chunks_by_doc: Dict[str, List[int]] = {}
-    chunk_metadata: Dict[Tuple[str, int], Dict[str, Any]] = {}
-    
-    for chunk in chunk_list:
-        doc_id = chunk.get('doc_id') or chunk.get('document_id')
-        chunk_index = chunk.get('chunk_index')
-        
-        if not doc_id or chunk_index is None:
-            logger.warning(f"Skipping chunk with missing doc_id or chunk_index: {chunk}")
-            continue
-        
-        if doc_id not in chunks_by_doc:
-            chunks_by_doc[doc_id] = []
-        
-        chunks_by_doc[doc_id].append(chunk_index)
-        chunk_metadata[(doc_id, chunk_index)] = chunk
-    
-    logger.debug(
-        f"Batch expanding {len(chunk_list)} chunks across {len(chunks_by_doc)} documents"
-    )
+    chunks_by_doc = _group_by_document(chunk_list)
     
     # Result: {(doc_id, chunk_index): [expanded_chunk_texts]}
     expanded_results: Dict[Tuple[str, int], List[str]] = {}
@@ -293,66 +275,14 @@ def batch_expand_chunks(
     # Process each document separately (one query per document)
     for doc_id, chunk_indices in chunks_by_doc.items():
         try:
-            # Calculate the min/max chunk_index range for this document
-            # This allows us to fetch all needed chunks in one query
-            all_indices = set(chunk_indices)
-            
-            # For each center chunk, calculate its expansion range
-            min_indices = [max(0, idx - expand_left) for idx in chunk_indices]
-            max_indices = [idx + expand_right for idx in chunk_indices]
-            
-            # Overall range to fetch (union of all ranges)
-            min_range = min(min_indices)
-            max_range = max(max_indices)
+            min_range, max_range = _expansion_range(chunk_indices, expand_left, expand_right)
             
             # Fetch all chunks in range for this document
-            result = supabase_client.table('document_vectors')\
-                .select('chunk_index, chunk_text')\
-                .eq('document_id', doc_id)\
-                .gte('chunk_index', min_range)\
-                .lte('chunk_index', max_range)\
-                .order('chunk_index', desc=False)\
-                .execute()
-            
-            if not result.data:
-                logger.warning(
-                    f"No chunks found for document {doc_id[:8]} in range [{min_range}, {max_range}]"
-                )
-                continue
-            
-            # Build lookup dict: {chunk_index: chunk_text}
-            chunks_dict = {item['chunk_index']: item['chunk_text'] for item in result.data}
+            result = _range_request(supabase_client, doc_id, min_range, max_range).execute()
             
-            # Expand each center chunk individually
-            for center_index in chunk_indices:
-                # Check if center chunk exists (required)
-                if center_index not in chunks_dict:
-                    logger.warning(
-                        f"Center chunk {center_index} not found in document {doc_id[:8]}"
-                    )
-                    continue
-                
-                # Calculate this chunk's expansion range
-                chunk_min = max(0, center_index - expand_left)
-                chunk_max = center_index + expand_right
-                
-                # Build ordered list: left → center → right
-                expanded = []
-                
-                # Left chunks
-                for idx in range(chunk_min, center_index):
-                    if idx in chunks_dict:
-                        expanded.append(chunks_dict[idx])
-                
-                # Center chunk
-                expanded.append(chunks_dict[center_index])
-                
-                # Right chunks
-                for idx in range(center_index + 1, chunk_max + 1):
-                    if idx in chunks_dict:
-                        expanded.append(chunks_dict[idx])
-                
-                expanded_results[(doc_id, center_index)] = expanded
+            expanded_results.update(
+                _expand_from_rows(doc_id, chunk_indices, result.data, min_range, max_range, expand_left, expand_right)
+            )
                 
         except Exception as e:
             logger.error(
@@ -368,6 +298,138 @@ def batch_expand_chunks(
     return expanded_results
 
 
+async def abatch_expand_chunks(
+    chunk_list: List[Dict[str, Any]],
+    expand_left: int = 2,
+    expand_right: int = 2,
+    supabase_client=None
+) -> Dict[Tuple[str, int], List[str]]:
+    """
+    Async variant of batch_expand_chunks.
+    
+    Issues the per-document range queries concurrently on the pooled async Supabase
+    client, so expansion across N documents costs roughly one round trip instead of N.
+    Same arguments and return format as batch_expand_chunks.
+    """
+    if not chunk_list:
+        return {}
+    
+    if supabase_client is None:
+        from backend.services.supabase_client_factory import get_async_supabase_client
+        supabase_client = await get_async_supabase_client()
+    
+    chunks_by_doc = _group_by_document(chunk_list)
+    ranges = {
+        doc_id: _expansion_range(chunk_indices, expand_left, expand_right)
+        for doc_id, chunk_indices in chunks_by_doc.items()
+    }
+    responses = await asyncio.gather(
+        *[_range_request(supabase_client, doc_id, *ranges[doc_id]).execute() for doc_id in chunks_by_doc],
+        return_exceptions=True
+    )
+    
+    expanded_results: Dict[Tuple[str, int], List[str]] = {}
+    for (doc_id, chunk_indices), result in zip(chunks_by_doc.items(), responses):
+        if isinstance(result, Exception):
+            logger.error(f"Error batch expanding chunks for document {doc_id[:8]}: {result}")
+            continue
+        min_range, max_range = ranges[doc_id]
+        expanded_results.update(
+            _expand_from_rows(doc_id, chunk_indices, result.data, min_range, max_range, expand_left, expand_right)
+        )
+    
+    logger.debug(
+        f"Batch expansion completed: {len(expanded_results)}/{len(chunk_list)} chunks expanded"
+    )
+    return expanded_results
+
+
+def _group_by_document(chunk_list: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    chunks_by_doc: Dict[str, List[int]] = {}
+    for chunk in chunk_list:
+        doc_id = chunk.get('doc_id') or chunk.get('document_id')
+        chunk_index = chunk.get('chunk_index')
+        
+        if not doc_id or chunk_index is None:
+            logger.warning(f"Skipping chunk with missing doc_id or chunk_index: {chunk}")
+            continue
+        
+        chunks_by_doc.setdefault(doc_id, []).append(chunk_index)
+    
+    logger.debug(
+        f"Batch expanding {len(chunk_list)} chunks across {len(chunks_by_doc)} documents"
+    )
+    return chunks_by_doc
+
+
+def _expansion_range(chunk_indices: List[int], expand_left: int, expand_right: int) -> Tuple[int, int]:
+    """Overall [min, max] chunk_index range covering every center chunk's expansion (union of ranges)."""
+    min_range = min(max(0, idx - expand_left) for idx in chunk_indices)
+    max_range = max(idx + expand_right for idx in chunk_indices)
+    return min_range, max_range
+
+
+def _range_request(supabase_client, doc_id: str, min_range: int, max_range: int):
+    return supabase_client.table('document_vectors')\
+        .select('chunk_index, chunk_text')\
+        .eq('document_id', doc_id)\
+        .gte('chunk_index', min_range)\
+        .lte('chunk_index', max_range)\
+        .order('chunk_index', desc=False)
+
+
+def _expand_from_rows(
+    doc_id: str,
+    chunk_indices: List[int],
+    rows: Optional[List[Dict[str, Any]]],
+    min_range: int,
+    max_range: int,
+    expand_left: int,
+    expand_right: int
+) -> Dict[Tuple[str, int], List[str]]:
+    if not rows:
+        logger.warning(
+            f"No chunks found for document {doc_id[:8]} in range [{min_range}, {max_range}]"
+        )
+        return {}
+    
+    # Build lookup dict: {chunk_index: chunk_text}
+    chunks_dict = {item['chunk_index']: item['chunk_text'] for item in rows}
+    
+    expanded_results: Dict[Tuple[str, int], List[str]] = {}
+    # Expand each center chunk individually
+    for center_index in chunk_indices:
+        # Check if center chunk exists (required)
+        if center_index not in chunks_dict:
+            logger.warning(
+                f"Center chunk {center_index} not found in document {doc_id[:8]}"
+            )
+            continue
+        
+        # Calculate this chunk's expansion range
+        chunk_min = max(0, center_index - expand_left)
+        chunk_max = center_index + expand_right
+        
+        # Build ordered list: left → center → right
+        expanded = []
+        
+        # Left chunks
+        for idx in range(chunk_min, center_index):
+            if idx in chunks_dict:
+                expanded.append(chunks_dict[idx])
+        
+        # Center chunk
+        expanded.append(chunks_dict[center_index])
+        
+        # Right chunks
+        for idx in range(center_index + 1, chunk_max + 1):
+            if idx in chunks_dict:
+                expanded.append(chunks_dict[idx])
+        
+        expanded_results[(doc_id, center_index)] = expanded
+    return expanded_results
+
+
 def merge_expanded_chunks(expanded_chunks: List[str], separator: str = "\n\n---\n\n") -> str:
     """
     Merge expanded chunk texts into a single string with separators.
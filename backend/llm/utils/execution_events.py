@@ -82,6 +82,36 @@ class ExecutionEvent:
         }
 
 
+@dataclass
+class AnswerDelta:
+    """Fragment of the final answer streamed while the node is still generating it"""
+    text: str
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        """Convert to dict for JSON serialization"""
+        return {
+            "type": "answer_delta",
+            "text": self.text,
+            "timestamp": self.timestamp
+        }
+
+
+@dataclass
+class AnswerCitation:
+    """Citation resolved while the answer is still streaming (frontend citation dict)"""
+    citation: Dict
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        """Convert to dict for JSON serialization"""
+        return {
+            "type": "answer_citation",
+            "citation": self.citation,
+            "timestamp": self.timestamp
+        }
+
+
 class ExecutionEventEmitter:
     """Manages execution event collection and queue-based streaming"""
     
@@ -130,6 +160,37 @@ class ExecutionEventEmitter:
         else:
             logger.warning(f"[EXECUTION_EVENTS] ⚠️  Stream queue not set - reasoning event '{label}' not streamed")
     
+    def emit_answer_delta(self, text: str) -> bool:
+        """
+        Stream a fragment of the final answer (sent to the client as `token` frames).
+
+        Returns False when there is no stream queue, so the caller knows the answer
+        will only be delivered once the node completes.
+        """
+        if not text or not self.stream_queue:
+            return False
+        try:
+            self.stream_queue.put(AnswerDelta(text=text), block=False)
+            return True
+        except Exception as e:
+            logger.warning(f"[EXECUTION_EVENTS] Stream queue full or error: {e}")
+            return False
+    
+    def emit_citation(self, citation: Dict) -> bool:
+        """
+        Stream a citation of the answer as soon as it is resolved (sent as a `citation` frame).
+
+        Returns False when there is no stream queue (citations then arrive with the node output).
+        """
+        if not citation or not self.stream_queue:
+            return False
+        try:
+            self.stream_queue.put(AnswerCitation(citation=citation), block=False)
+            return True
+        except Exception as e:
+            logger.warning(f"[EXECUTION_EVENTS] Stream queue full or error: {e}")
+            return False
+    
     def get_reasoning_events(self) -> List[ReasoningEvent]:
         """Get all reasoning events (thread-safe copy)"""
         with self._lock:
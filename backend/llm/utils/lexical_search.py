@@ -0,0 +1,83 @@
+"""
+Full-text (lexical) search for the retrieval tools.
+
+Keyword search used to be long OR chains of `%word%` ILIKE conditions, which can't use an
+index and scan every document / chunk in scope, so latency grew with the corpus. With
+backend/migrations/add_full_text_search.sql applied, both tools call ranked RPCs over
+GIN-indexed tsvector columns instead:
+
+- search_documents_fts(query_text, target_business_id, match_count)
+- search_chunks_fts(query_text, target_document_id, match_count)
+
+Rows come back best first with a keyword_rank (ts_rank_cd, length-normalized). Keyword and
+vector rankings are merged with reciprocal-rank fusion (fused_order), which needs no score
+calibration between the two signals.
+
+Until the migration is applied the RPCs don't exist: the first failure switches the tools
+back to their ILIKE queries for FULL_TEXT_SEARCH_RETRY_SECONDS, then the RPCs are retried.
+"""
+
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from backend.llm.utils import reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
+
+FULL_TEXT_SEARCH_ENABLED = os.environ.get('FULL_TEXT_SEARCH_ENABLED', 'true').lower() == 'true'
+FULL_TEXT_SEARCH_RETRY_SECONDS = float(os.environ.get('FULL_TEXT_SEARCH_RETRY_SECONDS', '300'))
+# RRF constant: larger values flatten the advantage of top ranks
+RRF_K = int(os.environ.get('RRF_K', '60'))
+
+# PostgREST / Postgres errors meaning the RPC isn't deployed (not transient)
+_MISSING_FUNCTION_MARKERS = ('PGRST202', 'Could not find the function', 'does not exist')
+
+_disabled_until = 0.0
+
+
+def fts_available() -> bool:
+    return FULL_TEXT_SEARCH_ENABLED and time.time() >= _disabled_until
+
+
+def record_failure(error: Exception) -> None:
+    """Fall back to ILIKE for a while if the full-text RPCs are missing; ignore transient errors."""
+    global _disabled_until
+    if not any(marker in str(error) for marker in _MISSING_FUNCTION_MARKERS):
+        return
+    if fts_available():
+        logger.warning(
+            f"[FTS] Full-text search RPCs unavailable, using ILIKE for "
+            f"{FULL_TEXT_SEARCH_RETRY_SECONDS:.0f}s: {error}"
+        )
+    _disabled_until = time.time() + FULL_TEXT_SEARCH_RETRY_SECONDS
+
+
+def search_documents_request(supabase, query: str, business_id: Optional[str], match_count: int):
+    """Ranked documents matching any query word (scoped to business_uuid or business_id)."""
+    return supabase.rpc('search_documents_fts', {
+        'query_text': query,
+        'target_business_id': business_id or None,
+        'match_count': match_count,
+    })
+
+
+def search_chunks_request(supabase, doc_id: str, query: str, match_count: int):
+    """Ranked chunks of one document matching any query word."""
+    return supabase.rpc('search_chunks_fts', {
+        'query_text': query,
+        'target_document_id': doc_id,
+        'match_count': match_count,
+    })
+
+
+def is_ranked(rows: List[Dict]) -> bool:
+    """True for full-text RPC rows (ordered by keyword_rank); ILIKE rows have no order."""
+    return bool(rows) and 'keyword_rank' in rows[0]
+
+
+def fused_order(ranked_ids: List[List[str]], k: int = RRF_K) -> List[str]:
+    """IDs ordered by reciprocal-rank fusion of several best-first ID lists."""
+    fused = reciprocal_rank_fusion([[{'doc_id': item_id} for item_id in ids] for ids in ranked_ids], k=k)
+    return [item['doc_id'] for item in fused]
@@ -0,0 +1,267 @@
+"""
+Plan Cache - reuse validated planner output for equivalent queries
+
+The planner LLM almost always returns the same 2-step shape (retrieve_docs → retrieve_chunks)
+with the user's query passed through unchanged. Those plans are stored as templates (step
+queries equal to the user query become QUERY_PLACEHOLDER) and served for later queries in
+the same business that either:
+
+- have the same normalized signature (case, punctuation and whitespace folded), or
+- are the nearest neighbour by query embedding above PLAN_CACHE_SIMILARITY
+
+Plans that depend on conversation context (rewritten queries, use_prior_context,
+format_instruction) are never cached.
+
+Modes (config.plan_cache_mode / PLAN_CACHE_MODE):
+- 'on': serve cached plans; a sample of hits (PLAN_CACHE_SHADOW_SAMPLE_RATE) is re-planned
+  by the LLM in the background to keep measuring accuracy
+- 'shadow' (default): always call the LLM, compare with the cached plan, record agreement
+- 'off': disabled
+
+Entries expire after PLAN_CACHE_TTL_SECONDS and each business keeps at most
+PLAN_CACHE_MAX_PER_BUSINESS entries (LRU).
+"""
+
+import copy
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUERY_PLACEHOLDER = "{query}"
+
+_SIMILARITY_THRESHOLD = float(os.environ.get('PLAN_CACHE_SIMILARITY', '0.93'))
+_TTL_SECONDS = float(os.environ.get('PLAN_CACHE_TTL_SECONDS', str(6 * 3600)))
+_MAX_PER_BUSINESS = int(os.environ.get('PLAN_CACHE_MAX_PER_BUSINESS', '256'))
+_MAX_BUSINESSES = int(os.environ.get('PLAN_CACHE_MAX_BUSINESSES', '512'))
+SHADOW_SAMPLE_RATE = float(os.environ.get('PLAN_CACHE_SHADOW_SAMPLE_RATE', '0.05'))
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def query_signature(query: str) -> str:
+    """Normalized query signature: lowercase, punctuation stripped, whitespace collapsed."""
+    folded = _NON_WORD_RE.sub(" ", (query or "").lower())
+    return _WHITESPACE_RE.sub(" ", folded).strip()
+
+
+def to_template(execution_plan: Dict[str, Any], user_query: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn a plan into a query-independent template.
+
+    Returns:
+        Template plan, or None if the plan depends on anything other than the query
+        (rewritten step queries, prior-context/format instructions, literal document ids)
+    """
+    if execution_plan.get("use_prior_context") or execution_plan.get("format_instruction"):
+        return None
+    steps = execution_plan.get("steps") or []
+    if not steps:
+        return None
+
+    query_norm = (user_query or "").strip().lower()
+    template_steps = []
+    for step in steps:
+        if (step.get("query") or "").strip().lower() != query_norm:
+            return None
+        doc_refs = step.get("document_ids") or []
+        if any(not (isinstance(ref, str) and ref.startswith("<from_step_")) for ref in doc_refs):
+            return None
+        template_steps.append({
+            "id": step.get("id"),
+            "action": step.get("action"),
+            "query": QUERY_PLACEHOLDER,
+            "document_ids": list(doc_refs) or None,
+            # Labels can name the queried thing; executor labels retrieve_docs from the query
+            "reasoning_label": "Searched documents" if step.get("action") == "retrieve_docs" else "Reviewed relevant sections",
+            "reasoning_detail": None,
+        })
+    return {
+        "objective": f"Answer query: {QUERY_PLACEHOLDER}",
+        "steps": template_steps,
+        "use_prior_context": False,
+        "format_instruction": None,
+    }
+
+
+def from_template(template: Dict[str, Any], user_query: str) -> Dict[str, Any]:
+    """Instantiate a template plan for a query."""
+    plan = copy.deepcopy(template)
+    plan["objective"] = plan["objective"].replace(QUERY_PLACEHOLDER, user_query)
+    for step in plan["steps"]:
+        if step.get("query") == QUERY_PLACEHOLDER:
+            step["query"] = user_query
+    return plan
+
+
+def plan_shape(execution_plan: Dict[str, Any], user_query: str) -> Tuple:
+    """Comparable shape of a plan (actions, step query pass-through, references, flags)."""
+    query_norm = (user_query or "").strip().lower()
+    return (
+        tuple(
+            (
+                step.get("action"),
+                (step.get("query") or "").strip().lower() == query_norm,
+                tuple(step.get("document_ids") or ()),
+            )
+            for step in execution_plan.get("steps") or []
+        ),
+        bool(execution_plan.get("use_prior_context")),
+        bool(execution_plan.get("format_instruction")),
+    )
+
+
+class PlanCache:
+    """In-process plan template cache, partitioned per business."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # business_id -> OrderedDict[signature -> entry]
+        self._entries: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+        self._stats = {
+            'lookups': 0, 'hits_exact': 0, 'hits_similar': 0, 'misses': 0, 'stores': 0,
+            'shadow_compared': 0, 'shadow_agreed': 0,
+        }
+
+    def lookup(self, business_id: Optional[str], user_query: str,
+               query_embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached plan for a query.
+
+        Returns:
+            {'plan', 'match', 'similarity', 'cached_query'} or None on miss
+        """
+        signature = query_signature(user_query)
+        business_key = str(business_id or '')
+        now = time.time()
+        with self._lock:
+            self._stats['lookups'] += 1
+            bucket = self._entries.get(business_key)
+            if bucket is None or not signature:
+                self._stats['misses'] += 1
+                return None
+            self._evict_expired(bucket, now)
+
+            entry = bucket.get(signature)
+            match, similarity = 'exact', 1.0
+            if entry is None and query_embedding is not None:
+                entry, similarity = self._nearest(bucket, query_embedding)
+                match = 'similar'
+                if entry is None or similarity < _SIMILARITY_THRESHOLD:
+                    entry = None
+
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            bucket.move_to_end(entry['signature'])
+            self._entries.move_to_end(business_key)
+            entry['hits'] += 1
+            self._stats['hits_exact' if match == 'exact' else 'hits_similar'] += 1
+            template = entry['template']
+            cached_query = entry['query']
+
+        return {
+            'plan': from_template(template, user_query),
+            'match': match,
+            'similarity': similarity,
+            'cached_query': cached_query,
+        }
+
+    def store(self, business_id: Optional[str], user_query: str, execution_plan: Dict[str, Any],
+              query_embedding: Optional[List[float]] = None) -> bool:
+        """Store a validated LLM plan if it is query-independent. Returns True if stored."""
+        template = to_template(execution_plan, user_query)
+        signature = query_signature(user_query)
+        if template is None or not signature:
+            return False
+        embedding = None
+        if query_embedding is not None:
+            vector = np.asarray(query_embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            embedding = vector / norm if norm else None
+
+        business_key = str(business_id or '')
+        with self._lock:
+            bucket = self._entries.setdefault(business_key, OrderedDict())
+            bucket[signature] = {
+                'signature': signature,
+                'query': user_query,
+                'template': template,
+                'embedding': embedding,
+                'expires_at': time.time() + _TTL_SECONDS,
+                'hits': 0,
+            }
+            bucket.move_to_end(signature)
+            self._entries.move_to_end(business_key)
+            while len(bucket) > _MAX_PER_BUSINESS:
+                bucket.popitem(last=False)
+            while len(self._entries) > _MAX_BUSINESSES:
+                self._entries.popitem(last=False)
+            self._stats['stores'] += 1
+        return True
+
+    def record_shadow(self, cached_plan: Dict[str, Any], llm_plan: Dict[str, Any], user_query: str) -> bool:
+        """Compare a cached plan with the LLM plan for the same query; returns True if they agree."""
+        agreed = plan_shape(cached_plan, user_query) == plan_shape(llm_plan, user_query)
+        with self._lock:
+            self._stats['shadow_compared'] += 1
+            if agreed:
+                self._stats['shadow_agreed'] += 1
+        if not agreed:
+            logger.info(
+                f"[PLAN_CACHE] Shadow mismatch for '{user_query[:60]}': "
+                f"cached={plan_shape(cached_plan, user_query)} llm={plan_shape(llm_plan, user_query)}"
+            )
+        return agreed
+
+    def invalidate(self, business_id: Optional[str] = None) -> None:
+        with self._lock:
+            if business_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(business_id), None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            hits = stats['hits_exact'] + stats['hits_similar']
+            stats['hit_rate'] = round(hits / stats['lookups'], 3) if stats['lookups'] else 0.0
+            stats['shadow_agreement'] = (
+                round(stats['shadow_agreed'] / stats['shadow_compared'], 3) if stats['shadow_compared'] else None
+            )
+            stats['entries'] = sum(len(bucket) for bucket in self._entries.values())
+            return stats
+
+    @staticmethod
+    def _evict_expired(bucket: "OrderedDict[str, Dict[str, Any]]", now: float) -> None:
+        expired = [signature for signature, entry in bucket.items() if entry['expires_at'] <= now]
+        for signature in expired:
+            del bucket[signature]
+
+    @staticmethod
+    def _nearest(bucket: "OrderedDict[str, Dict[str, Any]]", query_embedding: List[float]) -> Tuple[Optional[Dict[str, Any]], float]:
+        candidates = [entry for entry in bucket.values() if entry['embedding'] is not None]
+        if not candidates:
+            return None, 0.0
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return None, 0.0
+        matrix = np.stack([entry['embedding'] for entry in candidates])
+        if matrix.shape[1] != query.shape[0]:
+            return None, 0.0
+        scores = matrix @ (query / norm)
+        best = int(np.argmax(scores))
+        return candidates[best], float(scores[best])
+
+
+# Global instance (singleton pattern)
+plan_cache = PlanCache()
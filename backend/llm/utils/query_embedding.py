@@ -0,0 +1,164 @@
+"""
+Query embedding for retrieval tools.
+
+Document and chunk retrieval both embed the user query with the same model as the stored
+vectors (Voyage AI, 1024 dimensions), falling back to OpenAI when Voyage is disabled.
+Sync and async variants share configuration so retrieve_documents / retrieve_chunks and
+their awaitable counterparts produce identical embeddings.
+
+Embeddings are kept in a small process-wide LRU keyed by (provider, model, query), so a query
+embedded by the follow-up reuse check is not embedded again by the retrieval tools.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from backend.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_EMBEDDING_CACHE_SIZE = int(os.environ.get('QUERY_EMBEDDING_CACHE_SIZE', '256'))
+_embedding_cache: "OrderedDict[Tuple[str, str, str], List[float]]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+
+def _use_voyage() -> bool:
+    return os.environ.get('USE_VOYAGE_EMBEDDINGS', 'true').lower() == 'true'
+
+
+def _voyage_model() -> str:
+    return os.environ.get('VOYAGE_EMBEDDING_MODEL', 'voyage-law-2')
+
+
+def _cache_key(query: str) -> Tuple[str, str, str]:
+    if _use_voyage():
+        return ('voyage', _voyage_model(), query)
+    return ('openai', 'text-embedding-3-small', query)
+
+
+def peek_query_embedding(query: str) -> Optional[List[float]]:
+    """Return the cached embedding for a query without calling a provider."""
+    key = _cache_key(query)
+    with _embedding_cache_lock:
+        embedding = _embedding_cache.get(key)
+        if embedding is not None:
+            _embedding_cache.move_to_end(key)
+        return embedding
+
+
+def _remember(query: str, embedding: Optional[List[float]]) -> Optional[List[float]]:
+    if embedding is None or _EMBEDDING_CACHE_SIZE <= 0:
+        return embedding
+    with _embedding_cache_lock:
+        _embedding_cache[_cache_key(query)] = embedding
+        while len(_embedding_cache) > _EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+    return embedding
+
+
+@lru_cache(maxsize=1)
+def _get_voyage_client():
+    from voyageai import Client
+    return Client(api_key=os.environ.get('VOYAGE_API_KEY'))
+
+
+def embed_query(query: str, purpose: str = 'document') -> Optional[List[float]]:
+    """
+    Embed a retrieval query.
+
+    Args:
+        query: Query text
+        purpose: 'document' or 'chunk' (only used in log messages)
+
+    Returns:
+        Embedding vector, or None if no embedding provider is available
+    """
+    cached = peek_query_embedding(query)
+    if cached is not None:
+        return cached
+    provider, model, _ = _cache_key(query)
+    with span(f"{provider}.embed", provider, model=model, purpose=purpose):
+        return _remember(query, _embed_query(query, purpose))
+
+
+def _embed_query(query: str, purpose: str) -> Optional[List[float]]:
+    if _use_voyage():
+        if not os.environ.get('VOYAGE_API_KEY'):
+            logger.error(f"VOYAGE_API_KEY not set, cannot generate {purpose} embedding")
+            return None
+        try:
+            response = _get_voyage_client().embed(
+                texts=[query],
+                model=_voyage_model(),
+                input_type='query'  # Use 'query' for query embeddings
+            )
+            embedding = response.embeddings[0]
+            logger.debug(f"✅ Using Voyage AI embedding ({len(embedding)} dimensions) for {purpose} search")
+            return embedding
+        except Exception as e:
+            logger.error(f"Failed to generate Voyage embedding: {e}")
+            return None
+
+    # Fallback to OpenAI if Voyage is disabled
+    try:
+        from openai import OpenAI
+        openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+        response = openai_client.embeddings.create(
+            model="text-embedding-3-small",
+            input=[query]
+        )
+        embedding = response.data[0].embedding
+        logger.warning(f"⚠️ Using OpenAI embedding ({len(embedding)} dimensions) - Voyage is disabled")
+        return embedding
+    except Exception as e:
+        logger.error(f"Failed to generate OpenAI embedding: {e}")
+        return None
+
+
+async def aembed_query(query: str, purpose: str = 'document') -> Optional[List[float]]:
+    """Async variant of embed_query (does not block the event loop)."""
+    cached = peek_query_embedding(query)
+    if cached is not None:
+        return cached
+    provider, model, _ = _cache_key(query)
+    with span(f"{provider}.embed", provider, model=model, purpose=purpose):
+        return _remember(query, await _aembed_query(query, purpose))
+
+
+async def _aembed_query(query: str, purpose: str) -> Optional[List[float]]:
+    if _use_voyage():
+        voyage_api_key = os.environ.get('VOYAGE_API_KEY')
+        if not voyage_api_key:
+            logger.error(f"VOYAGE_API_KEY not set, cannot generate {purpose} embedding")
+            return None
+        try:
+            from voyageai import AsyncClient
+            response = await AsyncClient(api_key=voyage_api_key).embed(
+                texts=[query],
+                model=_voyage_model(),
+                input_type='query'
+            )
+            embedding = response.embeddings[0]
+            logger.debug(f"✅ Using Voyage AI embedding ({len(embedding)} dimensions) for {purpose} search")
+            return embedding
+        except Exception as e:
+            logger.error(f"Failed to generate Voyage embedding: {e}")
+            return None
+
+    try:
+        from openai import AsyncOpenAI
+        openai_client = AsyncOpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+        response = await openai_client.embeddings.create(
+            model="text-embedding-3-small",
+            input=[query]
+        )
+        embedding = response.data[0].embedding
+        logger.warning(f"⚠️ Using OpenAI embedding ({len(embedding)} dimensions) - Voyage is disabled")
+        return embedding
+    except Exception as e:
+        logger.error(f"Failed to generate OpenAI embedding: {e}")
+        return None
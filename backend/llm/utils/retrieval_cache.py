@@ -0,0 +1,208 @@
+"""
+Retrieval Reuse Cache - skip or shrink retrieval on follow-up turns
+
+The executor records the last successful retrieval of a thread in checkpointed state
+(`retrieval_cache`), so the cache is naturally keyed by thread_id. On the next document turn
+the retrieval_cache node compares the new query against it:
+
+- reuse: same scope and a near-identical query -> responder answers from the cached chunks
+- delta: same scope and a related query -> one retrieve_chunks step over the cached documents
+- miss: different scope, stale entry or unrelated query -> normal planner/simple_plan path
+
+Scope is (business_id, property_id, document_ids); a follow-up that changes property or
+@-selected documents never reuses. Thresholds are cosine similarities between query
+embeddings (Voyage vectors, same model as retrieval).
+
+Reuse rate and estimated latency saved are tracked per process in `retrieval_reuse_stats`
+and surfaced by /api/performance.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REUSE_SIMILARITY = float(os.environ.get('RETRIEVAL_REUSE_SIMILARITY', '0.92'))
+DELTA_SIMILARITY = float(os.environ.get('RETRIEVAL_DELTA_SIMILARITY', '0.75'))
+REUSE_TTL_SECONDS = float(os.environ.get('RETRIEVAL_REUSE_TTL_SECONDS', '1800'))
+
+REUSE = 'reuse'
+DELTA = 'delta'
+MISS = 'miss'
+
+
+def retrieval_scope(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Scope a cached retrieval is valid for (business, property, @-selected documents)."""
+    document_ids = state.get('document_ids') or []
+    return {
+        'business_id': str(state.get('business_id') or '') or None,
+        'property_id': str(state.get('property_id') or '') or None,
+        'document_ids': sorted(str(doc_id) for doc_id in document_ids if doc_id),
+    }
+
+
+def build_retrieval_cache(
+    state: Dict[str, Any],
+    execution_results: List[Dict[str, Any]],
+    document_ids: Sequence[str],
+    query_embedding: Optional[List[float]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the checkpointed cache entry after a successful chunk retrieval.
+
+    Args:
+        state: Current MainWorkflowState (query and scope are read from it)
+        execution_results: Executor results to replay on reuse
+        document_ids: Documents the chunks were retrieved from (delta retrieval target)
+        query_embedding: Embedding of user_query, if already known
+
+    Returns:
+        Cache entry, or None if there is nothing worth caching
+    """
+    user_query = state.get('user_query') or ''
+    has_chunks = any(
+        r.get('action') == 'retrieve_chunks' and r.get('success') and r.get('result')
+        for r in execution_results
+    )
+    if not user_query.strip() or not has_chunks:
+        return None
+    return {
+        'query': user_query,
+        'query_embedding': list(query_embedding) if query_embedding is not None else None,
+        'scope': retrieval_scope(state),
+        'document_ids': list(dict.fromkeys(str(doc_id) for doc_id in document_ids if doc_id)),
+        'execution_results': list(execution_results),
+        'created_at': time.time(),
+    }
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    va = np.asarray(a, dtype=np.float64)
+    vb = np.asarray(b, dtype=np.float64)
+    if va.shape != vb.shape or va.size == 0:
+        return 0.0
+    denom = float(np.linalg.norm(va) * np.linalg.norm(vb))
+    if denom == 0.0:
+        return 0.0
+    return float(np.dot(va, vb) / denom)
+
+
+def precheck_reuse(cache: Optional[Dict[str, Any]], state: Dict[str, Any]) -> Optional[str]:
+    """
+    Cheap checks before any embedding call.
+
+    Returns:
+        None if the entry may be reused, otherwise the reason it cannot
+    """
+    if not cache or not cache.get('execution_results'):
+        return 'no cached retrieval'
+    if time.time() - float(cache.get('created_at') or 0) > REUSE_TTL_SECONDS:
+        return 'cached retrieval expired'
+    if cache.get('scope') != retrieval_scope(state):
+        return 'scope changed'
+    return None
+
+
+def classify_reuse(cache: Dict[str, Any], query: str, query_embedding: Optional[List[float]]) -> Dict[str, Any]:
+    """
+    Decide reuse / delta / miss for a query against a cache entry that passed precheck_reuse.
+
+    Returns:
+        {'mode', 'similarity', 'reason'}
+    """
+    if query.strip().lower() == (cache.get('query') or '').strip().lower():
+        return {'mode': REUSE, 'similarity': 1.0, 'reason': 'identical query'}
+
+    cached_embedding = cache.get('query_embedding')
+    if query_embedding is None or cached_embedding is None:
+        return {'mode': MISS, 'similarity': None, 'reason': 'embedding unavailable'}
+
+    similarity = cosine_similarity(query_embedding, cached_embedding)
+    if similarity >= REUSE_SIMILARITY:
+        return {'mode': REUSE, 'similarity': similarity, 'reason': f'similarity {similarity:.3f} >= {REUSE_SIMILARITY}'}
+    if similarity >= DELTA_SIMILARITY and cache.get('document_ids'):
+        return {'mode': DELTA, 'similarity': similarity, 'reason': f'similarity {similarity:.3f} >= {DELTA_SIMILARITY}'}
+    return {'mode': MISS, 'similarity': similarity, 'reason': f'similarity {similarity:.3f} below {DELTA_SIMILARITY}'}
+
+
+def make_delta_plan(user_query: str, document_ids: List[str]) -> Dict[str, Any]:
+    """1-step plan: retrieve_chunks for the new query over the previously retrieved documents."""
+    doc_count = len(document_ids)
+    return {
+        "objective": f"Answer follow-up: {user_query}",
+        "steps": [
+            {
+                "id": "search_cached_chunks",
+                "action": "retrieve_chunks",
+                "query": user_query,
+                "document_ids": list(document_ids),
+                "reasoning_label": f"Reviewed {doc_count} document{'' if doc_count == 1 else 's'}",
+                "reasoning_detail": None,
+            },
+        ],
+        "use_prior_context": False,
+        "format_instruction": None,
+    }
+
+
+class RetrievalReuseStats:
+    """
+    Process-wide reuse counters.
+
+    Latency saved is estimated from running averages of the executor's retrieve_docs and
+    retrieve_chunks steps: a reuse skips both, a delta skips retrieve_docs. Planner LLM time
+    that is also skipped is not counted, so the figure is conservative.
+    """
+
+    _EWMA_ALPHA = 0.2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._decisions = {REUSE: 0, DELTA: 0, MISS: 0}
+        self._step_ms: Dict[str, float] = {}
+        self._check_ms_total = 0.0
+        self._saved_ms_total = 0.0
+
+    def record_step(self, action: str, duration_ms: float) -> None:
+        with self._lock:
+            previous = self._step_ms.get(action)
+            self._step_ms[action] = duration_ms if previous is None else (
+                previous + self._EWMA_ALPHA * (duration_ms - previous)
+            )
+
+    def record_decision(self, mode: str, check_ms: float) -> float:
+        """Record a reuse decision; returns the estimated milliseconds saved."""
+        with self._lock:
+            self._decisions[mode] = self._decisions.get(mode, 0) + 1
+            self._check_ms_total += check_ms
+            if mode == REUSE:
+                skipped = self._step_ms.get('retrieve_docs', 0.0) + self._step_ms.get('retrieve_chunks', 0.0)
+            elif mode == DELTA:
+                skipped = self._step_ms.get('retrieve_docs', 0.0)
+            else:
+                skipped = 0.0
+            saved = max(0.0, skipped - check_ms) if mode != MISS else -check_ms
+            self._saved_ms_total += saved
+            return saved
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._decisions.values())
+            return {
+                'evaluated': total,
+                'decisions': dict(self._decisions),
+                'reuse_rate': round(self._decisions[REUSE] / total, 3) if total else 0.0,
+                'delta_rate': round(self._decisions[DELTA] / total, 3) if total else 0.0,
+                'avg_check_ms': round(self._check_ms_total / total, 1) if total else 0.0,
+                'estimated_saved_ms_total': round(self._saved_ms_total, 1),
+                'avg_step_ms': {action: round(ms, 1) for action, ms in self._step_ms.items()},
+            }
+
+
+# Global instance (singleton pattern)
+retrieval_reuse_stats = RetrievalReuseStats()
@@ -0,0 +1,156 @@
+"""
+Speculative document retrieval while the planner LLM runs.
+
+The first plan step is almost always retrieve_docs on the raw user query. The planner starts
+that retrieval (which also embeds the query) as a background task before calling the LLM and
+puts the speculation id in state. The executor claims the task when its retrieve_docs step
+matches (same query and business) and awaits it instead of starting a new search; otherwise
+the task is cancelled and discarded.
+
+Tasks are process-local (they live on the GraphRunner loop); only the id is checkpointed.
+Unclaimed speculations are cancelled after SPECULATION_TTL_SECONDS.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_TTL_SECONDS = float(os.environ.get('SPECULATION_TTL_SECONDS', '120'))
+
+
+def _normalize(query: Optional[str]) -> str:
+    return (query or '').strip().lower()
+
+
+class SpeculativeRetrievals:
+    """Registry of in-flight speculative retrieve_documents calls, with hit/waste accounting."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._stats = {
+            'started': 0, 'hits': 0, 'discarded': 0, 'expired': 0,
+            'saved_ms_total': 0.0, 'wasted_ms_total': 0.0,
+        }
+
+    def start(self, query: str, business_id: Optional[str]) -> str:
+        """Start retrieve_documents(query, business_id) on the running loop; returns the speculation id."""
+        from backend.llm.config import config
+        from backend.llm.tools.document_retriever_tool import retrieve_documents, aretrieve_documents
+
+        speculation_id = uuid.uuid4().hex
+        entry = {
+            'query': query,
+            'business_id': business_id,
+            'started_at': time.perf_counter(),
+            'finished_at': None,
+        }
+
+        async def _run():
+            try:
+                if config.async_retrieval_enabled:
+                    return await aretrieve_documents(query=query, business_id=business_id)
+                from backend.llm.runtime.tool_pool import run_sync_tool
+                return await run_sync_tool(retrieve_documents, query=query, business_id=business_id)
+            finally:
+                entry['finished_at'] = time.perf_counter()
+
+        task = asyncio.get_running_loop().create_task(_run())
+        # Discarded tasks are never awaited; retrieve their outcome so failures aren't logged as unhandled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        entry['task'] = task
+        with self._lock:
+            self._sweep_expired()
+            self._entries[speculation_id] = entry
+            self._stats['started'] += 1
+        logger.debug(f"[SPECULATION] Started retrieve_documents for '{query[:60]}' ({speculation_id[:8]})")
+        return speculation_id
+
+    def claim(self, speculation_id: Optional[str], query: str, business_id: Optional[str]) -> Optional[asyncio.Task]:
+        """
+        Take the speculative task for a retrieve_docs step.
+
+        Returns:
+            The task if it matches the step (caller awaits it), else None. A mismatching
+            speculation is cancelled and counted as wasted.
+        """
+        if not speculation_id:
+            return None
+        with self._lock:
+            entry = self._entries.pop(speculation_id, None)
+        if entry is None:
+            return None
+        if _normalize(entry['query']) != _normalize(query) or entry['business_id'] != business_id:
+            self._discard_entry(entry, 'step does not match speculation')
+            return None
+
+        now = time.perf_counter()
+        finished_at = entry['finished_at']
+        # Time already spent on the search before the executor needed it
+        saved_ms = ((finished_at or now) - entry['started_at']) * 1000
+        with self._lock:
+            self._stats['hits'] += 1
+            self._stats['saved_ms_total'] += saved_ms
+        logger.info(
+            f"[SPECULATION] Hit: retrieve_documents {'already done' if finished_at else 'in flight'}, "
+            f"{saved_ms:.0f}ms off the critical path"
+        )
+        return entry['task']
+
+    def discard(self, speculation_id: Optional[str], reason: str) -> None:
+        """Cancel a speculation the plan does not use."""
+        if not speculation_id:
+            return
+        with self._lock:
+            entry = self._entries.pop(speculation_id, None)
+        if entry is not None:
+            self._discard_entry(entry, reason)
+
+    def matches_plan(self, speculation_id: Optional[str], execution_plan: Dict[str, Any]) -> bool:
+        """True if the plan has a retrieve_docs step the speculation can serve."""
+        with self._lock:
+            entry = self._entries.get(speculation_id) if speculation_id else None
+        if entry is None:
+            return False
+        return any(
+            step.get('action') == 'retrieve_docs' and _normalize(step.get('query')) == _normalize(entry['query'])
+            for step in (execution_plan.get('steps') or [])
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._entries)
+        resolved = stats['hits'] + stats['discarded'] + stats['expired']
+        stats['hit_rate'] = round(stats['hits'] / resolved, 3) if resolved else 0.0
+        stats['saved_ms_total'] = round(stats['saved_ms_total'], 1)
+        stats['wasted_ms_total'] = round(stats['wasted_ms_total'], 1)
+        return stats
+
+    def _discard_entry(self, entry: Dict[str, Any], reason: str) -> None:
+        entry['task'].cancel()
+        wasted_ms = ((entry['finished_at'] or time.perf_counter()) - entry['started_at']) * 1000
+        with self._lock:
+            self._stats['discarded'] += 1
+            self._stats['wasted_ms_total'] += wasted_ms
+        logger.info(f"[SPECULATION] Discarded ({reason}), {wasted_ms:.0f}ms of retrieval wasted")
+
+    def _sweep_expired(self) -> None:
+        # Caller holds the lock
+        cutoff = time.perf_counter() - SPECULATION_TTL_SECONDS
+        expired = [sid for sid, entry in self._entries.items() if entry['started_at'] < cutoff]
+        for sid in expired:
+            entry = self._entries.pop(sid)
+            entry['task'].cancel()
+            self._stats['expired'] += 1
+            self._stats['wasted_ms_total'] += ((entry['finished_at'] or time.perf_counter()) - entry['started_at']) * 1000
+
+
+# Global instance (singleton pattern)
+speculative_retrievals = SpeculativeRetrievals()
@@ -0,0 +1,306 @@
+"""
+Transcript Store - lightweight chat history for session loading
+
+Reads and writes the compact chat_messages table (role, content, citations) so opening a
+session does not deserialize the full LangGraph checkpoint. Sessions created before the
+table existed are projected from the checkpoint once and backfilled.
+
+Backfilled rows carry seq (the message's position in the checkpoint), which is unique per
+thread: concurrent backfills in different processes, or a session read racing the first
+append, upsert the same (thread_id, seq) rows instead of inserting the turns twice.
+
+Key Features:
+- Append a completed turn (user + assistant) after each query
+- Cursor pagination over messages (newest page first, returned oldest-first)
+- Per-session in-process cache with TTL, invalidated on append
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Columns the session list/detail endpoints need; skips any heavy per-session payloads
+SESSION_LIST_COLUMNS = (
+    'id, user_id, business_uuid, thread_id, session_name, message_count, '
+    'is_archived, created_at, last_message_at'
+)
+
+DEFAULT_PAGE_SIZE = 200
+_CACHE_TTL_SECONDS = float(os.environ.get('TRANSCRIPT_CACHE_TTL', '15'))
+_CACHE_MAX_SESSIONS = int(os.environ.get('TRANSCRIPT_CACHE_MAX_SESSIONS', '512'))
+
+_ROLE_BY_MESSAGE_TYPE = {
+    'HumanMessage': 'user',
+    'AIMessage': 'assistant',
+    'SystemMessage': 'system',
+    'ToolMessage': 'tool',
+}
+_MESSAGE_TYPE_BY_ROLE = {role: msg_type for msg_type, role in _ROLE_BY_MESSAGE_TYPE.items()}
+
+
+class TranscriptStore:
+    """
+    Read/write access to the chat_messages transcript projection.
+
+    Messages are returned as {'id', 'role', 'type', 'content', 'citations'}; 'type' keeps the
+    LangChain class name the session endpoint returned before the projection existed.
+    """
+
+    def __init__(self):
+        self._cache: "OrderedDict[str, Tuple[float, Dict[Tuple, Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Threads known to have transcript rows (skips the legacy-backfill check on append)
+        self._known_threads = set()
+
+    @property
+    def supabase(self):
+        from backend.services.supabase_client_factory import get_supabase_client
+        return get_supabase_client()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append_turn(
+        self,
+        thread_id: str,
+        user_content: str,
+        assistant_content: str,
+        citations: Optional[Dict[str, Any]] = None,
+        checkpoint_loader: Optional[Callable[[str], Any]] = None
+    ) -> bool:
+        """
+        Record a completed turn. Non-fatal: the checkpoint remains the source of truth.
+
+        Args:
+            thread_id: LangGraph thread_id (chat_sessions.thread_id)
+            user_content: The user's query
+            assistant_content: Final answer text
+            citations: Citations map sent to the frontend with the answer
+            checkpoint_loader: Optional callable(thread_id) -> checkpoint tuple; if the thread
+                has no transcript yet, earlier turns are backfilled from it first so legacy
+                sessions stay complete
+
+        Returns:
+            True if both rows were written
+        """
+        if not thread_id:
+            return False
+        turn_seq = None
+        if checkpoint_loader is not None:
+            turn_seq = self._backfill_before_first_append(thread_id, checkpoint_loader, user_content or '')
+        rows = [
+            {'thread_id': thread_id, 'role': 'user', 'content': user_content or ''},
+            {'thread_id': thread_id, 'role': 'assistant', 'content': assistant_content or '',
+             'citations': citations or None},
+        ]
+        try:
+            if turn_seq is None:
+                self.supabase.table('chat_messages').insert(rows).execute()
+            else:
+                # First append: a concurrent read may already have projected this turn from the
+                # checkpoint; merge into those rows (adding citations) rather than duplicating them
+                rows[0]['seq'], rows[1]['seq'] = turn_seq, turn_seq + 1
+                self.supabase.table('chat_messages').upsert(rows, on_conflict='thread_id,seq').execute()
+            return True
+        except Exception as e:
+            logger.warning(f"[TRANSCRIPT] Failed to append turn for {thread_id}: {e}")
+            return False
+        finally:
+            self.invalidate(thread_id)
+
+    def invalidate(self, thread_id: str) -> None:
+        with self._lock:
+            self._cache.pop(thread_id, None)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove a session's transcript (session delete)."""
+        try:
+            self.supabase.table('chat_messages').delete().eq('thread_id', thread_id).execute()
+        except Exception as e:
+            logger.warning(f"[TRANSCRIPT] Failed to delete transcript for {thread_id}: {e}")
+        finally:
+            self._known_threads.discard(thread_id)
+            self.invalidate(thread_id)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_messages(
+        self,
+        thread_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        before: Optional[int] = None,
+        checkpoint_loader: Optional[Callable[[str], Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of a session's transcript.
+
+        Args:
+            thread_id: LangGraph thread_id
+            limit: Max messages in the page
+            before: Cursor - only messages with id < before (None for the latest page)
+            checkpoint_loader: Optional callable(thread_id) -> checkpoint tuple, used to
+                project legacy sessions that have no transcript rows
+
+        Returns:
+            {'messages': [...oldest-first...], 'next_cursor': int | None, 'source': str}
+        """
+        limit = max(1, min(int(limit), 1000))
+        cache_key = (limit, before)
+        cached = self._cache_get(thread_id, cache_key)
+        if cached is not None:
+            return cached
+
+        page = self._read_page(thread_id, limit, before)
+        if not page['messages'] and before is None and checkpoint_loader is not None:
+            page = self._project_from_checkpoint(thread_id, checkpoint_loader, limit)
+
+        self._cache_put(thread_id, cache_key, page)
+        return page
+
+    def _read_page(self, thread_id: str, limit: int, before: Optional[int]) -> Dict[str, Any]:
+        query = self.supabase.table('chat_messages')\
+            .select('id, role, content, citations')\
+            .eq('thread_id', thread_id)
+        if before is not None:
+            query = query.lt('id', before)
+        # Fetch one extra row to know whether an older page exists
+        result = query.order('id', desc=True).limit(limit + 1).execute()
+        rows = result.data or []
+
+        has_more = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        return {
+            'messages': [self._format_row(row) for row in rows],
+            'next_cursor': rows[0]['id'] if has_more and rows else None,
+            'source': 'transcript'
+        }
+
+    def _backfill_before_first_append(
+        self,
+        thread_id: str,
+        checkpoint_loader: Callable[[str], Any],
+        user_content: str
+    ) -> Optional[int]:
+        """
+        Backfill earlier turns of a thread whose transcript is missing or only a projection.
+
+        Returns the seq the appended turn should take (its position in the checkpoint, or the
+        end of it when the checkpoint does not hold the turn), or None when the thread's latest
+        row was appended normally and the turn is a plain append.
+        """
+        if thread_id in self._known_threads:
+            return None
+        turn_seq = None
+        try:
+            latest = self.supabase.table('chat_messages')\
+                .select('id, seq').eq('thread_id', thread_id).order('id', desc=True).limit(1).execute()
+            # A projected latest row may come from a session read that ran after the checkpoint
+            # already held this turn; the turn then has to merge with it by seq
+            if not latest.data or latest.data[0].get('seq') is not None:
+                # The checkpoint normally already contains the turn being appended; drop it. Stateless
+                # runs (e.g. the retry without a checkpointer) never saved it, so the last user
+                # message is an earlier turn that must be kept
+                rows = self._checkpoint_rows(thread_id, checkpoint_loader)
+                last_user = max((i for i, row in enumerate(rows) if row['role'] == 'user'), default=None)
+                if last_user is not None and rows[last_user]['content'] == user_content:
+                    rows = rows[:last_user]
+                turn_seq = len(rows)
+                if rows:
+                    self._upsert_projection(rows)
+                    logger.info(f"[TRANSCRIPT] Backfilled {len(rows)} messages for {thread_id} from checkpoint")
+            if len(self._known_threads) > _CACHE_MAX_SESSIONS * 20:
+                self._known_threads.clear()
+            self._known_threads.add(thread_id)
+        except Exception as e:
+            logger.warning(f"[TRANSCRIPT] Could not backfill {thread_id} before append: {e}")
+        return turn_seq
+
+    def _upsert_projection(self, rows: List[Dict[str, Any]]) -> None:
+        """Write checkpoint-projected rows; rows another worker already wrote are left as they are."""
+        self.supabase.table('chat_messages')\
+            .upsert(rows, on_conflict='thread_id,seq', ignore_duplicates=True).execute()
+
+    @staticmethod
+    def _checkpoint_rows(thread_id: str, checkpoint_loader: Callable[[str], Any]) -> List[Dict[str, Any]]:
+        checkpoint_tuple = checkpoint_loader(thread_id)
+        if not checkpoint_tuple or not checkpoint_tuple.checkpoint:
+            return []
+
+        messages = checkpoint_tuple.checkpoint.get('channel_values', {}).get('messages', []) or []
+        rows = []
+        for msg in messages:
+            role = _ROLE_BY_MESSAGE_TYPE.get(msg.__class__.__name__)
+            if role not in ('user', 'assistant'):
+                continue
+            content = getattr(msg, 'content', '')
+            if not isinstance(content, str):
+                content = str(content)
+            rows.append({'thread_id': thread_id, 'seq': len(rows), 'role': role, 'content': content})
+        return rows
+
+    def _project_from_checkpoint(self, thread_id: str, checkpoint_loader: Callable[[str], Any], limit: int) -> Dict[str, Any]:
+        """
+        Legacy sessions: read messages from the checkpoint once, then backfill chat_messages
+        so subsequent loads use the compact table.
+        """
+        rows = self._checkpoint_rows(thread_id, checkpoint_loader)
+        if rows:
+            try:
+                self._upsert_projection(rows)
+                logger.info(f"[TRANSCRIPT] Backfilled {len(rows)} messages for {thread_id} from checkpoint")
+                return self._read_page(thread_id, limit, None)
+            except Exception as e:
+                logger.warning(f"[TRANSCRIPT] Backfill failed for {thread_id}: {e}")
+
+        formatted = [self._format_row(dict(row, id=None)) for row in rows]
+        return {'messages': formatted[-limit:], 'next_cursor': None, 'source': 'checkpoint'}
+
+    @staticmethod
+    def _format_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        role = row.get('role')
+        return {
+            'id': row.get('id'),
+            'role': role,
+            'type': _MESSAGE_TYPE_BY_ROLE.get(role, role),
+            'content': row.get('content'),
+            'citations': row.get('citations'),
+        }
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _cache_get(self, thread_id: str, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(thread_id)
+            if entry is None:
+                return None
+            expires_at, pages = entry
+            if expires_at <= time.time():
+                del self._cache[thread_id]
+                return None
+            self._cache.move_to_end(thread_id)
+            return pages.get(key)
+
+    def _cache_put(self, thread_id: str, key: Tuple, page: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._cache.get(thread_id)
+            if entry is None or entry[0] <= time.time():
+                entry = (time.time() + _CACHE_TTL_SECONDS, {})
+                self._cache[thread_id] = entry
+            entry[1][key] = page
+            self._cache.move_to_end(thread_id)
+            while len(self._cache) > _CACHE_MAX_SESSIONS:
+                self._cache.popitem(last=False)
+
+
+# Global instance (singleton pattern)
+transcript_store = TranscriptStore()
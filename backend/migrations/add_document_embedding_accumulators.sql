@@ -0,0 +1,101 @@
+-- Migration: Running-sum accumulators for incremental document embeddings
+-- Purpose: Maintain documents.document_embedding as a running mean of chunk embeddings
+--
+-- Lazy embedding (embed_chunk_on_demand / embed_document_chunks_lazy) fills chunks in
+-- gradually. Re-pooling every chunk embedding on each refresh downloads the full set of
+-- 1024-dim vectors as text and recomputes the mean from scratch. Instead we keep the
+-- element-wise sum and chunk count per document and apply O(dim) deltas.
+--
+-- This migration adds:
+-- 1. document_embedding_accumulators table (sum + count per document)
+-- 2. accumulate_document_embedding() - atomic delta update, returns new state (or reports
+--    that the document has no accumulator yet, so the caller rebuilds it)
+-- 3. reset_document_embedding_accumulator() - clear state when chunks are replaced
+
+-- ============================================================================
+-- STEP 1: Accumulator table
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS document_embedding_accumulators (
+    document_id uuid PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+    embedding_sum vector(1024),
+    chunk_count int NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE document_embedding_accumulators IS
+'Running element-wise sum and count of non-boilerplate chunk embeddings per document. '
+'documents.document_embedding is the normalized mean, published when it drifts.';
+
+-- ============================================================================
+-- STEP 2: Atomic delta update
+-- ============================================================================
+
+-- Adds delta to an existing running sum and returns the new state together with the
+-- currently published document embedding, so the caller can decide whether the mean moved
+-- enough to be written back.
+--
+-- When the document has no accumulator yet (it predates this migration, or its chunks were
+-- just replaced) nothing is written: seeding the sum from the incoming chunks alone would
+-- publish the mean of those chunks as the document embedding. A single row with
+-- has_accumulator = false is returned instead and the caller rebuilds the sum from all
+-- embedded chunks (DocumentEmbeddingMaintainer.rebuild).
+DROP FUNCTION IF EXISTS accumulate_document_embedding(uuid, vector, int);
+
+CREATE OR REPLACE FUNCTION accumulate_document_embedding(
+    target_document_id uuid,
+    delta vector(1024),
+    count_delta int
+)
+RETURNS TABLE (
+    embedding_sum vector(1024),
+    chunk_count int,
+    document_embedding vector(1024),
+    has_accumulator boolean
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    UPDATE document_embedding_accumulators acc
+    SET embedding_sum = CASE
+            WHEN acc.embedding_sum IS NULL THEN delta
+            ELSE acc.embedding_sum + delta
+        END,
+        chunk_count = GREATEST(acc.chunk_count + count_delta, 0),
+        updated_at = now()
+    WHERE acc.document_id = target_document_id;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT NULL::vector(1024), 0, NULL::vector(1024), false;
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT a.embedding_sum, a.chunk_count, d.document_embedding, true
+    FROM document_embedding_accumulators a
+    JOIN documents d ON d.id = a.document_id
+    WHERE a.document_id = target_document_id;
+END;
+$$;
+
+-- ============================================================================
+-- STEP 3: Reset (used when a document's chunks are deleted and re-stored)
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION reset_document_embedding_accumulator(
+    target_document_id uuid
+)
+RETURNS void
+LANGUAGE sql
+AS $$
+    DELETE FROM document_embedding_accumulators WHERE document_id = target_document_id;
+$$;
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
+--
+-- Existing documents have no accumulator row yet; the first chunk embedded for one of them
+-- triggers a full rebuild. To seed them all up front instead:
+--   python scripts/backfill_document_embeddings.py --all-documents --accumulators-only
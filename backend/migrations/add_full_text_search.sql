@@ -0,0 +1,148 @@
+-- Migration: Full-text (lexical) search for documents and chunks
+-- Purpose: Replace the `%word%` ILIKE chains in the retriever tools with indexed, ranked search
+--
+-- document_retriever_tool and chunk_retriever_tool matched keywords with long OR chains of
+-- ILIKE '%word%' conditions. A leading wildcard can't use a btree index, so every keyword
+-- search scanned all of a business's documents / all of a document's chunks, and latency grew
+-- with the corpus. This migration adds:
+-- 1. documents.search_tsv - filename (weight A, '_', '-' and '.' split into words) + summary (weight B)
+-- 2. document_vectors.chunk_tsv - chunk_text_clean (falling back to chunk_text)
+-- 3. GIN indexes on both
+-- 4. search_documents_fts() / search_chunks_fts() - ranked with ts_rank_cd, normalized by
+--    document length (BM25-style), best first, returning keyword_rank
+--
+-- Both columns are stored generated columns, so every insert made by
+-- vector_service.store_document_vectors (and every later update of the text) maintains them
+-- without an extra write. Adding them rewrites the tables; run it off-peak.
+--
+-- Query words are OR-ed (like the ILIKE chains); documents matching more of them, closer
+-- together, rank higher. The tools fuse keyword ranks with vector ranks using reciprocal-rank
+-- fusion (backend/llm/utils/lexical_search.py) and fall back to ILIKE until this is applied.
+--
+-- Run this SQL in your Supabase SQL Editor or via psql.
+
+-- ============================================================================
+-- STEP 1: tsvector columns
+-- ============================================================================
+
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS search_tsv tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', regexp_replace(coalesce(original_filename, ''), '[_.\-]+', ' ', 'g')), 'A') ||
+    setweight(to_tsvector('english', coalesce(summary_text, '')), 'B')
+) STORED;
+
+ALTER TABLE document_vectors
+ADD COLUMN IF NOT EXISTS chunk_tsv tsvector
+GENERATED ALWAYS AS (
+    to_tsvector('english', coalesce(nullif(chunk_text_clean, ''), chunk_text, ''))
+) STORED;
+
+COMMENT ON COLUMN documents.search_tsv IS
+'Full-text vector of original_filename (weight A) and summary_text (weight B). Generated.';
+
+COMMENT ON COLUMN document_vectors.chunk_tsv IS
+'Full-text vector of chunk_text_clean (or chunk_text). Generated.';
+
+-- ============================================================================
+-- STEP 2: GIN indexes
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_documents_search_tsv
+ON documents USING gin (search_tsv);
+
+CREATE INDEX IF NOT EXISTS idx_document_vectors_chunk_tsv
+ON document_vectors USING gin (chunk_tsv);
+
+-- ============================================================================
+-- STEP 3: Ranked search functions
+-- ============================================================================
+
+-- Documents of one business (business_uuid, or legacy business_id text) matching any query word.
+-- Rank normalization 1 divides by 1 + log(length), so long summaries don't win on volume alone.
+CREATE OR REPLACE FUNCTION search_documents_fts(
+    query_text text,
+    target_business_id text DEFAULT NULL,
+    match_count int DEFAULT 30
+)
+RETURNS TABLE (
+    id uuid,
+    original_filename text,
+    classification_type text,
+    summary_text text,
+    document_summary jsonb,
+    keyword_rank float
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT replace(plainto_tsquery('english', query_text)::text, ' & ', ' | ')::tsquery AS query
+    )
+    SELECT
+        d.id,
+        d.original_filename::text,
+        d.classification_type::text,
+        d.summary_text::text,
+        d.document_summary::jsonb,
+        ts_rank_cd(d.search_tsv, q.query, 1)::float AS keyword_rank
+    FROM documents d, q
+    WHERE d.search_tsv @@ q.query
+        AND (
+            target_business_id IS NULL
+            OR d.business_uuid::text = target_business_id
+            OR d.business_id::text = target_business_id
+        )
+    ORDER BY keyword_rank DESC
+    LIMIT match_count;
+$$;
+
+-- Chunks of one document matching any query word; same columns as the chunk tools select.
+CREATE OR REPLACE FUNCTION search_chunks_fts(
+    query_text text,
+    target_document_id uuid,
+    match_count int DEFAULT 10
+)
+RETURNS TABLE (
+    id uuid,
+    document_id uuid,
+    chunk_index int,
+    chunk_text text,
+    chunk_text_clean text,
+    page_number int,
+    metadata jsonb,
+    bbox jsonb,
+    blocks jsonb,
+    keyword_rank float
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT replace(plainto_tsquery('english', query_text)::text, ' & ', ' | ')::tsquery AS query
+    )
+    SELECT
+        dv.id,
+        dv.document_id,
+        dv.chunk_index::int,
+        dv.chunk_text::text,
+        dv.chunk_text_clean::text,
+        dv.page_number::int,
+        dv.metadata::jsonb,
+        dv.bbox::jsonb,
+        dv.blocks::jsonb,
+        ts_rank_cd(dv.chunk_tsv, q.query, 1)::float AS keyword_rank
+    FROM document_vectors dv, q
+    WHERE dv.document_id = target_document_id
+        AND dv.chunk_tsv @@ q.query
+    ORDER BY keyword_rank DESC
+    LIMIT match_count;
+$$;
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
+--
+-- To check the GIN index is used:
+-- EXPLAIN ANALYZE SELECT id FROM document_vectors
+-- WHERE chunk_tsv @@ plainto_tsquery('english', 'letter of offer');
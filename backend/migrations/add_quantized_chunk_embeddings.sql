@@ -0,0 +1,105 @@
+-- Migration: Compact (quantized) chunk embeddings and two-stage chunk search
+-- Purpose: Store int8 and binary codes next to document_vectors.embedding
+--
+-- Chunk embeddings (1024-dim, voyage-law-2) come back from PostgREST as ~12-20 KB of text per
+-- chunk. Chunk rescoring, mean pooling, backfills and the local ANN index only need a close
+-- approximation, so they read the int8 codes instead (see backend/services/embedding_quantization.py).
+--
+-- This migration adds:
+-- 1. embedding_int8 (bytea) - float32 scale + int8 codes, written by the application
+-- 2. embedding_binary (bit(1024)) - sign bits, generated from embedding by pgvector
+-- 3. HNSW index on embedding_binary (Hamming distance)
+-- 4. match_chunks_two_stage() - Hamming candidates, rescored with the full vectors
+--
+-- Requires pgvector >= 0.7 (binary_quantize, bit_hamming_ops).
+-- Adding the stored generated column rewrites document_vectors; run it off-peak.
+--
+-- Run this SQL in your Supabase SQL Editor or via psql.
+-- Then set QUANTIZED_EMBEDDINGS_ENABLED=true and backfill the int8 codes:
+--   python scripts/backfill_document_embeddings.py --all-documents --quantized-codes
+
+-- ============================================================================
+-- STEP 1: Columns
+-- ============================================================================
+
+ALTER TABLE document_vectors
+ADD COLUMN IF NOT EXISTS embedding_int8 bytea;
+
+ALTER TABLE document_vectors
+ADD COLUMN IF NOT EXISTS embedding_binary bit(1024)
+GENERATED ALWAYS AS (binary_quantize(embedding)::bit(1024)) STORED;
+
+COMMENT ON COLUMN document_vectors.embedding_int8 IS
+'int8 scalar-quantized embedding: 4-byte little-endian float32 scale followed by 1024 int8 codes.';
+
+COMMENT ON COLUMN document_vectors.embedding_binary IS
+'Sign bits of embedding (binary_quantize). Candidate selection only; rescore with embedding.';
+
+-- ============================================================================
+-- STEP 2: Hamming index
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS document_vectors_embedding_binary_hnsw_idx
+ON document_vectors
+USING hnsw (embedding_binary bit_hamming_ops);
+
+-- ============================================================================
+-- STEP 3: Two-stage chunk search
+-- ============================================================================
+
+-- Same signature and result columns as match_chunks(), plus the candidate multiplier.
+-- Stage 1 orders the document's chunks by Hamming distance on 128-byte codes; stage 2
+-- computes exact cosine similarity for the top match_count * rescore_multiplier only.
+CREATE OR REPLACE FUNCTION match_chunks_two_stage(
+    query_embedding vector(1024),
+    target_document_id uuid,
+    match_threshold float DEFAULT 0.6,
+    match_count int DEFAULT 5,
+    rescore_multiplier int DEFAULT 4
+)
+RETURNS TABLE (
+    id uuid,
+    document_id uuid,
+    chunk_index int,
+    chunk_text text,
+    chunk_text_clean text,
+    page_number int,
+    metadata jsonb,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT dv.id
+        FROM document_vectors dv
+        WHERE dv.document_id = target_document_id
+            AND dv.embedding_binary IS NOT NULL
+        ORDER BY dv.embedding_binary <~> binary_quantize(query_embedding)::bit(1024)
+        LIMIT match_count * rescore_multiplier
+    )
+    SELECT
+        dv.id,
+        dv.document_id,
+        dv.chunk_index,
+        dv.chunk_text,
+        dv.chunk_text_clean,
+        dv.page_number,
+        dv.metadata,
+        1 - (dv.embedding <=> query_embedding) as similarity
+    FROM document_vectors dv
+    JOIN candidates c ON c.id = dv.id
+    WHERE 1 - (dv.embedding <=> query_embedding) > match_threshold
+    ORDER BY dv.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- ============================================================================
+-- Migration complete
+-- ============================================================================
+--
+-- To check backfill progress:
+-- SELECT count(*) FILTER (WHERE embedding IS NOT NULL AND embedding_int8 IS NULL) AS pending_int8
+-- FROM document_vectors;
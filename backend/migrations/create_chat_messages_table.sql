@@ -0,0 +1,36 @@
+-- Migration: Compact chat transcript table
+-- Purpose: Load chat history without deserializing LangGraph checkpoints
+--
+-- GET /api/llm/sessions/<id>?include_messages=true used to call checkpointer.get_tuple(),
+-- which deserializes the entire MainWorkflowState (execution results, evidence, chunks)
+-- just to list messages. chat_messages is an append-only projection holding only what the
+-- chat UI renders: role, content and citations. Rows are written when a turn completes.
+--
+-- Run this SQL in your Supabase SQL Editor or via psql
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id BIGSERIAL PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    role VARCHAR(16) NOT NULL,          -- 'user' | 'assistant'
+    content TEXT NOT NULL DEFAULT '',
+    citations JSONB,                     -- citations map sent to the frontend (assistant only)
+    seq INTEGER,                         -- position in the checkpoint (rows backfilled from it, and the first appended turn)
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Cursor pagination: WHERE thread_id = $1 AND id < $cursor ORDER BY id DESC LIMIT $n
+CREATE INDEX IF NOT EXISTS idx_chat_messages_thread_id_id
+ON chat_messages (thread_id, id DESC);
+
+-- Older deployments created the table before seq existed
+ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS seq INTEGER;
+
+-- Checkpoint backfills upsert on (thread_id, seq), so two workers projecting the same legacy
+-- session (or a session read racing the first append) cannot insert its turns twice.
+-- Appended turns leave seq NULL, which the unique index does not constrain.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_chat_messages_thread_id_seq
+ON chat_messages (thread_id, seq);
+
+COMMENT ON TABLE chat_messages IS
+'Append-only chat transcript projection keyed by LangGraph thread_id. Source of truth for '
+'conversation state remains the checkpointer; this table only serves history loading.';
@@ -0,0 +1,32 @@
+-- Migration: Persistent geocoding cache
+-- Purpose: Remember provider geocoding results across workers, deploys and tenants
+--
+-- GeocodingService (backend/services/geocoding_service.py) is the single geocoding path for
+-- document processing (tasks.geocode_address / geocode_address_parallel,
+-- AddressNormalizationService.geocode_address) and /api/location/*. backend/services/geocode_cache.py
+-- checks an in-process LRU, then Redis, then this table before calling Google/Nominatim.
+--
+-- namespace: 'address' (cache_key = sha256 of the normalized address), 'reverse'
+--            (cache_key = 'lat,lng' rounded to 5 decimals) or 'search' (sha256 of the query)
+-- status:    'success' or 'not_found' (negative entries use GEOCODE_NEGATIVE_TTL_SECONDS)
+--
+-- Run this SQL in your Supabase SQL Editor or via psql
+
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    namespace VARCHAR(16) NOT NULL,
+    cache_key TEXT NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    result JSONB NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (namespace, cache_key)
+);
+
+-- Periodic cleanup: DELETE FROM geocode_cache WHERE expires_at < now();
+CREATE INDEX IF NOT EXISTS idx_geocode_cache_expires_at
+ON geocode_cache (expires_at);
+
+COMMENT ON TABLE geocode_cache IS
+'Shared geocoding results (positive and negative) keyed by namespace + normalized address hash. '
+'Rows are a cache: safe to truncate at any time.';
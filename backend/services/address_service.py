@@ -5,9 +5,6 @@ import hashlib
 import re
 import logging
 from typing import Dict, Any, Optional
-from geopy.geocoders import GoogleV3, Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
-import os
 
 logger = logging.getLogger(__name__)
 
@@ -15,16 +12,6 @@ class AddressNormalizationService:
     """Service for normalizing addresses and computing hashes for property linking"""
     
     def __init__(self):
-        self.google_api_key = os.environ.get('GOOGLE_MAPS_API_KEY')
-        
-        # Initialize geocoders
-        if self.google_api_key:
-            self.google_geocoder = GoogleV3(api_key=self.google_api_key, timeout=5)
-        else:
-            self.google_geocoder = None
-            
-        self.nominatim_geocoder = Nominatim(user_agent="solosway_mvp", timeout=8)
-        
         # Common abbreviations mapping
         self.abbreviations = {
             'st': 'street',
@@ -107,7 +94,7 @@ class AddressNormalizationService:
     
     def geocode_address(self, address: str) -> Dict[str, Any]:
         """
-        Geocode address using Google Maps API with Nominatim fallback
+        Geocode address using Google Maps API with Nominatim fallback (cached)
         
         Args:
             address: Address to geocode
@@ -124,40 +111,19 @@ class AddressNormalizationService:
                 "formatted_address": None
             }
         
-        # Try Google Geocoding API first (more accurate)
-        if self.google_geocoder:
-            try:
-                location = self.google_geocoder.geocode(address, exactly_one=True, timeout=5)
-                
-                if location:
-                    logger.info(f"Google geocoding successful for: '{address}'")
-                    return {
-                        "latitude": location.latitude,
-                        "longitude": location.longitude,
-                        "confidence": 0.9,
-                        "status": "success",
-                        "formatted_address": location.address,
-                        "geocoder": "google"
-                    }
-            except Exception as e:
-                logger.warning(f"Google geocoding failed: {e}, trying Nominatim")
+        # Shared cached implementation (geocode_cache keyed on this service's address hash)
+        from .geocoding_service import geocoding_service
+        record = geocoding_service.resolve(address)
         
-        # Fallback to Nominatim
-        try:
-            location = self.nominatim_geocoder.geocode(address, exactly_one=True, timeout=8)
-            
-            if location:
-                logger.info(f"Nominatim geocoding successful for: '{address}'")
-                return {
-                    "latitude": location.latitude,
-                    "longitude": location.longitude,
-                    "confidence": 0.8,
-                    "status": "success",
-                    "formatted_address": location.address,
-                    "geocoder": "nominatim"
-                }
-        except Exception as e:
-            logger.warning(f"Nominatim geocoding failed: {e}")
+        if record and record.get("status") == "success":
+            return {
+                "latitude": record["lat"],
+                "longitude": record["lng"],
+                "confidence": record.get("confidence", 0.0),
+                "status": "success",
+                "formatted_address": record.get("formatted_address"),
+                "geocoder": record.get("provider")
+            }
         
         logger.error(f"All geocoding attempts failed for: '{address}'")
         return {
@@ -0,0 +1,828 @@
+"""
+Local vector index tier for hot tenants' chunk and document embeddings.
+
+Every chunk search used to be a match_chunks RPC per document (and every document search a
+match_document_embeddings RPC) over HTTP, even for the busiest businesses whose
+document_vectors hardly change. With ANN_INDEX_ENABLED, each serving process keeps, per
+business_uuid:
+
+- chunk vectors from document_vectors, grouped by document_id
+- document vectors from documents.document_embedding
+
+as unit-normalized float32 matrices. retrieve_chunks / retrieve_documents search them first
+and only fetch the matching rows by primary key. Per-document search touches only that
+document's rows (tens to hundreds of vectors), so an exact matrix product is both faster than
+an HNSW graph at this size and has perfect recall against the stored vectors. qdrant-client's
+local mode is itself a brute-force numpy scan, so it would add a dependency without a gain.
+
+ANN_INDEX_QUANTIZATION=int8 or binary stores chunk vectors as compact codes
+(embedding_quantization.py) and builds from embedding_int8 when QUANTIZED_EMBEDDINGS_ENABLED.
+Binary search is two-stage: Hamming candidates here, rescored by the caller.
+
+Lifecycle:
+
+- A tenant is indexed once it is hot (ANN_INDEX_BUILD_AFTER_QUERIES searches within
+  ANN_INDEX_HOT_WINDOW_SECONDS); the build runs in the background and the database serves
+  until it is ready. warm() / ANN_INDEX_WARM_BUSINESSES / scripts/warm_ann_index.py build ahead
+  of traffic.
+- store_document_vectors, lazy chunk embedding, document-embedding publishes and deletions
+  call the on_* hooks. They apply the change locally and publish it on the
+  ann_index:changes Redis channel so other workers refresh that one document.
+- Indexes older than ANN_INDEX_MAX_AGE_SECONDS are rebuilt in the background (bounds drift if a
+  change notification was lost).
+- A sample of searches (ANN_INDEX_RECALL_SAMPLE_RATE) is re-run against the database off the
+  request path. Recall below ANN_INDEX_MIN_RECALL triggers a rebuild of that tenant.
+- Total memory is capped at ANN_INDEX_MEMORY_BUDGET_MB; least recently used tenants are evicted.
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_quantization import (
+    QUANTIZED_RESCORE_MULTIPLIER,
+    decode_int8,
+    dequantize_int8,
+    embedding_select,
+    estimated_cosine,
+    fill_missing_embeddings,
+    hamming_distances,
+    int8_similarities,
+    is_int8_literal,
+    quantize_binary,
+    quantize_int8,
+)
+from .redis_client import get_redis_client, subscribe_invalidations
+
+logger = logging.getLogger(__name__)
+
+ANN_INDEX_ENABLED = os.environ.get('ANN_INDEX_ENABLED', 'false').lower() == 'true'
+ANN_INDEX_MEMORY_BUDGET_MB = float(os.environ.get('ANN_INDEX_MEMORY_BUDGET_MB', '512'))
+ANN_INDEX_BUILD_AFTER_QUERIES = int(os.environ.get('ANN_INDEX_BUILD_AFTER_QUERIES', '3'))
+ANN_INDEX_HOT_WINDOW_SECONDS = float(os.environ.get('ANN_INDEX_HOT_WINDOW_SECONDS', '600'))
+ANN_INDEX_MAX_AGE_SECONDS = float(os.environ.get('ANN_INDEX_MAX_AGE_SECONDS', '3600'))
+ANN_INDEX_RECALL_SAMPLE_RATE = float(os.environ.get('ANN_INDEX_RECALL_SAMPLE_RATE', '0.05'))
+ANN_INDEX_MIN_RECALL = float(os.environ.get('ANN_INDEX_MIN_RECALL', '0.9'))
+ANN_INDEX_PAGE_SIZE = int(os.environ.get('ANN_INDEX_PAGE_SIZE', '1000'))
+# Chunk vector storage: 'float32', 'int8' (4x smaller) or 'binary' (32x smaller, two-stage)
+ANN_INDEX_QUANTIZATION = os.environ.get('ANN_INDEX_QUANTIZATION', 'float32').lower()
+# Comma-separated business UUIDs to build when the process starts serving
+ANN_INDEX_WARM_BUSINESSES = os.environ.get('ANN_INDEX_WARM_BUSINESSES', '')
+
+_CHANGES_CHANNEL = 'ann_index:changes'
+# Rough per-row overhead of the id strings and group bookkeeping, for the memory budget
+_ROW_OVERHEAD_BYTES = 120
+_ORIGIN = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _get_redis_client():
+    return get_redis_client(os.environ.get('ANN_INDEX_REDIS_URL'))
+
+
+def _parse_vector(value) -> Optional[np.ndarray]:
+    """pgvector value (list or '[...]' text from PostgREST, or int8 codes) as a float32 array."""
+    if value is None:
+        return None
+    if is_int8_literal(value):
+        return decode_int8(value)
+    try:
+        if isinstance(value, str):
+            value = json.loads(value)
+        vector = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    if vector.ndim != 1 or vector.size == 0:
+        return None
+    return vector
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class _VectorGroups:
+    """
+    Unit-normalized vectors grouped by document id (one matrix per group).
+
+    encoding is 'float32', 'int8' (codes + per-row scale, 4x smaller) or 'binary' (packed sign
+    bits, 32x smaller). Binary similarities are estimates from Hamming distance; callers
+    rescore the candidates (see AnnIndex.chunk_scores_are_estimates).
+    """
+
+    def __init__(self, encoding: str = 'float32'):
+        self.encoding = encoding
+        self._groups: Dict[str, Tuple[List[str], Any]] = {}
+        self._packed: Optional[Tuple[List[str], Any]] = None
+        self.dimension: Optional[int] = None
+        self.rows = 0
+        self.nbytes = 0
+
+    def __contains__(self, group_id: str) -> bool:
+        return group_id in self._groups
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def set_group(self, group_id: str, ids: List[str], vectors: Sequence[np.ndarray]) -> None:
+        self.remove_group(group_id)
+        if not ids:
+            return
+        matrix = _normalize_rows(np.vstack(vectors).astype(np.float32, copy=False))
+        if self.dimension is None:
+            self.dimension = matrix.shape[1]
+        elif matrix.shape[1] != self.dimension:
+            logger.warning(f"[ANN_INDEX] Skipping {group_id[:8]}: dimension {matrix.shape[1]} != {self.dimension}")
+            return
+        encoded = self._encode(matrix)
+        self._groups[group_id] = (list(ids), encoded)
+        self.rows += len(ids)
+        self.nbytes += self._encoded_nbytes(encoded) + len(ids) * _ROW_OVERHEAD_BYTES
+        self._packed = None
+
+    def remove_group(self, group_id: str) -> bool:
+        entry = self._groups.pop(group_id, None)
+        if entry is None:
+            return False
+        self.rows -= len(entry[0])
+        self.nbytes -= self._encoded_nbytes(entry[1]) + len(entry[0]) * _ROW_OVERHEAD_BYTES
+        self._packed = None
+        return True
+
+    def search_groups(self, query: np.ndarray, group_ids: Iterable[str], k: int,
+                      threshold: float) -> Dict[str, List[Tuple[str, float]]]:
+        """Top-k (similarity > threshold) within each requested group that is indexed."""
+        hits: Dict[str, List[Tuple[str, float]]] = {}
+        prepared = self._prepare_query(query)
+        for group_id in group_ids:
+            entry = self._groups.get(group_id)
+            if entry is None:
+                continue
+            ids, encoded = entry
+            hits[group_id] = self._top_k(ids, self._scores(encoded, prepared), k, threshold)
+        return hits
+
+    def search_all(self, query: np.ndarray, k: int, threshold: float) -> List[Tuple[str, float]]:
+        """Top-k (similarity > threshold) across every group."""
+        packed = self._packed
+        if packed is None:
+            ids: List[str] = []
+            encoded_groups = []
+            for group_ids, encoded in self._groups.values():
+                ids.extend(group_ids)
+                encoded_groups.append(encoded)
+            if not encoded_groups:
+                return []
+            packed = (ids, self._stack(encoded_groups))
+            self._packed = packed
+        return self._top_k(packed[0], self._scores(packed[1], self._prepare_query(query)), k, threshold)
+
+    def sample(self, n: int, rng: random.Random) -> List[Tuple[str, np.ndarray]]:
+        """n random (group_id, stored vector) pairs, e.g. as recall-check queries."""
+        group_ids = list(self._groups)
+        picks = []
+        for _ in range(n if group_ids else 0):
+            group_id = rng.choice(group_ids)
+            ids, encoded = self._groups[group_id]
+            picks.append((group_id, self._decode_row(encoded, rng.randrange(len(ids)))))
+        return picks
+
+    # Encoding-specific storage and scoring
+
+    def _encode(self, matrix: np.ndarray):
+        if self.encoding == 'int8':
+            return quantize_int8(matrix)
+        if self.encoding == 'binary':
+            return quantize_binary(matrix)
+        return matrix
+
+    def _encoded_nbytes(self, encoded) -> int:
+        if self.encoding == 'int8':
+            return encoded[0].nbytes + encoded[1].nbytes
+        return encoded.nbytes
+
+    def _stack(self, encoded_groups: List[Any]):
+        if self.encoding == 'int8':
+            return (np.vstack([codes for codes, _ in encoded_groups]),
+                    np.concatenate([scales for _, scales in encoded_groups]))
+        return np.vstack(encoded_groups)
+
+    def _prepare_query(self, query: np.ndarray):
+        return quantize_binary(query)[0] if self.encoding == 'binary' else query
+
+    def _scores(self, encoded, query) -> np.ndarray:
+        if self.encoding == 'int8':
+            return int8_similarities(encoded[0], encoded[1], query)
+        if self.encoding == 'binary':
+            return estimated_cosine(hamming_distances(encoded, query), self.dimension)
+        return encoded @ query
+
+    def _decode_row(self, encoded, index: int) -> np.ndarray:
+        if self.encoding == 'int8':
+            return dequantize_int8(encoded[0][index:index + 1], encoded[1][index:index + 1])[0]
+        if self.encoding == 'binary':
+            # Sign vector: only used as a query, where its direction is what matters
+            return np.unpackbits(encoded[index])[:self.dimension].astype(np.float32) * 2 - 1
+        return encoded[index]
+
+    @staticmethod
+    def _top_k(ids: List[str], similarities: np.ndarray, k: int, threshold: float) -> List[Tuple[str, float]]:
+        if k <= 0 or similarities.size == 0:
+            return []
+        if similarities.size > k:
+            candidates = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            candidates = np.arange(similarities.size)
+        ordered = candidates[np.argsort(-similarities[candidates])]
+        return [(ids[i], float(similarities[i])) for i in ordered if similarities[i] > threshold]
+
+
+class _TenantIndex:
+    """Chunk and document vectors for one business_uuid."""
+
+    def __init__(self, business_uuid: str):
+        self.business_uuid = business_uuid
+        # Document vectors are one per document, so they stay float32
+        self.chunks = _VectorGroups(ANN_INDEX_QUANTIZATION)
+        self.documents = _VectorGroups()
+        self.built_at = time.time()
+        self.last_used = time.time()
+        self.recall_checks = 0
+        self.recall_sum = 0.0
+        self.last_recall: Optional[float] = None
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        # search_all keeps a packed copy of the document matrix
+        return self.chunks.nbytes + 2 * self.documents.nbytes
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'business_uuid': self.business_uuid,
+            'chunks': self.chunks.rows,
+            'documents': self.documents.rows,
+            'memory_mb': round(self.nbytes / 1e6, 2),
+            'age_seconds': round(time.time() - self.built_at, 1),
+            'idle_seconds': round(time.time() - self.last_used, 1),
+            'recall_checks': self.recall_checks,
+            'mean_recall': round(self.recall_sum / self.recall_checks, 3) if self.recall_checks else None,
+            'last_recall': self.last_recall,
+        }
+
+
+# ----------------------------------------------------------------------------
+# Database reads (service-role client; run in background threads)
+# ----------------------------------------------------------------------------
+
+def _fetch_chunk_vectors(supabase, business_uuid: str) -> Dict[str, Tuple[List[str], List[np.ndarray]]]:
+    groups: Dict[str, Tuple[List[str], List[np.ndarray]]] = {}
+    start = 0
+    while True:
+        rows = (
+            supabase.table('document_vectors')
+            .select(f'id, document_id, {embedding_select()}')
+            .eq('business_uuid', business_uuid)
+            .not_.is_('embedding', 'null')
+            .order('id')
+            .range(start, start + ANN_INDEX_PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        for row in fill_missing_embeddings(supabase, rows):
+            vector = _parse_vector(row.get('embedding'))
+            if vector is None or not row.get('document_id'):
+                continue
+            ids, vectors = groups.setdefault(str(row['document_id']), ([], []))
+            ids.append(str(row['id']))
+            vectors.append(vector)
+        if len(rows) < ANN_INDEX_PAGE_SIZE:
+            return groups
+        start += ANN_INDEX_PAGE_SIZE
+
+
+def _fetch_document_chunk_vectors(supabase, document_id: str) -> Tuple[List[str], List[np.ndarray]]:
+    rows = (
+        supabase.table('document_vectors')
+        .select(f'id, {embedding_select()}')
+        .eq('document_id', document_id)
+        .not_.is_('embedding', 'null')
+        .execute()
+    ).data or []
+    ids, vectors = [], []
+    for row in fill_missing_embeddings(supabase, rows):
+        vector = _parse_vector(row.get('embedding'))
+        if vector is not None:
+            ids.append(str(row['id']))
+            vectors.append(vector)
+    return ids, vectors
+
+
+def _fetch_document_vectors(supabase, business_uuid: str) -> Dict[str, np.ndarray]:
+    vectors: Dict[str, np.ndarray] = {}
+    start = 0
+    while True:
+        rows = (
+            supabase.table('documents')
+            .select('id, document_embedding')
+            .eq('business_uuid', business_uuid)
+            .not_.is_('document_embedding', 'null')
+            .order('id')
+            .range(start, start + ANN_INDEX_PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        for row in rows:
+            vector = _parse_vector(row.get('document_embedding'))
+            if vector is not None:
+                vectors[str(row['id'])] = vector
+        if len(rows) < ANN_INDEX_PAGE_SIZE:
+            return vectors
+        start += ANN_INDEX_PAGE_SIZE
+
+
+class AnnIndex:
+    """Per-process registry of tenant indexes with hotness tracking, sync and LRU eviction."""
+
+    def __init__(self, memory_budget_mb: float = ANN_INDEX_MEMORY_BUDGET_MB):
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self._tenants: "OrderedDict[str, _TenantIndex]" = OrderedDict()
+        self._building: set = set()
+        self._too_large: Dict[str, float] = {}
+        self._recent_queries: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._started_pid: Optional[int] = None
+        self._stats = {
+            'local_searches': 0, 'db_fallbacks': 0, 'builds': 0, 'build_failures': 0,
+            'evictions': 0, 'refreshes': 0, 'recall_checks': 0, 'recall_rebuilds': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return ANN_INDEX_ENABLED
+
+    @property
+    def chunk_scores_are_estimates(self) -> bool:
+        """True when chunk hits are Hamming-distance candidates that need rescoring."""
+        return ANN_INDEX_QUANTIZATION == 'binary'
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search_chunks(
+        self,
+        business_uuid: Optional[str],
+        query_embedding: Sequence[float],
+        document_ids: Sequence[str],
+        k: int,
+        threshold: float,
+    ) -> Optional[Tuple[Dict[str, List[Tuple[str, float]]], List[str]]]:
+        """
+        Per-document top-k chunk ids (same semantics as the match_chunks RPC).
+
+        Returns (hits by document_id, document ids not in the index) or None when this
+        tenant is not indexed yet. Documents with no embedded chunks (lazy embedding still
+        pending) are reported as missing so the caller can ask the database.
+
+        With binary codes (chunk_scores_are_estimates) this is stage one of a two-stage
+        search: k * QUANTIZED_RESCORE_MULTIPLIER candidates per document, unthresholded, for
+        the caller to rescore, threshold and cut to k.
+        """
+        tenant, query = self._tenant_for_search(business_uuid, query_embedding, 'chunks')
+        if tenant is None:
+            return None
+        if self.chunk_scores_are_estimates:
+            k, threshold = k * QUANTIZED_RESCORE_MULTIPLIER, -1.0
+        with tenant.lock:
+            hits = tenant.chunks.search_groups(query, document_ids, k, threshold)
+        missing = [doc_id for doc_id in document_ids if doc_id not in hits]
+        return hits, missing
+
+    def search_documents(
+        self,
+        business_uuid: Optional[str],
+        query_embedding: Sequence[float],
+        k: int,
+        threshold: float,
+    ) -> Optional[List[Tuple[str, float]]]:
+        """Top-k document ids for the tenant (same semantics as match_document_embeddings), or None."""
+        tenant, query = self._tenant_for_search(business_uuid, query_embedding, 'documents')
+        if tenant is None:
+            return None
+        with tenant.lock:
+            return tenant.documents.search_all(query, k, threshold)
+
+    def maybe_check_recall(
+        self,
+        business_uuid: str,
+        kind: str,
+        local_ids: Sequence[str],
+        fetch_db_ids: Callable[[], Sequence[str]],
+    ) -> None:
+        """
+        For a sample of searches, compare local results with the database off the request path.
+
+        Recall = share of the database's ids the local search also returned. A tenant below
+        ANN_INDEX_MIN_RECALL (a missed change notification, a partial build) is rebuilt.
+        """
+        if random.random() >= ANN_INDEX_RECALL_SAMPLE_RATE:
+            return
+        local = set(local_ids)
+
+        def check():
+            try:
+                db_ids = set(fetch_db_ids())
+            except Exception as e:
+                logger.debug(f"[ANN_INDEX] Recall check query failed: {e}")
+                return
+            if not db_ids:
+                return
+            recall = len(db_ids & local) / len(db_ids)
+            from .performance_service import performance_service
+            performance_service.track_operation(f'ann_index.recall.{kind}', recall)
+            with self._lock:
+                self._stats['recall_checks'] += 1
+                tenant = self._tenants.get(business_uuid)
+            if tenant is not None:
+                tenant.recall_checks += 1
+                tenant.recall_sum += recall
+                tenant.last_recall = round(recall, 3)
+            if recall < ANN_INDEX_MIN_RECALL:
+                logger.warning(
+                    f"[ANN_INDEX] {kind} recall {recall:.2f} < {ANN_INDEX_MIN_RECALL} for business "
+                    f"{business_uuid[:8]}; rebuilding"
+                )
+                with self._lock:
+                    self._stats['recall_rebuilds'] += 1
+                self._schedule_build(business_uuid, force=True)
+
+        self._submit(check)
+
+    # ------------------------------------------------------------------
+    # Sync hooks (ingestion, lazy embedding, deletion)
+    # ------------------------------------------------------------------
+
+    def on_document_vectors_stored(
+        self,
+        business_uuid: Optional[str],
+        document_id: str,
+        rows: Optional[Iterable[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        A document's chunk vectors were (re)written.
+
+        rows (document_vectors records with 'id' and 'embedding') are applied directly when
+        this process indexes the tenant; other processes are told to refresh the document.
+        """
+        if not ANN_INDEX_ENABLED or not document_id:
+            return
+        document_id = str(document_id)
+        business_uuid = str(business_uuid) if business_uuid else None
+        if rows is not None and business_uuid:
+            tenant = self._loaded(business_uuid)
+            if tenant is not None:
+                ids, vectors = [], []
+                for row in rows:
+                    vector = _parse_vector(row.get('embedding'))
+                    if vector is not None and row.get('id'):
+                        ids.append(str(row['id']))
+                        vectors.append(vector)
+                with tenant.lock:
+                    tenant.chunks.set_group(document_id, ids, vectors)
+                self._enforce_budget()
+        else:
+            self._refresh_document(business_uuid, document_id)
+        self._publish({'op': 'refresh', 'business_uuid': business_uuid, 'document_id': document_id})
+
+    def on_document_embedding_changed(self, document_id: str, embedding=None,
+                                      business_uuid: Optional[str] = None) -> None:
+        """documents.document_embedding was written (embedding=None: cleared)."""
+        if not ANN_INDEX_ENABLED or not document_id:
+            return
+        document_id = str(document_id)
+        vector = _parse_vector(embedding)
+        for tenant in self._tenants_for(business_uuid, document_id):
+            with tenant.lock:
+                if vector is None:
+                    tenant.documents.remove_group(document_id)
+                else:
+                    tenant.documents.set_group(document_id, [document_id], [vector])
+        self._publish({'op': 'document_embedding', 'business_uuid': business_uuid, 'document_id': document_id})
+
+    def on_document_vectors_deleted(self, document_id: str, business_uuid: Optional[str] = None) -> None:
+        """A document's chunk vectors were deleted (the document itself may remain)."""
+        if not ANN_INDEX_ENABLED or not document_id:
+            return
+        document_id = str(document_id)
+        self._drop_document(business_uuid, document_id, chunks_only=True)
+        self._publish({'op': 'remove_chunks', 'business_uuid': business_uuid, 'document_id': document_id})
+
+    def on_document_deleted(self, document_id: str, business_uuid: Optional[str] = None) -> None:
+        """A document and its vectors were deleted."""
+        if not ANN_INDEX_ENABLED or not document_id:
+            return
+        document_id = str(document_id)
+        self._drop_document(business_uuid, document_id)
+        self._publish({'op': 'remove', 'business_uuid': business_uuid, 'document_id': document_id})
+
+    # ------------------------------------------------------------------
+    # Warm-up, invalidation, stats
+    # ------------------------------------------------------------------
+
+    def warm(self, business_uuids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Build (or rebuild) indexes now; returns per-tenant build summaries."""
+        results = {}
+        for business_uuid in business_uuids:
+            business_uuid = str(business_uuid).strip()
+            if business_uuid:
+                tenant = self.build(business_uuid)
+                results[business_uuid] = tenant.summary() if tenant else {'error': 'build failed or over budget'}
+        return results
+
+    def request_warm(self, business_uuids: Iterable[str]) -> bool:
+        """Ask every serving process (via Redis) to build these tenants; False without Redis."""
+        business_uuids = [str(b).strip() for b in business_uuids if str(b).strip()]
+        return self._publish({'op': 'warm', 'business_uuids': business_uuids}) if business_uuids else False
+
+    def start(self) -> None:
+        """
+        Subscribe to changes and build ANN_INDEX_WARM_BUSINESSES in the background.
+
+        Called from create_app and again lazily on the first search in each process, since
+        threads started before a pre-fork server forks do not exist in its workers.
+        """
+        if not ANN_INDEX_ENABLED or self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            inherited = self._started_pid is not None
+            self._started_pid = os.getpid()
+            if inherited:
+                # Builds in flight in the parent don't exist here
+                self._building.clear()
+        # Changes may have been missed while disconnected, hence clear on disconnect
+        subscribe_invalidations(_CHANGES_CHANNEL, self._handle_change, on_disconnect=self.clear,
+                                url=os.environ.get('ANN_INDEX_REDIS_URL'))
+        for business_uuid in [b.strip() for b in ANN_INDEX_WARM_BUSINESSES.split(',') if b.strip()]:
+            self._schedule_build(business_uuid, force=True)
+
+    def build(self, business_uuid: str) -> Optional[_TenantIndex]:
+        """Load a tenant's chunk and document vectors from the database (blocking)."""
+        from .supabase_client_factory import get_supabase_client
+        from .performance_service import performance_service
+
+        started = time.time()
+        try:
+            supabase = get_supabase_client()
+            tenant = _TenantIndex(business_uuid)
+            for document_id, (ids, vectors) in _fetch_chunk_vectors(supabase, business_uuid).items():
+                tenant.chunks.set_group(document_id, ids, vectors)
+            for document_id, vector in _fetch_document_vectors(supabase, business_uuid).items():
+                tenant.documents.set_group(document_id, [document_id], [vector])
+        except Exception as e:
+            logger.warning(f"[ANN_INDEX] Build failed for business {business_uuid[:8]}: {e}")
+            with self._lock:
+                self._stats['build_failures'] += 1
+            return None
+        finally:
+            with self._lock:
+                self._building.discard(business_uuid)
+
+        elapsed = time.time() - started
+        performance_service.track_operation('ann_index.build', elapsed)
+        if tenant.nbytes > self.memory_budget_bytes:
+            logger.warning(
+                f"[ANN_INDEX] Business {business_uuid[:8]} needs {tenant.nbytes / 1e6:.0f} MB, over the "
+                f"{self.memory_budget_bytes / 1e6:.0f} MB budget; serving it from the database"
+            )
+            with self._lock:
+                self._too_large[business_uuid] = time.time()
+                self._tenants.pop(business_uuid, None)
+            return None
+
+        with self._lock:
+            self._tenants[business_uuid] = tenant
+            self._tenants.move_to_end(business_uuid)
+            self._stats['builds'] += 1
+        self._enforce_budget()
+        logger.info(
+            f"[ANN_INDEX] Built business {business_uuid[:8]}: {tenant.chunks.rows} chunks, "
+            f"{tenant.documents.rows} documents, {tenant.nbytes / 1e6:.1f} MB in {elapsed:.2f}s"
+        )
+        return tenant
+
+    def invalidate(self, business_uuid: str) -> None:
+        with self._lock:
+            self._tenants.pop(str(business_uuid), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants.clear()
+            self._recent_queries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            tenants = list(self._tenants.values())
+            stats['building'] = len(self._building)
+        total = stats['local_searches'] + stats['db_fallbacks']
+        stats['local_share'] = round(stats['local_searches'] / total, 3) if total else 0.0
+        stats['memory_mb'] = round(sum(t.nbytes for t in tenants) / 1e6, 2)
+        stats['memory_budget_mb'] = round(self.memory_budget_bytes / 1e6, 2)
+        stats['tenants'] = [t.summary() for t in reversed(tenants)]
+        stats['enabled'] = ANN_INDEX_ENABLED
+        stats['quantization'] = ANN_INDEX_QUANTIZATION
+        stats['redis'] = _get_redis_client() is not None
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _tenant_for_search(self, business_uuid: Optional[str], query_embedding: Sequence[float],
+                           collection: str) -> Tuple[Optional[_TenantIndex], Optional[np.ndarray]]:
+        if not ANN_INDEX_ENABLED or not business_uuid or query_embedding is None:
+            return None, None
+        business_uuid = str(business_uuid)
+        self.start()
+        now = time.time()
+        with self._lock:
+            tenant = self._tenants.get(business_uuid)
+            if tenant is not None:
+                self._tenants.move_to_end(business_uuid)
+                tenant.last_used = now
+            else:
+                recent = [t for t in self._recent_queries.get(business_uuid, []) if now - t < ANN_INDEX_HOT_WINDOW_SECONDS]
+                recent.append(now)
+                self._recent_queries[business_uuid] = recent[-ANN_INDEX_BUILD_AFTER_QUERIES:]
+                hot = len(recent) >= ANN_INDEX_BUILD_AFTER_QUERIES
+                self._stats['db_fallbacks'] += 1
+        if tenant is None:
+            if hot:
+                self._schedule_build(business_uuid)
+            return None, None
+
+        if now - tenant.built_at > ANN_INDEX_MAX_AGE_SECONDS:
+            # Keep serving the current copy while the replacement builds
+            self._schedule_build(business_uuid, force=True)
+
+        groups = tenant.chunks if collection == 'chunks' else tenant.documents
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if groups.dimension is not None and query.shape[0] != groups.dimension:
+            logger.warning(f"[ANN_INDEX] Query dimension {query.shape[0]} != index dimension {groups.dimension}")
+            with self._lock:
+                self._stats['db_fallbacks'] += 1
+            return None, None
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return None, None
+        with self._lock:
+            self._stats['local_searches'] += 1
+        return tenant, query / norm
+
+    def _schedule_build(self, business_uuid: str, force: bool = False) -> None:
+        with self._lock:
+            if business_uuid in self._building:
+                return
+            if not force and business_uuid in self._tenants:
+                return
+            too_large_at = self._too_large.get(business_uuid)
+            if too_large_at and time.time() - too_large_at < ANN_INDEX_MAX_AGE_SECONDS:
+                return
+            self._building.add(business_uuid)
+        self._submit(lambda: self.build(business_uuid))
+
+    def _loaded(self, business_uuid: str) -> Optional[_TenantIndex]:
+        with self._lock:
+            return self._tenants.get(business_uuid)
+
+    def _tenants_for(self, business_uuid: Optional[str], document_id: str) -> List[_TenantIndex]:
+        """Loaded tenants a document belongs to (by business, else by where it is indexed)."""
+        with self._lock:
+            if business_uuid:
+                tenant = self._tenants.get(str(business_uuid))
+                return [tenant] if tenant is not None else []
+            return [t for t in self._tenants.values() if document_id in t.chunks or document_id in t.documents]
+
+    def _drop_document(self, business_uuid: Optional[str], document_id: str, chunks_only: bool = False) -> None:
+        for tenant in self._tenants_for(business_uuid, document_id):
+            with tenant.lock:
+                tenant.chunks.remove_group(document_id)
+                if not chunks_only:
+                    tenant.documents.remove_group(document_id)
+
+    def _refresh_document(self, business_uuid: Optional[str], document_id: str) -> None:
+        """Re-read one document's chunk vectors (and document vector) for loaded tenants."""
+        tenants = self._tenants_for(business_uuid, document_id)
+        if not tenants and not business_uuid:
+            with self._lock:
+                any_loaded = bool(self._tenants)
+            if not any_loaded:
+                return
+            # New document from a path that doesn't know its business (lazy embedding)
+            try:
+                from .supabase_client_factory import get_supabase_client
+                rows = get_supabase_client().table('documents').select('business_uuid').eq('id', document_id).limit(1).execute().data
+                owner = rows[0].get('business_uuid') if rows else None
+            except Exception as e:
+                logger.debug(f"[ANN_INDEX] Owner lookup failed for {document_id[:8]}: {e}")
+                return
+            tenants = self._tenants_for(str(owner), document_id) if owner else []
+        if not tenants:
+            return
+        try:
+            from .supabase_client_factory import get_supabase_client
+            ids, vectors = _fetch_document_chunk_vectors(get_supabase_client(), document_id)
+        except Exception as e:
+            logger.warning(f"[ANN_INDEX] Refresh of {document_id[:8]} failed ({e}); dropping it from the index")
+            self._drop_document(business_uuid, document_id)
+            return
+        for tenant in tenants:
+            with tenant.lock:
+                tenant.chunks.set_group(document_id, ids, vectors)
+        with self._lock:
+            self._stats['refreshes'] += 1
+        self._enforce_budget()
+
+    def _refresh_document_embedding(self, business_uuid: Optional[str], document_id: str) -> None:
+        tenants = self._tenants_for(business_uuid, document_id)
+        if not tenants:
+            return
+        try:
+            from .supabase_client_factory import get_supabase_client
+            rows = get_supabase_client().table('documents').select('document_embedding').eq('id', document_id).limit(1).execute().data
+        except Exception as e:
+            logger.debug(f"[ANN_INDEX] Document embedding refresh failed for {document_id[:8]}: {e}")
+            return
+        vector = _parse_vector(rows[0].get('document_embedding')) if rows else None
+        for tenant in tenants:
+            with tenant.lock:
+                if vector is None:
+                    tenant.documents.remove_group(document_id)
+                else:
+                    tenant.documents.set_group(document_id, [document_id], [vector])
+
+    def _enforce_budget(self) -> None:
+        with self._lock:
+            total = sum(t.nbytes for t in self._tenants.values())
+            while total > self.memory_budget_bytes and len(self._tenants) > 1:
+                business_uuid, evicted = self._tenants.popitem(last=False)
+                total -= evicted.nbytes
+                self._stats['evictions'] += 1
+                logger.info(f"[ANN_INDEX] Evicted business {business_uuid[:8]} ({evicted.nbytes / 1e6:.1f} MB, LRU)")
+
+    def _submit(self, fn: Callable[[], Any]) -> None:
+        # Threads don't survive fork: recreate the pool in each worker process
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ann-index')
+                self._executor_pid = os.getpid()
+            executor = self._executor
+        executor.submit(fn)
+
+    def _publish(self, message: Dict[str, Any]) -> bool:
+        client = _get_redis_client()
+        if client is None:
+            return False
+        try:
+            client.publish(_CHANGES_CHANNEL, json.dumps({**message, 'origin': _ORIGIN}))
+            return True
+        except Exception as e:
+            logger.debug(f"[ANN_INDEX] Publish failed: {e}")
+            return False
+
+    def _handle_change(self, raw: Optional[str]) -> None:
+        try:
+            change = json.loads(raw or '')
+        except (TypeError, ValueError):
+            return
+        if not isinstance(change, dict) or change.get('origin') == _ORIGIN:
+            return
+        op = change.get('op')
+        business_uuid = change.get('business_uuid')
+        document_id = change.get('document_id')
+        if op == 'warm':
+            for warm_uuid in change.get('business_uuids') or []:
+                self._schedule_build(str(warm_uuid), force=True)
+        elif op in ('remove', 'remove_chunks') and document_id:
+            self._drop_document(business_uuid, str(document_id), chunks_only=(op == 'remove_chunks'))
+        elif op == 'refresh' and document_id:
+            self._submit(lambda: self._refresh_document(business_uuid, str(document_id)))
+        elif op == 'document_embedding' and document_id:
+            self._submit(lambda: self._refresh_document_embedding(business_uuid, str(document_id)))
+
+
+# Global instance (singleton pattern)
+ann_index = AnnIndex()
@@ -0,0 +1,180 @@
+"""
+Process-wide catalog of document metadata used by retrieval.
+
+retrieve_chunks used to read the documents table once per query to check business_uuid
+and then once per document for original_filename / classification_type; retrieve_documents
+repeated the business check for its vector results. Those fields change only when a
+document is reclassified, changes status or is deleted, so they are cached per document_id:
+
+- in-process LRU, DOCUMENT_CATALOG_TTL_SECONDS as a staleness bound
+- misses are fetched together in one `in_` query (lookup / alookup)
+
+Writers call invalidate(document_id) after status, classification or deletion updates
+(DocumentStorageService, SupabaseDocumentService, UnifiedDeletionService and the direct
+status writes in tasks.py). The id is published on document_catalog:invalidate so every
+serving process drops its copy, including when the write happened in a Celery worker.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .redis_client import get_redis_client, subscribe_invalidations
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_CATALOG_ENABLED = os.environ.get('DOCUMENT_CATALOG_ENABLED', 'true').lower() == 'true'
+DOCUMENT_CATALOG_TTL_SECONDS = float(os.environ.get('DOCUMENT_CATALOG_TTL_SECONDS', '600'))
+DOCUMENT_CATALOG_MAX_ENTRIES = int(os.environ.get('DOCUMENT_CATALOG_MAX_ENTRIES', '20000'))
+
+_COLUMNS = 'id, business_uuid, business_id, original_filename, classification_type, status'
+_INVALIDATE_CHANNEL = 'document_catalog:invalidate'
+
+
+def _get_redis_client():
+    return get_redis_client()
+
+
+class DocumentCatalog:
+    """document_id -> {id, business_uuid, business_id, original_filename, classification_type, status}."""
+
+    def __init__(self, max_entries: int = DOCUMENT_CATALOG_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'fetches': 0, 'invalidations': 0}
+        # Bumped by every invalidation; rows read before one are returned but not cached
+        self._generation = 0
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(self, supabase, document_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Catalog records for document_ids, reading any misses with the sync client.
+
+        Documents that don't exist are absent from the result. Query errors propagate.
+        """
+        found, missing, generation = self._cached(document_ids)
+        if missing:
+            response = self._fetch_request(supabase, missing).execute()
+            found.update(self._store_rows(response.data or [], generation))
+        return found
+
+    async def alookup(self, supabase, document_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """lookup() with the async Supabase client."""
+        found, missing, generation = self._cached(document_ids)
+        if missing:
+            response = await self._fetch_request(supabase, missing).execute()
+            found.update(self._store_rows(response.data or [], generation))
+        return found
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self, document_id: Any) -> None:
+        """Drop a document everywhere (call after status, classification or deletion updates)."""
+        if document_id is None:
+            return
+        key = str(document_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._stats['invalidations'] += 1
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.publish(_INVALIDATE_CHANNEL, key)
+            except Exception as e:
+                logger.warning(f"[DOCUMENT_CATALOG] Redis invalidation failed for {key[:8]}: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['redis'] = _get_redis_client() is not None
+        stats['enabled'] = DOCUMENT_CATALOG_ENABLED
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fetch_request(supabase, document_ids: List[str]):
+        return supabase.table('documents').select(_COLUMNS).in_('id', document_ids)
+
+    def _cached(self, document_ids: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str], int]:
+        keys = list(dict.fromkeys(str(doc_id) for doc_id in document_ids if doc_id))
+        if not DOCUMENT_CATALOG_ENABLED:
+            return {}, keys, self._generation
+        if _get_redis_client() is not None:
+            self._ensure_listener()
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = dict(entry[1])
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(key)
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(missing)
+            if missing:
+                self._stats['fetches'] += 1
+            generation = self._generation
+        return found, missing, generation
+
+    def _store_rows(self, rows: List[Dict[str, Any]], generation: int) -> Dict[str, Dict[str, Any]]:
+        records = {}
+        for row in rows:
+            if not row.get('id'):
+                continue
+            record = {column: row.get(column) for column in _COLUMNS.split(', ')}
+            record['id'] = str(row['id'])
+            if record['business_uuid'] is not None:
+                record['business_uuid'] = str(record['business_uuid'])
+            records[record['id']] = record
+        if not DOCUMENT_CATALOG_ENABLED or not records:
+            return records
+        expires_at = time.time() + DOCUMENT_CATALOG_TTL_SECONDS
+        with self._lock:
+            if generation != self._generation:
+                return records
+            for key, record in records.items():
+                self._entries[key] = (expires_at, dict(record))
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return records
+
+    def _ensure_listener(self) -> None:
+        """Subscribe to invalidations from other processes (started lazily, after any fork)."""
+        # Documents may have changed while disconnected, hence clear on disconnect
+        subscribe_invalidations(_INVALIDATE_CHANNEL, self._on_invalidation, on_disconnect=self.clear)
+
+    def _on_invalidation(self, data: Any) -> None:
+        with self._lock:
+            self._entries.pop(str(data), None)
+            self._generation += 1
+
+
+# Global instance (singleton pattern)
+document_catalog = DocumentCatalog()
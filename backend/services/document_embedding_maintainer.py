@@ -0,0 +1,289 @@
+"""
+Incremental maintenance of document-level embeddings.
+
+Document embeddings are the mean of their (non-boilerplate) chunk embeddings. Rather than
+re-pooling every chunk whenever a lazily-embedded chunk lands, we keep a running sum and
+count per document in `document_embedding_accumulators` and apply O(dim) deltas. The
+normalized mean is written back to documents.document_embedding only when it has drifted
+far enough from the published vector to matter for retrieval. A document without an
+accumulator (created before the migration, or reset because its chunks were replaced) is
+rebuilt from all of its chunks the first time a delta arrives.
+
+Requires backend/migrations/add_document_embedding_accumulators.sql.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from backend.services.supabase_client_factory import get_supabase_client
+from backend.services.embedding_quantization import (
+    decode_int8,
+    embedding_select,
+    fill_missing_embeddings,
+    is_int8_literal,
+)
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSION = 1024
+
+# Cosine distance between the new mean and the published embedding below which we skip
+# the write-back. 0.001 keeps ranking effectively unchanged while avoiding an UPDATE on
+# every chunk of a large document.
+DEFAULT_DRIFT_THRESHOLD = float(os.environ.get('DOCUMENT_EMBEDDING_DRIFT_THRESHOLD', '0.001'))
+
+
+def parse_embedding(value) -> Optional[np.ndarray]:
+    """Parse a pgvector value (list or '[...]' text from PostgREST, or int8 codes) into a float64 array."""
+    if value is None:
+        return None
+    if is_int8_literal(value):
+        decoded = decode_int8(value)
+        return decoded.astype(np.float64) if decoded is not None else None
+    try:
+        if isinstance(value, str):
+            value = json.loads(value)
+        vector = np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Failed to parse embedding: {e}")
+        return None
+    if vector.ndim != 1 or vector.size == 0:
+        return None
+    return vector
+
+
+def _normalize(vector: np.ndarray) -> Optional[np.ndarray]:
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0 or not np.isfinite(norm):
+        return None
+    return vector / norm
+
+
+class DocumentEmbeddingMaintainer:
+    """Maintain documents.document_embedding from a running sum of chunk embeddings."""
+
+    def __init__(self, supabase=None, drift_threshold: Optional[float] = None):
+        self.supabase = supabase or get_supabase_client()
+        self.drift_threshold = DEFAULT_DRIFT_THRESHOLD if drift_threshold is None else drift_threshold
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def on_chunk_embedded(self, document_id: str, chunk: Dict, embedding) -> bool:
+        """
+        Fold a newly embedded chunk into the document's running mean.
+
+        Args:
+            document_id: Document UUID
+            chunk: document_vectors row (used for boilerplate filtering)
+            embedding: The chunk's new embedding
+
+        Returns:
+            True if the accumulator was updated (whether or not the mean was republished)
+        """
+        return self.on_chunks_embedded(document_id, [(chunk, embedding)])
+
+    def on_chunks_embedded(self, document_id: str, chunk_embeddings: Iterable[Tuple[Dict, object]]) -> bool:
+        """
+        Fold a batch of newly embedded chunks into the running mean with a single RPC.
+
+        Args:
+            document_id: Document UUID
+            chunk_embeddings: (chunk row, embedding) pairs
+
+        Returns:
+            True if the accumulator was updated
+        """
+        delta, count = self._sum_contributing(chunk_embeddings)
+        if count == 0:
+            return False
+        return self._apply_delta(document_id, delta, count)
+
+    def reset(self, document_id: str) -> bool:
+        """Drop the accumulator for a document whose chunks are being replaced wholesale."""
+        try:
+            self.supabase.rpc('reset_document_embedding_accumulator', {
+                'target_document_id': document_id
+            }).execute()
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to reset embedding accumulator for {document_id[:8]}: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Batch recompute (ingestion + backfills)
+    # ------------------------------------------------------------------
+
+    def rebuild(self, document_id: str, publish: bool = True) -> Optional[List[float]]:
+        """
+        Recompute the accumulator from all embedded chunks of a document.
+
+        Applies the same boilerplate filtering (and all-filtered fallback) as
+        DocumentSummaryService.generate_document_embedding_from_chunks.
+
+        Args:
+            document_id: Document UUID
+            publish: If True, also write the normalized mean to documents.document_embedding
+
+        Returns:
+            Normalized mean embedding, or None if the document has no usable chunk embeddings
+        """
+        from backend.services.document_summary_service import DocumentSummaryService
+
+        try:
+            response = self.supabase.table('document_vectors').select(
+                f'id, {embedding_select()}, chunk_text, chunk_text_clean, chunk_quality_score, metadata, page_number'
+            ).eq('document_id', document_id).not_.is_('embedding', 'null').execute()
+            chunks = fill_missing_embeddings(self.supabase, response.data or [])
+        except Exception as e:
+            logger.error(f"❌ Failed to load chunk embeddings for {document_id[:8]}: {e}")
+            return None
+
+        if not chunks:
+            logger.warning(f"⚠️ No chunks with embeddings found for document {document_id[:8]}")
+            return None
+
+        filtered = DocumentSummaryService._filter_boilerplate_chunks(chunks) or chunks
+        total, count = self._sum_vectors(c.get('embedding') for c in filtered)
+        if count == 0:
+            logger.error(f"❌ No valid embeddings extracted from chunks for document {document_id[:8]}")
+            return None
+
+        mean = _normalize(total / count)
+        if mean is None:
+            return None
+
+        try:
+            self.supabase.table('document_embedding_accumulators').upsert({
+                'document_id': document_id,
+                'embedding_sum': total.tolist(),
+                'chunk_count': count,
+            }).execute()
+        except Exception as e:
+            # Accumulators are an optimisation; the pooled mean is still valid without them.
+            logger.warning(f"⚠️ Failed to store embedding accumulator for {document_id[:8]}: {e}")
+
+        mean_list = mean.tolist()
+        if publish:
+            self._publish(document_id, mean_list)
+
+        logger.info(
+            f"✅ Rebuilt document embedding for {document_id[:8]} from {count} chunks "
+            f"({len(chunks) - len(filtered)} boilerplate skipped)"
+        )
+        return mean_list
+
+    def rebuild_many(self, document_ids: Sequence[str], publish: bool = True) -> Dict[str, bool]:
+        """
+        Rebuild accumulators for many documents (backfills).
+
+        Returns:
+            Mapping of document_id -> success
+        """
+        results = {}
+        for i, document_id in enumerate(document_ids, 1):
+            results[document_id] = self.rebuild(document_id, publish=publish) is not None
+            if i % 50 == 0:
+                logger.info(f"   Rebuilt {i}/{len(document_ids)} document embeddings")
+        return results
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _sum_contributing(self, chunk_embeddings: Iterable[Tuple[Dict, object]]) -> Tuple[Optional[np.ndarray], int]:
+        from backend.services.document_summary_service import DocumentSummaryService
+
+        pairs = list(chunk_embeddings)
+        kept = DocumentSummaryService._filter_boilerplate_chunks([chunk for chunk, _ in pairs])
+        kept_ids = {id(chunk) for chunk in kept}
+        return self._sum_vectors(embedding for chunk, embedding in pairs if id(chunk) in kept_ids)
+
+    @staticmethod
+    def _sum_vectors(embeddings: Iterable[object]) -> Tuple[Optional[np.ndarray], int]:
+        total = None
+        count = 0
+        for raw in embeddings:
+            vector = parse_embedding(raw)
+            if vector is None or vector.size != EMBEDDING_DIMENSION:
+                continue
+            total = vector.copy() if total is None else total + vector
+            count += 1
+        return total, count
+
+    def _apply_delta(self, document_id: str, delta: np.ndarray, count_delta: int) -> bool:
+        try:
+            response = self.supabase.rpc('accumulate_document_embedding', {
+                'target_document_id': document_id,
+                'delta': delta.tolist(),
+                'count_delta': count_delta,
+            }).execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update embedding accumulator for {document_id[:8]}: {e}")
+            return False
+
+        rows = response.data or []
+        if not rows:
+            return False
+
+        row = rows[0]
+        if not row.get('has_accumulator'):
+            # No running sum yet (document predates the accumulators, or its chunks were just
+            # replaced): the delta alone covers only the new chunks, so pool all of them instead.
+            logger.info(f"   No embedding accumulator for {document_id[:8]}, rebuilding from all chunks")
+            return self.rebuild(document_id) is not None
+
+        count = row.get('chunk_count') or 0
+        total = parse_embedding(row.get('embedding_sum'))
+        if count <= 0 or total is None:
+            return True
+
+        mean = _normalize(total / count)
+        if mean is None:
+            return True
+
+        published = parse_embedding(row.get('document_embedding'))
+        if published is not None and published.size == mean.size:
+            published_unit = _normalize(published)
+            if published_unit is not None:
+                drift = 1.0 - float(np.dot(mean, published_unit))
+                if drift < self.drift_threshold:
+                    logger.debug(
+                        f"   Document embedding for {document_id[:8]} drift {drift:.5f} "
+                        f"< {self.drift_threshold}, skipping write-back"
+                    )
+                    return True
+
+        self._publish(document_id, mean.tolist())
+        return True
+
+    def _publish(self, document_id: str, embedding: List[float]) -> None:
+        try:
+            self.supabase.table('documents').update({
+                'document_embedding': embedding
+            }).eq('id', document_id).execute()
+            logger.debug(f"   Published document embedding for {document_id[:8]}")
+            from .ann_index import ann_index
+            ann_index.on_document_embedding_changed(document_id, embedding)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to publish document embedding for {document_id[:8]}: {e}")
+
+
+_default_maintainer: Optional[DocumentEmbeddingMaintainer] = None
+_maintainer_lock = threading.Lock()
+
+
+def get_document_embedding_maintainer() -> DocumentEmbeddingMaintainer:
+    """Get the process-wide DocumentEmbeddingMaintainer (shares the cached Supabase client)."""
+    global _default_maintainer
+    if _default_maintainer is None:
+        with _maintainer_lock:
+            if _default_maintainer is None:
+                _default_maintainer = DocumentEmbeddingMaintainer()
+    return _default_maintainer
@@ -10,6 +10,7 @@ from supabase import Client
 import json
 
 from .supabase_client_factory import get_supabase_client
+from .document_catalog import document_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -196,6 +197,7 @@ class DocumentStorageService:
             
             if result.data and len(result.data) > 0:
                 logger.info(f"✅ Updated document {document_id} status to {status}")
+                document_catalog.invalidate(document_id)
                 
                 # Log processing history
                 self.log_processing_step(
@@ -398,6 +400,7 @@ class DocumentStorageService:
             
             if result.data and len(result.data) > 0:
                 logger.info(f"✅ Updated classification for document {document_id}: {classification_type} ({classification_confidence})")
+                document_catalog.invalidate(document_id)
                 
                 # Log processing step
                 self.log_processing_step(
@@ -595,6 +598,7 @@ class DocumentStorageService:
             
             if result.data is not None:
                 logger.info(f"✅ Deleted document {document_id}")
+                document_catalog.invalidate(document_id)
                 return True, None
             else:
                 return False, "Document not found"
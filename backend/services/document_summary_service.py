@@ -12,6 +12,7 @@ import os
 from backend.services.local_document_summary_service import LocalDocumentSummaryService
 from backend.services.local_embedding_service import get_default_service
 from backend.services.supabase_client_factory import get_supabase_client
+from backend.services.embedding_quantization import decode_int8, embedding_select, fill_missing_embeddings, is_int8_literal
 
 logger = logging.getLogger(__name__)
 
@@ -248,10 +249,10 @@ Generate the canonical summary for retrieval:"""
             # Query all chunk embeddings for this document
             logger.debug(f"🔍 Querying chunk embeddings for document {document_id[:8]}...")
             response = supabase.table('document_vectors').select(
-                'id, embedding, chunk_text_clean, chunk_quality_score, metadata, page_number'
+                f'id, {embedding_select()}, chunk_text_clean, chunk_quality_score, metadata, page_number'
             ).eq('document_id', document_id).not_.is_('embedding', 'null').execute()
             
-            chunks = response.data if response.data else []
+            chunks = fill_missing_embeddings(supabase, response.data) if response.data else []
             
             if not chunks:
                 logger.warning(f"⚠️ No chunks with embeddings found for document {document_id[:8]}")
@@ -276,6 +277,9 @@ Generate the canonical summary for retrieval:"""
                 embedding = chunk.get('embedding')
                 if embedding and isinstance(embedding, list):
                     embeddings.append(embedding)
+                elif is_int8_literal(embedding):
+                    # Compact int8 codes (QUANTIZED_EMBEDDINGS_ENABLED)
+                    embeddings.append(decode_int8(embedding).tolist())
                 elif embedding:
                     # Handle case where embedding might be a string representation
                     try:
@@ -323,7 +327,8 @@ Generate the canonical summary for retrieval:"""
             logger.debug(traceback.format_exc())
             return None
     
-    def _filter_boilerplate_chunks(self, chunks: List[Dict]) -> List[Dict]:
+    @staticmethod
+    def _filter_boilerplate_chunks(chunks: List[Dict]) -> List[Dict]:
         """
         Filter out boilerplate chunks (headers, footers, signatures, low-quality chunks).
         
@@ -567,6 +572,7 @@ Generate the canonical summary for retrieval:"""
         
         CRITICAL: Document embedding is now generated from chunk embeddings via mean pooling,
         NOT from summary text. Summary text is kept for UI/keyword search only.
+        Subsequent chunk embeddings are folded in incrementally by DocumentEmbeddingMaintainer.
         
         Args:
             document_id: Document UUID
@@ -577,8 +583,11 @@ Generate the canonical summary for retrieval:"""
             True if successful, False otherwise
         """
         try:
-            # Generate embedding from chunks (mean pooling)
-            embedding = self.generate_document_embedding_from_chunks(document_id)
+            # Generate embedding from chunks (mean pooling). Rebuilding through the maintainer
+            # also seeds the running sum/count so lazily embedded chunks can be folded in later
+            # without re-pooling the whole document.
+            from backend.services.document_embedding_maintainer import get_document_embedding_maintainer
+            embedding = get_document_embedding_maintainer().rebuild(document_id, publish=False)
             
             if not embedding:
                 logger.warning(f"Could not generate embedding from chunks for document {document_id}")
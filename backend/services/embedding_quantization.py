@@ -0,0 +1,152 @@
+"""
+Compact chunk-embedding codes stored next to the full vectors.
+
+document_vectors.embedding is a 1024-dim float vector; PostgREST returns it as ~12-20 KB of
+'[...]' text per chunk, which is what the chunk rescoring, mean pooling, backfills and the
+local ANN index were pulling back. Two compact forms sit alongside it
+(backend/migrations/add_quantized_chunk_embeddings.sql):
+
+- embedding_int8 (bytea): symmetric int8 scalar quantization with a per-vector scale,
+  written by the application. 4 bytes of float32 scale followed by one signed byte per
+  dimension: ~4x less memory and ~6-10x less transfer than the text form, with cosine
+  similarities within ~1e-3 of float.
+- embedding_binary (bit(1024)): sign bits, a generated column (pgvector binary_quantize).
+  32x less memory; Hamming distance is only good for picking candidates, so searches over
+  it rescore the top candidates with a more precise form (two-stage search).
+
+Writes and compact reads are gated by QUANTIZED_EMBEDDINGS_ENABLED (the migration must be
+applied first; backfill existing rows with
+`python scripts/backfill_document_embeddings.py --all-documents --quantized-codes`).
+scripts/benchmark_quantized_search.py measures recall@k of each form against float.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_EMBEDDINGS_ENABLED = os.environ.get('QUANTIZED_EMBEDDINGS_ENABLED', 'false').lower() == 'true'
+# Two-stage search: binary candidates kept per requested result for full/int8 rescoring
+QUANTIZED_RESCORE_MULTIPLIER = int(os.environ.get('QUANTIZED_RESCORE_MULTIPLIER', '4'))
+
+_INT8_MAX = 127
+_SCALE_BYTES = 4
+# Set-bit count for every byte value (Hamming distance over packed bits)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+# ----------------------------------------------------------------------------
+# int8 scalar quantization
+# ----------------------------------------------------------------------------
+
+def quantize_int8(vectors) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize rows to int8 with a per-row symmetric scale (max |x| / 127).
+
+    Returns (codes int8 [n, dim], scales float32 [n]); a 1-D input is treated as one row.
+    """
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(matrix).max(axis=1) / _INT8_MAX
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -_INT8_MAX, _INT8_MAX).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * np.asarray(scales, dtype=np.float32).reshape(-1, 1)
+
+
+def encode_int8(vector) -> Optional[str]:
+    """One vector as a bytea literal ('\\x' + hex of float32 scale + int8 codes) for PostgREST."""
+    if vector is None:
+        return None
+    codes, scales = quantize_int8(vector)
+    return '\\x' + (scales[:1].astype('<f4').tobytes() + codes[0].tobytes()).hex()
+
+
+def decode_int8(value) -> Optional[np.ndarray]:
+    """Decode an embedding_int8 value (PostgREST '\\x...' text or raw bytes) to float32."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str):
+            raw = bytes.fromhex(value[2:] if value.startswith('\\x') else value)
+        else:
+            raw = bytes(value)
+    except (TypeError, ValueError):
+        return None
+    if len(raw) <= _SCALE_BYTES:
+        return None
+    scale = np.frombuffer(raw[:_SCALE_BYTES], dtype='<f4')[0]
+    return np.frombuffer(raw[_SCALE_BYTES:], dtype=np.int8).astype(np.float32) * scale
+
+
+def is_int8_literal(value) -> bool:
+    return isinstance(value, str) and value.startswith('\\x')
+
+
+def int8_similarities(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Dot products of int8 rows (dequantized on the fly) with a float32 query."""
+    return (codes.astype(np.float32) @ query) * scales
+
+
+# ----------------------------------------------------------------------------
+# Binary (sign) quantization
+# ----------------------------------------------------------------------------
+
+def quantize_binary(vectors) -> np.ndarray:
+    """Sign bits packed 8 per byte (uint8 [n, dim / 8]); same bits as pgvector binary_quantize."""
+    matrix = np.atleast_2d(np.asarray(vectors))
+    return np.packbits(matrix > 0, axis=1)
+
+
+def hamming_distances(packed: np.ndarray, packed_query: np.ndarray) -> np.ndarray:
+    """Hamming distance from each packed row to the packed query."""
+    return _POPCOUNT[np.bitwise_xor(packed, packed_query)].sum(axis=1, dtype=np.int32)
+
+
+def estimated_cosine(distances: np.ndarray, dimension: int) -> np.ndarray:
+    """Cosine implied by the share of differing sign bits (angle ~ pi * hamming / dim)."""
+    return np.cos(np.pi * distances / float(dimension))
+
+
+# ----------------------------------------------------------------------------
+# Storage helpers
+# ----------------------------------------------------------------------------
+
+def embedding_select() -> str:
+    """
+    Column expression for reading chunk embeddings: the int8 codes aliased as 'embedding'
+    when compact reads are enabled, else the full vector.
+    """
+    return 'embedding:embedding_int8' if QUANTIZED_EMBEDDINGS_ENABLED else 'embedding'
+
+
+def quantized_columns(embedding) -> Dict[str, Optional[str]]:
+    """Extra document_vectors columns to write alongside an embedding (empty when disabled)."""
+    if not QUANTIZED_EMBEDDINGS_ENABLED:
+        return {}
+    return {'embedding_int8': encode_int8(embedding) if embedding is not None else None}
+
+
+def fill_missing_embeddings(supabase, rows: List[Dict]) -> List[Dict]:
+    """
+    For compact reads: fetch the full vector for rows whose int8 codes aren't backfilled yet.
+
+    Rows are updated in place (and returned); a no-op when compact reads are disabled.
+    """
+    if not QUANTIZED_EMBEDDINGS_ENABLED:
+        return rows
+    missing = [str(row['id']) for row in rows if row.get('embedding') is None and row.get('id')]
+    if not missing:
+        return rows
+    logger.debug(f"   {len(missing)} chunks have no int8 codes yet, reading full embeddings")
+    response = supabase.table('document_vectors').select('id, embedding').in_('id', missing).execute()
+    full = {str(row['id']): row.get('embedding') for row in response.data or []}
+    for row in rows:
+        if row.get('embedding') is None and str(row.get('id')) in full:
+            row['embedding'] = full[str(row['id'])]
+    return rows
@@ -3,6 +3,7 @@ Local Embedding Server using Sentence Transformers (CPU-based).
 
 This FastAPI server hosts embedding models (BGE, GTE, E5) on CPU,
 providing a local alternative to OpenAI embeddings for cost savings.
+It also hosts a cross-encoder (POST /rerank) used when Cohere reranking is unavailable.
 
 Usage:
     # Development
@@ -13,11 +14,12 @@ Usage:
 """
 
 from fastapi import FastAPI, HTTPException
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, CrossEncoder
 import logging
 import os
 import re
 import json
+import threading
 from typing import List, Dict, Any, Optional
 import numpy as np
 
@@ -102,6 +104,78 @@ async def embed(payload: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Cross-encoder used as the offline fallback for Cohere reranking (CohereReranker._score_local).
+# Loaded on first /rerank call so embedding-only deployments don't pay for it.
+# Options:
+# - "cross-encoder/ms-marco-MiniLM-L-6-v2" - fast on CPU (~10 ms per pair), good quality
+# - "BAAI/bge-reranker-base" - higher quality, ~4x slower
+RERANK_MODEL_NAME = os.environ.get("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Bounds latency: pairs are truncated to this many tokens and at most RERANK_MAX_DOCUMENTS scored
+RERANK_MAX_LENGTH = int(os.environ.get("RERANK_MAX_LENGTH", "512"))
+RERANK_MAX_DOCUMENTS = int(os.environ.get("RERANK_MAX_DOCUMENTS", "200"))
+
+_rerank_model = None
+_rerank_model_lock = threading.Lock()
+
+
+def _get_rerank_model() -> CrossEncoder:
+    global _rerank_model
+    if _rerank_model is None:
+        with _rerank_model_lock:
+            if _rerank_model is None:
+                logger.info(f"Loading rerank model: {RERANK_MODEL_NAME} on {DEVICE}")
+                _rerank_model = CrossEncoder(RERANK_MODEL_NAME, max_length=RERANK_MAX_LENGTH, device=DEVICE)
+    return _rerank_model
+
+
+@app.post("/rerank")
+def rerank(payload: dict):
+    """
+    Score documents against a query with a cross-encoder.
+    
+    Request:
+        {
+            "query": "What is the market value?",
+            "documents": ["text1", "text2", ...]
+        }
+    
+    Response:
+        {
+            "scores": [0.91, 0.02, ...],   # 0-1, aligned with documents
+            "count": 2,
+            "model": "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        }
+    """
+    query = payload.get("query", "")
+    documents = payload.get("documents", [])
+    if not query:
+        raise HTTPException(status_code=400, detail="No query provided")
+    if not isinstance(documents, list) or not documents:
+        raise HTTPException(status_code=400, detail="documents must be a non-empty list")
+    if len(documents) > RERANK_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {RERANK_MAX_DOCUMENTS} documents per request")
+    
+    try:
+        scores = _get_rerank_model().predict(
+            [(query, str(document)) for document in documents],
+            batch_size=32,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        scores = np.asarray(scores, dtype=np.float32).reshape(len(documents), -1)[:, -1]
+        # Single-label cross-encoders already apply a sigmoid; squash raw logits from others
+        if scores.min() < 0.0 or scores.max() > 1.0:
+            scores = 1.0 / (1.0 + np.exp(-scores))
+        return {
+            "scores": scores.tolist(),
+            "count": len(scores),
+            "model": RERANK_MODEL_NAME
+        }
+    except Exception as e:
+        logger.error(f"Rerank error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint."""
@@ -110,7 +184,9 @@ async def health():
             "status": "healthy", 
             "model": MODEL_NAME,
             "device": DEVICE,
-            "dimensions": embedding_dimension
+            "dimensions": embedding_dimension,
+            "rerank_model": RERANK_MODEL_NAME,
+            "rerank_model_loaded": _rerank_model is not None
         }
     except NameError:
         # Model not loaded yet
@@ -0,0 +1,164 @@
+"""
+Streaming file serving from S3.
+
+Pipes S3 StreamingBody chunks straight into a Flask Response instead of buffering the
+whole object in the gunicorn worker. Supports single-range requests (PDF viewers fetch
+pages incrementally) and conditional requests (If-None-Match / If-Modified-Since) using
+the ETag and Last-Modified S3 returns, so worker memory stays flat regardless of file size.
+"""
+
+import os
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+import boto3
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+from flask import Response, request
+
+logger = logging.getLogger(__name__)
+
+# 64 KiB keeps per-request memory small while avoiding excessive write syscalls
+STREAM_CHUNK_SIZE = int(os.environ.get('FILE_STREAM_CHUNK_SIZE', str(64 * 1024)))
+
+_SINGLE_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """
+    Shared S3 client for file serving.
+
+    boto3 clients are thread-safe, so one client (and its keep-alive connection pool)
+    is reused across requests instead of building a new client per download.
+    """
+    return boto3.client(
+        's3',
+        aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        config=BotoConfig(max_pool_connections=int(os.environ.get('S3_MAX_POOL_CONNECTIONS', '50'))),
+    )
+
+
+def _parse_single_range(range_header: Optional[str]) -> Optional[str]:
+    """Return the Range header if it is a single satisfiable-looking byte range, else None.
+
+    S3 only supports one range per request; multi-range requests fall back to a full 200
+    response, which RFC 9110 permits.
+    """
+    if not range_header:
+        return None
+    match = _SINGLE_RANGE_RE.match(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    return range_header.strip()
+
+
+def _iter_body(body, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield chunks from an S3 StreamingBody, always releasing the connection."""
+    try:
+        for chunk in body.iter_chunks(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+    finally:
+        body.close()
+
+
+def stream_s3_object(
+    bucket: str,
+    key: str,
+    filename: Optional[str] = None,
+    default_content_type: str = 'application/octet-stream',
+    disposition: str = 'inline',
+    s3_client=None,
+) -> Response:
+    """
+    Build a streaming Flask Response for an S3 object, honouring Range and conditional headers.
+
+    Args:
+        bucket: S3 bucket name
+        key: S3 object key
+        filename: Filename for Content-Disposition (omitted if None)
+        default_content_type: Used when S3 has no ContentType for the object
+        disposition: 'inline' or 'attachment'
+        s3_client: Optional client override (defaults to the shared client)
+
+    Returns:
+        200/206 streaming response, 304 Not Modified, 412/416 on failed preconditions.
+
+    Raises:
+        ClientError: For S3 errors other than precondition/range failures (e.g. NoSuchKey),
+            so callers keep their existing 404/500 handling.
+    """
+    s3_client = s3_client or get_s3_client()
+
+    params: Dict[str, str] = {'Bucket': bucket, 'Key': key}
+    if_none_match = request.headers.get('If-None-Match')
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_none_match:
+        params['IfNoneMatch'] = if_none_match
+    elif if_modified_since:
+        params['IfModifiedSince'] = if_modified_since
+
+    range_header = _parse_single_range(request.headers.get('Range'))
+    if_range = request.headers.get('If-Range')
+    if range_header:
+        params['Range'] = range_header
+
+    try:
+        s3_response = s3_client.get_object(**params)
+    except ClientError as e:
+        status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        error_code = e.response.get('Error', {}).get('Code', '')
+        if status == 304 or error_code in ('304', 'NotModified'):
+            headers = {}
+            etag = e.response.get('ResponseMetadata', {}).get('HTTPHeaders', {}).get('etag')
+            if etag:
+                headers['ETag'] = etag
+            return Response(status=304, headers=headers)
+        if status == 416 or error_code == 'InvalidRange':
+            return Response(status=416, headers={'Accept-Ranges': 'bytes'})
+        if status == 412 or error_code == 'PreconditionFailed':
+            return Response(status=412)
+        raise
+
+    # If-Range: only honour the range if the representation is unchanged; otherwise
+    # discard the partial body and send the full object.
+    if range_header and if_range and s3_response.get('ETag') and if_range != s3_response['ETag']:
+        s3_response['Body'].close()
+        params.pop('Range', None)
+        s3_response = s3_client.get_object(**params)
+        range_header = None
+
+    content_type = s3_response.get('ContentType') or default_content_type
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=0, must-revalidate',
+    }
+    if filename:
+        headers['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    else:
+        headers['Content-Disposition'] = disposition
+    if s3_response.get('ETag'):
+        headers['ETag'] = s3_response['ETag']
+    if s3_response.get('LastModified'):
+        headers['Last-Modified'] = s3_response['LastModified'].strftime('%a, %d %b %Y %H:%M:%S GMT')
+    if s3_response.get('ContentLength') is not None:
+        headers['Content-Length'] = str(s3_response['ContentLength'])
+
+    status = 200
+    if range_header and s3_response.get('ContentRange'):
+        status = 206
+        headers['Content-Range'] = s3_response['ContentRange']
+
+    return Response(
+        _iter_body(s3_response['Body']),
+        status=status,
+        mimetype=content_type,
+        headers=headers,
+        direct_passthrough=True,
+    )
+
@@ -0,0 +1,304 @@
+"""
+Persistent geocoding cache shared by every geocoding path.
+
+Geocoding used to go through tasks.geocode_address, GeocodingService.geocode_address and
+AddressNormalizationService.geocode_address, each making live provider calls (5-8 s
+timeouts) and remembering nothing. All three now resolve through GeocodingService, which
+keeps results here keyed on the normalized address hash
+(AddressNormalizationService.normalize_address + compute_address_hash), so the same
+address seen in another document or by another tenant costs nothing.
+
+Tiers, checked in order:
+
+- in-process: LRU dict (GEOCODE_CACHE_LOCAL_MAX_ENTRIES)
+- Redis: shared by all workers (GEOCODE_CACHE_REDIS_URL or REDIS_URL)
+- Supabase: geocode_cache table (backend/migrations/create_geocode_cache_table.sql), survives
+  Redis flushes and deploys
+
+Hits are stored with GEOCODE_CACHE_TTL_SECONDS. "Not found" answers are cached too, with the
+shorter GEOCODE_NEGATIVE_TTL_SECONDS, so unparseable addresses extracted from every upload do
+not walk the provider chain each time. Timeouts and provider errors are never cached.
+
+Concurrent lookups of the same key inside a process are coalesced: the first caller resolves
+it and the others wait for that result (get_or_compute).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_CACHE_ENABLED = os.environ.get('GEOCODE_CACHE_ENABLED', 'true').lower() == 'true'
+GEOCODE_CACHE_TTL_SECONDS = int(os.environ.get('GEOCODE_CACHE_TTL_SECONDS', str(90 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL_SECONDS = int(os.environ.get('GEOCODE_NEGATIVE_TTL_SECONDS', str(24 * 3600)))
+GEOCODE_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('GEOCODE_CACHE_LOCAL_MAX_ENTRIES', '4096'))
+GEOCODE_CACHE_DB_ENABLED = os.environ.get('GEOCODE_CACHE_DB_ENABLED', 'true').lower() == 'true'
+# Upper bound on waiting for another caller's in-flight lookup of the same key
+GEOCODE_INFLIGHT_WAIT_SECONDS = float(os.environ.get('GEOCODE_INFLIGHT_WAIT_SECONDS', '60'))
+# After a database-tier error, skip the tier for this long before trying again
+GEOCODE_CACHE_DB_RETRY_SECONDS = float(os.environ.get('GEOCODE_CACHE_DB_RETRY_SECONDS', '300'))
+
+_KEY_PREFIX = 'geocode:'
+_TABLE = 'geocode_cache'
+
+
+def _get_redis_client():
+    return get_redis_client(os.environ.get('GEOCODE_CACHE_REDIS_URL'))
+
+
+def is_negative(record: Optional[Dict[str, Any]]) -> bool:
+    """True for a cached "provider found nothing" record."""
+    return bool(record) and record.get('status') == 'not_found'
+
+
+class GeocodeCache:
+    """Three-tier (process, Redis, Supabase) cache of geocoding results with request coalescing."""
+
+    def __init__(self, max_entries: int = GEOCODE_CACHE_LOCAL_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._db_disabled_until = 0.0
+        self._stats = {
+            'local_hits': 0, 'redis_hits': 0, 'db_hits': 0, 'misses': 0,
+            'negative_hits': 0, 'coalesced': 0, 'stores': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """Cached record for (namespace, key), positive or negative, or None on a miss."""
+        if not GEOCODE_CACHE_ENABLED or not key:
+            return None
+        cache_key = f"{namespace}:{key}"
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(cache_key)
+                    self._count_hit('local_hits', entry[1])
+                    return dict(entry[1])
+                del self._entries[cache_key]
+
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                raw = client.get(_KEY_PREFIX + cache_key)
+            except Exception as e:
+                logger.debug(f"[GEOCODE_CACHE] Redis get failed: {e}")
+                raw = None
+            if raw:
+                try:
+                    payload = json.loads(raw)
+                except (TypeError, ValueError):
+                    payload = None
+                if isinstance(payload, dict) and isinstance(payload.get('record'), dict):
+                    record = payload['record']
+                    self._store_local(cache_key, record, payload.get('expires_at', now + GEOCODE_NEGATIVE_TTL_SECONDS))
+                    with self._lock:
+                        self._count_hit('redis_hits', record)
+                    return dict(record)
+
+        record, expires_at = self._db_get(namespace, key)
+        if record is not None:
+            self._store_local(cache_key, record, expires_at)
+            self._store_redis(cache_key, record, expires_at)
+            with self._lock:
+                self._count_hit('db_hits', record)
+            return dict(record)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def get_or_compute(self, namespace: str, key: str,
+                       compute: Callable[[], Tuple[Optional[Dict[str, Any]], bool]]) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached record, or resolve it once for all concurrent callers.
+
+        compute() returns (record, cacheable). Records with status 'not_found' are cached
+        with the negative TTL; cacheable=False (timeouts, provider errors) skips the store.
+        """
+        record = self.get(namespace, key)
+        if record is not None or not GEOCODE_CACHE_ENABLED or not key:
+            return record if record is not None else compute()[0]
+
+        cache_key = f"{namespace}:{key}"
+        with self._lock:
+            future = self._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[cache_key] = future
+            else:
+                self._stats['coalesced'] += 1
+
+        if not owner:
+            try:
+                result = future.result(timeout=GEOCODE_INFLIGHT_WAIT_SECONDS)
+                return dict(result) if result is not None else None
+            except Exception as e:
+                logger.warning(f"[GEOCODE_CACHE] Waiting on in-flight lookup for {cache_key} failed: {e}")
+                return compute()[0]
+
+        try:
+            record, cacheable = compute()
+            if record is not None and cacheable:
+                self.set(namespace, key, record)
+            future.set_result(record)
+            return record
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def set(self, namespace: str, key: str, record: Dict[str, Any]) -> None:
+        if not GEOCODE_CACHE_ENABLED or not key:
+            return
+        ttl = GEOCODE_NEGATIVE_TTL_SECONDS if is_negative(record) else GEOCODE_CACHE_TTL_SECONDS
+        expires_at = time.time() + ttl
+        cache_key = f"{namespace}:{key}"
+        self._store_local(cache_key, record, expires_at)
+        self._store_redis(cache_key, record, expires_at)
+        self._db_set(namespace, key, record, expires_at)
+        with self._lock:
+            self._stats['stores'] += 1
+
+    def invalidate(self, namespace: str, key: str) -> None:
+        cache_key = f"{namespace}:{key}"
+        with self._lock:
+            self._entries.pop(cache_key, None)
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.delete(_KEY_PREFIX + cache_key)
+            except Exception as e:
+                logger.debug(f"[GEOCODE_CACHE] Redis delete failed: {e}")
+        if self._db_enabled():
+            try:
+                from .supabase_client_factory import get_supabase_client
+                get_supabase_client().table(_TABLE).delete().eq('namespace', namespace).eq('cache_key', key).execute()
+            except Exception as e:
+                logger.debug(f"[GEOCODE_CACHE] Database delete failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['inflight'] = len(self._inflight)
+        lookups = stats['local_hits'] + stats['redis_hits'] + stats['db_hits'] + stats['misses']
+        hits = stats['local_hits'] + stats['redis_hits'] + stats['db_hits']
+        stats['hit_rate'] = round(hits / lookups, 3) if lookups else 0.0
+        stats['redis'] = _get_redis_client() is not None
+        stats['database'] = self._db_enabled()
+        stats['enabled'] = GEOCODE_CACHE_ENABLED
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _count_hit(self, tier: str, record: Dict[str, Any]) -> None:
+        # Caller holds self._lock
+        self._stats[tier] += 1
+        if is_negative(record):
+            self._stats['negative_hits'] += 1
+
+    def _store_local(self, cache_key: str, record: Dict[str, Any], expires_at: float) -> None:
+        with self._lock:
+            self._entries[cache_key] = (expires_at, dict(record))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store_redis(self, cache_key: str, record: Dict[str, Any], expires_at: float) -> None:
+        client = _get_redis_client()
+        if client is None:
+            return
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        try:
+            client.set(_KEY_PREFIX + cache_key, json.dumps({'record': record, 'expires_at': expires_at}, default=str), ex=ttl)
+        except Exception as e:
+            logger.debug(f"[GEOCODE_CACHE] Redis set failed: {e}")
+
+    def _db_get(self, namespace: str, key: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        if not self._db_enabled():
+            return None, 0.0
+        try:
+            from .supabase_client_factory import get_supabase_client
+            now = datetime.now(timezone.utc)
+            result = (
+                get_supabase_client().table(_TABLE)
+                .select('result, expires_at')
+                .eq('namespace', namespace)
+                .eq('cache_key', key)
+                .gt('expires_at', now.isoformat())
+                .limit(1)
+                .execute()
+            )
+        except Exception as e:
+            self._disable_db(e)
+            return None, 0.0
+        rows = result.data or []
+        if not rows or not isinstance(rows[0].get('result'), dict):
+            return None, 0.0
+        try:
+            expires_at = datetime.fromisoformat(str(rows[0]['expires_at']).replace('Z', '+00:00')).timestamp()
+        except (TypeError, ValueError):
+            expires_at = time.time() + GEOCODE_NEGATIVE_TTL_SECONDS
+        return rows[0]['result'], expires_at
+
+    def _db_set(self, namespace: str, key: str, record: Dict[str, Any], expires_at: float) -> None:
+        if not self._db_enabled():
+            return
+        try:
+            from .supabase_client_factory import get_supabase_client
+            get_supabase_client().table(_TABLE).upsert({
+                'namespace': namespace,
+                'cache_key': key,
+                'status': record.get('status'),
+                'result': record,
+                'expires_at': datetime.fromtimestamp(expires_at, timezone.utc).isoformat(),
+                'updated_at': datetime.now(timezone.utc).isoformat(),
+            }, on_conflict='namespace,cache_key').execute()
+        except Exception as e:
+            self._disable_db(e)
+
+    def _db_enabled(self) -> bool:
+        return GEOCODE_CACHE_DB_ENABLED and time.time() >= self._db_disabled_until
+
+    def _disable_db(self, error: Exception) -> None:
+        # A missing table (migration not applied) or unreachable database must not add a
+        # failing round trip to every lookup; Redis and the in-process tier keep working
+        if self._db_enabled():
+            logger.warning(f"[GEOCODE_CACHE] Database tier disabled for {GEOCODE_CACHE_DB_RETRY_SECONDS:.0f}s: {error}")
+        self._db_disabled_until = time.time() + GEOCODE_CACHE_DB_RETRY_SECONDS
+
+
+# Global instance (singleton pattern)
+geocode_cache = GeocodeCache()
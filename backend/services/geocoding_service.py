@@ -1,66 +1,161 @@
 from geopy.geocoders import Nominatim, GoogleV3
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+import hashlib
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 import time
 
+from .geocode_cache import geocode_cache, is_negative
+from .redis_client import get_redis_client
+
 logger = logging.getLogger(__name__)
 
+# Per-provider request rates. Nominatim's usage policy allows at most 1 request/second;
+# Google's geocoding quota is far higher but still enforced per project.
+GEOCODE_NOMINATIM_RPS = float(os.environ.get('GEOCODE_NOMINATIM_RPS', '1.0'))
+GEOCODE_GOOGLE_RPS = float(os.environ.get('GEOCODE_GOOGLE_RPS', '40'))
+GEOCODE_MAX_RETRIES = int(os.environ.get('GEOCODE_MAX_RETRIES', '2'))
+
+_RATE_KEY_PREFIX = 'geocode-rate:'
+
+# Reserve the provider's next free slot atomically across workers. Redis' own clock is used so
+# hosts with skewed clocks agree; the wait is returned as a string because Lua numbers are
+# truncated to integers on the way out.
+_RESERVE_SLOT_SCRIPT = """
+redis.replicate_commands()
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local slot = math.max(now, tonumber(redis.call('GET', KEYS[1]) or '0'))
+local ttl_ms = math.ceil((slot + interval - now) * 1000) + 1000
+redis.call('SET', KEYS[1], string.format('%.6f', slot + interval), 'PX', ttl_ms)
+return string.format('%.6f', slot - now)
+"""
+
+
+def _get_redis_client():
+    return get_redis_client(os.environ.get('GEOCODE_CACHE_REDIS_URL'))
+
+
+class ProviderRateLimiter:
+    """
+    Spaces calls to each provider at least 1/rps apart across all workers.
+
+    Callers reserve the next free slot and sleep outside the reservation, so concurrent
+    geocode_address_parallel workers queue up instead of bursting the provider. The slot is
+    reserved in Redis (GEOCODE_CACHE_REDIS_URL or REDIS_URL) so every process shares one
+    budget; without Redis, or when it errors, slots are reserved per process.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        self._intervals = {provider: (1.0 / rps if rps > 0 else 0.0) for provider, rps in rates.items()}
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, provider: str) -> float:
+        """Block until provider may be called; returns seconds waited."""
+        interval = self._intervals.get(provider, 0.0)
+        if interval <= 0:
+            return 0.0
+        wait = self._reserve_shared(provider, interval)
+        if wait is None:
+            wait = self._reserve_local(provider, interval)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _reserve_shared(self, provider: str, interval: float) -> Optional[float]:
+        client = _get_redis_client()
+        if client is None:
+            return None
+        try:
+            return float(client.eval(_RESERVE_SLOT_SCRIPT, 1, f"{_RATE_KEY_PREFIX}{provider}", interval))
+        except Exception as e:
+            logger.debug(f"[GEOCODE] Shared rate limit unavailable for {provider}, using per-process limit: {e}")
+            return None
+
+    def _reserve_local(self, provider: str, interval: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(provider, 0.0))
+            self._next_slot[provider] = slot + interval
+        return slot - now
+
+
 class GeocodingService:
     """
     Geocoding Service using Google Maps API and Nominatim.
     
-    This service provides geocoding functionality using your existing
-    geocoding logic from tasks.py with Google API priority and Nominatim fallback.
+    The single geocoding implementation: tasks.geocode_address,
+    AddressNormalizationService.geocode_address and the /api/location/* endpoints all
+    resolve through the shared instance below. Results (including "not found") are kept
+    in geocode_cache keyed on the normalized address hash, concurrent lookups of the same
+    address are coalesced, and provider calls are rate limited per provider.
     """
     
     def __init__(self):
         self.nominatim = Nominatim(user_agent="solosway_mvp", timeout=8)
         google_api_key = os.environ.get('GOOGLE_MAPS_API_KEY')
         self.google = GoogleV3(api_key=google_api_key, timeout=5) if google_api_key else None
+        self.rate_limiter = ProviderRateLimiter({'google': GEOCODE_GOOGLE_RPS, 'nominatim': GEOCODE_NOMINATIM_RPS})
+        self._normalizer = None
     
-    def geocode_address(self, address: str) -> Dict[str, Any]:
+    # ------------------------------------------------------------------
+    # Cached resolution (shared by every caller)
+    # ------------------------------------------------------------------
+    
+    def address_key(self, address: str) -> str:
+        """Cache key for an address: AddressNormalizationService's normalized address hash."""
+        if self._normalizer is None:
+            from .address_service import AddressNormalizationService
+            self._normalizer = AddressNormalizationService()
+        normalized = self._normalizer.normalize_address(address) or ' '.join(address.lower().split())
+        return self._normalizer.compute_address_hash(normalized)
+    
+    def resolve(self, address: str, max_retries: int = GEOCODE_MAX_RETRIES) -> Optional[Dict[str, Any]]:
         """
-        Forward geocoding: address -> coordinates.
+        Cached forward geocode.
         
-        Args:
-            address: Address string to geocode
-            
-        Returns:
-            Dictionary with coordinates and metadata
+        Returns {status: 'success', lat, lng, formatted_address, confidence, provider,
+        used_variation, tried_variations}, {status: 'not_found', tried_variations} or None
+        when the providers failed (timeouts/errors, not cached).
         """
-        logger.info(f"GeocodingService: Geocoding address: {address}")
-        
         if not address or address.strip() == "":
-            return {
-                "lat": None,
-                "lng": None,
-                "formatted_address": None,
-                "confidence": 0.0,
-                "error": "Empty address provided"
-            }
+            return None
+        return geocode_cache.get_or_compute(
+            'address', self.address_key(address), lambda: self._lookup(address, max_retries)
+        )
+    
+    def _lookup(self, address: str, max_retries: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Live provider chain. Returns (record, cacheable); errors make a miss uncacheable."""
+        from .performance_service import performance_service
         
-        # Clean and preprocess the address
+        started = time.time()
         cleaned_address = self._preprocess_address(address)
+        had_error = False
         
         # Try Google Geocoding API first (much faster and more accurate)
         if self.google:
             try:
+                self.rate_limiter.acquire('google')
                 location = self.google.geocode(cleaned_address, exactly_one=True, timeout=5)
                 
                 if location:
                     logger.info(f"GeocodingService: Google geocoding successful for: '{cleaned_address}'")
+                    performance_service.track_operation('geocode.provider.google', time.time() - started)
                     return {
+                        "status": "success",
                         "lat": location.latitude,
                         "lng": location.longitude,
                         "formatted_address": location.address,
                         "confidence": 0.9,
                         "provider": "google",
-                        "original_address": address,
                         "used_variation": cleaned_address
-                    }
+                    }, True
             except Exception as e:
+                had_error = True
                 logger.warning(f"GeocodingService: Google geocoding failed: {e}, falling back to Nominatim")
         
         # Fallback to Nominatim (slower but free)
@@ -69,42 +164,89 @@ class GeocodingService:
         for variation in address_variations:
             logger.info(f"GeocodingService: Trying geocoding with: '{variation}'")
             
-            try:
-                location = self.nominatim.geocode(variation, exactly_one=True, timeout=8)
-                
-                if location:
-                    logger.info(f"GeocodingService: Nominatim geocoding successful for: '{variation}'")
-                    return {
-                        "lat": location.latitude,
-                        "lng": location.longitude,
-                        "formatted_address": location.address,
-                        "confidence": 0.8,
-                        "provider": "nominatim",
-                        "original_address": address,
-                        "used_variation": variation
-                    }
+            for attempt in range(max(1, max_retries)):
+                try:
+                    self.rate_limiter.acquire('nominatim')
+                    location = self.nominatim.geocode(variation, exactly_one=True, timeout=8)
                     
-            except (GeocoderTimedOut, GeocoderUnavailable) as e:
-                logger.warning(f"GeocodingService: Geocoding attempt failed for '{variation}': {e}")
-                time.sleep(0.5)  # Wait before retry
-                continue
-            
-            except Exception as e:
-                logger.warning(f"GeocodingService: Unexpected error geocoding '{variation}': {e}")
-                break
-            
-            # Rate limiting - wait between address variations
-            time.sleep(0.3)
+                    if location:
+                        logger.info(f"GeocodingService: Nominatim geocoding successful for: '{variation}'")
+                        performance_service.track_operation('geocode.provider.nominatim', time.time() - started)
+                        return {
+                            "status": "success",
+                            "lat": location.latitude,
+                            "lng": location.longitude,
+                            "formatted_address": location.address,
+                            "confidence": 0.8,
+                            "provider": "nominatim",
+                            "used_variation": variation
+                        }, True
+                    break  # Clean "no result": move to next variation
+                    
+                except (GeocoderTimedOut, GeocoderUnavailable) as e:
+                    had_error = True
+                    logger.warning(f"GeocodingService: Geocoding attempt {attempt + 1} failed for '{variation}': {e}")
+                    time.sleep(0.5)  # Wait before retry
+                
+                except Exception as e:
+                    had_error = True
+                    logger.warning(f"GeocodingService: Unexpected error geocoding '{variation}': {e}")
+                    break
         
+        performance_service.track_operation(
+            'geocode.provider.none', time.time() - started, error='provider_error' if had_error else None
+        )
+        if had_error:
+            logger.warning(f"GeocodingService: Geocoding failed with provider errors for: '{address}'")
+            return None, False
         logger.warning(f"GeocodingService: All geocoding attempts failed for: '{address}'")
+        return {"status": "not_found", "tried_variations": len(address_variations)}, True
+    
+    # ------------------------------------------------------------------
+    # Public API (response shapes used by /api/location/*)
+    # ------------------------------------------------------------------
+    
+    def geocode_address(self, address: str) -> Dict[str, Any]:
+        """
+        Forward geocoding: address -> coordinates.
+        
+        Args:
+            address: Address string to geocode
+            
+        Returns:
+            Dictionary with coordinates and metadata
+        """
+        logger.info(f"GeocodingService: Geocoding address: {address}")
+        
+        if not address or address.strip() == "":
+            return {
+                "lat": None,
+                "lng": None,
+                "formatted_address": None,
+                "confidence": 0.0,
+                "error": "Empty address provided"
+            }
+        
+        record = self.resolve(address)
+        if record and record.get("status") == "success":
+            return {
+                "lat": record["lat"],
+                "lng": record["lng"],
+                "formatted_address": record.get("formatted_address"),
+                "confidence": record.get("confidence", 0.0),
+                "provider": record.get("provider"),
+                "original_address": address,
+                "used_variation": record.get("used_variation")
+            }
+        
         return {
             "lat": None,
             "lng": None,
             "formatted_address": None,
             "confidence": 0.0,
-            "error": "Address not found",
+            "error": "Address not found" if is_negative(record) else "Geocoding providers unavailable",
             "original_address": address,
-            "tried_variations": len(address_variations)
+            "tried_variations": (record or {}).get("tried_variations", 0)
         }
     
     def reverse_geocode(self, lat: float, lng: float) -> Dict[str, Any]:
@@ -121,42 +263,48 @@ class GeocodingService:
         logger.info(f"GeocodingService: Reverse geocoding lat: {lat}, lng: {lng}")
         
         try:
-            if self.google:
-                location = self.google.reverse((lat, lng), timeout=5)
-                provider = "google"
-                confidence = 0.9
-            else:
-                location = self.nominatim.reverse((lat, lng), timeout=8)
-                provider = "nominatim"
-                confidence = 0.8
-            
+            # ~1 m precision: map clicks on the same spot share an entry
+            key = f"{float(lat):.5f},{float(lng):.5f}"
+        except (TypeError, ValueError) as e:
+            return {"address": None, "lat": lat, "lng": lng, "confidence": 0.0, "error": str(e)}
+        
+        def lookup() -> Tuple[Optional[Dict[str, Any]], bool]:
+            try:
+                if self.google:
+                    provider, confidence = "google", 0.9
+                    self.rate_limiter.acquire(provider)
+                    location = self.google.reverse((lat, lng), timeout=5)
+                else:
+                    provider, confidence = "nominatim", 0.8
+                    self.rate_limiter.acquire(provider)
+                    location = self.nominatim.reverse((lat, lng), timeout=8)
+            except Exception as e:
+                logger.error(f"GeocodingService: Reverse geocoding error: {e}")
+                return {"status": "error", "error": str(e)}, False
             if location:
-                logger.info(f"GeocodingService: Reverse geocoding successful")
-                return {
-                    "address": location.address,
-                    "lat": lat,
-                    "lng": lng,
-                    "confidence": confidence,
-                    "provider": provider
-                }
-            else:
-                logger.warning("GeocodingService: Reverse geocoding found no address")
-                return {
-                    "address": None,
-                    "lat": lat,
-                    "lng": lng,
-                    "confidence": 0.0,
-                    "error": "Location not found"
-                }
-        except Exception as e:
-            logger.error(f"GeocodingService: Reverse geocoding error: {e}")
+                return {"status": "success", "address": location.address, "confidence": confidence,
+                        "provider": provider}, True
+            return {"status": "not_found"}, True
+        
+        record = geocode_cache.get_or_compute('reverse', key, lookup) or {}
+        if record.get("status") == "success":
+            logger.info("GeocodingService: Reverse geocoding successful")
             return {
-                "address": None,
+                "address": record["address"],
                 "lat": lat,
                 "lng": lng,
-                "confidence": 0.0,
-                "error": str(e)
+                "confidence": record["confidence"],
+                "provider": record["provider"]
             }
+        if is_negative(record):
+            logger.warning("GeocodingService: Reverse geocoding found no address")
+        return {
+            "address": None,
+            "lat": lat,
+            "lng": lng,
+            "confidence": 0.0,
+            "error": record.get("error") or "Location not found"
+        }
     
     def search_location(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -170,33 +318,36 @@ class GeocodingService:
         """
         logger.info(f"GeocodingService: Searching location: {query}")
         
-        try:
-            if self.google:
-                results = self.google.geocode(query, exactly_one=False, timeout=5)
-                provider = "google"
-            else:
-                results = self.nominatim.geocode(query, exactly_one=False, timeout=8)
-                provider = "nominatim"
-            
-            if results:
-                locations = []
-                for loc in results[:10]:  # Limit to 10 results
-                    locations.append({
-                        "address": loc.address,
-                        "lat": loc.latitude,
-                        "lng": loc.longitude,
-                        "provider": provider
-                    })
-                
-                logger.info(f"GeocodingService: Found {len(locations)} locations")
-                return locations
-            else:
-                logger.info("GeocodingService: No locations found")
-                return []
-                
-        except Exception as e:
-            logger.error(f"GeocodingService: Location search error: {e}")
+        normalized_query = ' '.join((query or '').lower().split())
+        if not normalized_query:
             return []
+        
+        def lookup() -> Tuple[Optional[Dict[str, Any]], bool]:
+            try:
+                if self.google:
+                    provider = "google"
+                    self.rate_limiter.acquire(provider)
+                    results = self.google.geocode(query, exactly_one=False, timeout=5)
+                else:
+                    provider = "nominatim"
+                    self.rate_limiter.acquire(provider)
+                    results = self.nominatim.geocode(query, exactly_one=False, timeout=8)
+            except Exception as e:
+                logger.error(f"GeocodingService: Location search error: {e}")
+                return None, False
+            if not results:
+                return {"status": "not_found", "results": []}, True
+            locations = [
+                {"address": loc.address, "lat": loc.latitude, "lng": loc.longitude, "provider": provider}
+                for loc in results[:10]  # Limit to 10 results
+            ]
+            return {"status": "success", "results": locations}, True
+        
+        key = hashlib.sha256(normalized_query.encode('utf-8')).hexdigest()
+        record = geocode_cache.get_or_compute('search', key, lookup)
+        locations = (record or {}).get("results") or []
+        logger.info(f"GeocodingService: Found {len(locations)} locations")
+        return locations
     
     def _preprocess_address(self, address: str) -> str:
         """
@@ -275,3 +426,7 @@ class GeocodingService:
                 unique_variations.append(variation)
         
         return unique_variations
+
+
+# Global instance (singleton pattern)
+geocoding_service = GeocodingService()
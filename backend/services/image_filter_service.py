@@ -39,6 +39,26 @@ class ImageFilterService:
         """Initialize the image filter service"""
         pass
     
+    @staticmethod
+    def probe_image(image_data: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Read format and dimensions from the image header without decoding pixels
+        (PIL parses only the header on open; pixel data loads on first access).
+        
+        Returns:
+            Dict with 'format' (lower-case PIL format or None), 'width', 'height', or None if unreadable
+        """
+        try:
+            with Image.open(io.BytesIO(image_data)) as img:
+                width, height = img.size
+                return {
+                    'format': img.format.lower() if img.format else None,
+                    'width': width,
+                    'height': height
+                }
+        except Exception:
+            return None
+    
     def filter_images(
         self,
         image_data_list: List[Dict[str, Any]],
@@ -85,13 +105,14 @@ class ImageFilterService:
             if block_metadata_list and idx < len(block_metadata_list):
                 block_metadata = block_metadata_list[idx]
             
-            # Score the image
+            # Score the image (reuse the header probe from download when present)
             score, reason = self._score_image(
                 image_data=image_data,
                 image_url=image_url,
                 block_metadata=block_metadata,
                 document_text=document_text,
-                index=original_index
+                index=original_index,
+                probe=image_item.get('probe')
             )
             
             scored_images.append({
@@ -100,6 +121,7 @@ class ImageFilterService:
                 'image_data': image_data,
                 'image_url': image_url,
                 'block_metadata': block_metadata,
+                'probe': image_item.get('probe'),
                 'reason': reason
             })
             
@@ -118,6 +140,7 @@ class ImageFilterService:
                     'image_url': img['image_url'],
                     'index': img['index'],
                     'block_metadata': img.get('block_metadata'),
+                    'probe': img.get('probe'),
                     'score': img['score']
                 })
                 
@@ -135,6 +158,7 @@ class ImageFilterService:
                         'image_url': img['image_url'],
                         'index': img['index'],
                         'block_metadata': img.get('block_metadata'),
+                        'probe': img.get('probe'),
                         'score': img['score']
                     })
         
@@ -154,11 +178,15 @@ class ImageFilterService:
         image_url: str,
         block_metadata: Optional[Dict[str, Any]],
         document_text: Optional[str],
-        index: int
+        index: int,
+        probe: Optional[Dict[str, Any]] = None
     ) -> Tuple[float, str]:
         """
         Score an image based on how likely it is to be a property photo
         
+        Cheap checks (block type, byte size) run first; dimensions come from the header
+        probe (see probe_image), so no image is fully decoded.
+        
         Returns:
             Tuple of (score, reason_string)
             Score: Higher = more likely to be property photo
@@ -194,8 +222,11 @@ class ImageFilterService:
         
         # 3. Check image dimensions
         try:
-            img = Image.open(io.BytesIO(image_data))
-            width, height = img.size
+            if probe is None:
+                probe = self.probe_image(image_data)
+            if probe is None:
+                raise ValueError("unreadable image header")
+            width, height = probe['width'], probe['height']
             
             if width < self.MIN_IMAGE_DIMENSION or height < self.MIN_IMAGE_DIMENSION:
                 return (-4.0, f"Dimensions too small ({width}x{height})")
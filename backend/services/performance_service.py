@@ -1,14 +1,35 @@
 """
 Performance Monitoring Service
 Tracks API performance, database queries, and system metrics
+
+Metrics are kept in fixed-size latency histograms, one per (kind, name) series:
+- kind 'api': Flask endpoints (track_api_call / track_performance in a request)
+- kind 'db': database queries and retrieval calls (track_db_query)
+- kind 'op': other timed functions (track_performance outside a request: Celery, graph tools)
+
+Recording is O(1) (one log-scale bucket increment), memory is bounded by
+PERF_METRICS_MAX_SERIES series plus a PERF_SLOW_LOG_SIZE ring buffer of recent slow calls,
+and percentiles are read from bucket counts instead of sorting raw samples.
+
+Histograms merge by adding counts, so every process (gunicorn workers, Celery workers)
+publishes its series to Redis every PERF_METRICS_PUBLISH_SECONDS and the /api/performance
+endpoints report the sum across live processes. Without Redis the numbers are per-process.
 """
 import time
 import logging
 import json
-from typing import Dict, Any, Optional, List
+import math
+import os
+import socket
+import threading
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from functools import wraps
 
+from .redis_client import get_redis_client
+
 # Try to import optional dependencies
 try:
     import psutil
@@ -19,83 +40,310 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+SLOW_API_SECONDS = 0.5
+SLOW_DB_SECONDS = 0.2
+
+_MAX_SERIES = int(os.environ.get('PERF_METRICS_MAX_SERIES', '2000'))
+_SLOW_LOG_SIZE = int(os.environ.get('PERF_SLOW_LOG_SIZE', '200'))
+_PUBLISH_SECONDS = float(os.environ.get('PERF_METRICS_PUBLISH_SECONDS', '10'))
+_PROCESS_TTL_SECONDS = int(os.environ.get('PERF_METRICS_PROCESS_TTL_SECONDS', '600'))
+_REDIS_KEY_PREFIX = 'perf_metrics:proc:'
+
+# Log-scale bucket upper bounds: 1ms growing by 25% per bucket up to ~2 minutes, then +Inf.
+# Percentiles are reported as a bucket's upper bound, i.e. within 25% of the true value.
+_BUCKET_GROWTH = 1.25
+_BUCKET_BOUNDS_MS: List[float] = [1.0 * _BUCKET_GROWTH ** i for i in range(53)]
+_LOG_GROWTH = math.log(_BUCKET_GROWTH)
+
+
+def _bucket_index(duration_ms: float) -> int:
+    if duration_ms <= _BUCKET_BOUNDS_MS[0]:
+        return 0
+    index = int(math.ceil(math.log(duration_ms / _BUCKET_BOUNDS_MS[0]) / _LOG_GROWTH - 1e-9))
+    return min(index, len(_BUCKET_BOUNDS_MS))  # last slot is the +Inf bucket
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (O(1) record, mergeable across processes)."""
+
+    __slots__ = ('buckets', 'count', 'sum_ms', 'max_ms', 'errors', 'slow_count', 'slow_sum_ms', 'rows')
+
+    def __init__(self):
+        self.buckets = [0] * (len(_BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+        self.slow_count = 0
+        self.slow_sum_ms = 0.0
+        self.rows = 0
+
+    def record(self, duration_ms: float, error: bool = False, slow: bool = False, rows: int = 0) -> None:
+        self.buckets[_bucket_index(duration_ms)] += 1
+        self.count += 1
+        self.sum_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        if error:
+            self.errors += 1
+        if slow:
+            self.slow_count += 1
+            self.slow_sum_ms += duration_ms
+        self.rows += rows
+
+    def percentile(self, p: float) -> float:
+        """Upper bound (ms) of the bucket holding the p-quantile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(p * self.count)))
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                if index >= len(_BUCKET_BOUNDS_MS):
+                    return self.max_ms
+                return min(_BUCKET_BOUNDS_MS[index], self.max_ms)
+        return self.max_ms
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, bucket_count in enumerate(other.buckets):
+            self.buckets[index] += bucket_count
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.errors += other.errors
+        self.slow_count += other.slow_count
+        self.slow_sum_ms += other.slow_sum_ms
+        self.rows += other.rows
+
+    def copy(self) -> 'LatencyHistogram':
+        clone = LatencyHistogram()
+        clone.merge(self)
+        return clone
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Sparse buckets keep the Redis payload small
+        return {
+            'b': {str(i): c for i, c in enumerate(self.buckets) if c},
+            'n': self.count, 's': self.sum_ms, 'm': self.max_ms,
+            'e': self.errors, 'sc': self.slow_count, 'ss': self.slow_sum_ms, 'r': self.rows,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        hist = cls()
+        for index, bucket_count in (data.get('b') or {}).items():
+            index = int(index)
+            if 0 <= index < len(hist.buckets):
+                hist.buckets[index] = int(bucket_count)
+        hist.count = int(data.get('n', 0))
+        hist.sum_ms = float(data.get('s', 0.0))
+        hist.max_ms = float(data.get('m', 0.0))
+        hist.errors = int(data.get('e', 0))
+        hist.slow_count = int(data.get('sc', 0))
+        hist.slow_sum_ms = float(data.get('ss', 0.0))
+        hist.rows = int(data.get('r', 0))
+        return hist
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.sum_ms / self.count, 2) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50), 2),
+            'p95_ms': round(self.percentile(0.95), 2),
+            'p99_ms': round(self.percentile(0.99), 2),
+            'max_ms': round(self.max_ms, 2),
+        }
+
+
+def _get_redis_client():
+    if os.environ.get('PERF_METRICS_AGGREGATE', 'true').lower() != 'true':
+        return None
+    return get_redis_client(os.environ.get('PERF_METRICS_REDIS_URL'), socket_timeout=2)
+
+
 class PerformanceService:
     """Service for monitoring and optimizing system performance"""
     
     def __init__(self):
-        self.metrics = {
-            'api_calls': [],
-            'db_queries': [],
-            'slow_queries': [],
-            'error_rates': {},
-            'response_times': []
-        }
+        self._lock = threading.Lock()
+        # (kind, name) -> LatencyHistogram
+        self._series: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._dropped_series = 0
+        self.slow_log = deque(maxlen=_SLOW_LOG_SIZE)
         self.start_time = time.time()
+        self._process_key = f"{_REDIS_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+        self._publisher_pid: Optional[int] = None
+        self._series_pid = os.getpid()
+    
+    def _record(self, kind: str, name: str, duration: float, error: bool = False,
+                slow: bool = False, rows: int = 0) -> None:
+        duration_ms = duration * 1000
+        key = (kind, name)
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None:
+                if len(self._series) >= _MAX_SERIES:
+                    # Unbounded label sets (e.g. ids in names) must not grow memory
+                    self._dropped_series += 1
+                    key = (kind, '_other')
+                    hist = self._series.get(key)
+                if hist is None:
+                    hist = self._series[key] = LatencyHistogram()
+            hist.record(duration_ms, error=error, slow=slow, rows=rows)
+        self._ensure_publisher()
     
     def track_api_call(self, endpoint: str, method: str, duration: float, 
                       status_code: int, user_id: Optional[str] = None):
         """Track API call performance"""
-        metric = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'endpoint': endpoint,
-            'method': method,
-            'duration_ms': duration * 1000,
-            'status_code': status_code,
-            'user_id': user_id
-        }
-        
-        self.metrics['api_calls'].append(metric)
-        self.metrics['response_times'].append(duration)
-        
-        # Keep only last 1000 calls to prevent memory issues
-        if len(self.metrics['api_calls']) > 1000:
-            self.metrics['api_calls'] = self.metrics['api_calls'][-1000:]
-            self.metrics['response_times'] = self.metrics['response_times'][-1000:]
+        slow = duration > SLOW_API_SECONDS
+        self._record('api', f"{method} {endpoint}", duration, error=status_code >= 400, slow=slow)
         
         # Log slow API calls
-        if duration > 0.5:  # 500ms threshold
+        if slow:
             logger.warning(f"Slow API call: {method} {endpoint} took {duration:.3f}s")
-            self.metrics['slow_queries'].append(metric)
+            self.slow_log.append({
+                'timestamp': datetime.utcnow().isoformat(),
+                'kind': 'api',
+                'endpoint': endpoint,
+                'method': method,
+                'duration_ms': duration * 1000,
+                'status_code': status_code,
+                'user_id': user_id
+            })
     
     def track_db_query(self, query_name: str, duration: float, 
                       rows_returned: int = 0, error: Optional[str] = None):
         """Track database query performance"""
-        metric = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'query_name': query_name,
-            'duration_ms': duration * 1000,
-            'rows_returned': rows_returned,
-            'error': error
-        }
-        
-        self.metrics['db_queries'].append(metric)
-        
-        # Keep only last 500 queries
-        if len(self.metrics['db_queries']) > 500:
-            self.metrics['db_queries'] = self.metrics['db_queries'][-500:]
+        slow = duration > SLOW_DB_SECONDS
+        self._record('db', query_name, duration, error=error is not None, slow=slow, rows=rows_returned)
         
         # Log slow queries
-        if duration > 0.2:  # 200ms threshold
+        if slow:
             logger.warning(f"Slow DB query: {query_name} took {duration:.3f}s")
-            self.metrics['slow_queries'].append(metric)
+            self.slow_log.append({
+                'timestamp': datetime.utcnow().isoformat(),
+                'kind': 'db',
+                'query_name': query_name,
+                'duration_ms': duration * 1000,
+                'rows_returned': rows_returned,
+                'error': error
+            })
+    
+    def track_operation(self, name: str, duration: float, error: Optional[str] = None):
+        """Track a timed function outside a Flask request (Celery tasks, graph tools)"""
+        self._record('op', name, duration, error=error is not None)
+    
+    def _local_series(self) -> Dict[Tuple[str, str], LatencyHistogram]:
+        with self._lock:
+            return {key: hist.copy() for key, hist in self._series.items()}
+    
+    # ------------------------------------------------------------------
+    # Cross-process aggregation
+    # ------------------------------------------------------------------
+    
+    def _ensure_publisher(self) -> None:
+        # Re-checked per pid so forked workers (gunicorn preload, Celery prefork) start their own
+        if self._publisher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._publisher_pid == os.getpid():
+                return
+            self._publisher_pid = os.getpid()
+            self._process_key = f"{_REDIS_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+            if self._series_pid != self._publisher_pid:
+                # Counts inherited from the parent would be double counted by the aggregate
+                self._series = {}
+                self._series_pid = self._publisher_pid
+        if _get_redis_client() is None:
+            return
+        thread = threading.Thread(target=self._publish_loop, name="perf-metrics-publisher", daemon=True)
+        thread.start()
+    
+    def _publish_loop(self) -> None:
+        pid = os.getpid()
+        while self._publisher_pid == pid:
+            time.sleep(_PUBLISH_SECONDS)
+            self.publish()
+    
+    def publish(self) -> bool:
+        """Write this process's histograms to Redis (cumulative; expires if the process dies)."""
+        client = _get_redis_client()
+        if client is None:
+            return False
+        payload = {
+            'started_at': self.start_time,
+            'series': [
+                {'kind': kind, 'name': name, 'hist': hist.to_dict()}
+                for (kind, name), hist in self._local_series().items()
+            ],
+        }
+        try:
+            client.set(self._process_key, json.dumps(payload), ex=_PROCESS_TTL_SECONDS)
+            return True
+        except Exception as e:
+            logger.warning(f"PerformanceService.publish failed: {e}")
+            return False
+    
+    def aggregated_series(self) -> Tuple[Dict[Tuple[str, str], LatencyHistogram], int]:
+        """
+        Histograms summed over all live processes.
+
+        Returns:
+            (series, process_count); falls back to this process only without Redis
+        """
+        local = self._local_series()
+        client = _get_redis_client()
+        if client is None:
+            return local, 1
+        self.publish()
+        merged: Dict[Tuple[str, str], LatencyHistogram] = {}
+        processes = 0
+        try:
+            keys = list(client.scan_iter(match=f"{_REDIS_KEY_PREFIX}*", count=200))
+            raw_payloads = client.mget(keys) if keys else []
+        except Exception as e:
+            logger.warning(f"PerformanceService aggregation failed, using local metrics: {e}")
+            return local, 1
+        for raw in raw_payloads:
+            if not raw:
+                continue
+            try:
+                payload = json.loads(raw)
+            except (TypeError, ValueError):
+                continue
+            processes += 1
+            for item in payload.get('series') or []:
+                key = (item.get('kind'), item.get('name'))
+                hist = LatencyHistogram.from_dict(item.get('hist') or {})
+                if key in merged:
+                    merged[key].merge(hist)
+                else:
+                    merged[key] = hist
+        return (merged, processes) if processes else (local, 1)
+    
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get performance summary statistics"""
-        if not self.metrics['response_times']:
-            return {'status': 'no_data'}
+        series, processes = self.aggregated_series()
         
-        response_times = self.metrics['response_times']
+        api_total = LatencyHistogram()
+        db_total = LatencyHistogram()
+        for (kind, _), hist in series.items():
+            if kind == 'api':
+                api_total.merge(hist)
+            elif kind == 'db':
+                db_total.merge(hist)
         
-        # Calculate statistics
-        avg_response_time = sum(response_times) / len(response_times)
-        p95_response_time = sorted(response_times)[int(len(response_times) * 0.95)]
-        p99_response_time = sorted(response_times)[int(len(response_times) * 0.99)]
+        if not api_total.count and not db_total.count:
+            return {'status': 'no_data'}
         
-        # Count errors
-        error_count = sum(1 for call in self.metrics['api_calls'] 
-                         if call['status_code'] >= 400)
-        total_calls = len(self.metrics['api_calls'])
-        error_rate = (error_count / total_calls * 100) if total_calls > 0 else 0
+        avg_response_time = (api_total.sum_ms / api_total.count / 1000) if api_total.count else 0.0
+        error_rate = (api_total.errors / api_total.count * 100) if api_total.count else 0
         
         # System metrics
         if PSUTIL_AVAILABLE:
@@ -108,15 +356,17 @@ class PerformanceService:
         return {
             'status': 'healthy' if avg_response_time < 0.2 and error_rate < 5 else 'needs_attention',
             'uptime_seconds': time.time() - self.start_time,
-            'total_api_calls': total_calls,
-            'total_db_queries': len(self.metrics['db_queries']),
-            'slow_queries_count': len(self.metrics['slow_queries']),
+            'processes_reporting': processes,
+            'total_api_calls': api_total.count,
+            'total_db_queries': db_total.count,
+            'slow_queries_count': api_total.slow_count + db_total.slow_count,
             'performance_metrics': {
                 'avg_response_time_ms': round(avg_response_time * 1000, 2),
-                'p95_response_time_ms': round(p95_response_time * 1000, 2),
-                'p99_response_time_ms': round(p99_response_time * 1000, 2),
+                'p95_response_time_ms': round(api_total.percentile(0.95), 2),
+                'p99_response_time_ms': round(api_total.percentile(0.99), 2),
                 'error_rate_percent': round(error_rate, 2)
             },
+            'db_metrics': db_total.summary(),
             'system_metrics': {
                 'memory_usage_percent': memory_usage,
                 'cpu_usage_percent': cpu_usage
@@ -125,83 +375,139 @@ class PerformanceService:
         }
     
     def get_slow_endpoints(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get slowest endpoints"""
-        slow_calls = [call for call in self.metrics['api_calls'] 
-                     if call['duration_ms'] > 500]  # 500ms threshold
-        
-        # Group by endpoint and calculate average
-        endpoint_stats = {}
-        for call in slow_calls:
-            endpoint = f"{call['method']} {call['endpoint']}"
-            if endpoint not in endpoint_stats:
-                endpoint_stats[endpoint] = {'count': 0, 'total_duration': 0}
-            endpoint_stats[endpoint]['count'] += 1
-            endpoint_stats[endpoint]['total_duration'] += call['duration_ms']
-        
-        # Calculate averages and sort
+        """Get slowest endpoints (by mean duration of their calls over 500ms)"""
+        series, _ = self.aggregated_series()
         slow_endpoints = []
-        for endpoint, stats in endpoint_stats.items():
-            avg_duration = stats['total_duration'] / stats['count']
+        for (kind, name), hist in series.items():
+            if kind != 'api' or not hist.slow_count:
+                continue
             slow_endpoints.append({
-                'endpoint': endpoint,
-                'avg_duration_ms': round(avg_duration, 2),
-                'call_count': stats['count']
+                'endpoint': name,
+                'avg_duration_ms': round(hist.slow_sum_ms / hist.slow_count, 2),
+                'call_count': hist.slow_count,
+                'p95_ms': round(hist.percentile(0.95), 2)
             })
         
         return sorted(slow_endpoints, key=lambda x: x['avg_duration_ms'], reverse=True)[:limit]
+    
+    def get_series_summary(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-series latency summary (all processes), slowest p95 first"""
+        series, _ = self.aggregated_series()
+        rows = []
+        for (series_kind, name), hist in series.items():
+            if kind and series_kind != kind:
+                continue
+            rows.append({'kind': series_kind, 'name': name, **hist.summary()})
+        return sorted(rows, key=lambda x: x['p95_ms'], reverse=True)
+    
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of all series (aggregated across processes)"""
+        series, processes = self.aggregated_series()
+        lines = [
+            '# HELP solosway_duration_seconds Latency of API calls (kind="api"), DB queries (kind="db") and operations (kind="op")',
+            '# TYPE solosway_duration_seconds histogram',
+        ]
+        error_lines = []
+        for (kind, name), hist in sorted(series.items()):
+            labels = f'kind="{kind}",name="{_escape_label(name)}"'
+            cumulative = 0
+            for index, upper_ms in enumerate(_BUCKET_BOUNDS_MS):
+                cumulative += hist.buckets[index]
+                lines.append(f'solosway_duration_seconds_bucket{{{labels},le="{upper_ms / 1000:.6g}"}} {cumulative}')
+            lines.append(f'solosway_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f'solosway_duration_seconds_sum{{{labels}}} {hist.sum_ms / 1000:.6f}')
+            lines.append(f'solosway_duration_seconds_count{{{labels}}} {hist.count}')
+            error_lines.append(f'solosway_errors_total{{{labels}}} {hist.errors}')
+        lines.append('# HELP solosway_errors_total Failed calls per series')
+        lines.append('# TYPE solosway_errors_total counter')
+        lines.extend(error_lines)
+        lines.append('# HELP solosway_metrics_processes Processes contributing to these metrics')
+        lines.append('# TYPE solosway_metrics_processes gauge')
+        lines.append(f'solosway_metrics_processes {processes}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
 
 # Global performance service instance
 performance_service = PerformanceService()
 
+def _request_endpoint() -> Optional[Tuple[str, str]]:
+    try:
+        from flask import has_request_context, request
+        if has_request_context():
+            return request.endpoint or 'unknown', request.method or 'unknown'
+    except ImportError:
+        pass
+    return None
+
+def _record_call(func, duration: float, error: Optional[Exception]) -> None:
+    try:
+        endpoint = _request_endpoint()
+        if endpoint is not None:
+            performance_service.track_api_call(endpoint[0], endpoint[1], duration, 500 if error else 200)
+        else:
+            performance_service.track_operation(func.__qualname__, duration, str(error) if error else None)
+    except Exception:
+        pass
+
 def track_performance(func):
-    """Decorator to track function performance"""
+    """Decorator to track function performance (API series inside a request, operation series otherwise)"""
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                _record_call(func, time.perf_counter() - start_time, e)
+                raise
+            _record_call(func, time.perf_counter() - start_time, None)
+            return result
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             result = func(*args, **kwargs)
-            duration = time.time() - start_time
-            
-            # Try to extract endpoint info from Flask context
-            try:
-                from flask import request
-                endpoint = request.endpoint or 'unknown'
-                method = request.method or 'unknown'
-                performance_service.track_api_call(endpoint, method, duration, 200)
-            except:
-                pass
-            
-            return result
         except Exception as e:
-            duration = time.time() - start_time
-            try:
-                from flask import request
-                endpoint = request.endpoint or 'unknown'
-                method = request.method or 'unknown'
-                performance_service.track_api_call(endpoint, method, duration, 500)
-            except:
-                pass
+            _record_call(func, time.perf_counter() - start_time, e)
             raise
+        _record_call(func, time.perf_counter() - start_time, None)
+        return result
     return wrapper
 
 def track_db_query(query_name: str):
-    """Decorator to track database query performance"""
+    """Decorator to track database query performance (sync or async functions)"""
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    performance_service.track_db_query(query_name, time.perf_counter() - start_time, 0, str(e))
+                    raise
+                rows_returned = len(result) if isinstance(result, list) else 0
+                performance_service.track_db_query(query_name, time.perf_counter() - start_time, rows_returned)
+                return result
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
-                duration = time.time() - start_time
-                
-                # Try to get row count if result is a list
-                rows_returned = len(result) if isinstance(result, list) else 0
-                performance_service.track_db_query(query_name, duration, rows_returned)
-                
-                return result
             except Exception as e:
-                duration = time.time() - start_time
-                performance_service.track_db_query(query_name, duration, 0, str(e))
+                performance_service.track_db_query(query_name, time.perf_counter() - start_time, 0, str(e))
                 raise
+            
+            # Try to get row count if result is a list
+            rows_returned = len(result) if isinstance(result, list) else 0
+            performance_service.track_db_query(query_name, time.perf_counter() - start_time, rows_returned)
+            return result
         return wrapper
     return decorator
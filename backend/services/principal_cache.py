@@ -0,0 +1,195 @@
+"""
+Authenticated principal cache for the Flask-Login user_loader.
+
+Every authenticated request (including SSE and polling) used to fetch the users row from
+Supabase in load_user and then resolve the business UUID from company_name in
+_ensure_business_uuid. Both results are cached per user id:
+
+- in-process tier: LRU dict, PRINCIPAL_CACHE_LOCAL_TTL_SECONDS (short, bounds staleness
+  when Redis is unavailable)
+- Redis tier: shared by all workers, PRINCIPAL_CACHE_TTL_SECONDS
+
+Explicit invalidation (invalidate(user_id)) is called on profile/role changes, login,
+logout and user deletion. It deletes the Redis entry and publishes on
+principal_cache:invalidate so other workers drop their in-process copy immediately.
+
+Records never contain password hashes or tokens. Auth time per request is recorded in the
+'auth.load_user' / 'auth.business_uuid' operation series and returned to the client as a
+Server-Timing header (see create_app).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .redis_client import get_redis_client, subscribe_invalidations
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_ENABLED = os.environ.get('PRINCIPAL_CACHE_ENABLED', 'true').lower() == 'true'
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', '120'))
+PRINCIPAL_CACHE_LOCAL_TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_LOCAL_TTL_SECONDS', '15'))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', '2048'))
+
+_KEY_PREFIX = 'principal:'
+_INVALIDATE_CHANNEL = 'principal_cache:invalidate'
+# Never cache credentials or one-time tokens
+_SENSITIVE_FIELDS = ('password', 'invitation_token', 'invitation_token_expires', 'reset_token')
+
+
+def _get_redis_client():
+    return get_redis_client(os.environ.get('PRINCIPAL_CACHE_REDIS_URL'))
+
+
+def _sanitize(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in record.items() if key not in _SENSITIVE_FIELDS}
+
+
+class PrincipalCache:
+    """Two-tier (process + Redis) cache of user records and resolved business UUIDs."""
+
+    def __init__(self, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'invalidations': 0}
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        """Cached principal record for user_id (users row + 'resolved_business_uuid'), or None."""
+        if not PRINCIPAL_CACHE_ENABLED or user_id is None:
+            return None
+        key = str(user_id)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['local_hits'] += 1
+                    return dict(entry[1])
+                del self._entries[key]
+
+        client = _get_redis_client()
+        if client is not None:
+            self._ensure_listener()
+            try:
+                raw = client.get(_KEY_PREFIX + key)
+            except Exception as e:
+                logger.debug(f"[PRINCIPAL_CACHE] Redis get failed: {e}")
+                raw = None
+            if raw:
+                try:
+                    record = json.loads(raw)
+                except (TypeError, ValueError):
+                    record = None
+                if isinstance(record, dict):
+                    self._store_local(key, record)
+                    with self._lock:
+                        self._stats['redis_hits'] += 1
+                    return dict(record)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def load(self, user_id: Any, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Return the cached record, or call loader() and cache a non-empty result."""
+        record = self.get(user_id)
+        if record is not None:
+            return record
+        record = loader()
+        if record:
+            self.set(user_id, record)
+        return record
+
+    # ------------------------------------------------------------------
+    # Writes and invalidation
+    # ------------------------------------------------------------------
+
+    def set(self, user_id: Any, record: Dict[str, Any]) -> None:
+        if not PRINCIPAL_CACHE_ENABLED or user_id is None:
+            return
+        key = str(user_id)
+        record = _sanitize(record)
+        self._store_local(key, record)
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.set(_KEY_PREFIX + key, json.dumps(record, default=str), ex=PRINCIPAL_CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.debug(f"[PRINCIPAL_CACHE] Redis set failed: {e}")
+
+    def set_business_uuid(self, user_id: Any, business_uuid: Optional[str]) -> None:
+        """Attach the business UUID resolved by _ensure_business_uuid to the cached record."""
+        if not business_uuid:
+            return
+        record = self.get(user_id)
+        if record is None:
+            return
+        record['resolved_business_uuid'] = str(business_uuid)
+        self.set(user_id, record)
+
+    def invalidate(self, user_id: Any) -> None:
+        """Drop a user's principal everywhere (call after profile, role or membership changes)."""
+        if user_id is None:
+            return
+        key = str(user_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._stats['invalidations'] += 1
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.delete(_KEY_PREFIX + key)
+                client.publish(_INVALIDATE_CHANNEL, key)
+            except Exception as e:
+                logger.warning(f"[PRINCIPAL_CACHE] Redis invalidation failed for {key}: {e}")
+        logger.debug(f"[PRINCIPAL_CACHE] Invalidated {key}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['local_hits'] + stats['redis_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['local_hits'] + stats['redis_hits']) / lookups, 3) if lookups else 0.0
+        stats['redis'] = _get_redis_client() is not None
+        stats['enabled'] = PRINCIPAL_CACHE_ENABLED
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _store_local(self, key: str, record: Dict[str, Any]) -> None:
+        expires_at = time.time() + min(PRINCIPAL_CACHE_LOCAL_TTL_SECONDS, PRINCIPAL_CACHE_TTL_SECONDS)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(record))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _ensure_listener(self) -> None:
+        """Subscribe to invalidations from other workers (started lazily, after any fork)."""
+        # Entries may have been invalidated while disconnected, hence clear on disconnect
+        subscribe_invalidations(_INVALIDATE_CHANNEL, self._on_invalidation, on_disconnect=self.clear,
+                                url=os.environ.get('PRINCIPAL_CACHE_REDIS_URL'))
+
+    def _on_invalidation(self, data: Any) -> None:
+        with self._lock:
+            self._entries.pop(str(data), None)
+
+
+# Global instance (singleton pattern)
+principal_cache = PrincipalCache()
@@ -17,6 +17,9 @@ logger = logging.getLogger(__name__)
 # Maximum pages to extract for quick mode (to prevent memory issues)
 MAX_QUICK_EXTRACT_PAGES = 50
 
+# How long a temp upload stays addressable by temp_file_id (S3 objects are cleaned up separately)
+TEMP_FILE_TTL_SECONDS = int(os.environ.get('QUICK_EXTRACT_TEMP_FILE_TTL', '86400'))
+
 
 def detect_file_type(file_bytes: bytes, filename: str) -> str:
     """
@@ -339,6 +342,15 @@ def store_temp_file(file_bytes: bytes, filename: str, temp_file_id: str) -> Dict
             }
         )
         
+        # Record the key in the shared token store so lookups are O(1) on any worker
+        # (no list_objects_v2 round-trip)
+        from .temp_token_store import get_token_store
+        get_token_store('quick_extract').set(
+            temp_file_id,
+            {'bucket': bucket_name, 'key': s3_key, 'filename': filename},
+            ttl_seconds=TEMP_FILE_TTL_SECONDS
+        )
+        
         logger.info(f"✅ Stored temp file: {s3_key}")
         
         return {
@@ -375,16 +387,23 @@ def get_temp_file(temp_file_id: str) -> Tuple[Optional[bytes], Optional[str]]:
         
         s3_client = boto3.client('s3')
         
-        # List objects with temp prefix
-        prefix = f"temp_uploads/{temp_file_id}/"
-        response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
-        
-        if 'Contents' not in response or len(response['Contents']) == 0:
-            return None, None
-        
-        # Get the first (and should be only) file
-        s3_key = response['Contents'][0]['Key']
-        filename = s3_key.split('/')[-1]
+        from .temp_token_store import get_token_store
+        entry = get_token_store('quick_extract').get(temp_file_id)
+        if entry:
+            bucket_name = entry.get('bucket') or bucket_name
+            s3_key = entry['key']
+            filename = entry.get('filename') or s3_key.split('/')[-1]
+        else:
+            # Fallback for files stored before the token store existed (or after its TTL)
+            prefix = f"temp_uploads/{temp_file_id}/"
+            response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
+            
+            if 'Contents' not in response or len(response['Contents']) == 0:
+                return None, None
+            
+            # Get the first (and should be only) file
+            s3_key = response['Contents'][0]['Key']
+            filename = s3_key.split('/')[-1]
         
         obj = s3_client.get_object(Bucket=bucket_name, Key=s3_key)
         file_bytes = obj['Body'].read()
@@ -416,6 +435,9 @@ def delete_temp_file(temp_file_id: str) -> bool:
         
         s3_client = boto3.client('s3')
         
+        from .temp_token_store import get_token_store
+        get_token_store('quick_extract').delete(temp_file_id)
+        
         # List and delete objects with temp prefix
         prefix = f"temp_uploads/{temp_file_id}/"
         response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
@@ -0,0 +1,141 @@
+"""
+Shared Redis connection and invalidation listener for the optional caching tiers.
+
+principal_cache, document_catalog, ann_index, temp_token_store, geocode_cache, the geocoding
+provider rate limiter, the rerank score cache, performance_service and tracing all treat Redis
+as optional: without it they fall back to per-process state. They used to each keep a
+connect-once client that gave up for the life of the process after the first failed ping, so
+a Redis restart during deploy left every worker per-process until it was recycled.
+
+- get_redis_client(url): one client per (url, timeout). After a failed connect the next
+  attempt is made once REDIS_RETRY_SECONDS have passed; until then callers get None
+  immediately instead of paying the connect timeout on every request.
+- subscribe_invalidations(channel, callback): one daemon pub/sub thread per channel and
+  process (started lazily, so it also runs in forked workers). It reconnects with
+  exponential backoff and calls on_disconnect after a dropped subscription, since messages
+  published while disconnected are lost.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Wait this long after a failed connect before trying Redis again
+REDIS_RETRY_SECONDS = float(os.environ.get('REDIS_RETRY_SECONDS', '30'))
+# Short default timeout: a slow Redis must not cost more than the lookup it replaces
+DEFAULT_SOCKET_TIMEOUT = 0.25
+_LISTENER_MAX_BACKOFF_SECONDS = 30.0
+
+_clients: Dict[Tuple[str, float], Any] = {}
+_retry_after: Dict[Tuple[str, float], float] = {}
+_listeners: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _resolve_url(url: Optional[str]) -> Optional[str]:
+    return url or os.environ.get('REDIS_URL') or None
+
+
+def get_redis_client(url: Optional[str] = None, socket_timeout: float = DEFAULT_SOCKET_TIMEOUT):
+    """
+    Shared Redis client, or None if Redis is not configured or currently unreachable.
+
+    Args:
+        url: Redis URL (a feature-specific *_REDIS_URL); REDIS_URL when empty
+        socket_timeout: per-command timeout in seconds
+    """
+    redis_url = _resolve_url(url)
+    if not redis_url:
+        return None
+    key = (redis_url, float(socket_timeout))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    if time.time() < _retry_after.get(key, 0.0):
+        return None
+
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+        if time.time() < _retry_after.get(key, 0.0):
+            return None
+        try:
+            import redis
+            client = redis.Redis.from_url(redis_url, decode_responses=True, socket_timeout=socket_timeout,
+                                          socket_connect_timeout=min(0.5, socket_timeout * 2))
+            client.ping()
+        except Exception as e:
+            _retry_after[key] = time.time() + REDIS_RETRY_SECONDS
+            logger.warning(f"⚠️ Redis not available ({e}); using per-process fallbacks, retrying in {REDIS_RETRY_SECONDS:.0f}s")
+            return None
+        _clients[key] = client
+        if _retry_after.pop(key, None) is not None:
+            logger.info("[REDIS] Connection restored")
+        else:
+            logger.debug("[REDIS] Connected")
+        return client
+
+
+def subscribe_invalidations(channel: str, callback: Callable[[Any], None],
+                            on_disconnect: Optional[Callable[[], None]] = None,
+                            url: Optional[str] = None) -> bool:
+    """
+    Start a background subscriber for `channel` in this process (no-op if already running).
+
+    Args:
+        channel: pub/sub channel name
+        callback: called with the data of every message
+        on_disconnect: called after an established subscription drops
+        url: Redis URL; REDIS_URL when empty
+
+    Returns:
+        True if a listener is running for the channel, False if Redis is not configured
+    """
+    redis_url = _resolve_url(url)
+    if not redis_url:
+        return False
+    pid = os.getpid()
+    if _listeners.get(channel) == pid:
+        return True
+    with _lock:
+        # Threads don't survive fork: a pid recorded by the parent means no listener here
+        if _listeners.get(channel) == pid:
+            return True
+        _listeners[channel] = pid
+    threading.Thread(target=_listen, args=(redis_url, channel, callback, on_disconnect),
+                     name=f"redis-listener-{channel}", daemon=True).start()
+    return True
+
+
+def _listen(redis_url: str, channel: str, callback: Callable[[Any], None],
+            on_disconnect: Optional[Callable[[], None]]) -> None:
+    import redis
+
+    backoff = 1.0
+    while True:
+        subscribed = False
+        try:
+            pubsub = redis.Redis.from_url(redis_url, decode_responses=True).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(channel)
+            subscribed = True
+            backoff = 1.0
+            for message in pubsub.listen():
+                if message.get('type') == 'message':
+                    try:
+                        callback(message.get('data'))
+                    except Exception as e:
+                        logger.debug(f"[REDIS] {channel} handler error: {e}")
+        except Exception as e:
+            logger.debug(f"[REDIS] {channel} listener error: {e}; retrying in {backoff:.0f}s")
+        if subscribed and on_disconnect is not None:
+            try:
+                on_disconnect()
+            except Exception as e:
+                logger.debug(f"[REDIS] {channel} disconnect handler error: {e}")
+        time.sleep(backoff)
+        backoff = min(backoff * 2, _LISTENER_MAX_BACKOFF_SECONDS)
@@ -1,17 +1,91 @@
 """
-Reducto Image Processing Service 
+Reducto Image Processing Service
 Handles downloading and storing images from reducto's parsed content blocks
+
+Pipeline (per document):
+- downloads share one keep-alive requests.Session per process (HTTP connection pool with
+  retries), instead of a new connection per presigned URL
+- each image is probed from its header only (format + dimensions, no pixel decode) and
+  the probe is reused for filter scoring and the storage extension / content type
+- with include_all_images (default) every worker downloads, probes and uploads its image
+  in one pass, so uploads start as soon as the first download lands and image bytes are
+  released after upload rather than held for the whole document
+- concurrency is bounded per document (IMAGE_PIPELINE_WORKERS) and per worker process
+  (IMAGE_PIPELINE_MAX_INFLIGHT, shared by concurrent documents in the same process)
 """
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from .reducto_service import ReductoService
 from .storage_service import StorageService
 from .image_filter_service import ImageFilterService
 
 logger = logging.getLogger(__name__)
 
+IMAGE_PIPELINE_WORKERS = int(os.environ.get('IMAGE_PIPELINE_WORKERS', '16'))
+IMAGE_PIPELINE_MAX_INFLIGHT = int(os.environ.get('IMAGE_PIPELINE_MAX_INFLIGHT', '32'))
+IMAGE_HTTP_POOL_SIZE = int(os.environ.get('IMAGE_HTTP_POOL_SIZE', '32'))
+
+_SUPPORTED_EXTENSIONS = ('jpg', 'jpeg', 'png', 'gif', 'webp')
+_CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+# Process-wide bound on images in flight (download + upload), across all documents
+_inflight_slots = threading.BoundedSemaphore(IMAGE_PIPELINE_MAX_INFLIGHT)
+
+_http_session: Optional[requests.Session] = None
+_http_session_pid: Optional[int] = None
+_http_session_lock = threading.Lock()
+
+
+def get_image_http_session() -> requests.Session:
+    """Keep-alive session for presigned image downloads (recreated after fork)."""
+    global _http_session, _http_session_pid
+    pid = os.getpid()
+    if _http_session is None or _http_session_pid != pid:
+        with _http_session_lock:
+            if _http_session is None or _http_session_pid != pid:
+                session = requests.Session()
+                retry = Retry(
+                    total=2,
+                    backoff_factor=0.3,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET'])
+                )
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=IMAGE_HTTP_POOL_SIZE, max_retries=retry)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+                _http_session_pid = pid
+    return _http_session
+
+
+def _image_extension(probe: Optional[Dict[str, Any]], image_url: str) -> str:
+    """Storage extension from the header probe, falling back to the URL."""
+    image_ext = (probe or {}).get('format')
+    if image_ext:
+        return image_ext if image_ext in _SUPPORTED_EXTENSIONS else 'jpg'
+    url_lower = image_url.lower()
+    if '.png' in url_lower:
+        return 'png'
+    if '.gif' in url_lower:
+        return 'gif'
+    return 'jpg'
+
+
 class ReductoImageService:
     """service for processing images from reductos parsed blocks"""
 
@@ -41,132 +115,178 @@ class ReductoImageService:
             property_id: Optional property ID if linked
             image_blocks_metadata: Optional list of block metadata (type, bbox, etc.) for filtering
             document_text: Optional document text for context-based filtering
-            
+
         Returns:
             Dict with processed images metadata
         """
         total_images = len(image_urls)
+        started = time.time()
         logger.info(f"📸 Processing {total_images} images from Reducto...")
 
-        # Step 1: Download all images in parallel (before URLs expire)
-        # Phase 2 Optimization: Parallel downloads (15 concurrent workers)
-        downloaded_images = self._download_images_parallel(
-            image_urls=image_urls,
-            image_blocks_metadata=image_blocks_metadata,
-            max_workers=15
-        )
-        
-        logger.info(f"✅ Downloaded {len(downloaded_images)}/{total_images} images (parallel)")
-        
-        # Step 2: Choose images to upload
-        # By default we now upload every image we can successfully download.
-        # (This matches product expectation: "pull every image it can".)
         if include_all_images:
-            # _download_images_parallel already filters out failed downloads,
-            # so all items in downloaded_images are successful
-            images_to_upload = downloaded_images
+            # Upload every image we can download ("pull every image it can").
+            # Download → probe → upload runs per image in one pass, no filtering barrier.
+            results = self._run_bounded(
+                lambda idx: self._download_and_upload(idx, image_urls[idx], image_blocks_metadata, document_id, business_id),
+                range(total_images)
+            )
+            downloaded_count = sum(1 for r in results if r.get('downloaded'))
+            processed_images = [r['image'] for r in results if r.get('image')]
+            errors = [r['error'] for r in results if r.get('downloaded') and r.get('error')]
             filter_result = {
-                'filtered_images': images_to_upload,
-                'filtered_count': len(images_to_upload),
-                'total_count': len(downloaded_images),
-                'filter_reasons': {f"image_{img.get('index')}": "include_all_images=True" for img in images_to_upload}
+                'filtered_count': downloaded_count,
+                'filter_reasons': {f"image_{r['index']}": "include_all_images=True" for r in results if r.get('downloaded')}
             }
-            logger.info(f"🖼️ include_all_images=True → uploading {len(images_to_upload)} images (no filtering)")
+            images_to_upload_count = downloaded_count
+            logger.info(f"🖼️ include_all_images=True → uploaded {len(processed_images)}/{downloaded_count} downloaded images (no filtering)")
         else:
-            # Filter images to keep only property-relevant photos
+            # Step 1: Download all images in parallel (before URLs expire)
+            downloaded_images = self._download_images_parallel(
+                image_urls=image_urls,
+                image_blocks_metadata=image_blocks_metadata,
+                max_workers=IMAGE_PIPELINE_WORKERS
+            )
+            downloaded_count = len(downloaded_images)
+            logger.info(f"✅ Downloaded {downloaded_count}/{total_images} images (parallel)")
+
+            # Step 2: Filter images to keep only property-relevant photos (scores reuse header probes)
             filter_result = self.filter_service.filter_images(
                 image_data_list=downloaded_images,
                 block_metadata_list=image_blocks_metadata,
                 document_text=document_text
             )
             images_to_upload = filter_result['filtered_images']
-            logger.info(f"🎯 Filtered to {len(images_to_upload)} property-relevant images")
-        
-        # Step 3: Upload selected images
-        processed_images = []
-        errors = []
-
-        for img_item in images_to_upload:
-            image_data = img_item['image_data']
-            image_url = img_item['image_url']
-            original_index = img_item['index']
-            block_metadata = img_item.get('block_metadata', {})
-            
-            try:
-                # Determine image format using PIL (more reliable than URL parsing)
-                try:
-                    from PIL import Image
-                    import io
-                    img = Image.open(io.BytesIO(image_data))
-                    image_ext = img.format.lower() if img.format else 'jpg'
-                    # Handle common formats
-                    if image_ext not in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-                        image_ext = 'jpg'  # Default fallback
-                except Exception as e:
-                    logger.warning(f"Could not detect image format for image {original_index}, using URL fallback: {e}")
-                    # Fallback to URL-based detection
-                    image_ext = 'jpg'
-                    if '.png' in image_url.lower():
-                        image_ext = 'png'
-                    elif '.gif' in image_url.lower():
-                        image_ext = 'gif'
-
-                # Generate storage path 
-                image_filename = f"document_{document_id}_image_{original_index}.{image_ext}"
-
-                # Upload using the existing StorageService (handles Supabase and S3)
-                upload_result = self.storage_service.upload_property_image(
-                    image_data=image_data,
-                    filename=image_filename,
-                    business_id=business_id,
-                    document_id=document_id,
-                    preferred_storage='supabase'
-                )
+            images_to_upload_count = len(images_to_upload)
+            logger.info(f"🎯 Filtered to {images_to_upload_count} property-relevant images")
 
-                if upload_result.get('success'):
-                    # Extract bbox and page_number from block_metadata
-                    bbox = block_metadata.get('bbox') if block_metadata else None
-                    page_number = None
-                    if bbox and isinstance(bbox, dict):
-                        page_number = bbox.get('page') or bbox.get('original_page')
-                    
-                    processed_images.append({
-                        'url': upload_result['url'],
-                        'document_id': document_id,
-                        'source_document_id': document_id,
-                        'storage_path': upload_result.get('path', ''),
-                        'image_index': original_index,
-                        'size_bytes': len(image_data),
-                        'storage_provider': upload_result.get('storage_provider', 'supabase'),
-                        'filter_score': img_item.get('score', 0),
-                        'bbox': bbox,  # ADD: Bbox coordinates for citation
-                        'page_number': page_number,  # ADD: Page number for citation
-                        'original_image_url': image_url,  # ADD: Original Reducto URL
-                        'block_type': block_metadata.get('type') if block_metadata else None  # ADD: Block type (Figure/Table)
-                    })
-                    logger.info(f"✅ Uploaded image {original_index} (score: {img_item.get('score', 0):.1f}, page: {page_number})")
-                else:
-                    errors.append(f"Failed to upload image {original_index}: {upload_result.get('error', 'unknown error')}")
-                
-            except Exception as e:
-                error_msg = f"Failed to process filtered image {original_index}: {str(e)}"
-                logger.warning(error_msg)
-                errors.append(error_msg)
+            # Step 3: Upload selected images concurrently
+            results = self._run_bounded(
+                lambda position: self._upload_image(images_to_upload[position], document_id, business_id),
+                range(images_to_upload_count)
+            )
+            processed_images = [r['image'] for r in results if r.get('image')]
+            errors = [r['error'] for r in results if r.get('error')]
 
+        logger.info(
+            f"✅ Image stage complete: {len(processed_images)} uploaded, {len(errors)} errors, "
+            f"{total_images} URLs in {time.time() - started:.1f}s"
+        )
         return {
             'success': len(errors) == 0,
             'images': processed_images,
             'errors': errors,
             'total': total_images,
-            'filtered': len(images_to_upload),
+            'filtered': images_to_upload_count,
             'processed': len(processed_images),
             'filter_stats': {
-                'total_downloaded': len(downloaded_images),
+                'total_downloaded': downloaded_count,
                 'total_filtered': filter_result['filtered_count'],
                 'filter_reasons': filter_result.get('filter_reasons', {})
             }
         }
 
+    def _run_bounded(self, func: Callable[[int], Dict[str, Any]], positions, max_workers: int = None) -> List[Dict[str, Any]]:
+        """
+        Run func(position) concurrently and return results in position order.
+
+        At most max_workers (IMAGE_PIPELINE_WORKERS) run for this document, and each call
+        also holds a process-wide slot so concurrent documents share IMAGE_PIPELINE_MAX_INFLIGHT.
+        """
+        positions = list(positions)
+        if not positions:
+            return []
+        max_workers = min(max_workers or IMAGE_PIPELINE_WORKERS, len(positions))
+
+        def _bounded(position: int) -> Dict[str, Any]:
+            with _inflight_slots:
+                return func(position)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(positions)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-pipeline") as executor:
+            futures = {executor.submit(_bounded, position): i for i, position in enumerate(positions)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return results
+
+    def _download_and_upload(
+        self,
+        idx: int,
+        image_url: str,
+        image_blocks_metadata: Optional[List[Dict[str, Any]]],
+        document_id: str,
+        business_id: str
+    ) -> Dict[str, Any]:
+        """Download, probe and upload one image (include_all_images path)."""
+        downloaded = self._download_single_image(idx, image_url, image_blocks_metadata)
+        if not downloaded['success']:
+            return {'downloaded': False, 'index': downloaded['index']}
+        result = self._upload_image(downloaded, document_id, business_id)
+        result['downloaded'] = True
+        result['index'] = downloaded['index']
+        return result
+
+    def _upload_image(self, img_item: Dict[str, Any], document_id: str, business_id: str) -> Dict[str, Any]:
+        """
+        Upload one downloaded image and build its processed-image record.
+
+        Returns:
+            Dict with 'image' (record) on success, or 'error'
+        """
+        image_data = img_item['image_data']
+        image_url = img_item['image_url']
+        original_index = img_item['index']
+        block_metadata = img_item.get('block_metadata') or {}
+
+        try:
+            probe = img_item.get('probe')
+            if probe is None:
+                logger.warning(f"Could not detect image format for image {original_index}, using URL fallback")
+            image_ext = _image_extension(probe, image_url)
+
+            # Generate storage path
+            image_filename = f"document_{document_id}_image_{original_index}.{image_ext}"
+
+            # Upload using the existing StorageService (handles Supabase and S3)
+            upload_result = self.storage_service.upload_property_image(
+                image_data=image_data,
+                filename=image_filename,
+                business_id=business_id,
+                document_id=document_id,
+                preferred_storage='supabase',
+                content_type=_CONTENT_TYPES.get(image_ext, 'image/jpeg')
+            )
+
+            if not upload_result.get('success'):
+                return {'error': f"Failed to upload image {original_index}: {upload_result.get('error', 'unknown error')}"}
+
+            # Extract bbox and page_number from block_metadata
+            bbox = block_metadata.get('bbox') if block_metadata else None
+            page_number = None
+            if bbox and isinstance(bbox, dict):
+                page_number = bbox.get('page') or bbox.get('original_page')
+
+            logger.info(f"✅ Uploaded image {original_index} (score: {img_item.get('score', 0):.1f}, page: {page_number})")
+            return {
+                'image': {
+                    'url': upload_result['url'],
+                    'document_id': document_id,
+                    'source_document_id': document_id,
+                    'storage_path': upload_result.get('path', ''),
+                    'image_index': original_index,
+                    'size_bytes': len(image_data),
+                    'storage_provider': upload_result.get('storage_provider', 'supabase'),
+                    'filter_score': img_item.get('score', 0),
+                    'bbox': bbox,  # ADD: Bbox coordinates for citation
+                    'page_number': page_number,  # ADD: Page number for citation
+                    'original_image_url': image_url,  # ADD: Original Reducto URL
+                    'block_type': block_metadata.get('type') if block_metadata else None  # ADD: Block type (Figure/Table)
+                }
+            }
+        except Exception as e:
+            error_msg = f"Failed to process filtered image {original_index}: {str(e)}"
+            logger.warning(error_msg)
+            return {'error': error_msg}
+
     def _download_single_image(
         self,
         idx: int,
@@ -175,32 +295,33 @@ class ReductoImageService:
     ) -> Dict[str, Any]:
         """
         Download a single image and return result dict.
-        
+
         Used by parallel download executor to download images concurrently.
-        
+
         Args:
             idx: Image index (0-based)
             image_url: Presigned URL to download from Reducto
             image_blocks_metadata: Optional list of block metadata for matching
-        
+
         Returns:
-            Dict with success status, image data, metadata, or error
+            Dict with success status, image data, header probe, metadata, or error
         """
         try:
-            # Download image from presigned URL (24h expiration)
-            image_data = self.reducto_service.download_image_from_url(image_url)
-            
+            # Download image from presigned URL (24h expiration) over the shared keep-alive pool
+            image_data = self.reducto_service.download_image_from_url(image_url, session=get_image_http_session())
+
             # Get corresponding block metadata if available
             block_metadata = None
             if image_blocks_metadata and idx < len(image_blocks_metadata):
                 block_metadata = image_blocks_metadata[idx]
-            
+
             return {
                 'success': True,
                 'image_data': image_data,
                 'image_url': image_url,
                 'index': idx + 1,  # 1-based index for consistency
-                'block_metadata': block_metadata
+                'block_metadata': block_metadata,
+                'probe': self.filter_service.probe_image(image_data)
             }
         except Exception as e:
             logger.warning(f"Failed to download image {idx + 1}: {str(e)}")
@@ -209,76 +330,48 @@ class ReductoImageService:
                 'index': idx + 1,
                 'error': str(e)
             }
-    
+
     def _download_images_parallel(
         self,
         image_urls: List[str],
         image_blocks_metadata: Optional[List[Dict[str, Any]]],
-        max_workers: int = 15
+        max_workers: int = IMAGE_PIPELINE_WORKERS
     ) -> List[Dict[str, Any]]:
         """
-        Download images in parallel using ThreadPoolExecutor.
-        
-        Phase 2 Optimization: Downloads 15 images concurrently instead of sequentially.
-        This reduces download time from ~3.5 minutes to ~30 seconds for 100+ images.
-        
+        Download images in parallel (bounded per document and per process, see _run_bounded).
+
         Args:
             image_urls: List of presigned URLs from Reducto
             image_blocks_metadata: Optional metadata list for each image
-            max_workers: Number of concurrent download threads (default: 15)
-        
+            max_workers: Number of concurrent downloads for this document
+
         Returns:
-            List of successfully downloaded images with data and metadata
+            List of successfully downloaded images with data, header probe and metadata
         """
         if not image_urls:
             return []
-        
+
         total_images = len(image_urls)
         logger.info(f"⚡ Starting parallel download of {total_images} images (max {max_workers} concurrent)...")
-        
-        # Use ThreadPoolExecutor for parallel downloads
-        # 15 workers balances speed vs API rate limits
-        downloaded_images = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all download tasks
-            futures = {
-                executor.submit(
-                    self._download_single_image,
-                    idx,
-                    url,
-                    image_blocks_metadata
-                ): idx
-                for idx, url in enumerate(image_urls)
+
+        results = self._run_bounded(
+            lambda idx: self._download_single_image(idx, image_urls[idx], image_blocks_metadata),
+            range(total_images),
+            max_workers=max_workers
+        )
+
+        # Filter out failed downloads (results are in original order for metadata matching)
+        downloaded_images = [
+            {
+                'image_data': r['image_data'],
+                'image_url': r['image_url'],
+                'index': r['index'],
+                'block_metadata': r['block_metadata'],
+                'probe': r['probe']
             }
-            
-            # Collect results as they complete
-            # Use list to preserve order for metadata matching
-            results = [None] * total_images
-            completed_count = 0
-            
-            for future in as_completed(futures):
-                result = future.result()
-                completed_count += 1
-                
-                if result['success']:
-                    # Store in original position to preserve metadata matching
-                    results[result['index'] - 1] = result
-                    logger.debug(f"✅ Downloaded image {result['index']}/{total_images} ({completed_count}/{total_images} completed)")
-                else:
-                    logger.debug(f"❌ Failed image {result['index']}/{total_images}: {result.get('error', 'unknown')}")
-            
-            # Filter out failed downloads and None values
-            downloaded_images = [
-                {
-                    'image_data': r['image_data'],
-                    'image_url': r['image_url'],
-                    'index': r['index'],
-                    'block_metadata': r['block_metadata']
-                }
-                for r in results
-                if r and r['success']
-            ]
-        
+            for r in results
+            if r['success']
+        ]
+
         logger.info(f"✅ Parallel download complete: {len(downloaded_images)}/{total_images} successful")
         return downloaded_images
-
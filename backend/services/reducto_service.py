@@ -2022,18 +2022,19 @@ class ReductoService:
             logger.error(f"Reducto extraction failed: {e}")
             raise
 
-    def download_image_from_url(self, presigned_url: str) -> bytes:
+    def download_image_from_url(self, presigned_url: str, session: Optional[requests.Session] = None) -> bytes:
         """
         Download image from presigned url (must download immediately - 24h expiary)
 
         Args:
             presigned_url: URL of image from reducto's parsed conent blocks
+            session: Optional keep-alive session (connection reuse across many images)
 
         Returns:
             Image binary data 
         """
         try:
-            response = requests.get(presigned_url, timeout=30)
+            response = (session or requests).get(presigned_url, timeout=30)
             response.raise_for_status()
             return response.content 
         except Exception as e:
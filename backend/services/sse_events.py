@@ -0,0 +1,139 @@
+"""
+Server-Sent Events framing for the streaming query endpoint.
+
+- sse_frame: one `data: <json>\\n\\n` frame, encoded with orjson when installed (falls back to
+  the stdlib encoder); output is always single-line JSON, which the frontend parser requires
+- token_frame: pre-built template for the hot `token` event (only the text is encoded)
+- paced_token_frames: streams answer text as coalesced `token` frames, flushing every
+  SSE_COALESCE_MS or once SSE_COALESCE_BYTES are buffered, with non-blocking pacing
+- TokenCoalescer: the same window for answer text that arrives live, delta by delta, while
+  a node is still generating
+- HEARTBEAT_FRAME: SSE comment line sent on idle connections (ignored by EventSource and by
+  the frontend's `data: ` line parser) so proxies don't drop long retrieval phases
+
+The event contract is unchanged: consecutive token frames are concatenated by the client,
+so coalescing only changes how many frames carry the same text.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
+COALESCE_MS = float(os.environ.get('SSE_COALESCE_MS', '20'))
+COALESCE_BYTES = int(os.environ.get('SSE_COALESCE_BYTES', '64'))
+HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+
+HEARTBEAT_FRAME = ": keep-alive\n\n"
+
+_TOKEN_PREFIX = 'data: {"type":"token","token":'
+_FRAME_SUFFIX = '}\n\n'
+
+
+def _dumps(value: Any) -> str:
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value).decode('utf-8')
+        except TypeError:
+            # Non-str keys, subclasses orjson rejects, etc.
+            pass
+    return json.dumps(value)
+
+
+def sse_frame(payload: Any) -> str:
+    """Encode one SSE `data:` frame."""
+    return f"data: {_dumps(payload)}\n\n"
+
+
+def token_frame(text: str) -> str:
+    """Encode a `token` event (same JSON as sse_frame({'type': 'token', 'token': text}))."""
+    return _TOKEN_PREFIX + _dumps(text) + _FRAME_SUFFIX
+
+
+async def paced_token_frames(
+    text: str,
+    chars_per_second: float,
+    window_ms: float = COALESCE_MS,
+    max_bytes: int = COALESCE_BYTES,
+) -> AsyncIterator[str]:
+    """
+    Stream text as coalesced token frames at a steady typing pace.
+
+    Each frame carries whatever the pace allows within one window, capped at max_bytes of
+    UTF-8. Pacing uses asyncio.sleep so the loop keeps serving other work.
+
+    Args:
+        text: Full answer text
+        chars_per_second: Typing pace; <= 0 streams as fast as frames can be built
+        window_ms: Flush interval
+        max_bytes: Max UTF-8 bytes per frame
+    """
+    if not text:
+        return
+    window = max(window_ms, 1.0) / 1000.0
+    chars_per_window = max(1, int(chars_per_second * window)) if chars_per_second > 0 else len(text)
+    # A character is at least one UTF-8 byte, so this only needs trimming for multi-byte text
+    chars_per_window = min(chars_per_window, max(1, max_bytes))
+
+    position = 0
+    while position < len(text):
+        chunk = text[position:position + chars_per_window]
+        while len(chunk) > 1 and len(chunk.encode('utf-8')) > max_bytes:
+            chunk = chunk[:-1]
+        position += len(chunk)
+        yield token_frame(chunk)
+        if chars_per_second > 0 and position < len(text):
+            await asyncio.sleep(window)
+
+
+class TokenCoalescer:
+    """
+    Buffer live answer deltas into token frames.
+
+    add() returns a frame once SSE_COALESCE_BYTES are buffered or SSE_COALESCE_MS have passed
+    since the first buffered delta; otherwise None. Call flush() before sending any other
+    frame (and at the end of the stream) so text never arrives after the events that follow it.
+    """
+
+    def __init__(self, window_ms: float = COALESCE_MS, max_bytes: int = COALESCE_BYTES):
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_bytes = max(1, max_bytes)
+        self._parts: List[str] = []
+        self._bytes = 0
+        self._first_at = 0.0
+
+    def add(self, text: str) -> Optional[str]:
+        if not text:
+            return self.due()
+        if not self._parts:
+            self._first_at = time.monotonic()
+        self._parts.append(text)
+        self._bytes += len(text.encode('utf-8'))
+        if self._bytes >= self.max_bytes:
+            return self.flush()
+        return self.due()
+
+    def due(self) -> Optional[str]:
+        """Flush only if the window since the first buffered delta has passed."""
+        if self._parts and time.monotonic() - self._first_at >= self.window:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        if not self._parts:
+            return None
+        frame = token_frame(''.join(self._parts))
+        self._parts = []
+        self._bytes = 0
+        return frame
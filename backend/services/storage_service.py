@@ -5,6 +5,7 @@ Handles both Supabase Storage and S3 storage for property images
 
 import os
 import boto3
+from botocore.config import Config
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
@@ -20,7 +21,9 @@ class StorageService:
             's3',
             aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
             aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-            region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
+            region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+            # Image uploads run concurrently; default pool (10) would serialise them
+            config=Config(max_pool_connections=int(os.environ.get('S3_MAX_POOL_CONNECTIONS', '32')))
         )
         
         self.s3_bucket = os.environ['S3_UPLOAD_BUCKET']
@@ -32,7 +35,8 @@ class StorageService:
         filename: str, 
         business_id: str, 
         document_id: str,
-        preferred_storage: str = 'supabase'
+        preferred_storage: str = 'supabase',
+        content_type: str = 'image/jpeg'
     ) -> Dict:
         """
         Upload property image to storage
@@ -43,6 +47,7 @@ class StorageService:
             business_id: Business ID for organization
             document_id: Document ID
             preferred_storage: 'supabase' or 's3'
+            content_type: MIME type stored with the object
         
         Returns:
             Dict with upload results and metadata
@@ -53,20 +58,20 @@ class StorageService:
             
             if preferred_storage == 'supabase':
                 # Try Supabase first
-                result = self._upload_to_supabase(image_data, storage_path)
+                result = self._upload_to_supabase(image_data, storage_path, content_type)
                 if result['success']:
                     return result
                 else:
                     print(f"⚠️ Supabase upload failed, falling back to S3: {result['error']}")
-                    return self._upload_to_s3(image_data, storage_path)
+                    return self._upload_to_s3(image_data, storage_path, content_type)
             else:
                 # Try S3 first
-                result = self._upload_to_s3(image_data, storage_path)
+                result = self._upload_to_s3(image_data, storage_path, content_type)
                 if result['success']:
                     return result
                 else:
                     print(f"⚠️ S3 upload failed, falling back to Supabase: {result['error']}")
-                    return self._upload_to_supabase(image_data, storage_path)
+                    return self._upload_to_supabase(image_data, storage_path, content_type)
                     
         except Exception as e:
             return {
@@ -76,13 +81,13 @@ class StorageService:
                 'url': None
             }
     
-    def _upload_to_supabase(self, image_data: bytes, storage_path: str) -> Dict:
+    def _upload_to_supabase(self, image_data: bytes, storage_path: str, content_type: str = 'image/jpeg') -> Dict:
         """Upload image to Supabase Storage"""
         try:
             response = self.supabase.storage.from_(self.supabase_bucket).upload(
                 storage_path,
                 image_data,
-                file_options={'content-type': 'image/jpeg'}
+                file_options={'content-type': content_type}
             )
             
             # Handle Supabase response object (not dict)
@@ -125,14 +130,14 @@ class StorageService:
                 'url': None
             }
     
-    def _upload_to_s3(self, image_data: bytes, storage_path: str) -> Dict:
+    def _upload_to_s3(self, image_data: bytes, storage_path: str, content_type: str = 'image/jpeg') -> Dict:
         """Upload image to S3"""
         try:
             self.s3_client.put_object(
                 Bucket=self.s3_bucket,
                 Key=storage_path,
                 Body=image_data,
-                ContentType='image/jpeg'
+                ContentType=content_type
             )
             
             # Generate public URL
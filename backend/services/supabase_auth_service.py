@@ -8,6 +8,7 @@ from typing import Optional, Tuple
 import httpx
 
 from .supabase_client_factory import get_supabase_client
+from .principal_cache import principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -169,6 +170,8 @@ class SupabaseAuthService:
         """Update user in Supabase"""
         try:
             result = self.supabase.table('users').update(user_data).eq('id', user_id).execute()
+            # Profile/role/business changes must not be served from the principal cache
+            principal_cache.invalidate(user_id)
             if result.data:
                 return result.data[0]
             return None
@@ -2,12 +2,16 @@
 Utilities for creating Supabase clients with consistent settings.
 """
 
+import asyncio
 import os
+import weakref
 from functools import lru_cache
 from supabase import create_client, Client
 import logging
 import httpx
 
+from .tracing import supabase_event_hooks
+
 logger = logging.getLogger(__name__)
 
 # Configure timeout to prevent long hangs (default httpx timeout is 5s connect, but can hang longer on errors)
@@ -62,7 +66,8 @@ def get_supabase_client() -> Client:
 
     # Create httpx client with timeout configuration
     # The supabase-py library accepts a custom httpx client via SyncClientOptions
-    http_client = httpx.Client(timeout=SUPABASE_TIMEOUT)
+    # Event hooks record each request as a 'supabase' span when a query trace is active
+    http_client = httpx.Client(timeout=SUPABASE_TIMEOUT, event_hooks=supabase_event_hooks())
     
     try:
         # Import SyncClientOptions to properly configure the client
@@ -121,6 +126,93 @@ def get_supabase_client() -> Client:
         return client
 
 
+
+# Async clients are bound to the event loop that created their connection pool, so they
+# are cached per loop (in practice: the GraphRunner loop plus any ad-hoc asyncio.run()).
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_async_client_locks: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+SUPABASE_ASYNC_POOL_SIZE = int(os.environ.get('SUPABASE_ASYNC_POOL_SIZE', '20'))
+SUPABASE_ASYNC_KEEPALIVE = int(os.environ.get('SUPABASE_ASYNC_KEEPALIVE', str(SUPABASE_ASYNC_POOL_SIZE)))
+SUPABASE_HTTP2 = os.environ.get('SUPABASE_HTTP2', 'true').lower() == 'true'
+
+
+def _http2_available() -> bool:
+    import importlib.util
+    return importlib.util.find_spec('h2') is not None
+
+
+async def get_async_supabase_client():
+    """
+    Get (and cache per event loop) an async Supabase client for graph nodes and tools.
+
+    The client shares one httpx.AsyncClient with keep-alive connections (HTTP/2 when the
+    h2 package is installed and SUPABASE_HTTP2 is not disabled), so concurrent PostgREST
+    queries issued with asyncio.gather multiplex over a small pool instead of each blocking
+    a thread on its own request.
+
+    Pool size: SUPABASE_ASYNC_POOL_SIZE (max connections, default 20) and
+    SUPABASE_ASYNC_KEEPALIVE (idle keep-alive connections, defaults to the pool size).
+
+    Returns:
+        supabase AsyncClient configured with service role credentials and timeouts.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is not None:
+        return client
+
+    lock = _async_client_locks.get(loop)
+    if lock is None:
+        lock = asyncio.Lock()
+        _async_client_locks[loop] = lock
+
+    async with lock:
+        client = _async_clients.get(loop)
+        if client is not None:
+            return client
+
+        from supabase import acreate_client
+
+        supabase_url = os.environ["SUPABASE_URL"]
+        supabase_key = os.environ["SUPABASE_SERVICE_KEY"]
+
+        use_http2 = SUPABASE_HTTP2 and _http2_available()
+        if SUPABASE_HTTP2 and not use_http2:
+            logger.info("SUPABASE_HTTP2 enabled but 'h2' is not installed; async Supabase client using HTTP/1.1")
+
+        http_client = httpx.AsyncClient(
+            timeout=SUPABASE_TIMEOUT,
+            http2=use_http2,
+            event_hooks=supabase_event_hooks(is_async=True),
+            limits=httpx.Limits(
+                max_connections=SUPABASE_ASYNC_POOL_SIZE,
+                max_keepalive_connections=SUPABASE_ASYNC_KEEPALIVE,
+            ),
+        )
+
+        try:
+            from supabase.lib.client_options import AsyncClientOptions
+
+            options = AsyncClientOptions(
+                httpx_client=http_client,
+                postgrest_client_timeout=20.0,
+                storage_client_timeout=10.0,
+                function_client_timeout=10.0
+            )
+            client = await acreate_client(supabase_url, supabase_key, options=options)
+        except (ImportError, TypeError, ValueError) as e:
+            logger.warning(f"Could not configure custom async httpx client: {e}. Using default async client.")
+            await http_client.aclose()
+            client = await acreate_client(supabase_url, supabase_key)
+
+        _async_clients[loop] = client
+        logger.info(
+            f"Created async Supabase client (pool={SUPABASE_ASYNC_POOL_SIZE}, "
+            f"http2={'on' if use_http2 else 'off'})"
+        )
+        return client
+
 def get_supabase_db_url() -> str:
     """
     Get Supabase PostgreSQL connection string for direct database access.
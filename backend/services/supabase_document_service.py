@@ -2,6 +2,7 @@ import logging
 from datetime import datetime
 
 from .supabase_client_factory import get_supabase_client
+from .document_catalog import document_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +59,7 @@ class SupabaseDocumentService:
         """Update document in Supabase"""
         try:
             result = self.supabase.table('documents').update(document_data).eq('id', document_id).execute()
+            document_catalog.invalidate(document_id)
             if result.data:
                 return result.data[0]
             return None
@@ -69,6 +71,7 @@ class SupabaseDocumentService:
         """Delete document from Supabase"""
         try:
             result = self.supabase.table('documents').delete().eq('id', document_id).execute()
+            document_catalog.invalidate(document_id)
             return True
         except Exception as e:
             logger.error(f"Error deleting document from Supabase: {e}")
@@ -93,6 +96,7 @@ class SupabaseDocumentService:
                 update_data.update(additional_data)
             
             result = self.supabase.table('documents').update(update_data).eq('id', document_id).execute()
+            document_catalog.invalidate(document_id)
             return True
         except Exception as e:
             logger.error(f"Error updating document status in Supabase: {e}")
@@ -0,0 +1,185 @@
+"""
+Temp Token Store - short-lived token -> payload mapping shared across workers
+
+Backs one-time preview links (/api/documents/open-in-word) and quick-extract temp files.
+Office Online retries and follow-up requests can land on any gunicorn worker or instance,
+so the default backend is Redis; an in-process backend is used when Redis is unavailable
+(single-worker dev setups).
+
+Both backends give O(1) lookups and evict entries on TTL: Redis natively, the in-process
+backend via an expiry heap swept on every write.
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+
+
+class TempTokenStore:
+    """Interface for token stores. Values are JSON-serializable dicts."""
+
+    backend_name = 'base'
+
+    def set(self, token: str, value: Dict[str, Any], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> bool:
+        raise NotImplementedError
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def delete(self, token: str) -> bool:
+        raise NotImplementedError
+
+
+class InMemoryTokenStore(TempTokenStore):
+    """
+    Process-local store. Expired entries are swept from a min-heap of expiry times on each
+    write (amortized O(log n)), so the dict cannot grow without bound even if tokens are
+    never read again.
+    """
+
+    backend_name = 'memory'
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float) -> None:
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, token = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(token)
+            # Only drop if the entry wasn't re-set with a later expiry
+            if entry is not None and entry[0] <= now:
+                del self._entries[token]
+
+    def set(self, token: str, value: Dict[str, Any], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> bool:
+        now = time.time()
+        expires_at = now + ttl_seconds
+        with self._lock:
+            self._sweep(now)
+            self._entries[token] = (expires_at, value)
+            heapq.heappush(self._expiry_heap, (expires_at, token))
+        return True
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[token]
+                return None
+            return entry[1]
+
+    def delete(self, token: str) -> bool:
+        with self._lock:
+            return self._entries.pop(token, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisTokenStore(TempTokenStore):
+    """Redis-backed store shared by all API workers and instances (SET ... EX ttl)."""
+
+    backend_name = 'redis'
+
+    def __init__(self, namespace: str, client, fallback: Optional[InMemoryTokenStore] = None):
+        self.namespace = namespace
+        self.redis = client
+        # In-process store that served this namespace while Redis was unreachable
+        self.fallback = fallback
+
+    def _key(self, token: str) -> str:
+        return f"temp_token:{self.namespace}:{token}"
+
+    def set(self, token: str, value: Dict[str, Any], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> bool:
+        try:
+            self.redis.set(self._key(token), json.dumps(value), ex=int(ttl_seconds))
+            return True
+        except Exception as e:
+            logger.warning(f"RedisTokenStore.set failed ({self.namespace}): {e}")
+            return False
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.redis.get(self._key(token))
+        except Exception as e:
+            logger.warning(f"RedisTokenStore.get failed ({self.namespace}): {e}")
+            raw = None
+        if raw is None:
+            return self.fallback.get(token) if self.fallback is not None else None
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+
+    def delete(self, token: str) -> bool:
+        if self.fallback is not None and self.fallback.delete(token):
+            return True
+        try:
+            return bool(self.redis.delete(self._key(token)))
+        except Exception as e:
+            logger.warning(f"RedisTokenStore.delete failed ({self.namespace}): {e}")
+            return False
+
+
+_stores: Dict[str, TempTokenStore] = {}
+_stores_lock = threading.Lock()
+# Namespaces on the in-process store only because Redis was unreachable
+_fallbacks: Dict[str, InMemoryTokenStore] = {}
+
+
+def _get_redis_client():
+    return get_redis_client(os.environ.get('TEMP_TOKEN_REDIS_URL'), socket_timeout=2)
+
+
+def get_token_store(namespace: str) -> TempTokenStore:
+    """
+    Get the shared token store for a namespace (e.g. 'preview', 'quick_extract').
+
+    Backend selection via TEMP_TOKEN_STORE:
+    - 'redis': Redis (falls back to memory with a warning if unreachable)
+    - 'memory': in-process only
+    - unset: Redis when REDIS_URL is reachable, otherwise memory
+
+    A namespace that fell back to memory switches to Redis once it is reachable again
+    (retried after the shared client's backoff); tokens issued in-process meanwhile are
+    still found by get().
+    """
+    store = _stores.get(namespace)
+    if store is not None and (namespace not in _fallbacks or _get_redis_client() is None):
+        return store
+
+    with _stores_lock:
+        store = _stores.get(namespace)
+        if store is not None and namespace not in _fallbacks:
+            return store
+
+        backend = os.environ.get('TEMP_TOKEN_STORE', '').lower()
+        client = None if backend == 'memory' else _get_redis_client()
+        if client is not None:
+            store = RedisTokenStore(namespace, client, fallback=_fallbacks.pop(namespace, None))
+        elif store is not None:
+            return store
+        else:
+            store = InMemoryTokenStore(namespace)
+            if backend != 'memory':
+                _fallbacks[namespace] = store
+            if backend == 'redis':
+                logger.warning(f"TEMP_TOKEN_STORE=redis but Redis is unavailable; '{namespace}' tokens are per-process")
+
+        _stores[namespace] = store
+        logger.info(f"Temp token store '{namespace}' using {store.backend_name} backend")
+        return store
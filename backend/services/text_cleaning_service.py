@@ -7,15 +7,217 @@ Provides utilities to clean chunk text before embedding, removing:
 - OCR commentary
 - Boilerplate content
 - Formatting artifacts
+
+clean_chunk_text / clean_chunk_texts run a compiled engine: every pattern is compiled once
+at import, passes whose trigger characters are absent are skipped, literal substitutions
+use str.replace / str.translate, and the table step collapses to one whitespace pass. The
+step-by-step methods below are kept as the reference pipeline (clean_chunk_text_reference);
+tests/test_text_cleaning_golden.py verifies both produce identical output.
+
+clean_chunk_texts cleans a whole document in one call and can fan out across a process
+pool for large documents (TEXT_CLEANING_PROCESSES > 1, documents with at least
+TEXT_CLEANING_POOL_MIN_CHUNKS chunks; never from daemonic processes such as Celery prefork
+children).
 """
 
+import os
 import re
+import threading
 import unicodedata
-from typing import List, Optional, Dict, Any
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Dict, Any, FrozenSet, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+TEXT_CLEANING_PROCESSES = int(os.environ.get('TEXT_CLEANING_PROCESSES', '0'))
+TEXT_CLEANING_POOL_MIN_CHUNKS = int(os.environ.get('TEXT_CLEANING_POOL_MIN_CHUNKS', '200'))
+
+# --- Compiled patterns (same expressions as the reference steps) ---
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_NAMED_ENTITY_RE = re.compile(r'&[a-zA-Z]+;')
+_NUMERIC_ENTITY_RE = re.compile(r'&#\d+;')
+_HEX_ENTITY_RE = re.compile(r'&#x[0-9a-fA-F]+;')
+_ENTITY_DECODES = (('&nbsp;', ' '), ('&amp;', '&'), ('&lt;', '<'), ('&gt;', '>'), ('&quot;', '"'))
+
+_MD_HEADER_RE = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+_MD_HEADER_TIGHT_RE = re.compile(r'^#{1,6}(?=\S)', re.MULTILINE)
+_MD_BULLET_RE = re.compile(r'^\s*[-*+]\s+', re.MULTILINE)
+_MD_NUMBERED_RE = re.compile(r'^\s*\d+\.\s+', re.MULTILINE)
+_MD_BOLD_STAR_RE = re.compile(r'\*\*([^*]+)\*\*')
+_MD_BOLD_UNDERSCORE_RE = re.compile(r'__([^_]+)__')
+_MD_ITALIC_STAR_RE = re.compile(r'(?<!\*)\*([^*\n]+?)\*(?!\*)')
+_MD_ITALIC_UNDERSCORE_RE = re.compile(r'(?<!_)_([^_\n]+?)_(?!_)')
+_MD_RULE_RE = re.compile(r'^[-*={3,}]+$', re.MULTILINE)
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+_MD_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^\)]+\)')
+_MD_INLINE_CODE_RE = re.compile(r'`([^`]+)`')
+_MD_FENCE_RE = re.compile(r'```[^`]*```', re.DOTALL)
+_MD_FENCE_LAZY_RE = re.compile(r'```.*?```', re.DOTALL)
+_MD_QUOTE_RE = re.compile(r'^>\s+', re.MULTILINE)
+_MD_STRIKE_RE = re.compile(r'~~([^~]+)~~')
+
+_OCR_PATTERNS = (
+    r"Here's the information extracted from the image[^\n]*",
+    r"Key entities identified[^\n]*",
+    r"Information extracted from the image[^\n]*",
+    r"Image analysis[^\n]*",
+    r"OCR detected[^\n]*",
+    r"Text extracted from image[^\n]*",
+    r"Image content[^\n]*",
+)
+_OCR_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in _OCR_PATTERNS)
+# Every OCR pattern contains one of these literals, so no hint means no OCR pass can match
+_OCR_HINT_RE = re.compile(r'image|key entities identified|ocr detected', re.IGNORECASE)
+
+_MULTI_NEWLINE_RE = re.compile(r'\n{3,}')
+_MULTI_SPACE_RE = re.compile(r' +')
+_ORPHAN_PUNCT_RE = re.compile(r'\n\s*([.,;:!?])')
+_BROKEN_SENTENCE_RE = re.compile(r'\.\n([A-Z])')
+_BROKEN_CLAUSE_RE = re.compile(r',\n([a-z])')
+
+_UNICODE_REPLACE_RE = re.compile('[\u2018\u2019\u201C\u201D\u2013\u2014\u00A0]')
+# Outputs contain none of the inputs, so one translate equals the sequential replaces
+_UNICODE_TABLE = str.maketrans({
+    '\u2018': "'", '\u2019': "'", '\u201C': '"', '\u201D': '"',
+    '\u2013': '-', '\u2014': '--', '\u00A0': ' ',
+})
+
+
+def _boilerplate_set(boilerplate_lines: Optional[List[Dict[str, Any]]]) -> FrozenSet[str]:
+    if not boilerplate_lines:
+        return frozenset()
+    return frozenset(bp['line'].strip() for bp in boilerplate_lines if bp.get('line'))
+
+
+def _strip_html_fast(text: str) -> str:
+    if '<' in text:
+        text = _HTML_TAG_RE.sub('', text)
+    if '&' in text:
+        text = _NAMED_ENTITY_RE.sub('', text)
+        text = _NUMERIC_ENTITY_RE.sub('', text)
+        text = _HEX_ENTITY_RE.sub('', text)
+        for entity, char in _ENTITY_DECODES:
+            text = text.replace(entity, char)
+    return text
+
+
+def _strip_markdown_fast(text: str) -> str:
+    if '#' in text:
+        text = _MD_HEADER_RE.sub('', text)
+        text = _MD_HEADER_TIGHT_RE.sub('', text)
+    if '-' in text or '*' in text or '+' in text:
+        text = _MD_BULLET_RE.sub('', text)
+    if '.' in text:
+        text = _MD_NUMBERED_RE.sub('', text)
+    if '**' in text:
+        text = _MD_BOLD_STAR_RE.sub(r'\1', text)
+    if '__' in text:
+        text = _MD_BOLD_UNDERSCORE_RE.sub(r'\1', text)
+    if '*' in text:
+        text = _MD_ITALIC_STAR_RE.sub(r'\1', text)
+    if '_' in text:
+        text = _MD_ITALIC_UNDERSCORE_RE.sub(r'\1', text)
+    text = _MD_RULE_RE.sub('', text)
+    if '](' in text:
+        text = _MD_LINK_RE.sub(r'\1', text)
+        text = _MD_IMAGE_RE.sub(r'\1', text)
+    if '`' in text:
+        text = _MD_INLINE_CODE_RE.sub(r'\1', text)
+        text = _MD_FENCE_RE.sub('', text)
+        text = _MD_FENCE_LAZY_RE.sub('', text)
+    if '>' in text:
+        text = _MD_QUOTE_RE.sub('', text)
+    if '~~' in text:
+        text = _MD_STRIKE_RE.sub(r'\1', text)
+    return text
+
+
+def _normalize_unicode_fast(text: str) -> str:
+    if text.isascii():
+        # ASCII is already NFC and contains none of the replaced characters
+        return text
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    if _UNICODE_REPLACE_RE.search(text):
+        text = text.translate(_UNICODE_TABLE)
+    return text
+
+
+def _has_ocr_hint(text: str) -> bool:
+    if text.isascii():
+        # For ASCII text, case-insensitive matching is exactly lower() equality
+        lowered = text.lower()
+        return 'image' in lowered or 'key entities identified' in lowered or 'ocr detected' in lowered
+    return _OCR_HINT_RE.search(text) is not None
+
+
+def _normalize_whitespace_fast(text: str) -> str:
+    if '\n' in text:
+        text = _MULTI_NEWLINE_RE.sub('\n\n', text)
+    if '  ' in text:
+        text = _MULTI_SPACE_RE.sub(' ', text)
+    if '\n' in text:
+        text = _ORPHAN_PUNCT_RE.sub(r'\1', text)
+        text = '\n'.join([line.rstrip() for line in text.split('\n')])
+    return text.strip()
+
+
+def _clean_fast(text: str, boilerplate_texts: FrozenSet[str]) -> str:
+    """Compiled equivalent of TextCleaningService.clean_chunk_text_reference."""
+    if not text:
+        return text
+
+    text = _strip_html_fast(text)
+    text = _strip_markdown_fast(text)
+    if _has_ocr_hint(text):
+        for pattern in _OCR_RES:
+            text = pattern.sub('', text)
+
+    # Table step: strip tags again, then re.sub(r'\s+', ' ') + strip. str.split() splits on the
+    # same whitespace class (str.isspace), so the result is one line of single spaces
+    text = _strip_html_fast(text)
+    text = ' '.join(text.split())
+
+    if boilerplate_texts and text:
+        if '\n' not in text:
+            if text.strip() in boilerplate_texts:
+                text = ''
+        else:
+            text = '\n'.join([line for line in text.split('\n') if line.strip() not in boilerplate_texts])
+
+    # normalize_unicode, normalize_whitespace, then normalize_sentences (which repeats both)
+    for _ in range(2):
+        if not text:
+            return text
+        text = _normalize_unicode_fast(text)
+        text = _normalize_whitespace_fast(text)
+    if '\n' in text:
+        text = _BROKEN_SENTENCE_RE.sub(r'. \1', text)
+        text = _BROKEN_CLAUSE_RE.sub(r', \1', text)
+    return text.strip()
+
+
+def _clean_slice(args: Tuple[List[str], FrozenSet[str]]) -> List[str]:
+    texts, boilerplate_texts = args
+    return [_clean_fast(text, boilerplate_texts) for text in texts]
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared cleaning pool, or None when disabled or when this process can't fork workers."""
+    global _process_pool
+    if TEXT_CLEANING_PROCESSES <= 1 or multiprocessing.current_process().daemon:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=TEXT_CLEANING_PROCESSES)
+        return _process_pool
+
 
 class TextCleaningService:
     """Service for cleaning text chunks before embedding."""
@@ -303,6 +505,54 @@ class TextCleaningService:
         Master cleaning function: applies all cleaning steps in order.
         
         This is the ONLY function that should be used to clean text before embedding.
+        Output is identical to clean_chunk_text_reference.
+        
+        Args:
+            text: Raw chunk text to clean
+            boilerplate_lines: Optional list of boilerplate lines to remove
+            
+        Returns:
+            Clean, semantic text ready for embedding
+        """
+        if not text:
+            return text
+        return _clean_fast(text, _boilerplate_set(boilerplate_lines))
+    
+    def clean_chunk_texts(
+        self,
+        texts: List[str],
+        boilerplate_lines: Optional[List[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """
+        Clean all chunks of a document in one call (same output as clean_chunk_text per chunk).
+        
+        Large documents are split across the shared process pool when it is enabled.
+        
+        Args:
+            texts: Raw chunk texts
+            boilerplate_lines: Optional list of boilerplate lines to remove
+            
+        Returns:
+            Cleaned texts, in input order
+        """
+        boilerplate_texts = _boilerplate_set(boilerplate_lines)
+        pool = _get_process_pool() if len(texts) >= TEXT_CLEANING_POOL_MIN_CHUNKS else None
+        if pool is not None:
+            slice_size = -(-len(texts) // TEXT_CLEANING_PROCESSES)
+            slices = [(texts[i:i + slice_size], boilerplate_texts) for i in range(0, len(texts), slice_size)]
+            try:
+                return [cleaned for part in pool.map(_clean_slice, slices) for cleaned in part]
+            except Exception as e:
+                logger.warning(f"Text cleaning pool failed, cleaning in-process: {e}")
+        return _clean_slice((texts, boilerplate_texts))
+    
+    def clean_chunk_text_reference(
+        self,
+        text: str,
+        boilerplate_lines: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """
+        Step-by-step cleaning pipeline (reference for the compiled engine).
         
         Args:
             text: Raw chunk text to clean
@@ -0,0 +1,597 @@
+"""
+Per-query latency tracing - one span tree per LLM query
+
+A trace is started by the query endpoints (request id from the X-Request-ID header or a
+generated one, plus the id of the user who sent the query) and carried in a context variable, so every span opened underneath it -
+graph nodes, executor tools, Voyage/OpenAI embeddings, LLM calls, Cohere rerank and each
+Supabase HTTP request - attaches to the right query without passing ids around.
+
+Propagation:
+- asyncio tasks copy the context when created, so LangGraph nodes and asyncio.gather
+  children inherit the trace automatically
+- threads do not: the query endpoints and GraphRunner call attach(trace) at the start of
+  the coroutine or thread that runs the graph, and run_sync_tool copies the context into
+  the tool pool
+
+Finished traces are sampled (TRACE_SAMPLE_RATE; traces slower than TRACE_ALWAYS_KEEP_MS
+are always kept) into an in-process ring of TRACE_RING_SIZE entries, keyed on
+(user_id, request_id) so a client-chosen request id can only ever address its own traces.
+Kept traces are handed to one background exporter thread (bounded queue of
+TRACE_EXPORT_QUEUE_SIZE; overflow is dropped and counted) for the optional sinks:
+- Redis (TRACE_REDIS_URL/REDIS_URL), so /api/llm/trace/<request_id> works on any worker
+- JSONL file (TRACE_EXPORT_FILE)
+- OTLP/HTTP JSON collector (TRACE_OTLP_ENDPOINT, e.g. http://localhost:4318)
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'true').lower() == 'true'
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.1'))
+TRACE_ALWAYS_KEEP_MS = float(os.environ.get('TRACE_ALWAYS_KEEP_MS', '5000'))
+TRACE_RING_SIZE = int(os.environ.get('TRACE_RING_SIZE', '200'))
+TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS', '2000'))
+TRACE_REDIS_TTL_SECONDS = int(os.environ.get('TRACE_REDIS_TTL_SECONDS', '3600'))
+TRACE_EXPORT_FILE = os.environ.get('TRACE_EXPORT_FILE')
+TRACE_OTLP_ENDPOINT = os.environ.get('TRACE_OTLP_ENDPOINT')
+TRACE_EXPORT_QUEUE_SIZE = int(os.environ.get('TRACE_EXPORT_QUEUE_SIZE', '1000'))
+
+_current_trace: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('current_trace', default=None)
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ('span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes (rows, bytes, model, tokens, ...)."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.time()) - self.start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start': self.start,
+            'duration_ms': round(self.duration_ms, 2),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class Trace:
+    """Span collection for one query."""
+
+    def __init__(self, request_id: str, name: str, attributes: Dict[str, Any], user_id: Optional[str] = None):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(name, 'request', None, attributes)
+        self.spans: List[Span] = [self.root]
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> bool:
+        with self._lock:
+            if len(self.spans) >= TRACE_MAX_SPANS:
+                self.dropped_spans += 1
+                return False
+            self.spans.append(span)
+            return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {
+            'request_id': self.request_id,
+            'trace_id': self.trace_id,
+            'user_id': self.user_id,
+            'name': self.root.name,
+            'started_at': self.root.start,
+            'duration_ms': round(self.root.duration_ms, 2),
+            'attributes': self.root.attributes,
+            'dropped_spans': self.dropped_spans,
+            'spans': spans,
+        }
+
+
+def build_span_tree(trace: Dict[str, Any]) -> Dict[str, Any]:
+    """Nest a serialized trace's flat span list under the root span (children by start time)."""
+    nodes = {span['span_id']: {**span, 'children': []} for span in trace.get('spans') or []}
+    root = None
+    for node in sorted(nodes.values(), key=lambda s: s['start']):
+        parent = nodes.get(node['parent_id']) if node['parent_id'] else None
+        if parent is not None:
+            parent['children'].append(node)
+        elif root is None:
+            root = node
+    return root or {}
+
+
+def stage_breakdown(trace: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Total time and call count per span kind (node, tool, voyage, openai, llm, cohere, supabase)."""
+    totals: Dict[str, Dict[str, float]] = {}
+    for span in trace.get('spans') or []:
+        if span['kind'] == 'request':
+            continue
+        entry = totals.setdefault(span['kind'], {'count': 0, 'total_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] = round(entry['total_ms'] + span['duration_ms'], 2)
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Context API
+# ---------------------------------------------------------------------------
+
+def start_trace(request_id: Optional[str], name: str, user_id: Optional[Any] = None,
+                **attributes: Any) -> Optional[Trace]:
+    """
+    Create a trace for one query; returns None when tracing is disabled.
+
+    user_id is the owner: the stored trace is keyed on (user_id, request_id) and only that
+    user can read it back through TraceStore.get.
+
+    The trace is not made current here: call attach() inside the task or thread that runs
+    the query, so it never lingers in a reused request-handler thread.
+    """
+    if not TRACING_ENABLED:
+        return None
+    return Trace(request_id or uuid.uuid4().hex, name, attributes,
+                 user_id=str(user_id) if user_id is not None else None)
+
+
+def attach(trace: Optional[Trace]) -> None:
+    """Make a trace current in this context (use at the start of work run on another thread)."""
+    if trace is None:
+        return
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+def finish_trace(trace: Optional[Trace], error: Optional[str] = None) -> None:
+    """Close the root span and hand the trace to the store (sampling applies there)."""
+    if trace is None or trace.root.end is not None:
+        return
+    trace.root.end = time.time()
+    trace.root.error = error
+    trace_store.record(trace)
+
+
+@contextmanager
+def span(name: str, kind: str = 'internal', **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Time a block as a child of the current span. Yields None (and records nothing) when no
+    trace is active, so call sites don't need to check.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, kind, parent.span_id if parent else trace.root.span_id, attributes)
+    if not trace.add(current):
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        current.end = time.time()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Exited from a different context (e.g. generator closed by another task)
+            _current_span.set(parent)
+
+
+def record_span(name: str, kind: str, start: float, end: float, error: Optional[str] = None,
+                **attributes: Any) -> None:
+    """Record an already-finished operation (wall-clock start/end) under the current span."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    finished = Span(name, kind, parent.span_id if parent else trace.root.span_id, attributes)
+    finished.start = start
+    finished.end = end
+    finished.error = error
+    trace.add(finished)
+
+
+def traced(name: str, kind: str = 'internal'):
+    """Decorator form of span() for sync and async functions."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Storage and export
+# ---------------------------------------------------------------------------
+
+
+def _get_redis_client():
+    return get_redis_client(os.environ.get('TRACE_REDIS_URL'), socket_timeout=2)
+
+
+def _store_key(user_id: Optional[str], request_id: str) -> str:
+    return f"{user_id}:{request_id}"
+
+
+class TraceStore:
+    """Bounded ring of sampled traces plus optional Redis/file/OTLP export."""
+
+    def __init__(self, capacity: int = TRACE_RING_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stats = {'finished': 0, 'kept': 0, 'export_errors': 0, 'export_dropped': 0}
+        self._export_lock = threading.Lock()
+        self._export_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=TRACE_EXPORT_QUEUE_SIZE)
+        self._exporter_pid: Optional[int] = None
+
+    def record(self, trace: Trace) -> None:
+        keep = (
+            trace.root.duration_ms >= TRACE_ALWAYS_KEEP_MS
+            or trace.root.error is not None
+            or random.random() < TRACE_SAMPLE_RATE
+        )
+        with self._lock:
+            self._stats['finished'] += 1
+            if not keep:
+                return
+            self._stats['kept'] += 1
+        data = trace.to_dict()
+        key = _store_key(trace.user_id, trace.request_id)
+        with self._lock:
+            self._traces[key] = data
+            self._traces.move_to_end(key)
+            while len(self._traces) > self.capacity:
+                self._traces.popitem(last=False)
+        if _get_redis_client() is not None or TRACE_EXPORT_FILE or TRACE_OTLP_ENDPOINT:
+            # Export off the request path
+            self._ensure_exporter()
+            try:
+                self._export_queue.put_nowait(data)
+            except queue.Full:
+                with self._lock:
+                    self._stats['export_dropped'] += 1
+
+    def get(self, request_id: str, user_id: Optional[Any]) -> Optional[Dict[str, Any]]:
+        """The trace for request_id if it belongs to user_id (None for a missing owner)."""
+        if user_id is None:
+            return None
+        key = _store_key(str(user_id), request_id)
+        with self._lock:
+            data = self._traces.get(key)
+        if data is None:
+            client = _get_redis_client()
+            if client is None:
+                return None
+            try:
+                raw = client.get(f"trace:{key}")
+                data = json.loads(raw) if raw else None
+            except Exception as e:
+                logger.warning(f"TraceStore.get failed for {request_id}: {e}")
+                return None
+        if data is None or data.get('user_id') != str(user_id):
+            return None
+        return data
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Summaries of the most recent local traces, newest first."""
+        with self._lock:
+            traces = list(self._traces.values())[-limit:]
+        return [
+            {'request_id': t['request_id'], 'name': t['name'], 'started_at': t['started_at'],
+             'duration_ms': t['duration_ms'], 'spans': len(t['spans'])}
+            for t in reversed(traces)
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['stored'] = len(self._traces)
+        stats['sample_rate'] = TRACE_SAMPLE_RATE
+        return stats
+
+    def _ensure_exporter(self) -> None:
+        # Re-checked per pid so forked workers (gunicorn preload, Celery prefork) start their own
+        if self._exporter_pid == os.getpid():
+            return
+        with self._lock:
+            if self._exporter_pid == os.getpid():
+                return
+            self._exporter_pid = os.getpid()
+            self._export_queue = queue.Queue(maxsize=TRACE_EXPORT_QUEUE_SIZE)
+        thread = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+        thread.start()
+
+    def _export_loop(self) -> None:
+        pid = os.getpid()
+        while self._exporter_pid == pid:
+            data = self._export_queue.get()
+            self._export(data)
+
+    def _export(self, data: Dict[str, Any]) -> None:
+        try:
+            client = _get_redis_client()
+            if client is not None:
+                key = _store_key(data.get('user_id'), data['request_id'])
+                client.set(f"trace:{key}", json.dumps(data, default=str), ex=TRACE_REDIS_TTL_SECONDS)
+            if TRACE_EXPORT_FILE:
+                line = json.dumps(data, default=str)
+                with self._export_lock:
+                    with open(TRACE_EXPORT_FILE, 'a') as f:
+                        f.write(line + '\n')
+            if TRACE_OTLP_ENDPOINT:
+                import requests
+                requests.post(
+                    TRACE_OTLP_ENDPOINT.rstrip('/') + '/v1/traces',
+                    json=_to_otlp(data),
+                    timeout=5,
+                )
+        except Exception as e:
+            with self._lock:
+                self._stats['export_errors'] += 1
+            logger.warning(f"Trace export failed for {data.get('request_id')}: {e}")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _to_otlp(data: Dict[str, Any]) -> Dict[str, Any]:
+    """OTLP/HTTP JSON payload for one trace."""
+    spans = []
+    for s in data['spans']:
+        start_ns = int(s['start'] * 1e9)
+        attributes = [{'key': 'span.kind', 'value': {'stringValue': s['kind']}}]
+        attributes += [{'key': k, 'value': _otlp_value(v)} for k, v in (s.get('attributes') or {}).items() if v is not None]
+        otlp_span = {
+            'traceId': data['trace_id'],
+            'spanId': s['span_id'],
+            'name': s['name'],
+            'kind': 1,
+            'startTimeUnixNano': str(start_ns),
+            'endTimeUnixNano': str(start_ns + int(s['duration_ms'] * 1e6)),
+            'attributes': attributes,
+            'status': {'code': 2, 'message': s['error']} if s.get('error') else {'code': 1},
+        }
+        if s.get('parent_id'):
+            otlp_span['parentSpanId'] = s['parent_id']
+        spans.append(otlp_span)
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': os.environ.get('OTEL_SERVICE_NAME', 'solosway-backend')}},
+            ]},
+            'scopeSpans': [{'scope': {'name': 'backend.services.tracing'}, 'spans': spans}],
+        }]
+    }
+
+
+# ---------------------------------------------------------------------------
+# Integrations
+# ---------------------------------------------------------------------------
+
+def traced_node(name: str, func):
+    """Wrap a LangGraph node so each invocation is a 'node' span."""
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_node(*args, **kwargs):
+            with span(name, 'node'):
+                return await func(*args, **kwargs)
+        return async_node
+
+    @wraps(func)
+    def node(*args, **kwargs):
+        with span(name, 'node'):
+            return func(*args, **kwargs)
+    return node
+
+
+def _supabase_span_name(request) -> str:
+    path = request.url.path
+    for prefix in ('/rest/v1', '/storage/v1', '/functions/v1'):
+        if path.startswith(prefix):
+            path = path[len(prefix):] or '/'
+            break
+    return f"supabase {request.method} {path}"
+
+
+def _rows_from_content_range(value: Optional[str]) -> Optional[int]:
+    # PostgREST: "0-24/*" or "0-24/120"; "*/0" for empty results
+    if not value:
+        return None
+    span_part = value.split('/')[0]
+    if '-' not in span_part:
+        return 0
+    try:
+        first, last = span_part.split('-')
+        return int(last) - int(first) + 1
+    except ValueError:
+        return None
+
+
+def _record_http_span(response) -> None:
+    request = response.request
+    started = request.extensions.get('trace_start')
+    if started is None:
+        return
+    content_length = response.headers.get('content-length')
+    record_span(
+        _supabase_span_name(request),
+        'supabase',
+        started,
+        time.time(),
+        error=f"HTTP {response.status_code}" if response.status_code >= 400 else None,
+        status=response.status_code,
+        rows=_rows_from_content_range(response.headers.get('content-range')),
+        response_bytes=int(content_length) if content_length and content_length.isdigit() else None,
+        request_bytes=len(request.content) if request.content else 0,
+    )
+
+
+def _mark_request_start(request) -> None:
+    if _current_trace.get() is not None:
+        request.extensions['trace_start'] = time.time()
+
+
+async def _amark_request_start(request) -> None:
+    _mark_request_start(request)
+
+
+async def _arecord_http_span(response) -> None:
+    _record_http_span(response)
+
+
+def supabase_event_hooks(is_async: bool = False) -> Dict[str, list]:
+    """httpx event hooks that record one 'supabase' span per PostgREST/storage request."""
+    if is_async:
+        return {'request': [_amark_request_start], 'response': [_arecord_http_span]}
+    return {'request': [_mark_request_start], 'response': [_record_http_span]}
+
+
+_llm_handler = None
+
+
+def llm_trace_callbacks() -> List[Any]:
+    """LangChain callback handlers that record each chat-model call as an 'llm' span."""
+    global _llm_handler
+    if _llm_handler is None:
+        try:
+            _llm_handler = _build_llm_handler()
+        except ImportError:
+            return []
+    return [_llm_handler]
+
+
+def _build_llm_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMTraceHandler(BaseCallbackHandler):
+        """Times chat-model calls; runs inline so it sees the caller's trace context."""
+
+        run_inline = True
+
+        def __init__(self):
+            self._open: Dict[Any, Dict[str, Any]] = {}
+            self._lock = threading.Lock()
+
+        def _start(self, run_id, serialized, kwargs) -> None:
+            trace = _current_trace.get()
+            if trace is None:
+                return
+            params = kwargs.get('invocation_params') or {}
+            class_path = ' '.join((serialized or {}).get('id') or []).lower()
+            provider = next((p for p in ('openai', 'anthropic') if p in class_path), 'llm')
+            parent = _current_span.get()
+            with self._lock:
+                self._open[run_id] = {
+                    'trace': trace,
+                    'parent_id': parent.span_id if parent else trace.root.span_id,
+                    'start': time.time(),
+                    'model': params.get('model') or params.get('model_name') or (serialized or {}).get('name'),
+                    'provider': provider,
+                }
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(run_id, serialized, kwargs)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(run_id, serialized, kwargs)
+
+        def _finish(self, run_id, error: Optional[str], usage: Dict[str, Any]) -> None:
+            with self._lock:
+                entry = self._open.pop(run_id, None)
+            if entry is None:
+                return
+            model = entry['model'] or 'unknown'
+            finished = Span(f"{entry['provider']}.chat {model}", 'llm', entry['parent_id'], {'model': model, **usage})
+            finished.start = entry['start']
+            finished.end = time.time()
+            finished.error = error
+            entry['trace'].add(finished)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            usage = {}
+            token_usage = (getattr(response, 'llm_output', None) or {}).get('token_usage') or {}
+            if token_usage:
+                usage = {
+                    'prompt_tokens': token_usage.get('prompt_tokens'),
+                    'completion_tokens': token_usage.get('completion_tokens'),
+                }
+            self._finish(run_id, None, usage)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id, f"{type(error).__name__}: {error}"[:300], {})
+
+    return LLMTraceHandler()
+
+
+# Global instance (singleton pattern)
+trace_store = TraceStore()
@@ -277,6 +277,11 @@ class UnifiedDeletionService:
             # Delete records
             self.supabase.table('document_vectors').delete().eq('document_id', document_id).execute()
             logger.info(f"✅ document_vectors: Deleted {count} records for {document_id}")
+            try:
+                from .ann_index import ann_index
+                ann_index.on_document_vectors_deleted(document_id)
+            except Exception as index_error:
+                logger.warning(f"⚠️ document_vectors: Failed to refresh ANN index for {document_id}: {index_error}")
             return True, None
             
         except Exception as e:
@@ -393,6 +398,13 @@ class UnifiedDeletionService:
             # Note: business_id in documents table is VARCHAR, not UUID
             self.supabase.table('documents').delete().eq('id', document_id).execute()
             logger.info(f"✅ documents: Deleted record {document_id}")
+            try:
+                from .ann_index import ann_index
+                from .document_catalog import document_catalog
+                ann_index.on_document_deleted(document_id)
+                document_catalog.invalidate(document_id)
+            except Exception as cache_error:
+                logger.warning(f"⚠️ documents: Failed to drop {document_id} from retrieval caches: {cache_error}")
             return True, None
             
         except Exception as e:
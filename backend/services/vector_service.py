@@ -14,6 +14,8 @@ import asyncio
 
 from .supabase_client_factory import get_supabase_client
 from .text_cleaning_service import TextCleaningService
+from .performance_service import track_db_query
+from .embedding_quantization import quantized_columns
 from .chunk_quality_service import ChunkQualityService
 from .chunk_validation_service import ChunkValidationService
 from .section_header_extractor import (
@@ -425,6 +427,29 @@ class SupabaseVectorService:
             boilerplate_lines=boilerplate_lines
         )
     
+    def clean_chunk_texts(
+        self,
+        chunk_texts: List[str],
+        boilerplate_lines: Optional[List[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """
+        Clean all chunks of a document in one batch (same output as clean_chunk_text per chunk).
+        
+        Args:
+            chunk_texts: Raw chunk texts to clean
+            boilerplate_lines: Optional list of boilerplate lines to remove
+            
+        Returns:
+            Clean texts ready for embedding, in input order
+        """
+        if not hasattr(self, '_text_cleaning_service'):
+            self._text_cleaning_service = TextCleaningService()
+        
+        return self._text_cleaning_service.clean_chunk_texts(
+            chunk_texts,
+            boilerplate_lines=boilerplate_lines
+        )
+    
     def generate_chunk_context(self, chunk: str, document_metadata: Dict[str, Any]) -> str:
         """
         Generate contextual explanation for a chunk using Claude (Contextual Retrieval).
@@ -800,6 +825,10 @@ class SupabaseVectorService:
                 .eq('document_id', document_id)\
                 .execute()
             
+            # Chunks are being replaced wholesale, so the running mean starts over
+            from .document_embedding_maintainer import DocumentEmbeddingMaintainer
+            DocumentEmbeddingMaintainer(supabase=self.supabase).reset(document_id)
+            
             logger.info(f"Deleted document vectors for document {document_id}")
             return True
             
@@ -807,6 +836,7 @@ class SupabaseVectorService:
             logger.error(f"Error deleting document vectors: {e}")
             return False
     
+    @track_db_query('store_document_vectors')
     def store_document_vectors(
         self, 
         document_id: str, 
@@ -1064,14 +1094,11 @@ class SupabaseVectorService:
             # This ensures embeddings contain ONLY semantic content, not formatting noise
             boilerplate_lines = metadata.get('boilerplate_lines')
             
-            cleaned_chunks = []
-            for chunk in contextualized_chunks:
-                # Clean the raw chunk text (removes HTML, markdown, OCR, boilerplate)
-                cleaned = self.clean_chunk_text(
-                    chunk,  # Raw chunk text from Reducto
-                    boilerplate_lines=boilerplate_lines
-                )
-                cleaned_chunks.append(cleaned)
+            # Whole document in one call (compiled patterns, optional process pool for large docs)
+            cleaned_chunks = self.clean_chunk_texts(
+                contextualized_chunks,  # Raw chunk texts from Reducto
+                boilerplate_lines=boilerplate_lines
+            )
             
             logger.debug(f"Cleaned {len(cleaned_chunks)} raw chunks (removed HTML, Markdown, OCR artifacts)")
             
@@ -1460,7 +1487,8 @@ class SupabaseVectorService:
                     'embedding_error': embedding_error,  # NEW: Error message if embedding failed
                     'embedding_model': self.embedding_model if not lazy_embedding else None,  # NEW: Model used
                     'metadata': chunk_metadata_jsonb if chunk_metadata_jsonb else None,  # NEW: Section header metadata (JSONB)
-                    'created_at': datetime.utcnow().isoformat()
+                    'created_at': datetime.utcnow().isoformat(),
+                    **quantized_columns(embedding)  # int8 codes when QUANTIZED_EMBEDDINGS_ENABLED
                 }
                 records.append(record)
             
@@ -1480,6 +1508,12 @@ class SupabaseVectorService:
             
             if result.data:
                 logger.info(f"✅ Stored {len(records)} document vectors (bbox: {bbox_count}, page: {page_count}, both: {both_count})")
+                # Keep local ANN indexes in step (lazy chunks join when they are embedded; non-fatal)
+                try:
+                    from .ann_index import ann_index
+                    ann_index.on_document_vectors_stored(business_uuid, document_id, records)
+                except Exception as index_error:
+                    logger.warning(f"⚠️ Failed to refresh ANN index for {document_id}: {index_error}")
                 return True
             else:
                 logger.error(f"Failed to store document vectors: {result}")
@@ -1746,7 +1780,14 @@ class SupabaseVectorService:
             result = self.supabase.table(self.document_vectors_table).delete().eq('document_id', document_id).execute()
             
             if result.data is not None:
-                # Vectors deleted for document
+                # Vectors deleted for document; the running mean starts over
+                from .document_embedding_maintainer import DocumentEmbeddingMaintainer
+                DocumentEmbeddingMaintainer(supabase=self.supabase).reset(document_id)
+                try:
+                    from .ann_index import ann_index
+                    ann_index.on_document_vectors_deleted(document_id)
+                except Exception as index_error:
+                    logger.warning(f"⚠️ Failed to refresh ANN index for {document_id}: {index_error}")
                 return True
             else:
                 logger.error(f"Failed to delete vectors for document {document_id}")
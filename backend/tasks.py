@@ -13,8 +13,6 @@ import tempfile
 import shutil
 import json
 from datetime import datetime
-from geopy.geocoders import Nominatim, GoogleV3
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import psycopg2
@@ -25,6 +23,8 @@ from uuid import UUID
 # Reducto imports
 from .services.reducto_service import ReductoService
 from .services.reducto_image_service import ReductoImageService
+from .services.performance_service import track_performance
+from .services.document_catalog import document_catalog
 from .services.extraction_schemas import SUBJECT_PROPERTY_EXTRACTION_SCHEMA
 
 logging.basicConfig(level=logging.INFO)
@@ -216,94 +216,56 @@ def extract_page_number_from_chunk(chunk: dict) -> Optional[int]:
 
 # Create enhanced geocoding function for addresses
 def geocode_address_parallel(addresses: list, max_workers: int = 3) -> list:
-    """Geocode multiple addresses in parallel for much faster processing"""
-    results = []
+    """
+    Geocode multiple addresses in parallel for much faster processing.
     
-    def geocode_single(address):
-        return geocode_address(address)
+    Addresses with the same normalized hash are resolved once; cached addresses (from any
+    document or tenant) return without a provider call, and provider rate limits are
+    enforced by the shared GeocodingService.
+    """
+    from .services.geocoding_service import geocoding_service
+    
+    results = []
+    by_key = {}
+    for address in addresses:
+        key = geocoding_service.address_key(address) if address and address.strip() else address
+        by_key.setdefault(key, []).append(address)
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all geocoding tasks
-        future_to_address = {executor.submit(geocode_single, addr): addr for addr in addresses}
+        # Submit one geocoding task per distinct address
+        future_to_key = {executor.submit(geocode_address, group[0]): key for key, group in by_key.items()}
         
         # Collect results as they complete
-        for future in as_completed(future_to_address):
-            address = future_to_address[future]
+        for future in as_completed(future_to_key):
+            group = by_key[future_to_key[future]]
             try:
                 result = future.result()
-                results.append((address, result))
             except Exception as e:
-                print(f"❌ Error geocoding {address}: {e}")
-                results.append((address, {"latitude": None, "longitude": None, "confidence": 0.0, "status": "error"}))
+                print(f"❌ Error geocoding {group[0]}: {e}")
+                result = {"latitude": None, "longitude": None, "confidence": 0.0, "status": "error"}
+            for address in group:
+                results.append((address, {**result, "original_address": address} if "original_address" in result else result))
     
     return results
 
 def geocode_address(address: str, max_retries: int = 2) -> dict:
-    """Enhanced geocoding function with address preprocessing and fallback strategies"""
+    """Enhanced geocoding function with address preprocessing and fallback strategies (cached)"""
     if not address or address.strip() == "":
         return {"latitude": None, "longitude": None, "confidence": 0.0, "status": "empty_address"}
     
-    # Clean and preprocess the address
-    cleaned_address = preprocess_address(address)
-    
-    # Try Google Geocoding API first (much faster and more accurate)
-    google_api_key = os.environ.get('GOOGLE_MAPS_API_KEY')
-    if google_api_key:
-        try:
-            geolocator = GoogleV3(api_key=google_api_key, timeout=5)
-            location = geolocator.geocode(cleaned_address, exactly_one=True, timeout=5)
-            
-            if location:
-                print(f"✅ Google geocoding successful for: '{cleaned_address}'")
-                return {
-                    "latitude": location.latitude,
-                    "longitude": location.longitude,
-                    "confidence": 0.9,  # Google is more accurate
-                    "status": "success",
-                    "geocoded_address": location.address,
-                    "original_address": address,
-                    "used_variation": cleaned_address
-                }
-        except Exception as e:
-            print(f"⚠️  Google geocoding failed: {e}, falling back to Nominatim")
-    
-    # Fallback to Nominatim (slower but free)
-    geolocator = Nominatim(user_agent="solosway_mvp", timeout=8)
-    
-    # Try multiple address variations for better success rate
-    address_variations = generate_address_variations(cleaned_address)
+    from .services.geocoding_service import geocoding_service
     
-    for variation in address_variations:
-        print(f"🔍 Trying geocoding with: '{variation}'")
-        
-        for attempt in range(max_retries):
-            try:
-                location = geolocator.geocode(variation, exactly_one=True, timeout=8)
-                
-                if location:
-                    print(f"✅ Geocoding successful for: '{variation}'")
-                    return {
-                        "latitude": location.latitude,
-                        "longitude": location.longitude,
-                        "confidence": 0.8,  # Nominatim doesn't provide confidence scores
-                        "status": "success",
-                        "geocoded_address": location.address,
-                        "original_address": address,
-                        "used_variation": variation
-                    }
-                    
-            except (GeocoderTimedOut, GeocoderUnavailable) as e:
-                logger.warning(f"Geocoding attempt {attempt + 1} failed for '{variation}': {e}")
-                if attempt == max_retries - 1:
-                    continue  # Try next variation
-                time.sleep(0.5)  # Shorter wait before retry
-            
-            except Exception as e:
-                logger.warning(f"Unexpected error geocoding '{variation}': {e}")
-                break  # Move to next variation
-        
-        # Rate limiting - shorter wait between address variations
-        time.sleep(0.3)
+    record = geocoding_service.resolve(address, max_retries=max_retries)
+    if record and record.get("status") == "success":
+        return {
+            "latitude": record["lat"],
+            "longitude": record["lng"],
+            "confidence": record.get("confidence", 0.0),
+            "status": "success",
+            "geocoded_address": record.get("formatted_address"),
+            "original_address": address,
+            "used_variation": record.get("used_variation")
+        }
     
     print(f"❌ All geocoding attempts failed for: '{address}'")
     return {
@@ -312,71 +274,9 @@ def geocode_address(address: str, max_retries: int = 2) -> dict:
         "confidence": 0.0,
         "status": "not_found",
         "original_address": address,
-        "tried_variations": len(address_variations)
+        "tried_variations": (record or {}).get("tried_variations", 0)
     }
 
-def preprocess_address(address: str) -> str:
-    """Clean and preprocess address for better geocoding results"""
-    if not address:
-        return ""
-    
-    # Remove common formatting issues
-    cleaned = address.strip()
-    
-    # Remove bracketed content that might confuse geocoding
-    import re
-    cleaned = re.sub(r'\[.*?\]', '', cleaned)
-    cleaned = re.sub(r'\(.*?\)', '', cleaned)
-    
-    # Clean up extra whitespace and commas
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-    cleaned = re.sub(r',\s*,', ',', cleaned)
-    cleaned = cleaned.strip(', ')
-    
-    return cleaned
-
-def generate_address_variations(address: str) -> list:
-    """Generate multiple address variations to improve geocoding success"""
-    variations = [address]  # Start with original
-    
-    # Extract postcode for UK addresses
-    import re
-    postcode_match = re.search(r'([A-Z]{1,2}\d{1,2}[A-Z]?\s?\d[A-Z]{2})', address, re.IGNORECASE)
-    postcode = postcode_match.group(1) if postcode_match else None
-    
-    if postcode:
-        # For UK addresses, add UK context to avoid US geocoding
-        parts = address.split(',')
-        if len(parts) >= 2:
-            # Try last two parts (usually town and postcode) + UK
-            town_postcode = ','.join(parts[-2:]).strip()
-            variations.append(f"{town_postcode}, UK")
-            
-            # Try just postcode + UK
-            variations.append(f"{postcode}, UK")
-    
-    # Try without specific house names/buildings
-    simplified = re.sub(r'^[^,]+,\s*', '', address)  # Remove first part (house name)
-    if simplified != address:
-        variations.append(simplified)
-    
-    # Try with just the main road and postcode + UK
-    if postcode:
-        road_match = re.search(r'([^,]+(?:Road|Street|Lane|Way|Drive|Avenue|Close|Gardens|Manor|House|Farm)[^,]*)', address, re.IGNORECASE)
-        if road_match:
-            road_name = road_match.group(1).strip()
-            variations.append(f"{road_name}, {postcode}, UK")
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_variations = []
-    for variation in variations:
-        if variation and variation not in seen:
-            seen.add(variation)
-            unique_variations.append(variation)
-    
-    return unique_variations
-
 def create_property_document(property_data: dict, geocoding_result: dict) -> str:
     """Create a rich text document for property vector embedding"""
     
@@ -661,9 +561,12 @@ def clean_extracted_property(property_data):
 
 
 @shared_task(bind=True)
-def process_document_classification(self, document_id, file_content, original_filename, business_id):
+@track_performance
+def process_document_classification(self, document_id, file_content, original_filename, business_id, s3_path=None):
     """
     Step 1: Document Classification with Event Logging
+    
+    If file_content is None the file is downloaded from S3 (s3_path, else the document's s3_path).
     """
     from . import create_app
     from .models import db, Document, DocumentStatus
@@ -694,6 +597,25 @@ def process_document_classification(self, document_id, file_content, original_fi
         
         logger.info(f"✅ Retrieved document {document_id} from Supabase")
         
+        if file_content is None:
+            s3_key = s3_path or document_dict.get('s3_path')
+            try:
+                if not s3_key:
+                    raise ValueError("document has no s3_path")
+                response = get_s3_client().get_object(Bucket=os.environ['S3_UPLOAD_BUCKET'], Key=s3_key)
+                file_content = response['Body'].read()
+            except Exception as e:
+                logger.error(f"Could not download document {document_id} from S3: {e}")
+                try:
+                    doc_storage.update_document_status(
+                        document_id=str(document_id),
+                        status='failed',
+                        business_id=business_id
+                    )
+                except Exception as status_err:
+                    logger.warning(f"Could not set document status to failed: {status_err}")
+                return {"error": f"Document download failed: {e}"}
+        
         # Store document_dict for later use (will replace document.attribute with document_dict['attribute'] in Phase 2)
         document = document_dict
         
@@ -1278,6 +1200,7 @@ def process_document_classification(self, document_id, file_content, original_fi
                 pass
 
 @shared_task(bind=True)
+@track_performance
 def process_document_minimal_extraction(self, document_id, file_content, original_filename, business_id, job_id=None):
     """
     Minimal extraction pipeline for non-valuation documents.
@@ -1835,6 +1758,7 @@ def process_document_minimal_extraction(self, document_id, file_content, origina
                 pass
 
 @shared_task(bind=True)
+@track_performance
 def process_document_with_dual_stores(self, document_id, file_content, original_filename, business_id, job_id=None):
     """
     Celery task to process an uploaded document:
@@ -3018,14 +2942,22 @@ def process_document_simple(self, document_id, file_content, original_filename,
             return f"Error: {e}"
 
 @shared_task(bind=True)
-def process_document_task(self, document_id, file_content, original_filename, business_id):
+def process_document_task(self, document_id, file_content, original_filename, business_id, s3_path=None):
     """
     Main document processing task that starts with classification
+    
+    The file is handed on by S3 key (s3_path, or the document's s3_path) and downloaded by
+    process_document_classification in the worker, so neither the API endpoints nor this task
+    put the whole object into a broker message. file_content is only forwarded for callers
+    that have no S3 key.
     """
-    return process_document_classification.delay(document_id, file_content, original_filename, business_id)
+    if file_content is not None and not s3_path:
+        return process_document_classification.delay(document_id, file_content, original_filename, business_id)
+    return process_document_classification.delay(document_id, None, original_filename, business_id, s3_path=s3_path)
 
 
 @shared_task(bind=True, name="process_document_fast")
+@track_performance
 def process_document_fast_task(
     self,
     document_id: str,
@@ -3083,6 +3015,7 @@ def process_document_fast_task(
                 doc_storage.supabase.table('documents').update({
                     'status': 'processing'
                 }).eq('id', document_id).execute()
+                document_catalog.invalidate(document_id)
                 logger.info(f"✅ Updated document status to 'processing'")
             except Exception as e:
                 logger.warning(f"Could not update document status: {e}")
@@ -3418,6 +3351,7 @@ def process_document_fast_task(
                 doc_storage.supabase.table('documents').update({
                     'status': 'processed'
                 }).eq('id', document_id).execute()
+                document_catalog.invalidate(document_id)
                 
                 logger.info(f"✅ Updated document status to 'processed'")
                 
@@ -3469,6 +3403,7 @@ def process_document_fast_task(
                         'processing_method': 'fast_pipeline'
                     }
                 }).eq('id', document_id).execute()
+                document_catalog.invalidate(document_id)
                 logger.info(f"✅ Updated document status to 'failed'")
             except Exception as update_error:
                 logger.error(f"Could not update document status to failed: {update_error}")
@@ -3502,6 +3437,7 @@ def embed_chunk_on_demand(self, chunk_id: str, document_id: str):
     try:
         from .services.supabase_client_factory import get_supabase_client
         from .services.vector_service import SupabaseVectorService
+        from .services.embedding_quantization import quantized_columns
         from datetime import datetime
         import json
         
@@ -3537,11 +3473,11 @@ def embed_chunk_on_demand(self, chunk_id: str, document_id: str):
         else:
             text_to_embed = chunk_text
         
-        # Update status to 'queued'
+        # Update status to 'queued' (unless a concurrent task embedded it since the read)
         supabase.table('document_vectors').update({
             'embedding_status': 'queued',
             'embedding_queued_at': datetime.utcnow().isoformat()
-        }).eq('id', chunk_id).execute()
+        }).eq('id', chunk_id).is_('embedding', 'null').execute()
         
         # Generate embedding using Voyage AI (via SupabaseVectorService)
         try:
@@ -3558,12 +3494,34 @@ def embed_chunk_on_demand(self, chunk_id: str, document_id: str):
                 'embedding_status': 'embedded',
                 'embedding_completed_at': datetime.utcnow().isoformat(),
                 'embedding_model': vector_service.embedding_model,
-                'embedding_error': None
+                'embedding_error': None,
+                **quantized_columns(embedding)
             }
             
-            supabase.table('document_vectors').update(update_data).eq('id', chunk_id).execute()
+            # Only write if the chunk is still unembedded: embed_document_chunks_lazy may have
+            # embedded it meanwhile, and folding it into the document sum twice would skew the mean
+            updated = supabase.table('document_vectors').update(update_data)\
+                .eq('id', chunk_id).is_('embedding', 'null').execute()
+            if not updated.data:
+                logger.info(f"Chunk {chunk_id} was embedded concurrently, skipping")
+                return True
             
             logger.info(f"✅ Embedded chunk {chunk_id} (dim: {len(embedding)})")
+            
+            # Fold the new chunk into the document's running mean (O(dim), non-fatal)
+            try:
+                from .services.document_embedding_maintainer import get_document_embedding_maintainer
+                get_document_embedding_maintainer().on_chunk_embedded(document_id, chunk_data, embedding)
+            except Exception as maintainer_error:
+                logger.warning(f"⚠️ Failed to update document embedding for {document_id}: {maintainer_error}")
+            
+            # The chunk is now searchable; refresh local ANN indexes that hold this document (non-fatal)
+            try:
+                from .services.ann_index import ann_index
+                ann_index.on_document_vectors_stored(chunk_data.get('business_uuid'), document_id)
+            except Exception as index_error:
+                logger.warning(f"⚠️ Failed to refresh ANN index for {document_id}: {index_error}")
+            
             return True
             
         except Exception as embed_error:
@@ -3585,6 +3543,7 @@ def embed_chunk_on_demand(self, chunk_id: str, document_id: str):
 
 
 @shared_task(bind=True, name="embed_document_chunks_lazy")
+@track_performance
 def embed_document_chunks_lazy(self, document_id: str, priority: str = 'normal'):
     """
     Embed all pending chunks for a document (batch processing).
@@ -3601,6 +3560,7 @@ def embed_document_chunks_lazy(self, document_id: str, priority: str = 'normal')
     try:
         from .services.supabase_client_factory import get_supabase_client
         from .services.vector_service import SupabaseVectorService
+        from .services.embedding_quantization import quantized_columns
         from datetime import datetime
         import json
         
@@ -3631,6 +3591,7 @@ def embed_document_chunks_lazy(self, document_id: str, priority: str = 'normal')
             # Prepare texts for embedding
             texts_to_embed = []
             chunk_ids = []
+            chunk_rows = []
             
             for chunk_data in batch:
                 chunk_text = chunk_data.get('chunk_text', '')
@@ -3647,6 +3608,7 @@ def embed_document_chunks_lazy(self, document_id: str, priority: str = 'normal')
                 
                 texts_to_embed.append(text_to_embed)
                 chunk_ids.append(chunk_data['id'])
+                chunk_rows.append(chunk_data)
             
             if not texts_to_embed:
                 continue
@@ -3677,18 +3639,32 @@ def embed_document_chunks_lazy(self, document_id: str, priority: str = 'normal')
                 # Use the actual model name from vector_service (Voyage AI or OpenAI)
                 model_name = vector_service.embedding_model
                 
-                for chunk_id, embedding in zip(chunk_ids, embeddings):
-                    supabase.table('document_vectors').update({
+                # Rows embedded concurrently (embed_chunk_on_demand) are left alone and not
+                # folded into the document sum a second time
+                written = []
+                for chunk_row, embedding in zip(chunk_rows, embeddings):
+                    updated = supabase.table('document_vectors').update({
                         'embedding': embedding,
                         'embedding_status': 'embedded',
                         'embedding_completed_at': datetime.utcnow().isoformat(),
                         'embedding_model': model_name,
-                        'embedding_error': None
-                    }).eq('id', chunk_id).execute()
+                        'embedding_error': None,
+                        **quantized_columns(embedding)
+                    }).eq('id', chunk_row['id']).is_('embedding', 'null').execute()
+                    if updated.data:
+                        written.append((chunk_row, embedding))
                 
                 embedded_count += len(chunk_ids)
                 logger.info(f"✅ Embedded batch {i//batch_size + 1} ({len(chunk_ids)} chunks)")
                 
+                # One accumulator delta per batch instead of re-pooling the whole document
+                try:
+                    from .services.document_embedding_maintainer import get_document_embedding_maintainer
+                    if written:
+                        get_document_embedding_maintainer().on_chunks_embedded(document_id, written)
+                except Exception as maintainer_error:
+                    logger.warning(f"⚠️ Failed to update document embedding for {document_id}: {maintainer_error}")
+                
             except Exception as batch_error:
                 error_msg = str(batch_error)
                 # Check if it's a rate limit error
@@ -3718,6 +3694,12 @@ def embed_document_chunks_lazy(self, document_id: str, priority: str = 'normal')
             f"✅ Completed lazy embedding for document {document_id}: "
             f"{embedded_count} embedded, {failed_count} failed"
         )
+        if embedded_count:
+            try:
+                from .services.ann_index import ann_index
+                ann_index.on_document_vectors_stored(chunks[0].get('business_uuid'), document_id)
+            except Exception as index_error:
+                logger.warning(f"⚠️ Failed to refresh ANN index for {document_id}: {index_error}")
         return True
         
     except Exception as e:
@@ -1,11 +1,16 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app, Response
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app, Response, g, has_app_context
 from flask_login import login_required, current_user, login_user, logout_user
 from .models import Document, DocumentStatus, Property, PropertyDetails, DocumentRelationship, User, UserRole, UserStatus, PropertyCardCache, db
 from .services.property_enrichment_service import PropertyEnrichmentService
 from .services.supabase_document_service import SupabaseDocumentService
 from .services.supabase_client_factory import get_supabase_client
+from .services.sse_events import sse_frame, token_frame, paced_token_frames, TokenCoalescer, HEARTBEAT_FRAME, HEARTBEAT_SECONDS
+from .services import tracing
+from .services.principal_cache import principal_cache
+from .services.performance_service import performance_service
 from datetime import datetime
 import os
+import hmac
 import uuid
 import requests
 from requests_aws4auth import AWS4Auth
@@ -41,6 +46,26 @@ def _strip_intent_fragment_from_response(text):
     return stripped
 
 
+def _responder_citation_event(citation):
+    """SSE `citation` event for a responder citation (frontend citation dict from responder_node)."""
+    citation_bbox = citation.get('bbox')
+    citation_page = citation.get('page_number', 0)
+    if citation_bbox and isinstance(citation_bbox, dict):
+        citation_bbox = citation_bbox.copy()
+        citation_bbox['page'] = citation_bbox.get('page', citation_page)
+    citation_data = {
+        'doc_id': citation.get('doc_id', ''),
+        'document_id': citation.get('doc_id', ''),
+        'page': citation_page,
+        'bbox': citation_bbox,
+        'method': citation.get('method', 'block-id-lookup'),
+        'block_id': citation.get('block_id'),
+        'cited_text': citation.get('cited_text', ''),
+        'original_filename': citation.get('original_filename', '')
+    }
+    return {'type': 'citation', 'citation_number': citation.get('citation_number'), 'data': citation_data}
+
+
 def _citation_numbers_in_response(response_text):
     """Return set of citation numbers (as str) that actually appear in the response text.
     Only documents cited in the response should be shown as sources.
@@ -64,6 +89,18 @@ def _citation_numbers_in_response(response_text):
 
 def _ensure_business_uuid():
     """Ensure the current user has a business UUID and return it as a string."""
+    started = time.perf_counter()
+    try:
+        return _resolve_business_uuid()
+    finally:
+        elapsed = time.perf_counter() - started
+        if has_app_context():
+            # Also called from streaming worker threads, which have no request globals
+            g.auth_ms = g.get('auth_ms', 0.0) + elapsed * 1000
+        performance_service.track_operation('auth.business_uuid', elapsed)
+
+
+def _resolve_business_uuid():
     existing = getattr(current_user, "business_id", None)
     if existing:
         try:
@@ -90,6 +127,8 @@ def _ensure_business_uuid():
             except Exception as commit_error:
                 db.session.rollback()
                 logger.warning(f"Failed to persist business UUID locally: {commit_error}")
+            # Later requests get it from load_user via the principal cache
+            principal_cache.set_business_uuid(current_user.id, business_uuid)
             return str(business_uuid)
     except Exception as fetch_error:
         logger.warning(f"Failed to ensure business UUID: {fetch_error}")
@@ -111,9 +150,11 @@ views = Blueprint('views', __name__)
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Stream response pacing: delay in ms between chunks (0 = no delay); chunk size in characters
+# Stream response pacing: delay in ms between chunks (0 = no delay); chunk size in characters.
+# Together they set the typing pace; frames are coalesced per SSE_COALESCE_MS / SSE_COALESCE_BYTES.
 STREAM_CHUNK_DELAY_MS = int(os.environ.get("STREAM_CHUNK_DELAY_MS", "18"))
 STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "8"))
+STREAM_CHARS_PER_SECOND = STREAM_CHUNK_SIZE * 1000.0 / STREAM_CHUNK_DELAY_MS if STREAM_CHUNK_DELAY_MS > 0 else 0
 
 # ---------------------------------------------------------------------------
 # Performance timing helpers (lightweight, server-side only)
@@ -311,6 +352,13 @@ def get_performance_metrics():
     try:
         from .services.performance_service import performance_service
         from .services.response_formatter import APIResponseFormatter
+        from .llm.utils.retrieval_cache import retrieval_reuse_stats
+        from .llm.utils.plan_cache import plan_cache
+        from .llm.runtime.graph_runner import graph_runner
+        from .llm.utils.speculative_retrieval import speculative_retrievals
+        from .services.geocode_cache import geocode_cache
+        from .services.ann_index import ann_index
+        from .services.document_catalog import document_catalog
         
         # Get performance summary
         performance_data = performance_service.get_performance_summary()
@@ -321,7 +369,30 @@ def get_performance_metrics():
         return jsonify(APIResponseFormatter.format_success_response(
             {
                 'performance_summary': performance_data,
-                'slow_endpoints': slow_endpoints
+                'slow_endpoints': slow_endpoints,
+                'retrieval_reuse': retrieval_reuse_stats.snapshot(),
+                'plan_cache': plan_cache.snapshot(),
+                'graph_loop_lag': graph_runner.loop_lag_stats(),
+                'speculative_retrieval': speculative_retrievals.snapshot(),
+                'series': performance_service.get_series_summary()[:50],
+                'traces': {**tracing.trace_store.snapshot(), 'recent': tracing.trace_store.recent(20)},
+                'auth': {
+                    'principal_cache': principal_cache.snapshot(),
+                    'series': [row for row in performance_service.get_series_summary('op') if row['name'].startswith('auth.')],
+                },
+                'geocoding': {
+                    'cache': geocode_cache.snapshot(),
+                    'series': [row for row in performance_service.get_series_summary('op') if row['name'].startswith('geocode.')],
+                },
+                'ann_index': {
+                    **ann_index.snapshot(),
+                    'series': [row for row in performance_service.get_series_summary('op') if row['name'].startswith('ann_index.')],
+                },
+                'document_catalog': document_catalog.snapshot(),
+                # summary.<mode>.ttfb / .total - compare SUMMARY_LLM_MODE settings;
+                # responder.<stream|invoke>.ttfb / .total - RESPONDER_STREAM_ENABLED
+                'summary_modes': [row for row in performance_service.get_series_summary('op') if row['name'].startswith(('summary.', 'responder.'))],
+                'recent_slow_calls': list(performance_service.slow_log)[-20:]
             },
             'Performance metrics retrieved successfully'
         )), 200
@@ -335,6 +406,28 @@ def get_performance_metrics():
         )), 500
 
 
+@views.route('/api/performance/metrics', methods=['GET'])
+def get_performance_metrics_prometheus():
+    """Prometheus text export of latency histograms (all workers when Redis is configured).
+
+    Scrapers authenticate with `Authorization: Bearer $METRICS_SCRAPE_TOKEN`; logged-in
+    users can also read it.
+    """
+    from .services.performance_service import performance_service
+
+    scrape_token = os.environ.get('METRICS_SCRAPE_TOKEN')
+    bearer = request.headers.get('Authorization', '')
+    token_ok = bool(scrape_token) and hmac.compare_digest(bearer.encode(), f"Bearer {scrape_token}".encode())
+    if not token_ok and not current_user.is_authenticated:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        return Response(performance_service.render_prometheus(), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+        logger.error(f"Error rendering Prometheus metrics: {e}")
+        return Response(f"# error: {e}\n", status=500, mimetype='text/plain')
+
+
 @views.route('/api/projects', methods=['GET', 'OPTIONS'])
 def get_projects():
     """Minimal projects endpoint so frontend does not hit CORS on missing route. Returns empty list."""
@@ -586,6 +679,14 @@ def query_documents_stream():
             session_id=frontend_session_id
         )
         
+        # Per-query span tree (attached in the stream thread, fetched via /api/llm/trace/<request_id>)
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        query_trace = tracing.start_trace(
+            request_id, 'llm.query.stream', user_id=current_user.id,
+            session_id=session_id, business_id=str(business_id) if business_id else None,
+            query_preview=query[:100] if query else ''
+        )
+        
         citation_context = data.get('citationContext')  # NEW: Get structured citation metadata (hidden from user)
         response_mode = data.get('responseMode')  # NEW: Response mode for file attachments (fast/detailed/full)
         attachment_context = data.get('attachmentContext')  # NEW: Extracted text from attached files
@@ -655,7 +756,7 @@ def query_documents_stream():
                 logger.info(f"🟢 [STREAM] Business ID: {business_id}")
                 if not business_id:
                     logger.error("❌ [STREAM] No business_id found")
-                    yield f"data: {json.dumps({'type': 'error', 'message': 'User not associated with a business'})}\n\n"
+                    yield sse_frame({'type': 'error', 'message': 'User not associated with a business'})
                     return
             except Exception as early_error:
                 # If error occurs before first yield, yield error immediately
@@ -663,7 +764,7 @@ def query_documents_stream():
                 import traceback
                 logger.error(f"❌ [STREAM] Traceback: {traceback.format_exc()}")
                 traceback.print_exc()
-                yield f"data: {json.dumps({'type': 'error', 'message': str(early_error)})}\n\n"
+                yield sse_frame({'type': 'error', 'message': str(early_error)})
                 return
             
             try:
@@ -714,11 +815,16 @@ def query_documents_stream():
                     "document_retry_count": 0,
                     "chunk_retry_count": 0,
                     "plan_refinement_count": 0,  # NEW: Reset plan refinement count for new queries
+                    "execution_plan": None,  # Previous turn's plan would make the planner treat this turn as a re-plan
+                    "speculation_id": None,
                     "refined_query": None,  # Reset refined_query to use original user_query
                     "retrieved_documents": [],  # Reset retrieved_documents
                     "document_outputs": [],  # Reset document_outputs
                     "last_document_failure_reason": None,
                     "last_chunk_failure_reason": None,
+                    # Follow-up reuse is decided per turn by the retrieval_cache node (retrieval_cache is checkpointed)
+                    "use_cached_results": False,
+                    "retrieval_reuse": None,
                     # conversation_history will be loaded from checkpointer or passed via messageHistory workaround
                 }
                 # #region agent log
@@ -751,7 +857,7 @@ def query_documents_stream():
                 
                 # Send initial status and FIRST reasoning step immediately
                 logger.info("🟢 [STREAM] Yielding initial status message")
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Searching documents...'})}\n\n"
+                yield sse_frame({'type': 'status', 'message': 'Searching documents...'})
                 
                 # Generate and stream chat title from query (so everything shown to user is streamed)
                 def generate_chat_title_from_query(q: str) -> str:
@@ -785,7 +891,7 @@ def query_documents_stream():
                 # Stream title in one chunk so the client gets it immediately (no char-by-char delay)
                 streamed_chat_title = generate_chat_title_from_query(query)
                 if streamed_chat_title:
-                    yield f"data: {json.dumps({'type': 'title_chunk', 'token': streamed_chat_title})}\n\n"
+                    yield sse_frame({'type': 'title_chunk', 'token': streamed_chat_title})
                 
                 # Extract intent from query for contextual reasoning step
                 # Simple heuristic: identify what user is looking for and where
@@ -974,7 +1080,7 @@ def query_documents_stream():
                     'message': 'Planning next moves',
                     'details': {}
                 }
-                yield f"data: {json.dumps(initial_reasoning)}\n\n"
+                yield sse_frame(initial_reasoning)
                 logger.debug("🟡 [REASONING] Emitted step (1): Planning next moves")
                 
                 # Detect if user wants agent to perform UI actions (show me, save, navigate)
@@ -1009,9 +1115,9 @@ def query_documents_stream():
                                         }
                             except Exception as e:
                                 logger.debug(f"Could not resolve filename for reading step: {e}")
-                            yield f"data: {json.dumps({'type': 'reasoning_step', 'step': 'reading_documents', 'action_type': 'reading', 'message': 'Reading selected documents...', 'details': reading_details, 'timestamp': time.time()})}\n\n"
+                            yield sse_frame({'type': 'reasoning_step', 'step': 'reading_documents', 'action_type': 'reading', 'message': 'Reading selected documents...', 'details': reading_details, 'timestamp': time.time()})
                         else:
-                            yield f"data: {json.dumps({'type': 'reasoning_step', 'step': 'preparing', 'action_type': 'planning', 'message': 'Preparing...', 'details': {}, 'timestamp': time.time()})}\n\n"
+                            yield sse_frame({'type': 'reasoning_step', 'step': 'preparing', 'action_type': 'planning', 'message': 'Preparing...', 'details': {}, 'timestamp': time.time()})
                         
                         # Create a new checkpointer and graph for current event loop.
                         # This avoids "Lock bound to different event loop" errors.
@@ -1067,6 +1173,7 @@ def query_documents_stream():
                             },
                             # Allow planner->executor->evaluator refinement loops (up to 3) without hitting limit
                             "recursion_limit": 50,
+                            "callbacks": tracing.llm_trace_callbacks(),
                         }
                         
                         # Check for existing session state (follow-up detection)
@@ -1088,14 +1195,6 @@ def query_documents_stream():
                         except Exception as state_err:
                             logger.warning(f"Could not check existing state: {state_err}")
                         
-                        # Cache-first for follow-ups: reuse execution_results from checkpoint to skip planner+executor
-                        if is_followup and existing_state is not None and getattr(existing_state, "values", None):
-                            cached_results = existing_state.values.get("execution_results") or []
-                            if cached_results and len(cached_results) > 0:
-                                initial_state["use_cached_results"] = True
-                                initial_state["execution_results"] = list(cached_results)  # copy, do not mutate checkpoint
-                                logger.info(f"🟢 [STREAM] Cache-first: reusing {len(cached_results)} execution_results from checkpoint (skipping planner+executor)")
-                        
                         # WORKAROUND: If checkpointer unavailable, try to use messageHistory from request
                         # This is a temporary solution until checkpointer is properly configured
                         if not loaded_conversation_history and not checkpointer and message_history:
@@ -1160,6 +1259,9 @@ def query_documents_stream():
                         final_result = None
                         summary_already_streamed = False  # Track if we've already streamed the summary
                         streamed_summary = None  # Store the exact summary that was streamed to ensure consistency
+                        answer_deltas_streamed = []  # Answer text sent as token frames while a node was still generating
+                        answer_coalescer = TokenCoalescer()  # Batches those deltas per SSE_COALESCE_MS / SSE_COALESCE_BYTES
+                        citation_numbers_streamed = set()  # Responder citations already sent during generation
                         memory_storage_scheduled = False  # Track if Mem0 memory storage has been scheduled for this request
                         
                         # Execute graph with error handling for connection timeouts during execution
@@ -1186,6 +1288,34 @@ def query_documents_stream():
                                 execution_events = consume_execution_events()
                                 for exec_event in execution_events:
                                     payload = exec_event.to_dict()
+                                    # Answer text streamed by summarize_results (SUMMARY_LLM_MODE=stream) or responder_node while citations resolve
+                                    if payload.get('type') == 'answer_delta':
+                                        if not answer_deltas_streamed:
+                                            yield sse_frame({
+                                                'type': 'reasoning_step',
+                                                'step': 'summarizing_content',
+                                                'action_type': 'summarising',
+                                                'message': 'Summarising content',
+                                                'timestamp': time.time(),
+                                                'details': {}
+                                            })
+                                            yield sse_frame({'type': 'status', 'message': 'Streaming response...'})
+                                            timing.mark("first_answer_delta")
+                                        answer_deltas_streamed.append(payload.get('text') or '')
+                                        token_batch = answer_coalescer.add(payload.get('text') or '')
+                                        if token_batch:
+                                            yield token_batch
+                                        continue
+                                    # Any other frame goes out after the text buffered before it
+                                    token_batch = answer_coalescer.flush()
+                                    if token_batch:
+                                        yield token_batch
+                                    # Citation resolved by responder_node while its answer is still streaming
+                                    if payload.get('type') == 'answer_citation':
+                                        citation = payload.get('citation') or {}
+                                        citation_numbers_streamed.add(citation.get('citation_number'))
+                                        yield sse_frame(_responder_citation_event(citation))
+                                        continue
                                     # When executor/planner emits phase events with reasoning (e.g. "Searched documents", "Reviewed selected document(s)"),
                                     # emit a reasoning_step so the UI shows the step when the toggle is on
                                     if not is_fast_path and payload.get('type') == 'phase' and (payload.get('metadata') or {}).get('reasoning'):
@@ -1211,7 +1341,7 @@ def query_documents_stream():
                                                     'timestamp': time.time(),
                                                     'details': {}
                                                 }
-                                                yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                                yield sse_frame(reasoning_data)
                                                 logger.info(f"🟡 [REASONING] Emitted searching step (from executor): {search_message}")
                                         elif label and ('Reviewed' in label or 'review' in label.lower()):
                                             # Normal retrieval: skip "Reviewed relevant sections" so steps match (1) Planning (2) Searching for query (3) Found x docs (4) Read
@@ -1220,9 +1350,13 @@ def query_documents_stream():
                                         'type': 'execution_event',
                                         'payload': payload
                                     }
-                                    yield f"data: {json.dumps(event_data)}\n\n"
+                                    yield sse_frame(event_data)
                                 event_type = event.get('event')
                                 node_name = event.get("name", "")
+                                # Node ends emit citations and the final answer bookkeeping: send all buffered text first
+                                token_batch = answer_coalescer.flush() if event_type == "on_chain_end" else answer_coalescer.due()
+                                if token_batch:
+                                    yield token_batch
                                 
                                 # Track node start times for performance analysis
                                 if event_type == "on_chain_start":
@@ -1242,7 +1376,7 @@ def query_documents_stream():
                                             'message': 'Summarising content',
                                             'details': {}
                                         }
-                                        yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                        yield sse_frame(reasoning_data)
                                         logger.info("🟡 [REASONING] ✅ Emitted citation step: Summarising content")
                                     elif not is_fast_path and node_name in node_messages and node_name not in processed_nodes:
                                         # Skip responder: "Summarising content" is emitted when we actually start streaming (first token), not when node starts
@@ -1257,8 +1391,8 @@ def query_documents_stream():
                                                 'message': node_messages[node_name]['message'],
                                                 'details': node_messages[node_name]['details']
                                             }
-                                            reasoning_json = json.dumps(reasoning_data)
-                                            yield f"data: {reasoning_json}\n\n"
+                                            reasoning_json = sse_frame(reasoning_data)
+                                            yield reasoning_json
                                             logger.info(f"🟡 [REASONING] ✅ Emitted step: {node_name} - {node_messages[node_name]['message']}")
                                             logger.debug(f"🟡 [REASONING] JSON: {reasoning_json}")
                                 
@@ -1360,7 +1494,7 @@ def query_documents_stream():
                                                     'doc_previews': doc_previews  # Full metadata for preview cards
                                                 }
                                             }
-                                            yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                            yield sse_frame(reasoning_data)
                                             
                                             # IMMEDIATELY emit "Analyzing" step after found_documents for faster UI feedback
                                             # Only for non-follow-ups (follow-ups get their own "Analyzing" step during process_documents)
@@ -1374,7 +1508,7 @@ def query_documents_stream():
                                                     'timestamp': time.time(),  # Ensure proper ordering
                                                     'details': {'documents_to_analyze': doc_count}
                                                 }
-                                                yield f"data: {json.dumps(analyzing_data)}\n\n"
+                                                yield sse_frame(analyzing_data)
                                     
                                             # EARLY DOCUMENT PREPARATION: In agent mode, emit prepare_document action
                                             # This allows frontend to start loading the document BEFORE answer generation
@@ -1386,7 +1520,7 @@ def query_documents_stream():
                                                     'filename': first_doc.get('original_filename', ''),
                                                     'download_url': first_doc.get('download_url', '')
                                                 }
-                                                yield f"data: {json.dumps(prepare_action)}\n\n"
+                                                yield sse_frame(prepare_action)
                                                 logger.info(f"📂 [EARLY_PREP] Emitted prepare_document for {first_doc.get('doc_id', '')[:8]}...")
                                     
                                     elif node_name == "executor" and not is_fast_path:
@@ -1456,7 +1590,7 @@ def query_documents_stream():
                                                         'doc_previews': doc_previews
                                                     }
                                                 }
-                                                yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                                yield sse_frame(reasoning_data)
                                                 # Emit one reading step per document we actually read
                                                 for i, doc_preview in enumerate(doc_previews):
                                                     display_filename = (doc_preview.get('original_filename') or doc_preview.get('classification_type', 'Document') or 'Document')
@@ -1486,7 +1620,7 @@ def query_documents_stream():
                                                             'doc_metadata': doc_metadata
                                                         }
                                                     }
-                                                    yield f"data: {json.dumps(reading_data)}\n\n"
+                                                    yield sse_frame(reading_data)
                                                 logger.debug(f"🟡 [REASONING] Emitted executor found_documents + {len(doc_previews)} reading steps ({doc_count} docs we read)")
                                     
                                     elif node_name == "process_documents" and not is_fast_path:
@@ -1514,7 +1648,7 @@ def query_documents_stream():
                                                     'timestamp': time.time(),  # Ensure proper ordering
                                                     'details': {'documents_analyzed': doc_outputs_count}
                                                 }
-                                                yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                                yield sse_frame(reasoning_data)
                                             else:
                                                 # First query - show individual read steps with preview cards
                                                 for i, doc_output in enumerate(doc_outputs):
@@ -1559,7 +1693,7 @@ def query_documents_stream():
                                                             'doc_metadata': doc_metadata
                                                         }
                                                     }
-                                                    yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                                    yield sse_frame(reasoning_data)
                                     
                                     # Handle citation query completion (ULTRA-FAST path)
                                     if node_name == "handle_citation_query":
@@ -1600,28 +1734,24 @@ def query_documents_stream():
                                                 "(same citation mapping as regular queries)"
                                             )
                                             # Stream citation events so frontend gets same real-time citation handling
+                                            # (skipping those already sent while the answer was streaming)
                                             try:
                                                 for citation in chunk_citations_from_responder:
-                                                    citation_num_str = str(citation.get('citation_number', ''))
-                                                    citation_bbox = citation.get('bbox')
-                                                    citation_page = citation.get('page_number', 0)
-                                                    if citation_bbox and isinstance(citation_bbox, dict):
-                                                        citation_bbox = citation_bbox.copy()
-                                                        citation_bbox['page'] = citation_bbox.get('page', citation_page)
-                                                    citation_data = {
-                                                        'doc_id': citation.get('doc_id', ''),
-                                                        'document_id': citation.get('doc_id', ''),
-                                                        'page': citation_page,
-                                                        'bbox': citation_bbox,
-                                                        'method': citation.get('method', 'block-id-lookup'),
-                                                        'block_id': citation.get('block_id'),
-                                                        'cited_text': citation.get('cited_text', ''),
-                                                        'original_filename': citation.get('original_filename', '')
-                                                    }
-                                                    citation_event = {'type': 'citation', 'citation_number': citation.get('citation_number'), 'data': citation_data}
-                                                    yield f"data: {json.dumps(citation_event)}\n\n"
+                                                    if citation.get('citation_number') in citation_numbers_streamed:
+                                                        continue
+                                                    yield sse_frame(_responder_citation_event(citation))
                                             except Exception as cit_err:
                                                 logger.warning(f"🟡 [CITATION_STREAM] Error streaming responder citations: {cit_err}")
+                                        if final_summary_from_responder and answer_deltas_streamed and not summary_already_streamed:
+                                            # Text already went out as token frames while responder_node was generating;
+                                            # final_summary is exactly their concatenation (cleaned while streaming), so keep it as is
+                                            streamed_summary = final_summary_from_responder
+                                            summary_already_streamed = True
+                                            logger.info(
+                                                f"🚀 [STREAM] Responder answer streamed during generation "
+                                                f"({sum(len(text) for text in answer_deltas_streamed)} chars in {len(answer_deltas_streamed)} deltas, "
+                                                f"{len(citation_numbers_streamed)} citations)"
+                                            )
                                     
                                     # Handle conversation node completion (chat-only path, no doc retrieval)
                                     elif node_name == "conversation":
@@ -1756,7 +1886,7 @@ def query_documents_stream():
                                                         'citation_number': citation['citation_number'],
                                                         'data': citation_data
                                                     }
-                                                    yield f"data: {json.dumps(citation_event)}\n\n"
+                                                    yield sse_frame(citation_event)
                                                     logger.info(
                                                         f"🟢 [CITATION_STREAM] Streamed citation {citation_num_str} "
                                                         f"(block_id: {block_id}, doc: {citation_data.get('doc_id', '')[:8]}, page: {citation_data.get('page')})"
@@ -1783,12 +1913,22 @@ def query_documents_stream():
                                         
                                         # 🚀 IMMEDIATE STREAMING: Stream the summary NOW, don't wait for checkpointer!
                                         # This eliminates the 20+ second delay caused by checkpointer saving
+                                        if final_summary_from_state and not summary_already_streamed and answer_deltas_streamed:
+                                            # Text already went out as token frames while summarize_results was generating
+                                            doc_count = len(doc_outputs_from_state) if doc_outputs_from_state else len(relevant_docs_from_state)
+                                            yield sse_frame({'type': 'documents_found', 'count': doc_count})
+                                            streamed_summary = _strip_intent_fragment_from_response(final_summary_from_state or "")
+                                            summary_already_streamed = True
+                                            logger.info(
+                                                f"🚀 [STREAM] Summary streamed during generation "
+                                                f"({sum(len(text) for text in answer_deltas_streamed)} chars in {len(answer_deltas_streamed)} deltas)"
+                                            )
                                         if final_summary_from_state and not summary_already_streamed:
                                             logger.info("🚀 [STREAM] IMMEDIATE: Streaming summary directly from summarize_results (skipping checkpointer wait)")
                                             
                                             # Send document count
                                             doc_count = len(doc_outputs_from_state) if doc_outputs_from_state else len(relevant_docs_from_state)
-                                            yield f"data: {json.dumps({'type': 'documents_found', 'count': doc_count})}\n\n"
+                                            yield sse_frame({'type': 'documents_found', 'count': doc_count})
                                             
                                             # Emit "Summarizing content" reasoning step (like Cursor's wand sparkles)
                                             # Use timestamp to ensure it comes after all reading steps
@@ -1801,7 +1941,7 @@ def query_documents_stream():
                                                 'timestamp': summarize_timestamp,  # After reading steps
                                                 'details': {'documents_processed': doc_count}
                                             }
-                                            yield f"data: {json.dumps(summarizing_data)}\n\n"
+                                            yield sse_frame(summarizing_data)
                                             logger.info("✨ [STREAM] Emitted 'Summarizing content' reasoning step")
                                             
                                             # AGENT-NATIVE: Agent actions are now emitted from frontend when they actually happen
@@ -1809,7 +1949,7 @@ def query_documents_stream():
                                             # (Reasoning steps for agent actions removed - they'll be added by frontend on actual execution)
                                             
                                             # Stream status
-                                            yield f"data: {json.dumps({'type': 'status', 'message': 'Streaming response...'})}\n\n"
+                                            yield sse_frame({'type': 'status', 'message': 'Streaming response...'})
                                             
                                             # Stream the final response text directly - preserve all formatting
                                             # Strip leading "of [property]" leakage (intent phrase fragment) before streaming
@@ -1817,14 +1957,10 @@ def query_documents_stream():
                                             streamed_summary = final_summary_from_state
                                             logger.info("🚀 [STREAM] Streaming final response directly (preserving formatting)")
                                             
-                                            # Stream in chunks to maintain formatting while still providing smooth streaming
-                                            for i in range(0, len(final_summary_from_state), STREAM_CHUNK_SIZE):
-                                                if i == 0:
-                                                    logger.info("🚀 [STREAM] First chunk streamed IMMEDIATELY from summarize_results")
-                                                chunk = final_summary_from_state[i:i + STREAM_CHUNK_SIZE]
-                                                yield f"data: {json.dumps({'type': 'token', 'token': chunk})}\n\n"
-                                                if STREAM_CHUNK_DELAY_MS > 0:
-                                                    time.sleep(STREAM_CHUNK_DELAY_MS / 1000.0)
+                                            # Stream coalesced token frames at the configured typing pace (non-blocking)
+                                            logger.info("🚀 [STREAM] First chunk streamed IMMEDIATELY from summarize_results")
+                                            async for frame in paced_token_frames(final_summary_from_state, STREAM_CHARS_PER_SECOND):
+                                                yield frame
                                             
                                             summary_already_streamed = True
                                             logger.info(f"🚀 [STREAM] Summary fully streamed ({len(final_summary_from_state)} chars) - continuing event loop for cleanup")
@@ -1847,6 +1983,9 @@ def query_documents_stream():
                                             final_result = {}
                                         final_result.update(output)
                                         logger.info(f"🟢 [STREAM] Captured state from {node_name} output field")
+                            token_batch = answer_coalescer.flush()
+                            if token_batch:
+                                yield token_batch
                         except Exception as exec_error:
                             error_msg = str(exec_error)
                             # Handle connection timeout errors during graph execution
@@ -1872,8 +2011,8 @@ def query_documents_stream():
                                                 'message': node_messages[node_name]['message'],
                                                 'details': node_messages[node_name]['details']
                                             }
-                                            reasoning_json = json.dumps(reasoning_data)
-                                            yield f"data: {reasoning_json}\n\n"
+                                            reasoning_json = sse_frame(reasoning_data)
+                                            yield reasoning_json
                                     
                                     # Capture node end events to track state
                                     elif event.get("event") == "on_chain_end":
@@ -1942,7 +2081,7 @@ def query_documents_stream():
                                                         'doc_previews': doc_previews  # Full metadata for preview cards
                                                     }
                                                 }
-                                                yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                                yield sse_frame(reasoning_data)
                                                 
                                                 # IMMEDIATELY emit "Analyzing" step after found_documents for faster UI feedback
                                                 # Only for non-follow-ups (follow-ups get their own "Analyzing" step during process_documents)
@@ -1956,7 +2095,7 @@ def query_documents_stream():
                                                         'timestamp': time.time(),  # Ensure proper ordering
                                                         'details': {'documents_to_analyze': doc_count}
                                                     }
-                                                    yield f"data: {json.dumps(analyzing_data)}\n\n"
+                                                    yield sse_frame(analyzing_data)
                                         
                                         elif node_name == "process_documents":
                                             state_data = state_update if state_update else event_data.get("output", {})
@@ -2011,7 +2150,7 @@ def query_documents_stream():
                                                             'doc_metadata': doc_metadata
                                                         }
                                                     }
-                                                    yield f"data: {json.dumps(reasoning_data)}\n\n"
+                                                    yield sse_frame(reasoning_data)
                                         
                                         # Store the state from ALL node completions (especially extract_final_answer)
                                         # CRITICAL: This captures the final_summary from extract_final_answer node
@@ -2098,9 +2237,12 @@ def query_documents_stream():
                         # Get the summary that was already generated by summarize_results node
                         # CRITICAL: Use streamed_summary if available (the exact text we streamed) to ensure consistency
                         # Otherwise use final_summary from result
-                        full_summary = streamed_summary if streamed_summary else final_result.get('final_summary', '')
-                        # Strip leading "of [property]" leakage (intent phrase fragment) before streaming/complete
-                        full_summary = _strip_intent_fragment_from_response(full_summary or "")
+                        full_summary = (streamed_summary if streamed_summary else final_result.get('final_summary', '')) or ""
+                        # Strip leading "of [property]" leakage (intent phrase fragment) before streaming/complete.
+                        # Text sent as answer deltas is final already: rewriting it would make the complete
+                        # event differ from what the client rendered
+                        if not answer_deltas_streamed:
+                            full_summary = _strip_intent_fragment_from_response(full_summary)
 
                         # --- Mem0: Schedule memory storage (fire-and-forget) ---
                         if not memory_storage_scheduled and full_summary:
@@ -2129,7 +2271,7 @@ def query_documents_stream():
                             # Only error if we have neither summary nor documents
                             if not doc_outputs:
                                 logger.error("🟡 [STREAM] No summary and no documents - cannot proceed")
-                                yield f"data: {json.dumps({'type': 'error', 'message': 'No relevant documents found'})}\n\n"
+                                yield sse_frame({'type': 'error', 'message': 'No relevant documents found'})
                                 return
                             else:
                                 logger.warning("🟡 [STREAM] No final_summary found in result")
@@ -2137,11 +2279,11 @@ def query_documents_stream():
                         
                         # Send document count (use doc_outputs if available, otherwise relevant_docs)
                         doc_count = len(doc_outputs) if doc_outputs else len(relevant_docs)
-                        yield f"data: {json.dumps({'type': 'documents_found', 'count': doc_count})}\n\n"
+                        yield sse_frame({'type': 'documents_found', 'count': doc_count})
                         
                         # If we have a summary, proceed even if doc_outputs is empty (documents were already processed)
                         if not doc_outputs and not full_summary:
-                            yield f"data: {json.dumps({'type': 'error', 'message': 'No relevant documents found'})}\n\n"
+                            yield sse_frame({'type': 'error', 'message': 'No relevant documents found'})
                             return
                         
                         logger.info(f"🟡 [STREAM] Using existing summary from summarize_results node ({len(full_summary)} chars)")
@@ -2161,22 +2303,18 @@ def query_documents_stream():
                                 'timestamp': time.time(),
                                 'details': {}
                             }
-                            yield f"data: {json.dumps(summarizing_data)}\n\n"
+                            yield sse_frame(summarizing_data)
                             logger.info("✨ [STREAM] Emitted 'Summarising content' reasoning step (at stream start)")
-                            yield f"data: {json.dumps({'type': 'status', 'message': 'Streaming response...'})}\n\n"
+                            yield sse_frame({'type': 'status', 'message': 'Streaming response...'})
                             
                             # Stream the final response text directly - preserve all formatting
                             # Stream character-by-character in chunks to maintain exact formatting (markdown, newlines, spaces)
                             logger.info("🟡 [STREAM] Streaming final response directly (preserving formatting)")
                             
-                            # Stream in chunks to maintain formatting while still providing smooth streaming
-                            for i in range(0, len(full_summary), STREAM_CHUNK_SIZE):
-                                if i == 0:
-                                    logger.info("🟡 [STREAM] First chunk streamed from existing summary")
-                                chunk = full_summary[i:i + STREAM_CHUNK_SIZE]
-                                yield f"data: {json.dumps({'type': 'token', 'token': chunk})}\n\n"
-                                if STREAM_CHUNK_DELAY_MS > 0:
-                                    time.sleep(STREAM_CHUNK_DELAY_MS / 1000.0)
+                            # Stream coalesced token frames at the configured typing pace (non-blocking)
+                            logger.info("🟡 [STREAM] First chunk streamed from existing summary")
+                            async for frame in paced_token_frames(full_summary, STREAM_CHARS_PER_SECOND):
+                                yield frame
                         
                         # Build citations_map_for_frontend to match the SOURCE of the displayed answer.
                         # Conflict fix: citation numbers (¹²³) in the text must map to the same pipeline
@@ -2505,7 +2643,7 @@ def query_documents_stream():
                                             'message': 'Opening citation view & Highlighting content',
                                             'details': {'citation_number': citation_number, 'reason': reason}
                                         }
-                                        yield f"data: {json.dumps(opening_step)}\n\n"
+                                        yield sse_frame(opening_step)
                                         
                                         # Emit open_document action
                                         open_doc_action = {
@@ -2519,7 +2657,7 @@ def query_documents_stream():
                                                 'reason': reason
                                             }
                                         }
-                                        yield f"data: {json.dumps(open_doc_action)}\n\n"
+                                        yield sse_frame(open_doc_action)
                                         logger.info(f"🎯 [AGENT_TOOLS] Emitted open_document for citation [{citation_number}]: {reason}")
                                     else:
                                         logger.warning(f"🎯 [AGENT_TOOLS] No citations available to open")
@@ -2538,7 +2676,7 @@ def query_documents_stream():
                                             'message': 'Navigating to property',
                                             'details': {'property_id': target_property_id, 'reason': reason}
                                         }
-                                        yield f"data: {json.dumps(nav_step)}\n\n"
+                                        yield sse_frame(nav_step)
                                         
                                         nav_action = {
                                             'type': 'agent_action',
@@ -2549,7 +2687,7 @@ def query_documents_stream():
                                                 'reason': reason
                                             }
                                         }
-                                        yield f"data: {json.dumps(nav_action)}\n\n"
+                                        yield sse_frame(nav_action)
                                         logger.info(f"🎯 [AGENT_TOOLS] Emitted navigate_to_property: {reason}")
                                 
                                 elif action_type == 'search_property':
@@ -2565,7 +2703,7 @@ def query_documents_stream():
                                             'message': f'Searching for property: {search_query}',
                                             'details': {'query': search_query}
                                         }
-                                        yield f"data: {json.dumps(search_step)}\n\n"
+                                        yield sse_frame(search_step)
                                         
                                         # Perform property search
                                         from backend.services.property_search_service import PropertySearchService
@@ -2593,7 +2731,7 @@ def query_documents_stream():
                                                     'query': search_query
                                                 }
                                             }
-                                            yield f"data: {json.dumps(search_action)}\n\n"
+                                            yield sse_frame(search_action)
                                             logger.info(f"🎯 [AGENT_TOOLS] Property search found: {found_address} ({found_property_id})")
                                         else:
                                             logger.warning(f"🎯 [AGENT_TOOLS] No property found for query: {search_query}")
@@ -2610,7 +2748,7 @@ def query_documents_stream():
                                         'message': 'Opening map view',
                                         'details': {'reason': reason}
                                     }
-                                    yield f"data: {json.dumps(map_step)}\n\n"
+                                    yield sse_frame(map_step)
                                     
                                     show_map_action = {
                                         'type': 'agent_action',
@@ -2619,7 +2757,7 @@ def query_documents_stream():
                                             'reason': reason
                                         }
                                     }
-                                    yield f"data: {json.dumps(show_map_action)}\n\n"
+                                    yield sse_frame(show_map_action)
                                     logger.info(f"🎯 [AGENT_TOOLS] Emitted show_map_view: {reason}")
                                 
                                 elif action_type == 'select_property_pin':
@@ -2636,7 +2774,7 @@ def query_documents_stream():
                                             'message': 'Selecting property pin',
                                             'details': {'property_id': target_property_id, 'reason': reason}
                                         }
-                                        yield f"data: {json.dumps(pin_step)}\n\n"
+                                        yield sse_frame(pin_step)
                                         
                                         # Get property coordinates if available
                                         property_lat = None
@@ -2671,7 +2809,7 @@ def query_documents_stream():
                                                 'reason': reason
                                             }
                                         }
-                                        yield f"data: {json.dumps(select_pin_action)}\n\n"
+                                        yield sse_frame(select_pin_action)
                                         logger.info(f"🎯 [AGENT_TOOLS] Emitted select_property_pin: {target_property_id}")
                                 
                                 elif action_type == 'navigate_to_property_by_name':
@@ -2707,7 +2845,7 @@ def query_documents_stream():
                                                 'message': f'Navigating to {found_address}',
                                                 'details': {'property_name': property_name, 'property_id': found_property_id, 'reason': reason}
                                             }
-                                            yield f"data: {json.dumps(nav_step)}\n\n"
+                                            yield sse_frame(nav_step)
                                             
                                             # Step 2: Emit show_map_view action
                                             show_map_action = {
@@ -2717,7 +2855,7 @@ def query_documents_stream():
                                                     'reason': f'Opening map to navigate to {found_address}'
                                                 }
                                             }
-                                            yield f"data: {json.dumps(show_map_action)}\n\n"
+                                            yield sse_frame(show_map_action)
                                             logger.info(f"🎯 [AGENT_TOOLS] Emitted show_map_view for navigation")
                                             
                                             # Step 3: Emit select_property_pin action
@@ -2732,7 +2870,7 @@ def query_documents_stream():
                                                     'reason': reason
                                                 }
                                             }
-                                            yield f"data: {json.dumps(select_pin_action)}\n\n"
+                                            yield sse_frame(select_pin_action)
                                             logger.info(f"🎯 [AGENT_TOOLS] Emitted select_property_pin: {found_property_id}")
                                         else:
                                             logger.warning(f"🎯 [AGENT_TOOLS] No property found for: '{property_name}'")
@@ -2755,11 +2893,13 @@ def query_documents_stream():
                                 'citations': citations_map_for_frontend,  # Frontend expects Record<string, CitationDataType>
                                 'citations_array': structured_citations,  # NEW: Structured array format (for future use)
                                 'session_id': session_id,
+                                'request_id': request_id,
                                 'title': streamed_chat_title  # Streamed earlier as title_chunk; include for persistence
                             }
                         }
-                        yield f"data: {json.dumps(complete_data)}\n\n"
+                        yield sse_frame(complete_data)
                         timing.mark("complete_sent")
+                        _record_transcript_turn(session_id, query, full_summary.strip(), citations_map_for_frontend)
                         logger.info("🟣 [PERF][STREAM] %s", json.dumps({
                             "endpoint": "/api/llm/query/stream",
                             "session_id": session_id,
@@ -2771,7 +2911,7 @@ def query_documents_stream():
                         logger.error(f"Error in run_and_stream: {e}")
                         import traceback
                         traceback.print_exc()
-                        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+                        yield sse_frame({'type': 'error', 'message': str(e)})
             
                 # Run async stream
                 # Note: run_and_stream() is an async generator, so we need to consume it properly
@@ -2789,6 +2929,7 @@ def query_documents_stream():
                 
                 def run_async_gen():
                     """Run the async generator in a separate thread with its own event loop"""
+                    tracing.attach(query_trace)
                     try:
                         logger.info("🟠 [STREAM] run_async_gen() thread started")
                         # Create new event loop for this thread
@@ -2817,7 +2958,7 @@ def query_documents_stream():
                                 logger.error(f"🟠 [STREAM] Error in consume_async_gen: {e}", exc_info=True)
                                 error_occurred.set()
                                 error_message[0] = str(e)
-                                chunk_queue.put(f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n")
+                                chunk_queue.put(sse_frame({'type': 'error', 'message': str(e)}))
                         
                         async def watch_client_disconnect():
                             """Exit when client disconnects so we can cancel the consumer."""
@@ -2885,8 +3026,9 @@ def query_documents_stream():
                         logger.error(f"🟠 [STREAM] Error in run_async_gen: {e}", exc_info=True)
                         error_occurred.set()
                         error_message[0] = str(e)
-                        chunk_queue.put(f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n")
+                        chunk_queue.put(sse_frame({'type': 'error', 'message': str(e)}))
                     finally:
+                        tracing.finish_trace(query_trace, error_message[0])
                         chunk_queue.put(None)  # Signal completion
                 
                 # Start async generator in a separate thread
@@ -2895,12 +3037,14 @@ def query_documents_stream():
                 logger.info("🟠 [STREAM] Thread started")
                 
                 # Yield chunks from queue
+                last_frame_at = time.monotonic()
                 while True:
                     try:
                         chunk = chunk_queue.get(timeout=1.0)
                         if chunk is None:  # Completion signal
                             break
                         yield chunk
+                        last_frame_at = time.monotonic()
                     except (BrokenPipeError, ConnectionResetError):
                         # Client disconnected (e.g., pause, stop, navigated away)
                         # Signal stream thread to cancel so backend retrieval/LLM stop
@@ -2912,10 +3056,19 @@ def query_documents_stream():
                         if not thread.is_alive():
                             if error_occurred.is_set():
                                 try:
-                                    yield f"data: {json.dumps({'type': 'error', 'message': error_message[0] or 'Unknown error'})}\n\n"
+                                    yield sse_frame({'type': 'error', 'message': error_message[0] or 'Unknown error'})
                                 except (BrokenPipeError, ConnectionResetError):
                                     logger.info("🔴 [STREAM] Client disconnected while sending error")
                             break
+                        # Keep idle connections open through proxies during long retrieval/LLM phases
+                        if time.monotonic() - last_frame_at >= HEARTBEAT_SECONDS:
+                            try:
+                                yield HEARTBEAT_FRAME
+                            except (BrokenPipeError, ConnectionResetError):
+                                client_disconnected.set()
+                                logger.info("🔴 [STREAM] Client disconnected (heartbeat), stopping stream")
+                                break
+                            last_frame_at = time.monotonic()
                         continue
                     except Exception as queue_err:
                         # Other queue errors - check thread status
@@ -2937,7 +3090,7 @@ def query_documents_stream():
                 import traceback
                 logger.error(f"❌ [STREAM] Traceback: {traceback.format_exc()}")
                 try:
-                    yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+                    yield sse_frame({'type': 'error', 'message': str(e)})
                 except (BrokenPipeError, ConnectionResetError):
                     logger.info("🔴 [STREAM] Client disconnected while sending error")
         
@@ -2950,9 +3103,11 @@ def query_documents_stream():
             headers={
                 'Cache-Control': 'no-cache',
                 'X-Accel-Buffering': 'no',  # Disable nginx buffering
+                'X-Request-ID': request_id,
+                'Access-Control-Expose-Headers': 'X-Request-ID',
                 'Access-Control-Allow-Origin': request.headers.get('Origin', '*'),
                 'Access-Control-Allow-Credentials': 'true',
-                'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+                'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Request-ID',
                 'Access-Control-Allow-Methods': 'POST, OPTIONS',
             }
         )
@@ -2974,6 +3129,33 @@ def query_documents_stream():
         response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
         return response, 500
 
+def _checkpoint_loader():
+    """Return callable(thread_id) -> checkpoint tuple via the GraphRunner loop, or None."""
+    try:
+        from backend.llm.runtime.graph_runner import graph_runner
+        if graph_runner.get_checkpointer() is None:
+            return None
+        return graph_runner.get_checkpoint_tuple_sync
+    except Exception as e:
+        logger.debug(f"Checkpoint loader unavailable: {e}")
+        return None
+
+
+def _record_transcript_turn(thread_id, user_content, assistant_content, citations=None):
+    """Append a completed turn to the chat transcript off the request thread (non-fatal)."""
+    def _write():
+        from backend.llm.utils.transcript_store import transcript_store
+        transcript_store.append_turn(
+            thread_id,
+            user_content,
+            assistant_content,
+            citations=citations,
+            checkpoint_loader=_checkpoint_loader()
+        )
+    import threading
+    threading.Thread(target=_write, name="TranscriptAppend", daemon=True).start()
+
+
 @views.route('/api/llm/sessions/<session_id>', methods=['DELETE', 'OPTIONS'])
 @login_required
 def delete_session(session_id):
@@ -3059,6 +3241,10 @@ def delete_session(session_id):
             .execute()
         logger.info(f"🗑️ [SESSION_DELETE] Checkpoint writes deleted: {len(writes_result.data) if writes_result.data else 0} rows")
         
+        # Delete compact transcript
+        from backend.llm.utils.transcript_store import transcript_store
+        transcript_store.delete_thread(thread_id)
+        
         # Delete from chat_sessions table (if exists)
         logger.info(f"🗑️ [SESSION_DELETE] Deleting from chat_sessions table...")
         try:
@@ -3216,11 +3402,12 @@ def list_sessions():
         
         logger.info(f"[SESSION_LIST] Fetching sessions for user {current_user.id} (archived: {include_archived})")
         
-        # Query chat_sessions from Supabase
+        # Query chat_sessions from Supabase (projection only - no heavy columns)
+        from backend.llm.utils.transcript_store import SESSION_LIST_COLUMNS
         supabase = get_supabase_client()
         
         query = supabase.table('chat_sessions')\
-            .select('*')\
+            .select(SESSION_LIST_COLUMNS)\
             .eq('user_id', current_user.id)\
             .order('last_message_at', desc=True)\
             .limit(limit)\
@@ -3261,7 +3448,9 @@ def get_session(session_id):
     Get a specific chat session with its metadata and optionally load conversation history.
     
     Query parameters:
-        - include_messages: Load conversation from checkpointer (default: false)
+        - include_messages: Load conversation transcript (default: false)
+        - messages_limit: Max messages to return (default: 200, newest page)
+        - messages_before: Cursor from a previous response's messages_next_cursor
     
     Returns:
         JSON response with session metadata and optionally messages
@@ -3283,8 +3472,9 @@ def get_session(session_id):
         # Get session from Supabase
         supabase = get_supabase_client()
         
+        from backend.llm.utils.transcript_store import SESSION_LIST_COLUMNS
         result = supabase.table('chat_sessions')\
-            .select('*')\
+            .select(SESSION_LIST_COLUMNS)\
             .eq('id', session_id)\
             .eq('user_id', current_user.id)\
             .execute()
@@ -3305,36 +3495,27 @@ def get_session(session_id):
             'data': session_data
         }
         
-        # Optionally load messages from checkpointer
+        # Optionally load messages from the compact transcript (legacy sessions are
+        # projected from the checkpoint once and backfilled)
         if include_messages:
             try:
-                # Load conversation from checkpointer
-                from backend.llm.graphs.main_graph import main_graph, checkpointer
+                from backend.llm.utils.transcript_store import transcript_store, DEFAULT_PAGE_SIZE
                 
-                if checkpointer:
-                    thread_id = session_data['thread_id']
-                    config = {"configurable": {"thread_id": thread_id}}
-                    
-                    # Get latest checkpoint
-                    checkpoint_tuple = checkpointer.get_tuple(config)
-                    
-                    if checkpoint_tuple and checkpoint_tuple.checkpoint:
-                        channel_values = checkpoint_tuple.checkpoint.get('channel_values', {})
-                        messages = channel_values.get('messages', [])
-                        
-                        # Convert messages to serializable format
-                        serialized_messages = []
-                        for msg in messages:
-                            msg_dict = {
-                                'type': msg.__class__.__name__,
-                                'content': getattr(msg, 'content', None)
-                            }
-                            serialized_messages.append(msg_dict)
-                        
-                        response_data['messages'] = serialized_messages
-                        logger.info(f"[SESSION_GET] Loaded {len(serialized_messages)} messages for session {session_id}")
-                else:
-                    logger.warning("[SESSION_GET] Checkpointer not available, cannot load messages")
+                messages_limit = int(request.args.get('messages_limit', DEFAULT_PAGE_SIZE))
+                messages_before = request.args.get('messages_before')
+                page = transcript_store.get_messages(
+                    session_data['thread_id'],
+                    limit=messages_limit,
+                    before=int(messages_before) if messages_before else None,
+                    checkpoint_loader=_checkpoint_loader()
+                )
+                
+                response_data['messages'] = page['messages']
+                response_data['messages_next_cursor'] = page['next_cursor']
+                logger.info(
+                    f"[SESSION_GET] Loaded {len(page['messages'])} messages for session {session_id} "
+                    f"(source: {page['source']})"
+                )
             except Exception as msg_error:
                 logger.warning(f"[SESSION_GET] Could not load messages: {msg_error}")
                 response_data['messages_error'] = str(msg_error)
@@ -3510,6 +3691,12 @@ def query_documents():
         business_id=business_id or "no_business",
         session_id=frontend_session_id
     )
+    request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    query_trace = tracing.start_trace(
+        request_id, 'llm.query', user_id=current_user.id,
+        session_id=session_id, business_id=str(business_id) if business_id else None,
+        query_preview=query[:100] if query else ''
+    )
     
     citation_context = data.get('citationContext')  # Get structured citation metadata (hidden from user)
     response_mode = data.get('responseMode')  # NEW: Response mode for file attachments (fast/detailed/full)
@@ -3574,10 +3761,17 @@ def query_documents():
             "document_ids": document_ids if document_ids else None,  # NEW: Pass document IDs for fast path
             "citation_context": citation_context,  # NEW: Pass structured citation metadata (bbox, page, text)
             "response_mode": response_mode if response_mode else None,  # NEW: Response mode for attachments (fast/detailed/full) - ensure None not empty string
-            "attachment_context": attachment_context if attachment_context else None  # NEW: Extracted text from attached files - ensure None not empty dict
+            "attachment_context": attachment_context if attachment_context else None,  # NEW: Extracted text from attached files - ensure None not empty dict
+            "use_cached_results": False,  # Follow-up reuse is decided per turn by the retrieval_cache node
+            "retrieval_reuse": None,
+            "plan_refinement_count": 0,
+            "execution_plan": None,  # Previous turn's plan would make the planner treat this turn as a re-plan
+            "speculation_id": None,
         }
         
         async def run_query():
+            # asyncio.run gives this coroutine its own context, so the trace doesn't outlive the request
+            tracing.attach(query_trace)
             try:
                 # Prefer persistent GraphRunner graph (compiled once on startup).
                 # Falls back to legacy behavior if runner isn't available.
@@ -3615,7 +3809,8 @@ def query_documents():
                             "query_preview": query[:100] if query else "",  # First 100 chars for context
                             "endpoint": "query"
                         }
-                    }
+                    },
+                    "callbacks": tracing.llm_trace_callbacks(),
                 }
                 result = await graph.ainvoke(initial_state, config)
                 timing.mark("graph_done")
@@ -3635,7 +3830,12 @@ def query_documents():
         
         # Run async graph
         logger.info(f"Running LangGraph query: '{query[:50]}...' (property_id: {property_id}, session: {session_id})")
-        result = asyncio.run(run_query())
+        try:
+            result = asyncio.run(run_query())
+        except Exception as query_error:
+            tracing.finish_trace(query_trace, str(query_error))
+            raise
+        tracing.finish_trace(query_trace)
         timing.mark("response_ready")
         
         # Format response for frontend
@@ -3663,6 +3863,9 @@ def query_documents():
             except Exception as mem_err:
                 logger.warning(f"[MEMORY] Failed to store memories (non-streaming): {mem_err}")
         
+        if final_summary:
+            _record_transcript_turn(session_id, query, final_summary)
+        
         # Let agent handle empty responses naturally - no hard-coded fallbacks
         
         response_data = {
@@ -3671,7 +3874,8 @@ def query_documents():
             "message": final_summary,  # Alias for compatibility
             "relevant_documents": result.get("relevant_documents", []),
             "document_outputs": result.get("document_outputs", []),
-            "session_id": session_id
+            "session_id": session_id,
+            "request_id": request_id
         }
         
         logger.info(f"LangGraph query completed: {len(result.get('relevant_documents', []))} documents found")
@@ -3697,6 +3901,27 @@ def query_documents():
             'error': str(e)
         }), 500
 
+@views.route('/api/llm/trace/<request_id>', methods=['GET'])
+@login_required
+def get_query_trace(request_id):
+    """Span tree and per-stage totals for one query (request id from X-Request-ID / the complete event)."""
+    # Scoped to the owner: another user's trace (or one without an owner) is a plain 404
+    trace = tracing.trace_store.get(request_id, user_id=current_user.id)
+    if trace is None:
+        return jsonify({'success': False, 'error': 'Trace not found (not sampled or expired)'}), 404
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'request_id': trace['request_id'],
+            'trace_id': trace['trace_id'],
+            'duration_ms': trace['duration_ms'],
+            'stages': tracing.stage_breakdown(trace),
+            'dropped_spans': trace.get('dropped_spans', 0),
+            'tree': tracing.build_span_tree(trace),
+        }
+    }), 200
+
 @views.route('/api/vector/search', methods=['POST'])
 @login_required
 def vector_search():
@@ -4904,7 +5129,6 @@ def upload_document():
                 region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
             )
             
-            # Read file content once (will be reused for full processing task)
             file.seek(0)  # Reset file pointer
             file_content = file.read()
             
@@ -4959,9 +5183,10 @@ def upload_document():
                 # Queue full processing task (process_document_task → process_document_classification → full extraction)
                 task = process_document_task.delay(
                     document_id=doc_id,
-                    file_content=file_content,
+                    file_content=None,  # Downloaded from S3 by the worker, not sent through the broker
                     original_filename=filename,
-                    business_id=str(business_uuid_str)
+                    business_id=str(business_uuid_str),
+                    s3_path=s3_key
                 )
                 logger.info(f"🔄 [UPLOAD] ✅ Queued full processing task {task.id} for document {doc_id}")
                 logger.info(f"   Pipeline: classification → extraction → embedding")
@@ -4999,11 +5224,27 @@ def upload_document():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 500
 
-# One-time tokens for "open in Word Online" - token -> (bucket, key, expiry_ts). Office Online needs a URL it can fetch; presigned S3 URLs often fail.
-_temp_preview_tokens = {}
+# One-time tokens for "open in Word Online" - token -> {bucket, key, expires_at}. Office Online needs a URL it can fetch; presigned S3 URLs often fail.
+# Shared across workers/instances (Redis when available) so Office's retries can land on any worker.
+from .services.temp_token_store import get_token_store
 _TEMP_PREVIEW_TOKEN_TTL_SEC = 3600
 
 
+def _issue_preview_token(bucket, key):
+    """Returns the token, or None if it could not be stored (the link would 404)."""
+    token = uuid.uuid4().hex
+    try:
+        stored = get_token_store('preview').set(
+            token,
+            {'bucket': bucket, 'key': key, 'expires_at': time.time() + _TEMP_PREVIEW_TOKEN_TTL_SEC},
+            ttl_seconds=_TEMP_PREVIEW_TOKEN_TTL_SEC
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to store preview token: {e}")
+        stored = False
+    return token if stored else None
+
+
 @views.route('/api/documents/temp-preview', methods=['POST'])
 @login_required
 def temp_preview():
@@ -5024,8 +5265,9 @@ def temp_preview():
     s3_client.put_object(Bucket=bucket, Key=s3_key, Body=file.read(), ContentType=content_type)
     presigned_url = s3_client.generate_presigned_url('get_object', Params={'Bucket': bucket, 'Key': s3_key}, ExpiresIn=3600)
 
-    token = uuid.uuid4().hex
-    _temp_preview_tokens[token] = (bucket, s3_key, time.time() + _TEMP_PREVIEW_TOKEN_TTL_SEC)
+    token = _issue_preview_token(bucket, s3_key)
+    if token is None:
+        return jsonify({'error': 'Preview links are temporarily unavailable'}), 503
     base = request.url_root.rstrip('/')
     open_in_word_url = f"{base}/api/documents/open-in-word?token={token}"
 
@@ -5055,8 +5297,9 @@ def docx_preview_url():
         bucket = os.environ.get('S3_UPLOAD_BUCKET')
         if not bucket:
             return jsonify({'error': 'Server misconfigured'}), 500
-        token = uuid.uuid4().hex
-        _temp_preview_tokens[token] = (bucket, s3_path, time.time() + _TEMP_PREVIEW_TOKEN_TTL_SEC)
+        token = _issue_preview_token(bucket, s3_path)
+        if token is None:
+            return jsonify({'error': 'Preview links are temporarily unavailable'}), 503
         base = request.url_root.rstrip('/')
         open_in_word_url = f"{base}/api/documents/open-in-word?token={token}"
         return jsonify({'open_in_word_url': open_in_word_url, 'presigned_url': None}), 200
@@ -5072,21 +5315,19 @@ def open_in_word():
     token = request.args.get('token')
     if not token:
         return jsonify({'error': 'Missing token'}), 400
-    entry = _temp_preview_tokens.get(token)
+    entry = get_token_store('preview').get(token)
     if not entry:
         return jsonify({'error': 'Invalid or expired token'}), 404
-    bucket, key, expiry = entry
+    bucket, key, expiry = entry['bucket'], entry['key'], entry['expires_at']
     if time.time() > expiry:
         return jsonify({'error': 'Link expired'}), 410
     try:
-        s3_client = boto3.client('s3',
-            aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-            aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-            region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
-        resp = s3_client.get_object(Bucket=bucket, Key=key)
-        body = resp['Body']
-        content_type = resp.get('ContentType') or 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        return Response(body.read(), mimetype=content_type, headers={'Content-Disposition': 'inline'})
+        from .services.file_streaming_service import stream_s3_object
+        return stream_s3_object(
+            bucket,
+            key,
+            default_content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        )
     except Exception as e:
         logging.exception("open_in_word get_object failed: %s", e)
         return jsonify({'error': 'Failed to load document'}), 500
@@ -5604,24 +5845,19 @@ def reprocess_document(document_id):
         if not bucket:
             return jsonify({'success': False, 'error': 'S3 bucket not configured'}), 500
 
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
-        )
-        response = s3_client.get_object(Bucket=bucket, Key=s3_path)
-        file_content = response['Body'].read()
         original_filename = document.get('original_filename', 'document')
         business_id = str(doc_business_uuid or doc_business_id or user_business_id or user_company_name)
 
         doc_service.update_document(str(document_id), {'status': 'processing'})
 
+        # file_content=None: the worker downloads from S3 itself, so the file is never
+        # buffered in this request worker or serialized through the broker.
         task = process_document_task.delay(
             document_id=str(document_id),
-            file_content=file_content,
+            file_content=None,
             original_filename=original_filename,
             business_id=business_id,
+            s3_path=s3_path,
         )
         logger.info(f"Reprocess queued for document {document_id} (task_id={task.id})")
         return jsonify({
@@ -5653,28 +5889,14 @@ def confirm_upload(document_id):
         document.status = DocumentStatus.UPLOADED
         db.session.commit()
         
-        # Get file content from S3 for processing
+        # Trigger processing task (the worker downloads the file from S3 itself)
         try:
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-                region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-            )
-            
-            # Download file from S3
-            response = s3_client.get_object(
-                Bucket=os.environ['S3_UPLOAD_BUCKET'],
-                Key=document.s3_path
-            )
-            file_content = response['Body'].read()
-            
-            # Trigger processing task
             task = process_document_task.delay(
                 document_id=document.id,
-                file_content=file_content,
+                file_content=None,
                 original_filename=document.original_filename,
-                business_id=document.business_id
+                business_id=document.business_id,
+                s3_path=document.s3_path
             )
             
             return jsonify({
@@ -5704,9 +5926,8 @@ def geocode_address_endpoint():
     address = data.get('address', '')
     
     try:
-        from .services.geocoding_service import GeocodingService
-        geo = GeocodingService()
-        result = geo.geocode_address(address)
+        from .services.geocoding_service import geocoding_service
+        result = geocoding_service.geocode_address(address)
         
         return jsonify({
             'success': True,
@@ -5727,9 +5948,8 @@ def reverse_geocode_endpoint():
     lng = data.get('lng')
     
     try:
-        from .services.geocoding_service import GeocodingService
-        geo = GeocodingService()
-        result = geo.reverse_geocode(lat, lng)
+        from .services.geocoding_service import geocoding_service
+        result = geocoding_service.reverse_geocode(lat, lng)
         
         return jsonify({
             'success': True,
@@ -5749,9 +5969,8 @@ def search_location():
     query = data.get('query', '')
     
     try:
-        from .services.geocoding_service import GeocodingService
-        geo = GeocodingService()
-        results = geo.search_location(query)
+        from .services.geocoding_service import geocoding_service
+        results = geocoding_service.search_location(query)
         
         return jsonify({
             'success': True,
@@ -7774,30 +7993,16 @@ def download_file():
             original_filename = s3_path.split('/')[-1] if s3_path else 'document'
             file_type = 'application/octet-stream'
         
-        # Download file from S3
+        # Stream file from S3 (Range / If-None-Match aware, never buffered in the worker)
         try:
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-                aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-                region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-            )
+            from .services.file_streaming_service import stream_s3_object
             
             bucket_name = os.environ['S3_UPLOAD_BUCKET']
-            response = s3_client.get_object(Bucket=bucket_name, Key=s3_path)
-            file_content = response['Body'].read()
-            
-            # Determine content type
-            content_type = response.get('ContentType', file_type)
-            
-            # Create Flask response with file content
-            return Response(
-                file_content,
-                mimetype=content_type,
-                headers={
-                    'Content-Disposition': f'inline; filename="{original_filename}"',
-                    'Content-Type': content_type
-                }
+            return stream_s3_object(
+                bucket_name,
+                s3_path,
+                filename=original_filename,
+                default_content_type=file_type
             )
             
         except ClientError as e:
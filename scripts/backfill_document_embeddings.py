@@ -9,11 +9,19 @@ This script:
 
 Usage:
     python scripts/backfill_document_embeddings.py [--business-id BUSINESS_UUID] [--dry-run]
+    python scripts/backfill_document_embeddings.py --all-documents --accumulators-only
+
+--accumulators-only skips summary/topic regeneration and only rebuilds the running
+sum/count used for incremental document embeddings (see DocumentEmbeddingMaintainer).
+
+--quantized-codes only writes document_vectors.embedding_int8 for chunks that don't have it
+yet (backend/migrations/add_quantized_chunk_embeddings.sql).
 """
 
 import sys
 import os
 import argparse
+import json
 import logging
 from typing import List, Optional
 
@@ -30,7 +38,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Now import backend modules (after .env is loaded)
 from backend.services.document_summary_service import DocumentSummaryService
+from backend.services.document_embedding_maintainer import get_document_embedding_maintainer
 from backend.services.supabase_client_factory import get_supabase_client
+from backend.services.embedding_quantization import encode_int8
 
 logging.basicConfig(
     level=logging.INFO,
@@ -178,6 +188,28 @@ def backfill_document_embedding(document_id: str, dry_run: bool = False) -> bool
         return False
 
 
+def backfill_quantized_codes(document_id: str, dry_run: bool = False) -> int:
+    """
+    Write int8 codes for a document's embedded chunks that don't have them yet.
+    
+    Returns:
+        Number of chunks updated (or that would be, in dry-run mode)
+    """
+    supabase = get_supabase_client()
+    rows = supabase.table('document_vectors').select('id, embedding').eq(
+        'document_id', document_id
+    ).not_.is_('embedding', 'null').is_('embedding_int8', 'null').execute().data or []
+    
+    if dry_run:
+        return len(rows)
+    
+    for row in rows:
+        supabase.table('document_vectors').update({
+            'embedding_int8': encode_int8(json.loads(row['embedding']) if isinstance(row['embedding'], str) else row['embedding'])
+        }).eq('id', row['id']).execute()
+    return len(rows)
+
+
 def main():
     """Main entry point for backfill script."""
     parser = argparse.ArgumentParser(
@@ -203,6 +235,16 @@ def main():
         type=str,
         help='Specific document ID to backfill (optional)'
     )
+    parser.add_argument(
+        '--accumulators-only',
+        action='store_true',
+        help='Only rebuild incremental embedding accumulators (and republish the mean)'
+    )
+    parser.add_argument(
+        '--quantized-codes',
+        action='store_true',
+        help='Only write missing int8 chunk embedding codes (embedding_int8)'
+    )
     
     args = parser.parse_args()
     
@@ -220,6 +262,28 @@ def main():
         logger.warning("No documents found to backfill")
         return
     
+    if args.quantized_codes:
+        total = 0
+        for i, doc in enumerate(documents, 1):
+            total += backfill_quantized_codes(doc['id'], dry_run=args.dry_run)
+            if i % 50 == 0:
+                logger.info(f"   Quantized chunks for {i}/{len(documents)} documents")
+        logger.info("=" * 60)
+        logger.info(f"int8 code backfill complete: {total} chunks{' (dry run)' if args.dry_run else ''}")
+        logger.info("=" * 60)
+        return
+    
+    if args.accumulators_only:
+        if args.dry_run:
+            logger.info(f"[DRY RUN] Would rebuild accumulators for {len(documents)} documents")
+            return
+        results = get_document_embedding_maintainer().rebuild_many([doc['id'] for doc in documents])
+        successful = sum(1 for ok in results.values() if ok)
+        logger.info("=" * 60)
+        logger.info(f"Accumulator rebuild complete: {successful}/{len(results)} documents")
+        logger.info("=" * 60)
+        return
+    
     # Process each document
     successful = 0
     failed = 0
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the external services used by the query and ingestion paths.
+
+Shared by scripts/benchmark_query_latency.py and scripts/benchmark_ingestion.py so the
+benchmarks run offline, deterministically, and with configurable service latency:
+
+- hash_embedding: deterministic bag-of-words embedding (1024 dims, L2-normalised), so the
+  fake vector search ranks seeded chunks by real lexical overlap with the query
+- FakeSupabase: in-memory tables plus the match_document_embeddings / match_chunks RPCs,
+  implementing the PostgREST builder subset the retrieval, citation and ingestion code uses
+  (select/eq/neq/in_/is_/or_ ilike/order/limit/range/single, insert/upsert/update/delete),
+  with sync and async execute()
+- install_fake_embeddings / install_fake_chat_model / install_fake_supabase: patch the
+  backend in-process (call before building the graph)
+- seed_corpus: seeded documents and chunks for one business
+
+Latencies are simulated with time.sleep / asyncio.sleep so they occupy wall time the way
+network calls do without burning CPU.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+EMBEDDING_DIM = 1024
+
+_TOKEN_RE = re.compile(r"[a-z0-9£]+")
+_BLOCK_ID_RE = re.compile(r"BLOCK_CITE_ID_\d+")
+
+
+# ---------------------------------------------------------------------------
+# Embeddings
+# ---------------------------------------------------------------------------
+
+def hash_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Deterministic hashed bag-of-words embedding (unit length)."""
+    vector = [0.0] * dim
+    for token in _TOKEN_RE.findall((text or '').lower()):
+        digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], 'little') % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def install_fake_embeddings(latency_ms: float) -> None:
+    """Replace Voyage/OpenAI query embedding (and the ingestion embedder) with hash_embedding."""
+    from backend.llm.utils import query_embedding
+
+    def _embed_query(query: str, purpose: str) -> Optional[List[float]]:
+        time.sleep(latency_ms / 1000)
+        return hash_embedding(query)
+
+    async def _aembed_query(query: str, purpose: str) -> Optional[List[float]]:
+        await asyncio.sleep(latency_ms / 1000)
+        return hash_embedding(query)
+
+    query_embedding._embed_query = _embed_query
+    query_embedding._aembed_query = _aembed_query
+
+    def create_embeddings(self, text_chunks: List[str]) -> List[List[float]]:
+        # One simulated round trip per batch of 128 texts (Voyage batch size)
+        time.sleep(latency_ms / 1000 * max(1, math.ceil(len(text_chunks) / 128)))
+        return [hash_embedding(text) for text in text_chunks]
+
+    try:
+        from backend.services.vector_service import SupabaseVectorService
+        SupabaseVectorService.create_embeddings = create_embeddings
+    except ImportError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Chat model
+# ---------------------------------------------------------------------------
+
+def _synthesize(schema: Dict[str, Any], answer: str) -> Dict[str, Any]:
+    """Fill a JSON schema's properties with plausible values (answer text for free-text fields)."""
+    values: Dict[str, Any] = {}
+    for name, prop in (schema.get('properties') or {}).items():
+        kind = prop.get('type')
+        if prop.get('enum'):
+            values[name] = prop['enum'][0]
+        elif kind == 'string' or 'anyOf' in prop:
+            values[name] = answer if name in ('response', 'answer', 'text', 'content', 'summary') else 'default'
+        elif kind == 'boolean':
+            values[name] = False
+        elif kind in ('integer', 'number'):
+            values[name] = 0
+        elif kind == 'array':
+            values[name] = []
+        elif kind == 'object':
+            values[name] = {}
+    return values
+
+
+def _message_text(messages: List[Any]) -> str:
+    parts = []
+    for message in messages:
+        content = getattr(message, 'content', message)
+        parts.append(content if isinstance(content, str) else json.dumps(content, default=str))
+    return '\n'.join(parts)
+
+
+def fake_answer(prompt_text: str, user_query: str) -> str:
+    """Answer text citing the first blocks in the prompt (exercises citation mapping)."""
+    block_ids = list(dict.fromkeys(_BLOCK_ID_RE.findall(prompt_text)))[:3]
+    if not block_ids:
+        return f"I couldn't find that in the documents for: {user_query}"
+    sentences = [
+        f"The documents address this directly [ID: {i + 1}]({block_id})."
+        for i, block_id in enumerate(block_ids)
+    ]
+    return f"Here is what the documents say about {user_query}:\n\n" + ' '.join(sentences)
+
+
+_BLOCK_RE = re.compile(r'<BLOCK id="(BLOCK_CITE_ID_\d+)">\s*(?:Content:\s*)?(.+?)\s*</BLOCK>', re.S)
+
+
+def fake_segments(prompt_text: str, user_query: str) -> List[Dict[str, Any]]:
+    """Answer segments for the anchor-quote flow, quoting the first blocks in the prompt verbatim."""
+    segments: List[Dict[str, Any]] = [
+        {'type': 'text', 'content': f"Here is what the documents say about {user_query}: "}
+    ]
+    for number, (block_id, content) in enumerate(_BLOCK_RE.findall(prompt_text)[:3], start=1):
+        segments.append({'type': 'text', 'content': 'The documents address this directly '})
+        segments.append({'type': 'cite', 'anchor_quote': content.strip()[:40], 'citation_number': number,
+                         'block_id': block_id, 'doc_id': None})
+        segments.append({'type': 'text', 'content': '. '})
+    return segments
+
+
+def fake_plan(user_query: str) -> str:
+    return json.dumps({
+        'objective': f'Answer query: {user_query}',
+        'steps': [
+            {'id': 'search_docs', 'action': 'retrieve_docs', 'query': user_query,
+             'document_ids': None, 'reasoning_label': 'Searched documents', 'reasoning_detail': None},
+            {'id': 'search_chunks', 'action': 'retrieve_chunks', 'query': user_query,
+             'document_ids': ['<from_step_search_docs>'], 'reasoning_label': 'Reviewed relevant sections',
+             'reasoning_detail': None},
+        ],
+        'use_prior_context': False,
+        'format_instruction': None,
+    })
+
+
+def install_fake_chat_model(latency_ms: float, current_query: Callable[[], str],
+                            ms_per_output_token: float = 0.0) -> None:
+    """
+    Patch ChatOpenAI generation with canned, prompt-aware responses:
+    planner prompts get a 2-step plan, answer-segment prompts get segments quoting the
+    prompt's blocks, tool/structured-output calls get schema-shaped arguments, everything
+    else gets an answer that cites blocks from the prompt.
+    """
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+    from langchain_openai import ChatOpenAI
+
+    def _respond(messages: List[Any], kwargs: Dict[str, Any]) -> ChatResult:
+        prompt_text = _message_text(messages)
+        query = current_query()
+        if 'use_prior_context' in prompt_text and 'steps' in prompt_text:
+            message = AIMessage(content=fake_plan(query))
+        elif 'JSON array of segments' in prompt_text:
+            segments = fake_segments(prompt_text, query)
+            # Structured-output mode wraps the array in {"segments": [...]}
+            wrapped = kwargs.get('response_format') is not None
+            message = AIMessage(content=json.dumps({'segments': segments} if wrapped else segments))
+        else:
+            answer = fake_answer(prompt_text, query)
+            tools = kwargs.get('tools') or []
+            response_format = kwargs.get('response_format')
+            if tools:
+                function = tools[0].get('function', tools[0])
+                args = _synthesize(function.get('parameters') or {}, answer)
+                message = AIMessage(content='', tool_calls=[{'name': function.get('name'), 'args': args, 'id': f"call_{uuid.uuid4().hex[:12]}"}])
+            elif response_format is not None:
+                if isinstance(response_format, dict):
+                    schema = (response_format.get('json_schema') or {}).get('schema') or {}
+                    message = AIMessage(content=json.dumps(_synthesize(schema, answer)))
+                else:
+                    # Pydantic class (langchain-openai json_schema structured output)
+                    values = _synthesize(response_format.model_json_schema(), answer)
+                    message = AIMessage(content=json.dumps(values), additional_kwargs={'parsed': response_format(**values)})
+            else:
+                message = AIMessage(content=answer)
+        output_tokens = max(1, len(str(message.content)) // 4)
+        usage = {'prompt_tokens': len(prompt_text) // 4, 'completion_tokens': output_tokens}
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={'token_usage': usage}), output_tokens
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        result, output_tokens = _respond(messages, kwargs)
+        time.sleep((latency_ms + ms_per_output_token * output_tokens) / 1000)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        result, output_tokens = _respond(messages, kwargs)
+        await asyncio.sleep((latency_ms + ms_per_output_token * output_tokens) / 1000)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        """Explicit .astream() calls: first chunk after latency_ms, then ~4 chars per output token."""
+        result, _ = _respond(messages, kwargs)
+        content = str(result.generations[0].message.content)
+        await asyncio.sleep(latency_ms / 1000)
+        for start in range(0, max(len(content), 1), 4):
+            if start:
+                await asyncio.sleep(ms_per_output_token / 1000)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=content[start:start + 4]))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    ChatOpenAI._generate = _generate
+    ChatOpenAI._agenerate = _agenerate
+    ChatOpenAI._astream = _astream
+    # Only explicit .astream() calls stream; invoke/ainvoke (even under astream_events) use _agenerate
+    ChatOpenAI._should_stream = lambda self, async_api=False, run_manager=None, **kwargs: (
+        async_api and kwargs.get('stream') is True
+    )
+
+
+# ---------------------------------------------------------------------------
+# Supabase
+# ---------------------------------------------------------------------------
+
+class _Response:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _ilike(value: Any, pattern: str) -> bool:
+    regex = '^' + '.*'.join(re.escape(part) for part in pattern.split('%')) + '$'
+    return re.match(regex, str(value or ''), re.IGNORECASE | re.DOTALL) is not None
+
+
+class _Query:
+    """Chainable PostgREST-style query over an in-memory table."""
+
+    def __init__(self, db: 'FakeSupabase', table: str, is_async: bool):
+        self._db = db
+        self._table = table
+        self._async = is_async
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._columns: Optional[List[str]] = None
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+        self._mutation: Optional[tuple] = None
+
+    # -- builders ------------------------------------------------------------
+    def select(self, columns: str = '*', count: Optional[str] = None, **_):
+        if self._mutation is None:
+            names = [c.strip() for c in re.sub(r'\w+\([^)]*\)', '', columns).split(',') if c.strip()]
+            self._columns = None if '*' in names or not names else names
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(lambda row: str(row.get(column)) != str(value))
+        return self
+
+    def in_(self, column, values):
+        allowed = {str(v) for v in values}
+        self._filters.append(lambda row: str(row.get(column)) in allowed)
+        return self
+
+    def is_(self, column, value):
+        self._filters.append(lambda row: (row.get(column) is None) == (str(value) == 'null'))
+        return self
+
+    @property
+    def not_(self):
+        # Negated filters are only used for 'IS NULL' checks on joined tables; treat as pass-through
+        return _PassThrough(self)
+
+    def ilike(self, column, pattern):
+        self._filters.append(lambda row: _ilike(row.get(column), pattern))
+        return self
+
+    def or_(self, conditions: str, **_):
+        clauses = []
+        for part in conditions.split(','):
+            pieces = part.split('.', 2)
+            if len(pieces) == 3 and pieces[1] == 'ilike':
+                clauses.append((pieces[0], pieces[2]))
+        self._filters.append(lambda row: any(_ilike(row.get(col), pat) for col, pat in clauses))
+        return self
+
+    def order(self, column, desc: bool = False, **_):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count: int, **_):
+        self._limit = count
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    maybe_single = single
+
+    def insert(self, rows, **_):
+        self._mutation = ('insert', rows)
+        return self
+
+    def upsert(self, rows, **_):
+        self._mutation = ('upsert', rows)
+        return self
+
+    def update(self, values, **_):
+        self._mutation = ('update', values)
+        return self
+
+    def delete(self, **_):
+        self._mutation = ('delete', None)
+        return self
+
+    def __getattr__(self, name):
+        # Any other builder method (gte, lte, contains, ...) is accepted and ignored
+        return lambda *args, **kwargs: self
+
+    # -- execution -------------------------------------------------------------
+    def _run(self) -> _Response:
+        rows = self._db.tables.setdefault(self._table, [])
+        if self._mutation is not None:
+            return self._db.mutate(self._table, self._mutation, self._filters)
+        matched = [row for row in rows if all(f(row) for f in self._filters)]
+        for column, desc in reversed(self._order):
+            matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        matched = matched[self._offset:]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        if self._columns is not None:
+            matched = [{c: row.get(c) for c in self._columns} for row in matched]
+        else:
+            matched = [dict(row) for row in matched]
+        if self._single:
+            return _Response(matched[0] if matched else None)
+        return _Response(matched, count=len(matched))
+
+    def execute(self):
+        self._db.calls += 1
+        if self._async:
+            return self._aexecute()
+        time.sleep(self._db.latency_ms / 1000)
+        return self._run()
+
+    async def _aexecute(self):
+        await asyncio.sleep(self._db.latency_ms / 1000)
+        return self._run()
+
+
+class _PassThrough:
+    def __init__(self, query: _Query):
+        self._query = query
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._query
+
+
+class _Rpc:
+    def __init__(self, db: 'FakeSupabase', name: str, params: Dict[str, Any], is_async: bool):
+        self._db = db
+        self._name = name
+        self._params = params
+        self._async = is_async
+
+    def execute(self):
+        self._db.calls += 1
+        if self._async:
+            return self._aexecute()
+        time.sleep(self._db.latency_ms / 1000)
+        return _Response(self._db.call_rpc(self._name, self._params))
+
+    async def _aexecute(self):
+        await asyncio.sleep(self._db.latency_ms / 1000)
+        return _Response(self._db.call_rpc(self._name, self._params))
+
+
+class FakeSupabase:
+    """In-memory Supabase client (tables + vector RPCs)."""
+
+    def __init__(self, latency_ms: float = 0.0, is_async: bool = False, tables: Optional[Dict[str, List[Dict]]] = None):
+        self.latency_ms = latency_ms
+        self.is_async = is_async
+        self.tables: Dict[str, List[Dict[str, Any]]] = tables if tables is not None else {}
+        self.calls = 0
+        self.rpcs: Dict[str, Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = {
+            'match_document_embeddings': self._match_document_embeddings,
+            'match_chunks': self._match_chunks,
+        }
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name, self.is_async)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> _Rpc:
+        return _Rpc(self, name, params or {}, self.is_async)
+
+    def async_view(self) -> 'FakeSupabase':
+        """Async client sharing this client's tables."""
+        view = FakeSupabase(self.latency_ms, is_async=True, tables=self.tables)
+        view.rpcs = self.rpcs
+        return view
+
+    def call_rpc(self, name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        handler = self.rpcs.get(name)
+        if handler is None:
+            raise RuntimeError(f"FakeSupabase: RPC '{name}' is not implemented")
+        return handler(params)
+
+    def mutate(self, table: str, mutation: tuple, filters: List[Callable]) -> _Response:
+        kind, payload = mutation
+        rows = self.tables.setdefault(table, [])
+        if kind in ('insert', 'upsert'):
+            new_rows = payload if isinstance(payload, list) else [payload]
+            stored = []
+            for row in new_rows:
+                row = dict(row)
+                row.setdefault('id', str(uuid.uuid4()))
+                if kind == 'upsert':
+                    rows[:] = [r for r in rows if str(r.get('id')) != str(row['id'])]
+                rows.append(row)
+                stored.append(row)
+            return _Response(stored)
+        matched = [row for row in rows if all(f(row) for f in filters)]
+        if kind == 'update':
+            for row in matched:
+                row.update(payload)
+            return _Response(matched)
+        self.tables[table] = [row for row in rows if row not in matched]
+        return _Response(matched)
+
+    def _match_document_embeddings(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        query = params['query_embedding']
+        threshold = params.get('match_threshold', 0.7)
+        scored = []
+        for doc in self.tables.get('documents', []):
+            embedding = doc.get('document_embedding')
+            if embedding is None:
+                continue
+            similarity = _cosine(query, embedding)
+            if similarity > threshold:
+                scored.append({
+                    'id': doc['id'], 'original_filename': doc.get('original_filename'),
+                    'classification_type': doc.get('classification_type'), 'summary_text': doc.get('summary_text'),
+                    'document_summary': doc.get('document_summary'), 'similarity': similarity,
+                })
+        scored.sort(key=lambda row: row['similarity'], reverse=True)
+        return scored[:params.get('match_count', 20)]
+
+    def _match_chunks(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        query = params['query_embedding']
+        target = str(params.get('target_document_id'))
+        threshold = params.get('match_threshold', 0.6)
+        scored = []
+        for chunk in self.tables.get('document_vectors', []):
+            if str(chunk.get('document_id')) != target or chunk.get('embedding') is None:
+                continue
+            similarity = _cosine(query, chunk['embedding'])
+            if similarity > threshold:
+                scored.append({
+                    'id': chunk['id'], 'document_id': chunk['document_id'], 'chunk_index': chunk.get('chunk_index'),
+                    'chunk_text': chunk.get('chunk_text'), 'chunk_text_clean': chunk.get('chunk_text_clean'),
+                    'page_number': chunk.get('page_number'), 'metadata': chunk.get('metadata'),
+                    'similarity': similarity,
+                })
+        scored.sort(key=lambda row: row['similarity'], reverse=True)
+        return scored[:params.get('match_count', 5)]
+
+
+def install_fake_supabase(client: FakeSupabase) -> None:
+    """Point every imported backend module's Supabase accessors at the fake client."""
+    from backend.services import supabase_client_factory
+
+    async_client = client.async_view()
+
+    def get_supabase_client():
+        return client
+
+    async def get_async_supabase_client():
+        return async_client
+
+    supabase_client_factory.get_supabase_client = get_supabase_client
+    supabase_client_factory.get_async_supabase_client = get_async_supabase_client
+    # Modules bind the accessors at import time (from ... import get_supabase_client)
+    for module in list(sys.modules.values()):
+        name = getattr(module, '__name__', '') or ''
+        if not name.startswith('backend.'):
+            continue
+        if getattr(module, 'get_supabase_client', None) is not None:
+            module.get_supabase_client = get_supabase_client
+        if getattr(module, 'get_async_supabase_client', None) is not None:
+            module.get_async_supabase_client = get_async_supabase_client
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+PROPERTIES = [
+    'Banda Lane', '24 Rudthorpe Road', 'Nzohe LR 1160 750', 'Mbagathi Ridge No 10 Karen',
+    'Highlands Berden Bishops Stortford', 'Kenyajui Espindola Mellifera',
+]
+DOCUMENT_TYPES = {
+    'offer_letter': ['offer price of £{price}', 'completion date of {date}', 'deposit of 10% payable on exchange',
+                     'the offer is subject to contract', 'the buyer is {person}'],
+    'lease': ['annual rent of £{rent} payable quarterly', 'term of {years} years from {date}',
+              'break clause at year {break_year} on six months notice', 'tenant {person}', 'no subletting without consent'],
+    'valuation_report': ['market value of £{price}', 'EPC rating {epc}', 'comparables within half a mile',
+                         'valuer {person} inspected on {date}', 'planning approval for extension'],
+    'inventory': ['inventory dated {date}', 'fixtures and fittings include white goods', 'signed by {person}',
+                  'minor defects noted in the kitchen', 'meter readings recorded'],
+    'letting_agreement': ['commission of {commission}% of annual rent', 'joint agency with Knight Frank',
+                          'break clause so the landlord can remarket', 'pets allowed with consent', 'landlord {person}'],
+}
+_PEOPLE = ['J. Mwangi', 'A. Patel', 'S. Clarke', 'R. Otieno', 'L. Harris', 'M. Wanjiru']
+
+
+def seed_corpus(client: FakeSupabase, business_id: str, n_documents: int = 30, chunks_per_document: int = 12,
+                seed: int = 7) -> List[str]:
+    """Insert deterministic documents and chunks (with embeddings and bboxes); returns document ids."""
+    rng = random.Random(seed)
+    documents = client.tables.setdefault('documents', [])
+    vectors = client.tables.setdefault('document_vectors', [])
+    doc_types = list(DOCUMENT_TYPES)
+    document_ids = []
+    for index in range(n_documents):
+        prop = PROPERTIES[index % len(PROPERTIES)]
+        doc_type = doc_types[(index // len(PROPERTIES)) % len(doc_types)]
+        document_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        facts = {
+            'price': f"{rng.randint(300, 2500) * 1000:,}", 'rent': f"{rng.randint(12, 120) * 1000:,}",
+            'date': f"{rng.randint(1, 28)} {rng.choice(['March', 'June', 'September'])} 2024",
+            'years': rng.randint(2, 15), 'break_year': rng.randint(1, 5), 'epc': rng.choice('BCDE'),
+            'commission': rng.choice(['1.5', '2', '10']), 'person': rng.choice(_PEOPLE),
+        }
+        chunk_texts = []
+        for chunk_index in range(chunks_per_document):
+            fact = DOCUMENT_TYPES[doc_type][chunk_index % len(DOCUMENT_TYPES[doc_type])].format(**facts)
+            filler = ' '.join(rng.choice(['the', 'property', 'agreement', 'schedule', 'clause', 'party', 'term', 'notice'])
+                              for _ in range(rng.randint(60, 140)))
+            chunk_texts.append(f"{prop} {doc_type.replace('_', ' ')}: {fact}. {filler}")
+        summary = f"{doc_type.replace('_', ' ').title()} for {prop}: " + '; '.join(
+            t.split(':', 1)[1].split('.')[0] for t in chunk_texts[:4])
+        documents.append({
+            'id': document_id, 'business_uuid': business_id, 'business_id': business_id,
+            'original_filename': f"{prop.replace(' ', '_')}_{doc_type}.pdf", 'classification_type': doc_type,
+            'summary_text': summary, 'document_summary': {'summary': summary}, 'status': 'completed',
+            'document_embedding': hash_embedding(summary + ' ' + ' '.join(chunk_texts)),
+        })
+        for chunk_index, text in enumerate(chunk_texts):
+            page = chunk_index // 3 + 1
+            top = 0.1 + 0.25 * (chunk_index % 3)
+            bbox = {'left': 0.1, 'top': top, 'width': 0.8, 'height': 0.2, 'page': page}
+            vectors.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128))), 'document_id': document_id,
+                'business_uuid': business_id, 'chunk_index': chunk_index, 'chunk_text': text,
+                'chunk_text_clean': text, 'page_number': page, 'metadata': {'page_numbers': [page]},
+                'bbox': bbox, 'embedding': hash_embedding(text),
+                'blocks': [{'content': sentence.strip(), 'bbox': {**bbox, 'height': 0.05}, 'type': 'Text'}
+                           for sentence in text.split('.') if sentence.strip()][:6],
+            })
+        document_ids.append(document_id)
+    return document_ids
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Ingestion throughput benchmark and profiler for SupabaseVectorService.store_document_vectors.
+
+Feeds Reducto parse outputs through the whole storage path (chunk splitting,
+_map_subchunk_to_blocks, cleaning, validate_batch, quality scoring, enrichment, section
+headers, record building, insert) with embeddings and Supabase replaced by the local fakes
+in scripts/bench_fakes.py.
+
+Input is either a recorded Reducto parse (--parse-file, the JSON returned by Reducto with
+result.chunks[].content/embed/bbox/blocks) or a synthetic parse of the requested sizes
+(default 50, 300 and 1000 chunks) with realistic block layout, markdown/HTML artifacts,
+boilerplate lines and oversized sections that trigger sub-chunk splitting.
+
+Each size runs in a fresh process so peak RSS is per size. Reports per stage:
+- wall time (timing pass, no tracing overhead)
+- peak and net KiB from a separate tracemalloc pass
+Optional profiling of one extra run per size:
+- --profile cprofile: <prefix>_<size>.prof (open with snakeviz / flameprof) + top functions
+- --profile sample: <prefix>_<size>.collapsed, folded stacks from a 1ms sampler, the
+  format py-spy --format raw / flamegraph.pl / speedscope use
+
+Usage:
+    python scripts/benchmark_ingestion.py
+    python scripts/benchmark_ingestion.py --sizes 1000 --profile sample --profile-prefix /tmp/ingest
+    python scripts/benchmark_ingestion.py --parse-file reducto_parse.json --repeat 5
+    python scripts/benchmark_ingestion.py --write-baseline scripts/ingestion_baseline.json
+    python scripts/benchmark_ingestion.py --baseline scripts/ingestion_baseline.json --tolerance 0.2
+
+py-spy works unchanged on the in-process mode:
+    py-spy record -o ingest.svg -- python scripts/benchmark_ingestion.py --sizes 1000 --in-process
+"""
+
+import os
+import sys
+
+# Configure the backend for offline use before anything imports it
+os.environ['USE_VOYAGE_EMBEDDINGS'] = 'false'
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'benchmark')
+os.environ.pop('ANTHROPIC_API_KEY', None)
+os.environ['PERF_METRICS_AGGREGATE'] = 'false'
+os.environ.pop('REDIS_URL', None)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+sys.path.insert(0, SCRIPT_DIR)
+
+import argparse
+import cProfile
+import functools
+import io
+import json
+import logging
+import multiprocessing
+import pstats
+import random
+import resource
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import bench_fakes
+
+logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BUSINESS_ID = '00000000-0000-4000-8000-000000000b01'
+
+# (owner, attribute, stage) - owners are resolved lazily by install_stage_probes
+_STAGE_TARGETS = [
+    ('SupabaseVectorService', 'delete_document_vectors', 'delete'),
+    ('SupabaseVectorService', 'chunk_text', 'split'),
+    ('SupabaseVectorService', '_map_subchunk_to_blocks', 'map_blocks'),
+    ('SupabaseVectorService', 'clean_chunk_texts', 'clean'),
+    ('ChunkValidationService', 'validate_batch', 'validate'),
+    ('ChunkQualityService', 'compute_quality_score', 'quality'),
+    ('SupabaseVectorService', 'enrich_chunk_for_embedding', 'enrich'),
+    ('SupabaseVectorService', 'create_embeddings', 'embed'),
+    ('vector_service', 'extract_section_header_from_blocks', 'section_headers'),
+    ('vector_service', 'extract_keywords', 'section_headers'),
+]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic Reducto parse
+# ---------------------------------------------------------------------------
+
+_SECTION_TITLES = ['Particulars', 'Terms of the Lease', 'Rent and Review', 'Repairs', 'Insurance',
+                   'Break Clause', 'Valuation', 'Comparable Evidence', 'Schedule of Condition', 'Signatures']
+_WORDS = ('the tenant landlord shall pay rent premises term lease clause schedule property valuation '
+          'market value comparable evidence repair insurance notice quarter annual deposit completion '
+          'purchaser vendor agent commission inventory fixtures fittings condition survey').split()
+_BOILERPLATE = ['Strictly private and confidential', 'Subject to contract', 'Page footer - Solosway Estates LLP']
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 24))]
+    words[0] = words[0].capitalize()
+    return ' '.join(words) + '.'
+
+
+def synthetic_parse(n_chunks: int, seed: int = 11) -> Dict[str, Any]:
+    """Reducto-shaped parse output: result.chunks with content, embed, bbox and blocks."""
+    rng = random.Random(seed)
+    chunks = []
+    page = 1
+    for index in range(n_chunks):
+        blocks = []
+        parts = []
+        if index % 4 == 0:
+            title = f"{index // 4 % 9 + 1}. {rng.choice(_SECTION_TITLES)}"
+            blocks.append({'type': 'Section Header', 'content': f"## {title}", 'confidence': 'high',
+                           'bbox': {'left': 0.08, 'top': 0.06, 'width': 0.5, 'height': 0.03, 'page': page, 'original_page': page}})
+            parts.append(f"## {title}")
+        # ~20% oversized sections get split into sub-chunks by store_document_vectors
+        n_blocks = rng.randint(14, 22) if rng.random() < 0.2 else rng.randint(3, 8)
+        top = 0.1
+        for _ in range(n_blocks):
+            kind = rng.random()
+            if kind < 0.08:
+                content = ('<table><tr><th>Item</th><th>Amount</th></tr>' +
+                           ''.join(f"<tr><td>{rng.choice(_WORDS)}</td><td>£{rng.randint(100, 90000):,}</td></tr>" for _ in range(4)) +
+                           '</table>')
+                block = {'type': 'Table', 'content': content}
+            elif kind < 0.12:
+                block = {'type': 'Figure', 'content': '', 'image_url': f"https://example.invalid/img/{index}_{len(blocks)}.png"}
+            else:
+                text = ' '.join(_sentence(rng) for _ in range(rng.randint(1, 4)))
+                if rng.random() < 0.15:
+                    text = f"**{text}**  \n{rng.choice(_BOILERPLATE)}"
+                block = {'type': 'Text', 'content': text}
+            height = round(rng.uniform(0.02, 0.09), 4)
+            block['bbox'] = {'left': 0.08, 'top': round(top, 4), 'width': 0.84, 'height': height, 'page': page, 'original_page': page}
+            block['confidence'] = 'high'
+            blocks.append(block)
+            if block.get('content'):
+                parts.append(block['content'])
+            top += height + 0.01
+            if top > 0.88:
+                top = 0.1
+                page += 1
+        content = '\n\n'.join(parts)
+        chunks.append({
+            'content': content,
+            'embed': content,
+            'enriched': None,
+            'bbox': {'left': 0.08, 'top': 0.06, 'width': 0.84, 'height': 0.8, 'page': blocks[0]['bbox']['page'],
+                     'original_page': blocks[0]['bbox']['page']},
+            'blocks': blocks,
+        })
+    return {'result': {'chunks': chunks}}
+
+
+def parse_to_inputs(parse: Any) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Mirror tasks.py: chunk texts (embed, else content) plus per-chunk bbox/blocks/page metadata."""
+    from backend.llm.utils.section_header_detector import detect_section_header
+
+    if isinstance(parse, dict):
+        parse = (parse.get('result') or parse).get('chunks') or []
+    chunk_texts, chunk_metadata_list = [], []
+    for chunk in parse:
+        content_text = chunk.get('content', '')
+        text_to_embed = chunk.get('embed') or content_text
+        if not text_to_embed:
+            continue
+        chunk_texts.append(text_to_embed)
+        blocks = chunk.get('blocks', [])
+        page = (chunk.get('bbox') or {}).get('original_page') or (chunk.get('bbox') or {}).get('page')
+        if page is None and blocks:
+            page = (blocks[0].get('bbox') or {}).get('page')
+        chunk_meta = {'bbox': chunk.get('bbox'), 'blocks': blocks, 'page': page}
+        header_info = detect_section_header(content_text or text_to_embed)
+        if header_info:
+            chunk_meta.update(header_info)
+        else:
+            chunk_meta['has_section_header'] = False
+        chunk_metadata_list.append(chunk_meta)
+    return chunk_texts, chunk_metadata_list
+
+
+# ---------------------------------------------------------------------------
+# Stage probes
+# ---------------------------------------------------------------------------
+
+class StageRecorder:
+    """Accumulates wall time (and tracemalloc peaks when tracing) per stage, outermost calls only."""
+
+    def __init__(self):
+        self.active: Dict[str, bool] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.ms: Counter = Counter()
+        self.calls: Counter = Counter()
+        self.peak_kib: Dict[str, float] = {}
+        self.net_kib: Counter = Counter()
+
+    def wrap(self, stage: str, func):
+        recorder = self
+
+        @functools.wraps(func)
+        def probe(*args, **kwargs):
+            if recorder.active.get(stage):
+                return func(*args, **kwargs)
+            recorder.active[stage] = True
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.reset_peak()
+                start_bytes = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.ms[stage] += (time.perf_counter() - started) * 1000
+                recorder.calls[stage] += 1
+                if tracing:
+                    current, peak = tracemalloc.get_traced_memory()
+                    recorder.peak_kib[stage] = max(recorder.peak_kib.get(stage, 0.0), (peak - start_bytes) / 1024)
+                    recorder.net_kib[stage] += (current - start_bytes) / 1024
+                recorder.active[stage] = False
+        return probe
+
+
+def install_stage_probes(recorder: StageRecorder) -> None:
+    from backend.services import vector_service
+    from backend.services.chunk_quality_service import ChunkQualityService
+    from backend.services.chunk_validation_service import ChunkValidationService
+
+    owners = {
+        'SupabaseVectorService': vector_service.SupabaseVectorService,
+        'ChunkValidationService': ChunkValidationService,
+        'ChunkQualityService': ChunkQualityService,
+        'vector_service': vector_service,
+    }
+    for owner_name, attribute, stage in _STAGE_TARGETS:
+        owner = owners[owner_name]
+        setattr(owner, attribute, recorder.wrap(stage, getattr(owner, attribute)))
+
+    # Insert = the fake's execute() for insert mutations
+    original_execute = bench_fakes._Query.execute
+    timed_execute = recorder.wrap('insert', original_execute)
+
+    def execute(query):
+        if query._mutation is not None and query._mutation[0] == 'insert':
+            return timed_execute(query)
+        return original_execute(query)
+
+    bench_fakes._Query.execute = execute
+
+
+# ---------------------------------------------------------------------------
+# Sampling profiler (folded stacks)
+# ---------------------------------------------------------------------------
+
+class StackSampler:
+    """Samples one thread's Python stack every interval into folded-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def write(self, path: str) -> None:
+        with open(path, 'w') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def run_size(label: str, parse: Any, args_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmark one parse in the current process; returns the per-size report."""
+    from backend.services import vector_service
+
+    fake_db = bench_fakes.FakeSupabase(latency_ms=args_dict['db_latency_ms'])
+    bench_fakes.install_fake_supabase(fake_db)
+    bench_fakes.install_fake_embeddings(args_dict['embed_latency_ms'])
+    recorder = StageRecorder()
+    install_stage_probes(recorder)
+
+    service = vector_service.SupabaseVectorService()
+    chunks, chunk_metadata_list = parse_to_inputs(parse)
+    metadata = {
+        'business_id': BUSINESS_ID, 'business_uuid': BUSINESS_ID, 'property_id': None,
+        'classification_type': 'lease', 'address_hash': None,
+        'boilerplate_lines': [{'line': line} for line in _BOILERPLATE],
+    }
+    document_id = '00000000-0000-4000-8000-00000000d0c0'
+
+    def store() -> int:
+        # store_document_vectors mutates chunk metadata/metadata; give each run fresh copies
+        ok = service.store_document_vectors(
+            document_id, list(chunks), dict(metadata),
+            chunk_metadata_list=json.loads(json.dumps(chunk_metadata_list)), lazy_embedding=False,
+        )
+        if not ok:
+            raise RuntimeError('store_document_vectors returned False')
+        return len(fake_db.tables.get('document_vectors', []))
+
+    store()  # warm-up (imports, regex compilation)
+
+    totals: List[float] = []
+    stage_runs: List[Dict[str, float]] = []
+    stored = 0
+    for _ in range(args_dict['repeat']):
+        recorder.reset()
+        started = time.perf_counter()
+        stored = store()
+        totals.append((time.perf_counter() - started) * 1000)
+        stage_runs.append(dict(recorder.ms))
+
+    stages = sorted({stage for run in stage_runs for stage in run})
+    median_total = sorted(totals)[len(totals) // 2]
+    stage_ms = {stage: round(sorted(run.get(stage, 0.0) for run in stage_runs)[len(stage_runs) // 2], 2) for stage in stages}
+    stage_ms['records_and_other'] = round(max(0.0, median_total - sum(stage_ms.values())), 2)
+
+    recorder.reset()
+    tracemalloc.start()
+    try:
+        store()
+        peak_total = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    allocations = {
+        stage: {'peak_kib': round(recorder.peak_kib.get(stage, 0.0), 1), 'net_kib': round(recorder.net_kib[stage], 1)}
+        for stage in stages
+    }
+
+    profile_path = None
+    if args_dict.get('profile'):
+        prefix = args_dict['profile_prefix']
+        if args_dict['profile'] == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            store()
+            profiler.disable()
+            profile_path = f"{prefix}_{label}.prof"
+            profiler.dump_stats(profile_path)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(args_dict['profile_top'])
+            print(out.getvalue())
+        else:
+            with StackSampler(threading.get_ident()) as sampler:
+                store()
+            profile_path = f"{prefix}_{label}.collapsed"
+            sampler.write(profile_path)
+
+    maxrss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        maxrss_kib //= 1024  # bytes on macOS
+
+    return {
+        'label': label,
+        'input_chunks': len(chunks),
+        'stored_chunks': stored,
+        'total_ms_p50': round(median_total, 2),
+        'total_ms_max': round(max(totals), 2),
+        'chunks_per_second': round(len(chunks) / (median_total / 1000), 1) if median_total else None,
+        'stage_ms': stage_ms,
+        'stage_calls': dict(recorder.calls),
+        'allocations': allocations,
+        'traced_peak_kib': round(peak_total / 1024, 1),
+        'peak_rss_mib': round(maxrss_kib / 1024, 1),
+        'profile': profile_path,
+    }
+
+
+def _run_size_worker(label: str, parse: Any, args_dict: Dict[str, Any], queue) -> None:
+    try:
+        queue.put(run_size(label, parse, args_dict))
+    except Exception as e:
+        queue.put({'label': label, 'error': f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(label: str, parse: Any, args_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one size in a fresh interpreter so peak RSS isn't inherited from earlier sizes."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_size_worker, args=(label, parse, args_dict, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    for result in results:
+        if result.get('error'):
+            print(f"\n[{result['label']}] FAILED: {result['error']}")
+            continue
+        print(
+            f"\n[{result['label']}] {result['input_chunks']} chunks -> {result['stored_chunks']} stored: "
+            f"p50 {result['total_ms_p50']:.1f}ms ({result['chunks_per_second']} chunks/s), "
+            f"peak RSS {result['peak_rss_mib']} MiB, traced peak {result['traced_peak_kib']} KiB"
+        )
+        print(f"  {'stage':<22}{'ms':>10}{'share':>8}{'calls':>8}{'peak KiB':>11}{'net KiB':>10}")
+        for stage, ms in sorted(result['stage_ms'].items(), key=lambda item: -item[1]):
+            share = ms / result['total_ms_p50'] * 100 if result['total_ms_p50'] else 0
+            alloc = result['allocations'].get(stage, {})
+            print(
+                f"  {stage:<22}{ms:>10.1f}{share:>7.0f}%{result['stage_calls'].get(stage, ''):>8}"
+                f"{alloc.get('peak_kib', ''):>11}{alloc.get('net_kib', ''):>10}"
+            )
+        if result.get('profile'):
+            print(f"  profile: {result['profile']}")
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float,
+                        slack_ms: float) -> List[str]:
+    regressions = []
+    reference = {entry['label']: entry for entry in baseline.get('results', [])}
+    for result in results:
+        base = reference.get(result['label'])
+        if not base or result.get('error'):
+            continue
+        checks = [('total', result['total_ms_p50'], base['total_ms_p50'])]
+        checks += [(stage, ms, base['stage_ms'].get(stage)) for stage, ms in result['stage_ms'].items()]
+        for name, current, previous in checks:
+            if previous is None:
+                continue
+            limit = previous * (1 + tolerance) + slack_ms
+            if current > limit:
+                regressions.append(f"[{result['label']}] {name}: {current:.1f}ms > {limit:.1f}ms (baseline {previous:.1f}ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingestion benchmark for store_document_vectors')
+    parser.add_argument('--sizes', default='50,300,1000', help='Synthetic parse sizes in chunks (default: 50,300,1000)')
+    parser.add_argument('--parse-file', action='append', help='Recorded Reducto parse JSON (repeatable; replaces --sizes)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per size (default: 3)')
+    parser.add_argument('--seed', type=int, default=11, help='Synthetic parse seed (default: 11)')
+    parser.add_argument('--embed-latency-ms', type=float, default=0.0, help='Simulated embedding latency per 128-text batch')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help='Simulated Supabase round trip')
+    parser.add_argument('--profile', choices=['cprofile', 'sample'], help='Profile one extra run per size')
+    parser.add_argument('--profile-prefix', default='ingestion_profile', help='Profile output path prefix')
+    parser.add_argument('--profile-top', type=int, default=25, help='Functions to print for cProfile (default: 25)')
+    parser.add_argument('--in-process', action='store_true', help="Don't spawn a process per size (for py-spy)")
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', help='Fail (exit 1) if slower than this stored report')
+    parser.add_argument('--write-baseline', help='Write the report as a new baseline at this path')
+    parser.add_argument('--tolerance', type=float, default=0.20, help='Allowed slowdown vs baseline (default: 0.20)')
+    parser.add_argument('--slack-ms', type=float, default=5.0, help='Absolute slack for tiny stages (default: 5)')
+    args = parser.parse_args()
+
+    if args.parse_file:
+        inputs = []
+        for path in args.parse_file:
+            with open(path) as f:
+                inputs.append((os.path.splitext(os.path.basename(path))[0], json.load(f)))
+    else:
+        inputs = [(f"{size}_chunks", synthetic_parse(int(size), seed=args.seed)) for size in args.sizes.split(',')]
+
+    args_dict = {
+        'repeat': args.repeat, 'embed_latency_ms': args.embed_latency_ms, 'db_latency_ms': args.db_latency_ms,
+        'profile': args.profile, 'profile_prefix': args.profile_prefix, 'profile_top': args.profile_top,
+    }
+    results = []
+    for label, parse in inputs:
+        print(f"Running {label}...")
+        results.append(run_size(label, parse, args_dict) if args.in_process else run_isolated(label, parse, args_dict))
+    print_report(results)
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'settings': {key: value for key, value in args_dict.items() if not key.startswith('profile')},
+        'results': results,
+    }
+    for path in (args.output, args.write_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote {path}")
+
+    if any(result.get('error') for result in results):
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.slack_ms)
+        if regressions:
+            print("❌ Ingestion regression vs baseline:")
+            for message in regressions:
+                print(f"   - {message}")
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == '__main__':
+    main()
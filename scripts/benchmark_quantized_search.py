@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Recall@k of compact chunk-embedding codes against the float baseline.
+
+Loads chunk embeddings for a business from document_vectors (or generates clustered
+synthetic vectors with --synthetic) and, for a set of queries, compares the top-k of an
+exact float32 scan with:
+
+- int8:            int8 codes (embedding_int8), full scan
+- binary:          sign bits (embedding_binary), Hamming distance only
+- binary+int8 xM:  two-stage - top k*M by Hamming, rescored with int8 codes
+- binary+float xM: two-stage - top k*M by Hamming, rescored with the full vectors
+                   (what match_chunks_two_stage does in the database)
+
+Queries are stored chunk vectors with Gaussian noise added (--query-noise), so they sit
+near real data without being exact duplicates. Also reports memory per vector, PostgREST
+transfer per vector and scan time per query.
+
+Usage:
+    python scripts/benchmark_quantized_search.py --business-id BUSINESS_UUID
+    python scripts/benchmark_quantized_search.py --business-id BUSINESS_UUID --k 5,10,20 --queries 200
+    python scripts/benchmark_quantized_search.py --synthetic 50000 --output quantized_recall.json
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import time
+from typing import Dict, List
+
+import numpy as np
+
+# Load .env before backend imports (only needed for --business-id)
+from dotenv import load_dotenv
+
+env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+load_dotenv(env_path)
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.embedding_quantization import (
+    encode_int8,
+    hamming_distances,
+    int8_similarities,
+    quantize_binary,
+    quantize_int8,
+)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+
+
+def load_business_vectors(business_uuid: str, limit: int) -> np.ndarray:
+    from backend.services.supabase_client_factory import get_supabase_client
+
+    supabase = get_supabase_client()
+    vectors = []
+    start = 0
+    while len(vectors) < limit:
+        rows = (
+            supabase.table('document_vectors')
+            .select('id, embedding')
+            .eq('business_uuid', business_uuid)
+            .not_.is_('embedding', 'null')
+            .order('id')
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        for row in rows:
+            embedding = row['embedding']
+            vectors.append(json.loads(embedding) if isinstance(embedding, str) else embedding)
+        if len(rows) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    logger.info(f"Loaded {len(vectors)} chunk embeddings for business {business_uuid[:8]}")
+    return np.asarray(vectors[:limit], dtype=np.float32)
+
+
+def synthetic_vectors(n: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered unit vectors (documents on similar topics share a centroid)."""
+    centroids = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size=n)
+    vectors = centroids[assignments] + 0.8 * rng.normal(size=(n, dimension)).astype(np.float32)
+    return vectors
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if scores.size <= k:
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return len(set(found.tolist()) & set(truth.tolist())) / max(1, len(truth))
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, ks: List[int], multipliers: List[int]) -> List[Dict]:
+    vectors = normalize(vectors)
+    dimension = vectors.shape[1]
+    codes, scales = quantize_int8(vectors)
+    bits = quantize_binary(vectors)
+    max_k = max(ks)
+
+    methods = {
+        'float32': {'bytes': vectors.nbytes / len(vectors)},
+        'int8': {'bytes': (codes.nbytes + scales.nbytes) / len(vectors)},
+        'binary': {'bytes': bits.nbytes / len(vectors)},
+    }
+    for m in multipliers:
+        methods[f'binary+int8 x{m}'] = {'bytes': (bits.nbytes + codes.nbytes + scales.nbytes) / len(vectors)}
+        methods[f'binary+float x{m}'] = {'bytes': bits.nbytes / len(vectors)}
+    for stats in methods.values():
+        stats.update({'recall': {k: [] for k in ks}, 'seconds': 0.0})
+
+    def timed(name, fn):
+        started = time.perf_counter()
+        result = fn()
+        methods[name]['seconds'] += time.perf_counter() - started
+        return result
+
+    for query in normalize(queries):
+        truth = timed('float32', lambda: top_k(vectors @ query, max_k))
+        int8_ranked = timed('int8', lambda: top_k(int8_similarities(codes, scales, query), max_k))
+        query_bits = quantize_binary(query)[0]
+        hamming = timed('binary', lambda: hamming_distances(bits, query_bits))
+        binary_ranked = top_k(-hamming.astype(np.float32), max_k)
+        results = {'float32': truth, 'int8': int8_ranked, 'binary': binary_ranked}
+
+        for m in multipliers:
+            candidates = top_k(-hamming.astype(np.float32), max_k * m)
+            results[f'binary+int8 x{m}'] = timed(f'binary+int8 x{m}', lambda: candidates[
+                top_k(int8_similarities(codes[candidates], scales[candidates], query), max_k)
+            ])
+            results[f'binary+float x{m}'] = timed(f'binary+float x{m}', lambda: candidates[
+                top_k(vectors[candidates] @ query, max_k)
+            ])
+
+        for name, ranked in results.items():
+            for k in ks:
+                methods[name]['recall'][k].append(recall(ranked[:k], truth[:k]))
+
+    # PostgREST transfer per vector: '[...]' text vs '\x...' bytea hex vs '0101...' bit string
+    sample = vectors[: min(100, len(vectors))]
+    text_bytes = np.mean([len(json.dumps([float(x) for x in row])) for row in sample])
+    int8_bytes = np.mean([len(encode_int8(row)) for row in sample])
+    transfer = {'float32': text_bytes, 'int8': int8_bytes, 'binary': float(dimension)}
+
+    rows = []
+    for name, stats in methods.items():
+        base = 'int8' if 'int8' in name else 'float32' if 'float' in name else 'binary'
+        rows.append({
+            'method': name,
+            **{f'recall@{k}': round(float(np.mean(stats['recall'][k])), 4) for k in ks},
+            'memory_bytes_per_vector': round(stats['bytes'], 1),
+            'memory_reduction': round(methods['float32']['bytes'] / stats['bytes'], 1),
+            'transfer_bytes_per_vector': round(transfer[base], 1),
+            'ms_per_query': round(stats['seconds'] * 1000 / len(queries), 3),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recall@k of int8/binary chunk embeddings vs float')
+    parser.add_argument('--business-id', help='Load chunk embeddings for this business')
+    parser.add_argument('--synthetic', type=int, default=0, help='Use N synthetic vectors instead')
+    parser.add_argument('--dimension', type=int, default=1024, help='Synthetic vector dimension (default: 1024)')
+    parser.add_argument('--clusters', type=int, default=200, help='Synthetic topic clusters (default: 200)')
+    parser.add_argument('--limit', type=int, default=100000, help='Max chunk embeddings to load (default: 100000)')
+    parser.add_argument('--queries', type=int, default=100, help='Queries (default: 100)')
+    parser.add_argument('--query-noise', type=float, default=0.5,
+                        help='Noise added to sampled vectors to form queries, relative to their norm (default: 0.5)')
+    parser.add_argument('--k', default='5,10,20', help='Comma-separated k values (default: 5,10,20)')
+    parser.add_argument('--multipliers', default='2,4,8', help='Two-stage candidate multipliers (default: 2,4,8)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report here')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.business_id:
+        vectors = load_business_vectors(args.business_id, args.limit)
+    elif args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, args.dimension, args.clusters, rng)
+    else:
+        parser.error('Pass --business-id or --synthetic N')
+    if len(vectors) == 0:
+        logger.error("No vectors to benchmark")
+        return
+
+    ks = [int(k) for k in args.k.split(',') if k.strip()]
+    multipliers = [int(m) for m in args.multipliers.split(',') if m.strip()]
+    picks = normalize(vectors[rng.integers(0, len(vectors), size=args.queries)])
+    queries = picks + args.query_noise * normalize(rng.normal(size=picks.shape).astype(np.float32))
+
+    rows = run(vectors, queries, ks, multipliers)
+
+    recall_columns = ''.join(f"{'r@' + str(k):>8}" for k in ks)
+    print(f"\n{'method':<18}{recall_columns}{'mem B/vec':>11}{'x smaller':>10}{'wire B/vec':>12}{'ms/query':>10}")
+    for row in rows:
+        recalls = ''.join(f"{row[f'recall@{k}']:>8.3f}" for k in ks)
+        print(f"{row['method']:<18}{recalls}{row['memory_bytes_per_vector']:>11.0f}{row['memory_reduction']:>10.1f}"
+              f"{row['transfer_bytes_per_vector']:>12.0f}{row['ms_per_query']:>10.3f}")
+
+    if args.output:
+        report = {'config': vars(args), 'vectors': int(len(vectors)), 'methods': rows}
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
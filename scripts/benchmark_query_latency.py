@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Offline query-latency benchmark for the main LangGraph pipeline.
+
+Runs build_main_graph end-to-end against local fakes (scripts/bench_fakes.py): ChatOpenAI,
+Voyage/OpenAI query embeddings and the Supabase clients are replaced in-process, with
+configurable latency, and a seeded corpus is served through in-memory match_document_embeddings
+/ match_chunks RPCs. No network access or API keys are needed, so the numbers isolate the
+pipeline's own overhead plus the simulated service latency.
+
+Reports:
+- total and per-node p50/p95 wall time (from the per-query span tree, see services/tracing.py)
+- memory for the retrieval stage (executor tool steps) and the citation stage (responder
+  citation helpers) from a separate tracemalloc pass: peak KiB, net KiB retained and net
+  allocated blocks per query. CPython exposes net/peak figures, not gross allocation counts.
+
+Regression gate: every run compares against the stored report at
+scripts/query_latency_baseline.json (or --baseline PATH) and exits 1 when total or any node's
+p95 is slower than baseline * (1 + tolerance) + slack. The baseline is kept in the repo next
+to this script: record it on the reference machine with the default settings and commit it
+(--write-baseline scripts/query_latency_baseline.json). Until it exists the gate is skipped
+with a notice; --no-baseline skips it explicitly.
+
+Usage:
+    python scripts/benchmark_query_latency.py
+    python scripts/benchmark_query_latency.py --repeat 5 --llm-latency-ms 400 --output report.json
+    python scripts/benchmark_query_latency.py --write-baseline scripts/query_latency_baseline.json
+    python scripts/benchmark_query_latency.py --tolerance 0.2
+"""
+
+import os
+import sys
+
+# Configure the backend for offline use before anything imports it
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('VOYAGE_API_KEY', 'benchmark')
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'benchmark')
+os.environ['MEM0_ENABLED'] = 'false'
+os.environ['COHERE_API_KEY'] = ''
+os.environ['LANGCHAIN_TRACING_V2'] = 'false'
+os.environ['PERF_METRICS_AGGREGATE'] = 'false'
+os.environ['TRACE_SAMPLE_RATE'] = '0'
+os.environ.pop('REDIS_URL', None)
+os.environ.pop('TRACE_EXPORT_FILE', None)
+os.environ.pop('TRACE_OTLP_ENDPOINT', None)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, 'query_latency_baseline.json')
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+sys.path.insert(0, SCRIPT_DIR)
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import platform
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, List, Optional
+
+import bench_fakes
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERIES = [
+    'What is the offer value or price for Banda Lane?',
+    'What are the lease terms and rent in the Nzohe LR 1160 750 agreement?',
+    'When was the 24 Rudthorpe Road inventory dated and who signed it?',
+    'What does the Knight Frank letting agreement say about break clauses?',
+    'What did the Highlands Berden Bishops Stortford valuation conclude?',
+    'Who are the parties in the Kenyajui Espindola Mellifera lease?',
+    'What are the key details or asking price for Mbagathi Ridge No 10 Karen?',
+    'Is the Banda Lane offer subject to any conditions or still subject to contract?',
+]
+
+BUSINESS_ID = '00000000-0000-4000-8000-000000000b01'
+
+# Stage name -> True while an outer call of that stage is being measured
+_active_stages: Dict[str, bool] = {}
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50), 2),
+        'p95_ms': round(percentile(values, 0.95), 2),
+        'max_ms': round(max(values), 2) if values else 0.0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Allocation probes
+# ---------------------------------------------------------------------------
+
+class StageAllocations:
+    """Per-call tracemalloc deltas for one pipeline stage (outermost calls only)."""
+
+    def __init__(self):
+        self.peak_kib: List[float] = []
+        self.net_kib: List[float] = []
+        self.net_blocks: List[int] = []
+
+    def measure_start(self):
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0], sys.getallocatedblocks()
+
+    def measure_end(self, started) -> None:
+        start_bytes, start_blocks = started
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_kib.append((peak - start_bytes) / 1024)
+        self.net_kib.append((current - start_bytes) / 1024)
+        self.net_blocks.append(sys.getallocatedblocks() - start_blocks)
+
+    def summary(self, queries: int) -> Dict[str, Any]:
+        per_query = max(1, queries)
+        return {
+            'calls': len(self.peak_kib),
+            'peak_kib_p50': round(percentile(self.peak_kib, 0.50), 1),
+            'peak_kib_max': round(max(self.peak_kib), 1) if self.peak_kib else 0.0,
+            'net_kib_per_query': round(sum(self.net_kib) / per_query, 1),
+            'net_blocks_per_query': round(sum(self.net_blocks) / per_query, 1),
+        }
+
+
+def _probe(stage: str, stats: StageAllocations, func):
+    """Wrap func so its outermost calls are measured under `stage`."""
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_probe(*args, **kwargs):
+            if _active_stages.get(stage):
+                return await func(*args, **kwargs)
+            _active_stages[stage] = True
+            started = stats.measure_start()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                stats.measure_end(started)
+                _active_stages[stage] = False
+        return async_probe
+
+    @functools.wraps(func)
+    def probe(*args, **kwargs):
+        if _active_stages.get(stage):
+            return func(*args, **kwargs)
+        _active_stages[stage] = True
+        started = stats.measure_start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.measure_end(started)
+            _active_stages[stage] = False
+    return probe
+
+
+def install_allocation_probes() -> Dict[str, StageAllocations]:
+    """Probe executor tool steps (retrieval) and responder citation helpers (citation)."""
+    from backend.llm.nodes import executor_node, responder_node
+
+    stages = {'retrieval': StageAllocations(), 'citation': StageAllocations()}
+    executor_node._timed_step = _probe('retrieval', stages['retrieval'], executor_node._timed_step)
+    for name in dir(responder_node):
+        value = getattr(responder_node, name)
+        if 'citation' in name.lower() and callable(value) and getattr(value, '__module__', '').startswith('backend.') \
+                and not isinstance(value, type):
+            setattr(responder_node, name, _probe('citation', stages['citation'], value))
+    return stages
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def initial_state(query: str) -> Dict[str, Any]:
+    """Fresh-turn state, matching the non-streaming /api/llm/query endpoint."""
+    return {
+        'user_query': query,
+        'user_id': 'benchmark',
+        'business_id': BUSINESS_ID,
+        'session_id': f"bench_{uuid.uuid4().hex[:12]}",
+        'property_id': None,
+        'document_ids': None,
+        'citation_context': None,
+        'response_mode': None,
+        'attachment_context': None,
+        'use_cached_results': False,
+        'retrieval_reuse': None,
+        'plan_refinement_count': 0,
+        'execution_plan': None,
+        'speculation_id': None,
+    }
+
+
+async def run_queries(graph, queries: List[str], repeat: int, warm_caches: bool,
+                      query_holder: Dict[str, str]) -> Dict[str, Any]:
+    from backend.llm.utils import query_embedding
+    from backend.services import tracing
+
+    totals: List[float] = []
+    nodes: Dict[str, List[float]] = {}
+    kinds: Dict[str, List[float]] = {}
+    errors = 0
+
+    for _ in range(repeat):
+        for query in queries:
+            if not warm_caches:
+                with query_embedding._embedding_cache_lock:
+                    query_embedding._embedding_cache.clear()
+            query_holder['query'] = query
+            trace = tracing.start_trace(None, 'benchmark.query', query=query[:80])
+
+            async def _one():
+                # Own task so the attached trace stays scoped to this query
+                tracing.attach(trace)
+                return await graph.ainvoke(initial_state(query), {
+                    'configurable': {'thread_id': f"bench_{uuid.uuid4().hex[:8]}"},
+                    'callbacks': tracing.llm_trace_callbacks(),
+                })
+
+            started = time.perf_counter()
+            try:
+                result = await asyncio.get_running_loop().create_task(_one())
+                if not (result or {}).get('final_summary'):
+                    logger.warning(f"No final_summary for: {query}")
+            except Exception as e:
+                errors += 1
+                logger.error(f"Query failed: {query}: {e}", exc_info=True)
+                continue
+            finally:
+                tracing.finish_trace(trace)
+            totals.append((time.perf_counter() - started) * 1000)
+
+            data = trace.to_dict() if trace is not None else {}
+            for span in data.get('spans', []):
+                if span['kind'] == 'node':
+                    nodes.setdefault(span['name'], []).append(span['duration_ms'])
+            for kind, entry in tracing.stage_breakdown(data).items():
+                kinds.setdefault(kind, []).append(entry['total_ms'])
+
+    return {
+        'total': summarize(totals),
+        'nodes': {name: summarize(values) for name, values in sorted(nodes.items())},
+        'span_kinds': {kind: summarize(values) for kind, values in sorted(kinds.items())},
+        'errors': errors,
+    }
+
+
+async def benchmark(args) -> Dict[str, Any]:
+    query_holder = {'query': ''}
+    fake_db = bench_fakes.FakeSupabase(latency_ms=args.db_latency_ms)
+    document_ids = bench_fakes.seed_corpus(fake_db, BUSINESS_ID, n_documents=args.docs, seed=args.seed)
+
+    bench_fakes.install_fake_embeddings(args.embed_latency_ms)
+    bench_fakes.install_fake_chat_model(args.llm_latency_ms, lambda: query_holder['query'],
+                                        ms_per_output_token=args.llm_ms_per_token)
+
+    from backend.llm.graphs.main_graph import build_main_graph
+
+    graph, _ = await build_main_graph(use_checkpointer=False)
+    # Patch after the graph import chain so every module's bound accessor is replaced
+    bench_fakes.install_fake_supabase(fake_db)
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries) as f:
+            lines = [line.strip() for line in f]
+        queries = [line[2:].strip() for line in lines if line.startswith('- ') and line.endswith('?')] or DEFAULT_QUERIES
+
+    # Warm-up: imports, prompt templates and compiled regexes shouldn't count against p50
+    await run_queries(graph, queries[:1], 1, True, query_holder)
+
+    latency = await run_queries(graph, queries, args.repeat, args.warm_caches, query_holder)
+
+    allocations = {}
+    if not args.skip_allocations:
+        stages = install_allocation_probes()
+        tracemalloc.start()
+        try:
+            await run_queries(graph, queries, 1, args.warm_caches, query_holder)
+        finally:
+            tracemalloc.stop()
+        allocations = {name: stage.summary(len(queries)) for name, stage in stages.items()}
+
+    return {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'settings': {
+            'queries': len(queries), 'repeat': args.repeat, 'docs': len(document_ids), 'seed': args.seed,
+            'embed_latency_ms': args.embed_latency_ms, 'llm_latency_ms': args.llm_latency_ms,
+            'llm_ms_per_token': args.llm_ms_per_token, 'db_latency_ms': args.db_latency_ms,
+            'warm_caches': args.warm_caches,
+        },
+        'latency': latency,
+        'allocations': allocations,
+        'db_calls': fake_db.calls,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reporting and regression gate
+# ---------------------------------------------------------------------------
+
+def print_report(report: Dict[str, Any]) -> None:
+    latency = report['latency']
+    total = latency['total']
+    print(f"\nQueries: {total['count']}  errors: {latency['errors']}  db calls: {report['db_calls']}")
+    print(f"{'stage':<32}{'n':>6}{'p50 ms':>12}{'p95 ms':>12}")
+    print(f"{'TOTAL':<32}{total['count']:>6}{total['p50_ms']:>12.1f}{total['p95_ms']:>12.1f}")
+    for name, stats in latency['nodes'].items():
+        print(f"  {name:<30}{stats['count']:>6}{stats['p50_ms']:>12.1f}{stats['p95_ms']:>12.1f}")
+    print("By span kind (per query):")
+    for kind, stats in latency['span_kinds'].items():
+        print(f"  {kind:<30}{stats['count']:>6}{stats['p50_ms']:>12.1f}{stats['p95_ms']:>12.1f}")
+    for stage, stats in report.get('allocations', {}).items():
+        print(
+            f"Allocations [{stage}]: {stats['calls']} calls, peak p50 {stats['peak_kib_p50']} KiB "
+            f"(max {stats['peak_kib_max']}), net {stats['net_kib_per_query']} KiB / "
+            f"{stats['net_blocks_per_query']} blocks per query"
+        )
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+                        slack_ms: float) -> List[str]:
+    """Return regression messages (empty when within tolerance)."""
+    regressions = []
+
+    def check(label: str, current: Optional[Dict[str, float]], reference: Optional[Dict[str, float]]) -> None:
+        if not current or not reference:
+            return
+        limit = reference['p95_ms'] * (1 + tolerance) + slack_ms
+        if current['p95_ms'] > limit:
+            regressions.append(
+                f"{label}: p95 {current['p95_ms']:.1f}ms > {limit:.1f}ms (baseline {reference['p95_ms']:.1f}ms)"
+            )
+
+    if baseline.get('settings') and baseline['settings'] != report['settings']:
+        logger.warning("Baseline was recorded with different settings; comparison may be meaningless")
+    check('total', report['latency']['total'], baseline['latency']['total'])
+    for name, stats in report['latency']['nodes'].items():
+        check(f"node {name}", stats, baseline['latency']['nodes'].get(name))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline query-latency benchmark for the main graph')
+    parser.add_argument('--queries', help='File of queries (one "- question?" per line, e.g. docs/TEST_QUERIES.md)')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the query set (default: 3)')
+    parser.add_argument('--docs', type=int, default=30, help='Seeded documents (default: 30)')
+    parser.add_argument('--seed', type=int, default=7, help='Corpus seed (default: 7)')
+    parser.add_argument('--embed-latency-ms', type=float, default=80, help='Simulated embedding latency (default: 80)')
+    parser.add_argument('--llm-latency-ms', type=float, default=300, help='Simulated LLM call latency (default: 300)')
+    parser.add_argument('--llm-ms-per-token', type=float, default=0.0, help='Extra simulated LLM latency per output token')
+    parser.add_argument('--db-latency-ms', type=float, default=15, help='Simulated Supabase round trip (default: 15)')
+    parser.add_argument('--warm-caches', action='store_true', help='Keep the query-embedding cache between queries')
+    parser.add_argument('--skip-allocations', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Fail (exit 1) if slower than this stored report (default: scripts/query_latency_baseline.json)')
+    parser.add_argument('--no-baseline', action='store_true', help='Skip the baseline regression gate')
+    parser.add_argument('--write-baseline', help='Write the report as a new baseline at this path')
+    parser.add_argument('--tolerance', type=float, default=0.20, help='Allowed p95 slowdown vs baseline (default: 0.20)')
+    parser.add_argument('--slack-ms', type=float, default=5.0, help='Absolute p95 slack for tiny stages (default: 5)')
+    parser.add_argument('--verbose', action='store_true', help='Show backend INFO logs')
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.INFO)
+
+    report = asyncio.run(benchmark(args))
+    print_report(report)
+
+    for path in (args.output, args.write_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote {path}")
+
+    if report['latency']['errors']:
+        print(f"❌ {report['latency']['errors']} queries failed")
+        sys.exit(1)
+
+    if args.no_baseline or args.write_baseline:
+        return
+    if not os.path.exists(args.baseline):
+        if args.baseline != DEFAULT_BASELINE:
+            print(f"❌ Baseline {args.baseline} not found")
+            sys.exit(1)
+        print(f"⚠️ No stored baseline at {os.path.relpath(args.baseline)}; regression gate skipped "
+              f"(record one with --write-baseline {os.path.relpath(args.baseline)})")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(report, baseline, args.tolerance, args.slack_ms)
+    if regressions:
+        print("❌ Latency regression vs baseline:")
+        for message in regressions:
+            print(f"   - {message}")
+        sys.exit(1)
+    print(f"✅ Within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == '__main__':
+    main()
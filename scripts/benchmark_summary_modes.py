@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Compare summarize_results LLM call layouts (SUMMARY_LLM_MODE) offline.
+
+Runs summary_nodes.summarize_results directly on synthetic document outputs with the fake
+ChatOpenAI from scripts/bench_fakes.py (fixed first-token latency plus per-output-token
+time), once per mode:
+
+- sequential: segments call; citation + answer calls only when segments fail
+- parallel:   segments and citation-extraction calls started together
+- single:     one structured-output segments call
+- stream:     the same call streamed; text reaches the client before citations resolve
+
+Reports per mode p50/p95 TTFB (first answer_delta sent to the client, or node completion
+when nothing was streamed), total node time and LLM calls per query. --segment-failure-rate
+makes that share of segment responses unusable so the fallback path is measured too.
+
+Usage:
+    python scripts/benchmark_summary_modes.py
+    python scripts/benchmark_summary_modes.py --llm-latency-ms 600 --ms-per-token 15 --repeat 10
+    python scripts/benchmark_summary_modes.py --segment-failure-rate 0.3 --output summary_modes.json
+"""
+
+import os
+import sys
+
+# Configure the backend for offline use before anything imports it
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ['LANGCHAIN_TRACING_V2'] = 'false'
+os.environ['PERF_METRICS_AGGREGATE'] = 'false'
+os.environ.pop('REDIS_URL', None)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+sys.path.insert(0, SCRIPT_DIR)
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from queue import Queue
+from typing import Any, Dict, List
+
+import bench_fakes
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MODES = ['sequential', 'parallel', 'single', 'stream']
+
+QUERIES = [
+    'What is the market value of the Highlands property?',
+    'What are the lease terms and rent?',
+    'Who signed the inventory and when?',
+    'Is the offer subject to contract?',
+]
+
+# Query the fake chat model answers for (set before each summarize_results call)
+bench_fakes_query = {'value': QUERIES[0]}
+
+_SENTENCES = [
+    'Market Value: £1,950,000 as at 15 March 2024.',
+    'The lease term is 10 years from 1 June 2021 at a passing rent of £42,500 per annum.',
+    'The inventory was signed by the tenant and the agent on 3 February 2023.',
+    'The offer is made subject to contract and subject to survey.',
+    'The property comprises a detached house with five bedrooms and a double garage.',
+    'Flood Zone 1 (Low Probability) according to the Environment Agency map.',
+]
+
+
+def build_doc_outputs(n_documents: int, blocks_per_document: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    doc_types = list(bench_fakes.DOCUMENT_TYPES)
+    outputs = []
+    for d in range(n_documents):
+        blocks = []
+        for b in range(blocks_per_document):
+            blocks.append({
+                'content': f"{rng.choice(_SENTENCES)} Ref {d}-{b}.",
+                'bbox': {'left': 0.1, 'top': 0.05 * (b % 18), 'width': 0.8, 'height': 0.04, 'page': 1 + b // 10},
+            })
+        outputs.append({
+            'doc_id': f'00000000-0000-4000-8000-{d:012d}',
+            'original_filename': f'document_{d}.pdf',
+            'classification_type': doc_types[d % len(doc_types)],
+            'property_id': None,
+            'output': ' '.join(block['content'] for block in blocks),
+            'source_chunks_metadata': [{'chunk_index': 0, 'page_number': 1, 'blocks': blocks}],
+            'search_source': 'vector',
+            'similarity_score': 0.8,
+        })
+    return outputs
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def install_call_counter() -> Dict[str, int]:
+    """Count ChatOpenAI generations (invoke and stream) on top of the fake model."""
+    from langchain_openai import ChatOpenAI
+
+    counter = {'calls': 0}
+    agenerate, astream = ChatOpenAI._agenerate, ChatOpenAI._astream
+
+    async def _agenerate(self, *args, **kwargs):
+        counter['calls'] += 1
+        return await agenerate(self, *args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        counter['calls'] += 1
+        async for chunk in astream(self, *args, **kwargs):
+            yield chunk
+
+    ChatOpenAI._agenerate = _agenerate
+    ChatOpenAI._astream = _astream
+    return counter
+
+
+async def run_mode(mode: str, doc_outputs: List[Dict[str, Any]], repeat: int, counter: Dict[str, int]) -> Dict[str, Any]:
+    from backend.llm.config import config
+    from backend.llm.nodes.summary_nodes import summarize_results
+    from backend.llm.utils.execution_events import AnswerDelta, ExecutionEventEmitter
+
+    config.summary_llm_mode = mode
+    ttfb_ms, total_ms, calls, fallbacks = [], [], [], 0
+    for _ in range(repeat):
+        for query in QUERIES:
+            bench_fakes_query['value'] = query
+            queue: Queue = Queue()
+            emitter = ExecutionEventEmitter()
+            emitter.set_stream_queue(queue)
+            state = {
+                'user_query': query,
+                'document_outputs': doc_outputs,
+                'relevant_documents': [],
+                'conversation_history': [],
+                'is_agent_mode': False,
+                'detail_level': 'concise',
+                'execution_events': emitter,
+            }
+            calls_before = counter['calls']
+            started = time.time()
+            result = await summarize_results(state)
+            ended = time.time()
+            deltas = []
+            while not queue.empty():
+                item = queue.get_nowait()
+                if isinstance(item, AnswerDelta):
+                    deltas.append(item.timestamp)
+            first = min(deltas) if deltas else ended
+            ttfb_ms.append((first - started) * 1000)
+            total_ms.append((ended - started) * 1000)
+            calls.append(counter['calls'] - calls_before)
+            if not result.get('citations'):
+                fallbacks += 1
+    return {
+        'mode': mode,
+        'queries': len(total_ms),
+        'ttfb_p50_ms': round(percentile(ttfb_ms, 0.50), 1),
+        'ttfb_p95_ms': round(percentile(ttfb_ms, 0.95), 1),
+        'total_p50_ms': round(percentile(total_ms, 0.50), 1),
+        'total_p95_ms': round(percentile(total_ms, 0.95), 1),
+        'llm_calls_per_query': round(sum(calls) / len(calls), 2) if calls else 0,
+        'answers_without_citations': fallbacks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SUMMARY_LLM_MODE settings for summarize_results')
+    parser.add_argument('--modes', default=','.join(MODES), help=f"Comma-separated modes (default: {','.join(MODES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the query set per mode (default: 3)')
+    parser.add_argument('--documents', type=int, default=5, help='Document outputs per query (default: 5)')
+    parser.add_argument('--blocks', type=int, default=20, help='Blocks per document (default: 20)')
+    parser.add_argument('--llm-latency-ms', type=float, default=400, help='Simulated time to first token (default: 400)')
+    parser.add_argument('--ms-per-token', type=float, default=10, help='Simulated time per output token (default: 10)')
+    parser.add_argument('--segment-failure-rate', type=float, default=0.0,
+                        help='Share of segment responses that are unusable, forcing the fallback (default: 0)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report here')
+    args = parser.parse_args()
+
+    bench_fakes.install_fake_chat_model(args.llm_latency_ms, lambda: bench_fakes_query['value'],
+                                        ms_per_output_token=args.ms_per_token)
+    counter = install_call_counter()
+    if args.segment_failure_rate > 0:
+        rng = random.Random(args.seed)
+        fake_segments = bench_fakes.fake_segments
+        bench_fakes.fake_segments = lambda prompt, query: (
+            [] if rng.random() < args.segment_failure_rate else fake_segments(prompt, query)
+        )
+
+    doc_outputs = build_doc_outputs(args.documents, args.blocks, args.seed)
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    rows = [asyncio.run(run_mode(mode, doc_outputs, args.repeat, counter)) for mode in modes]
+
+    print(f"\n{'mode':<12}{'ttfb p50':>10}{'ttfb p95':>10}{'total p50':>11}{'total p95':>11}{'calls':>7}")
+    for row in rows:
+        print(f"{row['mode']:<12}{row['ttfb_p50_ms']:>10.0f}{row['ttfb_p95_ms']:>10.0f}"
+              f"{row['total_p50_ms']:>11.0f}{row['total_p95_ms']:>11.0f}{row['llm_calls_per_query']:>7}")
+
+    if args.output:
+        report = {
+            'config': vars(args),
+            'modes': rows,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Warm the local ANN index (backend/services/ann_index.py) for hot businesses.
+
+By default the request is published on the ann_index:changes Redis channel, so every
+serving process builds the listed tenants in the background. --local builds in this
+process instead and reports build time, memory and recall of the local search against the
+match_chunks RPC, using stored chunk vectors as queries.
+
+Usage:
+    python scripts/warm_ann_index.py --business-id BUSINESS_UUID [--business-id ...]
+    python scripts/warm_ann_index.py --from-env
+    python scripts/warm_ann_index.py --business-id BUSINESS_UUID --local --recall-queries 50
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import random
+
+# CRITICAL: Load .env file BEFORE any backend imports
+from dotenv import load_dotenv
+
+env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+load_dotenv(env_path)
+# Building is what this script is for, whatever the serving default
+os.environ['ANN_INDEX_ENABLED'] = 'true'
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.ann_index import ann_index, ANN_INDEX_WARM_BUSINESSES
+from backend.services.supabase_client_factory import get_supabase_client
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def measure_recall(business_uuid: str, queries: int, k: int, threshold: float, seed: int) -> dict:
+    """Local per-document top-k vs match_chunks for random stored chunk vectors."""
+    tenant = ann_index._loaded(business_uuid)
+    if tenant is None or queries <= 0:
+        return {}
+    supabase = get_supabase_client()
+    recalls = []
+    for document_id, vector in tenant.chunks.sample(queries, random.Random(seed)):
+        result = ann_index.search_chunks(business_uuid, vector.tolist(), [document_id], k, threshold)
+        local_ids = {chunk_id for chunk_id, _ in (result[0].get(document_id, []) if result else [])}
+        rows = supabase.rpc('match_chunks', {
+            'query_embedding': vector.tolist(),
+            'target_document_id': document_id,
+            'match_threshold': threshold,
+            'match_count': k,
+        }).execute().data or []
+        db_ids = {str(row['id']) for row in rows if row.get('id')}
+        if db_ids:
+            recalls.append(len(db_ids & local_ids) / len(db_ids))
+    if not recalls:
+        return {'recall_queries': 0}
+    return {
+        'recall_queries': len(recalls),
+        'mean_recall': round(sum(recalls) / len(recalls), 4),
+        'min_recall': round(min(recalls), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm the local ANN index for businesses')
+    parser.add_argument('--business-id', action='append', default=[], help='Business UUID (repeatable)')
+    parser.add_argument('--from-env', action='store_true', help='Use ANN_INDEX_WARM_BUSINESSES')
+    parser.add_argument('--local', action='store_true', help='Build in this process and report instead of publishing')
+    parser.add_argument('--recall-queries', type=int, default=20, help='Recall check queries per business with --local (default: 20)')
+    parser.add_argument('--k', type=int, default=20, help='Chunks per document for recall checks (default: 20)')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Similarity threshold for recall checks (default: 0.2)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    business_uuids = list(args.business_id)
+    if args.from_env:
+        business_uuids.extend(b.strip() for b in ANN_INDEX_WARM_BUSINESSES.split(',') if b.strip())
+    if not business_uuids:
+        parser.error('Pass --business-id or --from-env (with ANN_INDEX_WARM_BUSINESSES set)')
+
+    if not args.local:
+        if ann_index.request_warm(business_uuids):
+            logger.info(f"✅ Requested warm-up of {len(business_uuids)} businesses from all serving processes")
+            return
+        logger.warning("Redis not available; building locally instead")
+
+    report = ann_index.warm(business_uuids)
+    for business_uuid in business_uuids:
+        if 'error' not in report.get(business_uuid, {}):
+            report[business_uuid].update(measure_recall(business_uuid, args.recall_queries, args.k, args.threshold, args.seed))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,40 @@
+import importlib
 import sys
+import types
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+def _load_backend_module(dotted_name: str):
+    """
+    Import a backend module without the Flask app package.
+
+    backend/__init__.py builds the Flask app, so `backend` is registered as a plain namespace
+    module over the source directory. Sub-packages are imported normally, and fall back to a
+    namespace module when their __init__ needs dependencies the module under test does not.
+    """
+    parts = dotted_name.split('.')
+    for depth in range(1, len(parts)):
+        package = '.'.join(parts[:depth])
+        if package in sys.modules:
+            continue
+        if depth > 1:
+            try:
+                importlib.import_module(package)
+                continue
+            except ImportError:
+                pass
+        module = types.ModuleType(package)
+        module.__path__ = [str(ROOT.joinpath(*parts[:depth]))]
+        sys.modules[package] = module
+    return importlib.import_module(dotted_name)
+
+
+@pytest.fixture(scope='session')
+def load_backend_module():
+    return _load_backend_module
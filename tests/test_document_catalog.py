@@ -0,0 +1,91 @@
+import pytest
+
+
+@pytest.fixture(scope='module')
+def catalog_module(load_backend_module):
+    return load_backend_module('backend.services.document_catalog')
+
+
+@pytest.fixture
+def catalog(catalog_module, monkeypatch):
+    for name in ('REDIS_URL',):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(catalog_module, 'DOCUMENT_CATALOG_ENABLED', True)
+    return catalog_module.DocumentCatalog()
+
+
+class _Supabase:
+    """documents.select(...).in_('id', ids).execute() over an in-memory table."""
+
+    def __init__(self, rows, on_execute=None):
+        self.rows = {row['id']: row for row in rows}
+        self.fetched = []
+        self.on_execute = on_execute
+
+    def table(self, name):
+        assert name == 'documents'
+        return self
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, ids):
+        self._ids = list(ids)
+        return self
+
+    def execute(self):
+        self.fetched.append(self._ids)
+        if self.on_execute is not None:
+            self.on_execute()
+        return type('Response', (), {'data': [dict(self.rows[i]) for i in self._ids if i in self.rows]})()
+
+
+def _row(doc_id, status='completed'):
+    return {'id': doc_id, 'business_uuid': 'b1', 'business_id': 'Acme', 'original_filename': f'{doc_id}.pdf',
+            'classification_type': 'valuation_report', 'status': status}
+
+
+def test_lookup_fetches_misses_once(catalog):
+    supabase = _Supabase([_row('d1'), _row('d2')])
+    assert set(catalog.lookup(supabase, ['d1', 'd2', 'missing'])) == {'d1', 'd2'}
+    assert catalog.lookup(supabase, ['d1', 'd2'])['d1']['original_filename'] == 'd1.pdf'
+    assert supabase.fetched == [['d1', 'd2', 'missing']]
+
+
+def test_invalidate_drops_the_cached_record(catalog):
+    supabase = _Supabase([_row('d1')])
+    catalog.lookup(supabase, ['d1'])
+    supabase.rows['d1']['status'] = 'failed'
+
+    catalog.invalidate('d1')
+
+    assert catalog.lookup(supabase, ['d1'])['d1']['status'] == 'failed'
+    assert len(supabase.fetched) == 2
+    assert catalog.snapshot()['invalidations'] == 1
+
+
+def test_invalidation_from_another_process_drops_the_record(catalog):
+    supabase = _Supabase([_row('d1')])
+    catalog.lookup(supabase, ['d1'])
+
+    catalog._on_invalidation('d1')
+
+    catalog.lookup(supabase, ['d1'])
+    assert len(supabase.fetched) == 2
+
+
+def test_rows_read_before_an_invalidation_are_not_cached(catalog):
+    # The write (and its invalidation) lands while the fetch is in flight
+    supabase = _Supabase([_row('d1', status='processing')], on_execute=lambda: catalog.invalidate('d1'))
+    assert catalog.lookup(supabase, ['d1'])['d1']['status'] == 'processing'
+
+    supabase.on_execute = None
+    supabase.rows['d1']['status'] = 'completed'
+    assert catalog.lookup(supabase, ['d1'])['d1']['status'] == 'completed'
+
+
+def test_clear_empties_the_catalog(catalog):
+    supabase = _Supabase([_row('d1')])
+    catalog.lookup(supabase, ['d1'])
+    catalog.clear()
+    assert catalog.snapshot()['entries'] == 0
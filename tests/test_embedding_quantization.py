@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope='module')
+def eq(load_backend_module):
+    return load_backend_module('backend.services.embedding_quantization')
+
+
+def _vectors(count=8, dim=1024, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def test_int8_literal_round_trip(eq):
+    for vector in _vectors():
+        literal = eq.encode_int8(vector)
+        assert eq.is_int8_literal(literal)
+        decoded = eq.decode_int8(literal)
+        assert decoded.dtype == np.float32 and decoded.shape == vector.shape
+        # Symmetric per-row scale: each component is off by at most half a quantization step
+        step = np.abs(vector).max() / 127
+        assert np.max(np.abs(decoded - vector)) <= step / 2 + 1e-6
+
+
+def test_decode_accepts_raw_bytes(eq):
+    vector = _vectors(1)[0]
+    literal = eq.encode_int8(vector)
+    raw = bytes.fromhex(literal[2:])
+    np.testing.assert_array_equal(eq.decode_int8(raw), eq.decode_int8(literal))
+
+
+def test_round_trip_keeps_cosine(eq):
+    vectors = _vectors()
+    decoded = np.stack([eq.decode_int8(eq.encode_int8(v)) for v in vectors])
+    cosine = np.sum(vectors * decoded, axis=1) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(decoded, axis=1))
+    assert cosine.min() > 0.999
+
+
+def test_quantized_matrix_matches_literal_encoding(eq):
+    vectors = _vectors()
+    codes, scales = eq.quantize_int8(vectors)
+    expected = np.stack([eq.decode_int8(eq.encode_int8(v)) for v in vectors])
+    np.testing.assert_allclose(eq.dequantize_int8(codes, scales), expected, rtol=1e-6)
+    query = vectors[0]
+    np.testing.assert_allclose(eq.int8_similarities(codes, scales, query), expected @ query, rtol=1e-4)
+
+
+def test_zero_vector_and_invalid_values(eq):
+    zero = np.zeros(16, dtype=np.float32)
+    np.testing.assert_array_equal(eq.decode_int8(eq.encode_int8(zero)), zero)
+    assert eq.encode_int8(None) is None
+    assert eq.decode_int8(None) is None
+    assert eq.decode_int8('\\xzz') is None
+    assert eq.decode_int8('\\x00000000') is None
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip('pydantic_settings')
+pytest.importorskip('langchain_openai')
+
+
+@pytest.fixture(scope='module')
+def lexical(load_backend_module):
+    return load_backend_module('backend.llm.utils.lexical_search')
+
+
+def test_fused_order_rewards_agreement_between_lists(lexical):
+    vector = ['a', 'b', 'c', 'd']
+    keyword = ['c', 'e', 'a']
+    # a: 1/61 + 1/63, c: 1/63 + 1/61, b: 1/62, e: 1/62, d: 1/64; ties keep first-seen order
+    assert lexical.fused_order([vector, keyword], k=60) == ['a', 'c', 'b', 'e', 'd']
+
+
+def test_fused_order_of_one_list_keeps_its_order(lexical):
+    assert lexical.fused_order([['x', 'y', 'z']]) == ['x', 'y', 'z']
+
+
+def test_fused_order_prefers_items_found_by_both_lists(lexical):
+    # Second in both lists beats first in only one
+    assert lexical.fused_order([['a', 'b'], ['c', 'b']], k=1)[0] == 'b'
+    assert lexical.fused_order([['a', 'b'], ['c', 'b']], k=60)[0] == 'b'
+    assert lexical.fused_order([['a', 'b'], ['c']], k=1) == ['a', 'c', 'b']
+
+
+def test_ranked_rows_are_detected(lexical):
+    assert lexical.is_ranked([{'id': 'c1', 'keyword_rank': 0.3}])
+    assert not lexical.is_ranked([{'id': 'c1'}])
+    assert not lexical.is_ranked([])
@@ -0,0 +1,83 @@
+import pytest
+
+
+@pytest.fixture(scope='module')
+def pc(load_backend_module):
+    return load_backend_module('backend.llm.utils.plan_cache')
+
+
+QUERY = 'What is the market value of Highlands?'
+
+
+def _plan(query=QUERY, **overrides):
+    plan = {
+        'objective': f'Answer query: {query}',
+        'steps': [
+            {'id': 'search_docs', 'action': 'retrieve_docs', 'query': query, 'document_ids': None,
+             'reasoning_label': 'Searched valuation reports', 'reasoning_detail': None},
+            {'id': 'search_chunks', 'action': 'retrieve_chunks', 'query': query,
+             'document_ids': ['<from_step_search_docs>'], 'reasoning_label': 'Read Highlands valuation',
+             'reasoning_detail': None},
+        ],
+        'use_prior_context': False,
+        'format_instruction': None,
+    }
+    plan.update(overrides)
+    return plan
+
+
+@pytest.mark.parametrize('query, signature', [
+    ('What is the Market Value?', 'what is the market value'),
+    ('  what   is the market-value ?? ', 'what is the market value'),
+    ("Who's the tenant?\n", 'who s the tenant'),
+    ('', ''),
+])
+def test_query_signature_folds_case_punctuation_and_whitespace(pc, query, signature):
+    assert pc.query_signature(query) == signature
+
+
+def test_template_replaces_the_query_and_round_trips(pc):
+    template = pc.to_template(_plan(), QUERY)
+    assert template['objective'] == f'Answer query: {pc.QUERY_PLACEHOLDER}'
+    assert [step['query'] for step in template['steps']] == [pc.QUERY_PLACEHOLDER] * 2
+    # Labels can name the queried thing, so they are not kept
+    assert 'Highlands' not in str(template)
+
+    other = 'What is the market rent of Rivermead?'
+    plan = pc.from_template(template, other)
+    assert [step['query'] for step in plan['steps']] == [other, other]
+    assert plan['steps'][1]['document_ids'] == ['<from_step_search_docs>']
+    assert pc.plan_shape(plan, other) == pc.plan_shape(_plan(other), other)
+
+
+@pytest.mark.parametrize('plan', [
+    _plan(use_prior_context=True),
+    _plan(format_instruction='as a table'),
+    _plan(steps=[]),
+    _plan(steps=[dict(_plan()['steps'][0], query='market value Highlands valuation')]),
+    _plan(steps=[dict(_plan()['steps'][1], document_ids=['0b0e6a0c-doc'])]),
+])
+def test_context_dependent_plans_are_not_templated(pc, plan):
+    assert pc.to_template(plan, QUERY) is None
+
+
+def test_lookup_matches_by_signature_within_the_business(pc):
+    cache = pc.PlanCache()
+    assert cache.store('b1', QUERY, _plan())
+
+    hit = cache.lookup('b1', 'what is the MARKET VALUE of highlands')
+    assert hit['match'] == 'exact'
+    assert hit['plan']['steps'][0]['query'] == 'what is the MARKET VALUE of highlands'
+    assert cache.lookup('b2', QUERY) is None
+
+    cache.invalidate('b1')
+    assert cache.lookup('b1', QUERY) is None
+
+
+def test_lookup_matches_similar_queries_by_embedding(pc):
+    cache = pc.PlanCache()
+    cache.store('b1', QUERY, _plan(), query_embedding=[1.0, 0.0])
+
+    hit = cache.lookup('b1', 'How much is Highlands worth?', query_embedding=[0.99, 0.01])
+    assert hit['match'] == 'similar'
+    assert cache.lookup('b1', 'Who is the tenant?', query_embedding=[0.0, 1.0]) is None
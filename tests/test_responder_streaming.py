@@ -0,0 +1,174 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('pydantic')
+pytest.importorskip('langchain_openai')
+pytest.importorskip('langgraph')
+
+
+@pytest.fixture(scope='module')
+def responder(load_backend_module):
+    return load_backend_module('backend.llm.nodes.responder_node')
+
+
+@pytest.fixture(scope='module')
+def lookups(responder):
+    chunks = [
+        {
+            'chunk_id': 'chunk-1',
+            'chunk_text': 'The Market Value of the property is £2,300,000 as at 1 March 2024.',
+            'document_id': 'doc-1',
+            'document_filename': 'valuation.pdf',
+            'page_number': 3,
+            'bbox': {'left': 0.1, 'top': 0.2, 'width': 0.5, 'height': 0.1, 'page': 3},
+        },
+    ]
+    _, short_id_lookup, metadata_lookup_tables = responder.format_chunks_with_block_ids(chunks)
+    return short_id_lookup, metadata_lookup_tables
+
+
+class _Emitter:
+    stream_queue = object()
+
+    def __init__(self):
+        self.deltas = []
+        self.citations = []
+
+    def emit_answer_delta(self, text):
+        self.deltas.append(text)
+        return True
+
+    def emit_citation(self, citation):
+        self.citations.append(citation)
+
+
+def _fake_llm(chunks):
+    class _FakeChatOpenAI:
+        def __init__(self, **kwargs):
+            pass
+
+        def bind(self, **kwargs):
+            return self
+
+        async def astream(self, messages):
+            for chunk in chunks:
+                yield SimpleNamespace(content=chunk)
+
+    return _FakeChatOpenAI
+
+
+def _split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64])
+def test_streamed_deltas_equal_final_summary(responder, lookups, monkeypatch, chunk_size):
+    answer = (
+        "of Highlands\n\n"
+        "The Market Value is <<<MAIN>>>£2,300,000<<<END_MAIN>>> [ID: 1](BLOCK_CITE_ID_1) "
+        "as at 1 March 2024.\n\n"
+    )
+    canned = json.dumps({'personality_id': 'default', 'response': answer})
+    monkeypatch.setattr(responder, 'ChatOpenAI', _fake_llm(_split(canned, chunk_size)))
+    emitter = _Emitter()
+
+    _, final_summary, citations, _ = asyncio.run(
+        responder._stream_answer_with_citations([], emitter, *lookups)
+    )
+
+    assert ''.join(emitter.deltas) == final_summary
+    assert final_summary == (
+        "The Market Value is <<<MAIN>>>£2,300,000<<<END_MAIN>>> [1] as at 1 March 2024."
+    )
+    assert [c['citation_number'] for c in citations] == [1]
+    assert len(emitter.citations) == 1
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("of Highlands\nThe answer.", "The answer."),
+    ("  of Highlands Estate  \n\n The answer. ", "The answer."),
+    ("of Highlands\nEstate agents confirmed it.", "Estate agents confirmed it."),
+    ("Of course, the lease runs to 2030.", "Of course, the lease runs to 2030."),
+    ("Our records show the lease runs to 2030.", "Our records show the lease runs to 2030."),
+    ("of Highlands\nof Rivermead\nThe answer.", "of Rivermead\nThe answer."),
+    ("of Highlands", ""),
+])
+def test_answer_cleaner_matches_finished_text_cleanup(responder, text, expected):
+    for size in (1, 2, 5, len(text)):
+        cleaner = responder._StreamingAnswerCleaner()
+        out = ''.join(cleaner.feed(part) for part in _split(text, size)) + cleaner.feed('', final=True)
+        assert out == expected
+
+
+def _batch_citations(responder, text, short_id_lookup, metadata_lookup_tables):
+    """The non-streamed path: extract, number by position, replace markers."""
+    citations = responder.extract_citations_with_positions(text, short_id_lookup, metadata_lookup_tables)
+    citations.sort(key=lambda c: c.get('position', 0))
+    for seq, citation in enumerate(citations, start=1):
+        citation['citation_number'] = seq
+    return responder.replace_ids_with_citation_numbers(text, citations), citations
+
+
+@pytest.fixture(scope='module')
+def block_lookups(responder):
+    chunks = [
+        {
+            'chunk_id': 'chunk-1',
+            'chunk_text': 'Valuation summary',
+            'document_id': 'doc-1',
+            'document_filename': 'valuation.pdf',
+            'page_number': 2,
+            'bbox': {'left': 0.0, 'top': 0.0, 'width': 1.0, 'height': 1.0, 'page': 2},
+            'blocks': [
+                {'content': 'The Market Value is £2,300,000 as at 1 March 2024.', 'type': 'text',
+                 'bbox': {'left': 0.1, 'top': 0.1, 'width': 0.5, 'height': 0.05, 'page': 3}},
+                {'content': 'The property has a large rear garden.', 'type': 'text',
+                 'bbox': {'left': 0.1, 'top': 0.3, 'width': 0.5, 'height': 0.05, 'page': 3}},
+            ],
+        },
+        {
+            'chunk_id': 'chunk-2',
+            'chunk_text': 'The lease expires in 2030.',
+            'document_id': 'doc-2',
+            'document_filename': 'lease.pdf',
+            'page_number': 5,
+            'bbox': {'left': 0.2, 'top': 0.4, 'width': 0.6, 'height': 0.1, 'page': 5},
+        },
+    ]
+    _, short_id_lookup, metadata_lookup_tables = responder.format_chunks_with_block_ids(chunks)
+    return short_id_lookup, metadata_lookup_tables
+
+
+MAPPER_TEXT = (
+    "The value is £2,300,000 [ID: 1](BLOCK_CITE_ID_1). It has a garden [ID: 1] BLOCK_CITE_ID_2 and "
+    "[a link](x) next to [ID: 9] an unknown source. The lease runs to 2030 [ID: 2](BLOCK_CITE_ID_3). "
+    "Again the value [ID: 1] is stated. [ID: 1](BLOCK_CITE_ID_99) and a trailing [ID:"
+)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_streaming_mapper_matches_batch_extraction(responder, block_lookups, seed):
+    import random
+
+    expected_text, expected_citations = _batch_citations(responder, MAPPER_TEXT, *block_lookups)
+    mapper = responder._StreamingCitationMapper(*block_lookups)
+    rng = random.Random(seed)
+    out, streamed_citations, i = [], [], 0
+    while i < len(MAPPER_TEXT):
+        size = rng.randint(1, 9)
+        text, citations = mapper.feed(MAPPER_TEXT[i:i + size])
+        out.append(text)
+        streamed_citations += citations
+        i += size
+    text, citations = mapper.feed('', final=True)
+    out.append(text)
+    streamed_citations += citations
+
+    assert ''.join(out) == expected_text
+    key = ('citation_number', 'block_id', 'page_number', 'bbox', 'cited_text', 'position', 'end_position')
+    assert [tuple(c.get(k) for k in key) for c in streamed_citations] == \
+        [tuple(c.get(k) for k in key) for c in expected_citations]
+    assert mapper.citations == streamed_citations
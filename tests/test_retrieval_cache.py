@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def rc(load_backend_module):
+    return load_backend_module('backend.llm.utils.retrieval_cache')
+
+
+def _state(**overrides):
+    state = {'user_query': 'What is the market value?', 'business_id': 'b1', 'property_id': None, 'document_ids': []}
+    state.update(overrides)
+    return state
+
+
+def _results():
+    return [{'action': 'retrieve_chunks', 'success': True, 'result': [{'chunk_id': 'c1'}]}]
+
+
+def _cache(rc, embedding=(1.0, 0.0), document_ids=('d1', 'd2')):
+    return rc.build_retrieval_cache(_state(), _results(), list(document_ids), query_embedding=list(embedding))
+
+
+def _embedding_at(similarity):
+    # Unit vector whose cosine with (1, 0) is `similarity`
+    return [similarity, (1.0 - similarity ** 2) ** 0.5]
+
+
+def test_identical_query_is_reused_without_embeddings(rc):
+    decision = rc.classify_reuse(_cache(rc), '  what is the MARKET value? ', None)
+    assert decision['mode'] == rc.REUSE
+    assert decision['similarity'] == 1.0
+
+
+def test_similar_query_is_reused(rc):
+    decision = rc.classify_reuse(_cache(rc), 'And the value?', _embedding_at(rc.REUSE_SIMILARITY + 0.01))
+    assert decision['mode'] == rc.REUSE
+
+
+def test_related_query_gets_delta_retrieval(rc):
+    similarity = (rc.REUSE_SIMILARITY + rc.DELTA_SIMILARITY) / 2
+    decision = rc.classify_reuse(_cache(rc), 'And the rent?', _embedding_at(similarity))
+    assert decision['mode'] == rc.DELTA
+    assert decision['similarity'] == pytest.approx(similarity)
+
+
+def test_delta_needs_cached_documents(rc):
+    similarity = (rc.REUSE_SIMILARITY + rc.DELTA_SIMILARITY) / 2
+    decision = rc.classify_reuse(_cache(rc, document_ids=()), 'And the rent?', _embedding_at(similarity))
+    assert decision['mode'] == rc.MISS
+
+
+def test_unrelated_query_misses(rc):
+    decision = rc.classify_reuse(_cache(rc), 'Who is the tenant?', _embedding_at(rc.DELTA_SIMILARITY - 0.05))
+    assert decision['mode'] == rc.MISS
+
+
+def test_missing_embedding_misses(rc):
+    assert rc.classify_reuse(_cache(rc), 'Who is the tenant?', None)['mode'] == rc.MISS
+
+
+def test_precheck_rejects_scope_change_and_expiry(rc):
+    cache = _cache(rc)
+    assert rc.precheck_reuse(cache, _state()) is None
+    assert rc.precheck_reuse(cache, _state(document_ids=['d9'])) == 'scope changed'
+    assert rc.precheck_reuse(cache, _state(property_id='p1')) == 'scope changed'
+    cache['created_at'] = time.time() - rc.REUSE_TTL_SECONDS - 1
+    assert rc.precheck_reuse(cache, _state()) == 'cached retrieval expired'
+    assert rc.precheck_reuse(None, _state()) == 'no cached retrieval'
+
+
+def test_nothing_cached_without_chunks(rc):
+    failed = [{'action': 'retrieve_chunks', 'success': False, 'result': None}]
+    assert rc.build_retrieval_cache(_state(), failed, ['d1']) is None
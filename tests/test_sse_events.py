@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def sse(load_backend_module):
+    return load_backend_module('backend.services.sse_events')
+
+
+def _tokens(frames):
+    return ''.join(json.loads(frame[len('data: '):])['token'] for frame in frames)
+
+
+def test_coalescer_batches_deltas_until_byte_limit(sse):
+    coalescer = sse.TokenCoalescer(window_ms=60_000, max_bytes=16)
+    frames = [coalescer.add(text) for text in ('The ', 'value ', 'is ', '£2.3m', ' today.')]
+    sent = [frame for frame in frames if frame]
+    # Nothing goes out until 16 bytes are buffered; the rest waits for flush()
+    assert len(sent) == 1 and frames[:3] == [None, None, None]
+    sent.append(coalescer.flush())
+    assert _tokens(sent) == 'The value is £2.3m today.'
+    assert coalescer.flush() is None
+
+
+def test_coalescer_flushes_once_window_has_passed(sse):
+    coalescer = sse.TokenCoalescer(window_ms=0, max_bytes=1024)
+    frame = coalescer.add('Hello')
+    assert frame is not None and _tokens([frame]) == 'Hello'
+    assert coalescer.due() is None
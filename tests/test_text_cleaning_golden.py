@@ -0,0 +1,119 @@
+"""
+Golden check for the compiled text cleaning engine.
+
+TextCleaningService.clean_chunk_text and clean_chunk_texts (in-process and with the process
+pool) must produce exactly the same output as the step-by-step reference pipeline
+(clean_chunk_text_reference) on built-in edge cases and a seeded fuzz corpus.
+TEXT_CLEANING_GOLDEN=<path> also verifies a recorded JSONL golden file of
+{"input", "boilerplate_lines", "expected"} entries (e.g. real document_vectors chunks).
+"""
+
+import json
+import multiprocessing
+import os
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+BOILERPLATE = [{'line': 'Subject to contract'}, {'line': '  Strictly private and confidential  '}, {'line': ''}]
+
+EDGE_CASES = [
+    '', ' ', '\n\n\n', '## Heading\nBody text.', '###NoSpace', '- bullet\n* star\n+ plus\n1. numbered',
+    '**bold** and __bold__ and *italic* and _italic_ and ***mixed***', '---\n***\n===\n{3,}',
+    '[link](http://x) and ![img](http://y) and ![](http://z)', '`code` and ```fenced\nblock``` and ``` open',
+    '> quote\n>> nested', '~~struck~~', '<table><tr><td>A</td><td>B</td></tr></table>',
+    '&nbsp;&amp;&lt;&gt;&quot;&#160;&#xA0;&copy;', '&amp;lt;b&amp;gt;tag&amp;lt;/b&amp;gt;', '&lt;b&gt;decoded tag&lt;/b&gt;',
+    "Here's the information extracted from the image: a map\nKept line", 'Text extracted from image analysis here',
+    'IMAGE CONTENT shouting', 'Key entities identified: none', 'ocr detected noise', 'Subject to contract',
+    'Subject to contract\nReal content', '‘smart’ “quotes” – en — em nbsp',
+    'é combining, ﬁ ligature, Å angstrom, 　 ideographic space', 'Line one.\nLine two,\nline three',
+    'orphan\n.punctuation\n ;here', 'tabs\tand\x0bvertical\x0cfeeds\r\nand\x1cseparators\x85next',
+]
+
+_FUZZ_PIECES = list("abcXYZ  \n\t.,;:!?#*-+_=~`>[]()<>&0123") + [
+    '&nbsp;', '&amp;', '&lt;', '&gt;', '&quot;', '&#160;', '&#xA0;', '<td>', '</tr>', '**', '__', '```', '~~',
+    '‘', '’', '“', '—', '–', ' ', 'é', '́', '　', 'İ', 'ſ',
+    'Image analysis', 'Text extracted from image', 'image content', 'OCR detected', 'Key entities identified',
+    'Subject to contract', '1. ', '- ', '> ', '## ', '---', '[a](b)', '![x](y)',
+]
+
+FUZZ_CASES = 20000
+FUZZ_SEED = 1
+
+
+def _fuzz_corpus(count: int, seed: int) -> List[Tuple[str, Optional[List[Dict[str, Any]]]]]:
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        text = ''.join(rng.choice(_FUZZ_PIECES) for _ in range(rng.randint(0, 60)))
+        cases.append((text, BOILERPLATE if rng.random() < 0.5 else None))
+    return cases
+
+
+CASES = (
+    [(text, None) for text in EDGE_CASES]
+    + [(text, BOILERPLATE) for text in EDGE_CASES]
+    + _fuzz_corpus(FUZZ_CASES, FUZZ_SEED)
+)
+
+
+@pytest.fixture(scope='module')
+def cleaning(load_backend_module):
+    return load_backend_module('backend.services.text_cleaning_service')
+
+
+@pytest.fixture(scope='module')
+def service(cleaning):
+    return cleaning.TextCleaningService()
+
+
+@pytest.fixture(scope='module')
+def expected(service):
+    return [service.clean_chunk_text_reference(text, lines) for text, lines in CASES]
+
+
+def _batch_mismatches(service, expected):
+    mismatches = []
+    # Grouped by boilerplate list, as store_document_vectors calls it per document
+    for lines in (None, BOILERPLATE):
+        group = [(i, text) for i, (text, case_lines) in enumerate(CASES) if case_lines is lines]
+        cleaned = service.clean_chunk_texts([text for _, text in group], boilerplate_lines=lines)
+        mismatches += [text for (i, text), got in zip(group, cleaned) if got != expected[i]]
+    return mismatches
+
+
+def test_clean_chunk_text_matches_reference(service, expected):
+    mismatches = [
+        text for (text, lines), want in zip(CASES, expected)
+        if service.clean_chunk_text(text, lines) != want
+    ]
+    assert mismatches == []
+
+
+def test_clean_chunk_texts_matches_reference(service, expected):
+    assert _batch_mismatches(service, expected) == []
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='pool workers need the loaded module')
+def test_clean_chunk_texts_with_process_pool_matches_reference(cleaning, service, expected, monkeypatch):
+    monkeypatch.setattr(cleaning, 'TEXT_CLEANING_PROCESSES', 2)
+    monkeypatch.setattr(cleaning, 'TEXT_CLEANING_POOL_MIN_CHUNKS', 1)
+    try:
+        assert _batch_mismatches(service, expected) == []
+        assert cleaning._process_pool is not None
+    finally:
+        if cleaning._process_pool is not None:
+            cleaning._process_pool.shutdown()
+            cleaning._process_pool = None
+
+
+@pytest.mark.skipif(not os.environ.get('TEXT_CLEANING_GOLDEN'), reason='TEXT_CLEANING_GOLDEN not set')
+def test_recorded_golden_file(service):
+    with open(os.environ['TEXT_CLEANING_GOLDEN']) as f:
+        golden = [json.loads(line) for line in f if line.strip()]
+    mismatches = [
+        entry['input'] for entry in golden
+        if service.clean_chunk_text(entry['input'], entry.get('boilerplate_lines')) != entry['expected']
+    ]
+    assert mismatches == []